@@ -0,0 +1,284 @@
+"""
+Admission control and load shedding for the HTTP API.
+
+Every request (except exempt paths such as ``/health``) passes two gates:
+
+1. A token bucket per client — the ``X-API-Key`` header if present, else the
+   client address. A client over its rate gets ``429`` with ``Retry-After``.
+2. A concurrency limit with a bounded FIFO wait queue. When the queue is
+   full, or a request has waited longer than the maximum queue time, it is
+   shed with ``503`` and ``Retry-After`` instead of adding to the backlog.
+
+Shedding early keeps memory and latency bounded for the requests that are
+admitted while everyone piles onto the server during an incident.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.llm.resilience import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        Take one token.
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            0 if a token was taken, else seconds until one is available
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+class Rejected(Exception):
+    """A request that was not admitted."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Per-client rate limits plus a bounded concurrency queue."""
+
+    def __init__(
+        self,
+        rate_per_second: float = 10.0,
+        burst: int = 20,
+        max_concurrency: int = 64,
+        max_queue: int = 128,
+        max_queue_seconds: float = 5.0,
+        max_clients: int = 10000,
+    ) -> None:
+        """
+        Initialize the controller.
+
+        Args:
+            rate_per_second: Sustained requests per second per client (0
+                disables rate limiting)
+            burst: Requests a client may make at once before being limited
+            max_concurrency: Requests processed at the same time
+            max_queue: Requests waiting for a slot before new ones are shed
+            max_queue_seconds: Longest a request may wait for a slot
+            max_clients: Client buckets kept (least recently seen are dropped)
+        """
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_seconds = max_queue_seconds
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._in_flight = 0
+        self._queue_wait = LatencyTracker(window=1000, min_samples=1)
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rate_limited": 0,
+            "shed_queue_full": 0,
+            "shed_queue_timeout": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        """Create a controller configured from application settings."""
+        settings = get_settings()
+        return cls(
+            rate_per_second=settings.ADMISSION_RATE_PER_SECOND,
+            burst=settings.ADMISSION_BURST,
+            max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            max_queue_seconds=settings.ADMISSION_MAX_QUEUE_SECONDS,
+        )
+
+    def check_rate(self, client: str) -> None:
+        """
+        Apply the client's token bucket.
+
+        Raises:
+            Rejected: 429 if the client is over its rate
+        """
+        if self.rate_per_second <= 0:
+            return
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_second, self.burst, now)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        wait = bucket.take(now)
+        if wait > 0:
+            self._stats["rate_limited"] += 1
+            raise Rejected(429, "Rate limit exceeded", wait)
+
+    async def acquire(self) -> None:
+        """
+        Take a processing slot, waiting in FIFO order if none is free.
+
+        Raises:
+            Rejected: 503 if the queue is full or the wait is too long
+        """
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            self._stats["admitted"] += 1
+            self._queue_wait.record(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._stats["shed_queue_full"] += 1
+            raise Rejected(503, "Server is overloaded", self.max_queue_seconds)
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._stats["queued"] += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_queue_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                # The slot was handed over just as the wait ended
+                self.release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._stats["shed_queue_timeout"] += 1
+            raise Rejected(503, "Server is overloaded", self.max_queue_seconds) from e
+        self._stats["admitted"] += 1
+        self._queue_wait.record(time.monotonic() - started)
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the next waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get admission counters, queue state and queue wait times."""
+        p50 = self._queue_wait.quantile(0.5)
+        p95 = self._queue_wait.quantile(0.95)
+        p99 = self._queue_wait.quantile(0.99)
+        return {
+            **self._stats,
+            "shed": self._stats["shed_queue_full"] + self._stats["shed_queue_timeout"],
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "clients": len(self._buckets),
+            "queue_wait_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "queue_wait_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "queue_wait_p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        }
+
+
+def client_key(scope: Scope) -> str:
+    """Rate-limit key of a request: its API key, else its client address."""
+    for name, value in scope.get("headers", ()):
+        if name == b"x-api-key" and value:
+            # Only a digest of the key is kept in memory
+            return "key:" + hashlib.sha256(value).hexdigest()[:16]
+    client = scope.get("client")
+    return f"addr:{client[0]}" if client else "addr:unknown"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an ``AdmissionController`` to HTTP requests."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: Optional[AdmissionController] = None,
+        exempt_paths: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            controller: Admission controller (defaults to the shared one)
+            exempt_paths: Paths never rate limited or queued (defaults to
+                ``ADMISSION_EXEMPT_PATHS``)
+        """
+        self.app = app
+        self._controller = controller
+        if exempt_paths is None:
+            exempt_paths = get_settings().ADMISSION_EXEMPT_PATHS
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        controller = self._controller or get_admission_controller()
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            controller.check_rate(client_key(scope))
+            await controller.acquire()
+        except Rejected as e:
+            response = JSONResponse(
+                {"detail": e.detail},
+                status_code=e.status_code,
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+
+# Singleton instance
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Get or create the shared admission controller, or None if disabled."""
+    global _admission_controller
+    if not get_settings().ADMISSION_ENABLED:
+        return None
+    if _admission_controller is None:
+        _admission_controller = AdmissionController.from_settings()
+    return _admission_controller
+
+
+def get_admission_stats() -> Optional[Dict[str, Any]]:
+    """Get admission statistics without creating the controller."""
+    if _admission_controller is None:
+        return None
+    return _admission_controller.stats()
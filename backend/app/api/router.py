@@ -4,6 +4,25 @@ Main API router for BoaServer.
 
 from fastapi import APIRouter
 
+from app.api.admission import get_admission_stats
+from app.api.routes.admin import router as admin_router
+from app.api.routes.analysis import router as analysis_router
+from app.api.routes.stream import router as stream_router
+from app.api.routes.webhooks import router as webhooks_router
+from app.core.analysis import get_analysis_stats
+from app.core.cache import get_shared_cache_stats
+from app.core.context import get_context_stats
+from app.core.ingest import get_ingest_stats
+from app.core.profiler import get_profiler_stats
+from app.knowledge.fingerprint import get_fingerprint_stats
+from app.knowledge.incidents import get_knowledge_stats
+from app.llm.cache import get_completion_cache
+from app.llm.executor import get_llm_pool
+from app.llm.routing import get_model_router_stats
+from app.llm.similarity_cache import get_similarity_cache_stats
+from app.mcp.client import get_mcp_stats
+from app.mcp.local_search import get_local_search_stats
+
 router = APIRouter()
 
 @router.get("/info")
@@ -15,6 +34,30 @@ async def get_info() -> dict:
         "description": "AI-Powered Oncall Support Assistant"
     }
 
+
+@router.get("/stats")
+async def get_stats() -> dict:
+    """Get runtime statistics for capacity tuning."""
+    completion_cache = get_completion_cache()
+    return {
+        "admission": get_admission_stats(),
+        "analysis": get_analysis_stats(),
+        "context": get_context_stats(),
+        "llm_pool": get_llm_pool().stats(),
+        "routing": get_model_router_stats(),
+        "completion_cache": completion_cache.stats() if completion_cache else None,
+        "shared_cache": get_shared_cache_stats(),
+        "similarity_cache": get_similarity_cache_stats(),
+        "mcp": get_mcp_stats(),
+        "local_search": get_local_search_stats(),
+        "knowledge": get_knowledge_stats(),
+        "fingerprints": get_fingerprint_stats(),
+        "profiler": get_profiler_stats(),
+        "ingest": get_ingest_stats(),
+    }
+
 # Import and include additional routers here as they are created
-# from app.api.routes.chat import router as chat_router
-# router.include_router(chat_router, prefix="/chat", tags=["chat"])
+router.include_router(analysis_router, prefix="/analysis", tags=["analysis"])
+router.include_router(stream_router, prefix="/stream", tags=["stream"])
+router.include_router(admin_router, prefix="/admin", tags=["admin"])
+router.include_router(webhooks_router, prefix="/webhooks", tags=["webhooks"])
@@ -0,0 +1,3 @@
+"""
+API route modules for BoaServer.
+"""
@@ -0,0 +1,37 @@
+"""
+Operator endpoints for diagnosing latency.
+"""
+
+import hmac
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from app.core.config import get_settings
+from app.core.profiler import get_profiler
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Check the admin token; without one configured, access is denied."""
+    token = get_settings().ADMIN_TOKEN
+    if not token:
+        raise HTTPException(status_code=403, detail="ADMIN_TOKEN is not configured")
+    if not hmac.compare_digest((x_admin_token or "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/slow-requests")
+async def slow_requests(limit: int = Query(20, ge=1, le=500)) -> Dict[str, Any]:
+    """Most recent slow-request captures and event-loop stalls, newest first."""
+    profiler = get_profiler()
+    if profiler is None:
+        return {"enabled": False, "captures": [], "stalls": [], "stats": None}
+    return {
+        "enabled": True,
+        "captures": list(reversed(profiler.captures))[:limit],
+        "stalls": list(reversed(profiler.stalls))[:limit],
+        "stats": profiler.stats(),
+    }
@@ -0,0 +1,52 @@
+"""
+Ticket analysis routes.
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.core.analysis import analyze_ticket, record_resolution
+from app.core.ingest import get_ingest_pipeline
+
+router = APIRouter()
+
+
+class TicketRequest(BaseModel):
+    """A ticket submitted for analysis."""
+
+    ticket_id: str
+    title: str
+    description: str = ""
+
+
+@router.post("/ticket")
+async def analyze_ticket_endpoint(ticket: TicketRequest) -> Dict[str, Any]:
+    """Analyze an operational ticket."""
+    # Tickets received through the webhook may already have been analyzed
+    pipeline = get_ingest_pipeline()
+    if pipeline is not None:
+        precomputed = pipeline.lookup(
+            ticket.ticket_id, ticket.title, ticket.description
+        )
+        if precomputed is not None:
+            return precomputed
+    return await analyze_ticket(ticket.ticket_id, ticket.title, ticket.description)
+
+
+class ResolutionRequest(BaseModel):
+    """How an analyzed ticket's incident was resolved."""
+
+    resolution: str
+
+
+@router.post("/ticket/{ticket_id}/resolution")
+async def record_resolution_endpoint(
+    ticket_id: str, request: ResolutionRequest
+) -> Dict[str, Any]:
+    """Attach a resolution to the known incident first seen in a ticket."""
+    known = record_resolution(ticket_id, request.resolution)
+    if known is None:
+        raise HTTPException(status_code=404, detail="No known incident for ticket")
+    return known
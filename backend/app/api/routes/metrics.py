@@ -0,0 +1,133 @@
+"""
+Prometheus metrics endpoint.
+
+Stage histograms and error counters come from ``app.core.metrics``; the
+counters and gauges that components already keep (cache hits, pool
+occupancy, load shedding) are read from their ``stats()`` at scrape time.
+"""
+
+from typing import Iterator
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from app.api.admission import get_admission_stats
+from app.core.config import get_settings
+from app.core.metrics import CONTENT_TYPE, REGISTRY, Sample
+from app.knowledge.fingerprint import get_fingerprint_stats
+from app.llm.cache import get_completion_cache
+from app.llm.executor import get_llm_pool
+from app.llm.similarity_cache import get_similarity_cache_stats
+from app.mcp.client import get_mcp_stats
+
+router = APIRouter()
+
+
+def _cache_samples(name: str, hits: int, misses: int) -> Iterator[Sample]:
+    help = "Cache lookups by cache and result"
+    yield Sample(
+        "boa_cache_requests_total",
+        "counter",
+        help,
+        {"cache": name, "result": "hit"},
+        hits,
+    )
+    yield Sample(
+        "boa_cache_requests_total",
+        "counter",
+        help,
+        {"cache": name, "result": "miss"},
+        misses,
+    )
+
+
+def collect_component_stats() -> Iterator[Sample]:
+    """Samples read from the components' own statistics."""
+    pool = get_llm_pool().stats()
+    yield Sample(
+        "boa_llm_in_flight", "gauge", "LLM calls executing", {}, pool["in_flight"]
+    )
+    yield Sample(
+        "boa_llm_queue_depth",
+        "gauge",
+        "LLM calls waiting for a slot",
+        {},
+        pool["queue_depth"],
+    )
+    for result in ("completed", "failed", "rejected"):
+        yield Sample(
+            "boa_llm_calls_total",
+            "counter",
+            "LLM calls by outcome",
+            {"result": result},
+            pool[result],
+        )
+
+    completion_cache = get_completion_cache()
+    if completion_cache is not None:
+        stats = completion_cache.stats()
+        yield from _cache_samples("completion", stats["hits"], stats["misses"])
+    similarity = get_similarity_cache_stats()
+    if similarity is not None:
+        yield from _cache_samples(
+            "similarity", similarity["hits"], similarity["lookups"] - similarity["hits"]
+        )
+    fingerprint = get_fingerprint_stats()
+    if fingerprint is not None:
+        yield from _cache_samples(
+            "fingerprint", fingerprint["hits"], fingerprint["misses"]
+        )
+
+    mcp = get_mcp_stats()
+    if mcp is not None:
+        yield Sample(
+            "boa_mcp_in_flight", "gauge", "MCP requests executing", {}, mcp["in_flight"]
+        )
+        yield Sample(
+            "boa_mcp_requests_total",
+            "counter",
+            "MCP requests sent",
+            {},
+            mcp["requests"],
+        )
+        files = mcp["file_cache"]
+        if files is not None:
+            yield from _cache_samples(
+                "mcp_file", files["hits"] + files["revalidated"], files["misses"]
+            )
+
+    admission = get_admission_stats()
+    if admission is not None:
+        yield Sample(
+            "boa_http_in_flight",
+            "gauge",
+            "HTTP requests admitted and running",
+            {},
+            admission["in_flight"],
+        )
+        yield Sample(
+            "boa_http_queue_depth",
+            "gauge",
+            "HTTP requests waiting for admission",
+            {},
+            admission["queue_depth"],
+        )
+        for reason in ("rate_limited", "shed_queue_full", "shed_queue_timeout"):
+            yield Sample(
+                "boa_http_rejected_total",
+                "counter",
+                "HTTP requests rejected by admission control",
+                {"reason": reason},
+                admission[reason],
+            )
+
+
+REGISTRY.add_collector(collect_component_stats)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Expose metrics in the Prometheus text format."""
+    if not get_settings().METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,110 @@
+"""
+Streaming LLM response routes (Server-Sent Events and WebSocket).
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from app.llm import gemini
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class StreamRequest(BaseModel):
+    """Request body for a streamed completion."""
+
+    prompt: str
+    context: Optional[Dict[str, Any]] = None
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _sse_stream(request: StreamRequest) -> AsyncIterator[str]:
+    """Translate streamed chunks into SSE events."""
+    client = gemini.get_gemini_client()
+    try:
+        async for text in client.stream_response(request.prompt, request.context):
+            yield _sse_event("token", {"text": text})
+    except Exception as e:
+        yield _sse_event("error", {"message": str(e)})
+        return
+    yield _sse_event("done", {})
+
+
+@router.post("/sse")
+async def stream_sse(request: StreamRequest) -> StreamingResponse:
+    """
+    Stream a completion as Server-Sent Events.
+
+    Emits ``token`` events as text arrives, then ``done`` (or ``error``).
+    If the client disconnects the response task is cancelled, which closes
+    the upstream generation.
+    """
+    return StreamingResponse(
+        _sse_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _send_stream(websocket: WebSocket, request: StreamRequest) -> None:
+    """Send streamed chunks over the WebSocket."""
+    client = gemini.get_gemini_client()
+    try:
+        async for text in client.stream_response(request.prompt, request.context):
+            await websocket.send_json({"type": "token", "text": text})
+    except Exception as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        return
+    await websocket.send_json({"type": "done"})
+
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket) -> None:
+    """
+    Stream completions over a WebSocket.
+
+    Each JSON message ``{"prompt": ..., "context": ...}`` starts a new
+    completion whose chunks are sent back as ``token`` messages followed by
+    ``done``. Any message received while a completion is streaming, or a
+    disconnect, cancels it.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            payload = await websocket.receive_json()
+            try:
+                request = StreamRequest(**payload)
+            except (TypeError, ValidationError) as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+                continue
+
+            sender = asyncio.ensure_future(_send_stream(websocket, request))
+            receiver = asyncio.ensure_future(websocket.receive())
+            done, _ = await asyncio.wait(
+                {sender, receiver}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if receiver in done:
+                sender.cancel()
+                await asyncio.gather(sender, return_exceptions=True)
+                message = receiver.result()
+                if message["type"] == "websocket.disconnect":
+                    logger.info("WebSocket client disconnected; stream cancelled")
+                    return
+                await websocket.send_json({"type": "cancelled"})
+            else:
+                receiver.cancel()
+                sender.result()
+    except WebSocketDisconnect:
+        logger.info("WebSocket client disconnected")
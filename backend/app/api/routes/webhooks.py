@@ -0,0 +1,44 @@
+"""
+Webhooks called by the ticketing system.
+"""
+
+import hmac
+import math
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.api.routes.analysis import TicketRequest
+from app.core.config import get_settings
+from app.core.ingest import QueueFull, get_ingest_pipeline
+
+
+def require_webhook_token(x_webhook_token: Optional[str] = Header(None)) -> None:
+    """Check the webhook token; without one configured, webhooks are refused."""
+    token = get_settings().WEBHOOK_TOKEN
+    if not token:
+        raise HTTPException(status_code=403, detail="WEBHOOK_TOKEN is not configured")
+    if not hmac.compare_digest((x_webhook_token or "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid webhook token")
+
+
+router = APIRouter(dependencies=[Depends(require_webhook_token)])
+
+
+@router.post("/tickets", status_code=202)
+async def ticket_webhook(ticket: TicketRequest) -> Dict[str, Any]:
+    """Queue a ticket update for parsing and a pre-computed analysis."""
+    pipeline = get_ingest_pipeline()
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail="Ticket ingestion is disabled")
+    try:
+        status = await pipeline.submit(
+            ticket.ticket_id, ticket.title, ticket.description
+        )
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(pipeline.retry_after()))},
+        ) from e
+    return {"ticket_id": ticket.ticket_id, "status": status}
@@ -0,0 +1,303 @@
+"""
+Ticket analysis pipeline: ticket parsing, prompt construction and LLM call.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import get_settings
+from app.core.context import AssembledContext, assemble_context
+from app.knowledge.fingerprint import (
+    KnownIncident,
+    fingerprint_ticket,
+    get_fingerprint_index,
+)
+from app.knowledge.incidents import (
+    find_similar_incidents,
+    format_similar_incidents,
+    record_incident,
+)
+from app.llm.context_packer import estimate_tokens, prompt_token_budget
+from app.llm.gemini import is_error_response
+from app.llm.prompts import get_ticket_analysis_prompt
+from app.llm.routing import get_model_router
+from app.llm.similarity_cache import get_similarity_cache
+from app.utils.singleflight import SingleFlight
+from app.utils.ticket_parser import parse_ticket
+
+logger = logging.getLogger(__name__)
+
+# Coalesces identical analyses that are requested concurrently
+_analysis_flight = SingleFlight()
+# Background refreshes of known incidents, by fingerprint
+_refreshing: "Dict[str, asyncio.Task[None]]" = {}
+
+
+def analysis_key(ticket_id: str, ticket_title: str, ticket_description: str) -> str:
+    """
+    Build the coalescing key for a ticket analysis.
+
+    Args:
+        ticket_id: Ticket identifier
+        ticket_title: Ticket title or summary
+        ticket_description: Detailed ticket description
+
+    Returns:
+        Key combining the ticket ID with a hash of its content
+    """
+    content = f"{ticket_title}\n{ticket_description}".encode("utf-8")
+    return f"{ticket_id}:{hashlib.sha256(content).hexdigest()}"
+
+
+def _format_entities(parsed: Dict[str, Any]) -> str:
+    """Render parsed ticket information as prompt context."""
+    lines = [f"Ticket category: {parsed.get('category', 'unknown')}"]
+    for name, values in parsed.get("entities", {}).items():
+        if values:
+            lines.append(f"{name.replace('_', ' ').capitalize()}: {', '.join(values)}")
+    if parsed.get("stacktrace"):
+        lines.append(f"Stacktrace:\n{parsed['stacktrace']}")
+    return "\n".join(lines)
+
+
+async def _no_context() -> AssembledContext:
+    """Empty code context, used when context assembly is disabled."""
+    return AssembledContext()
+
+
+async def _analyze_parsed(
+    ticket_id: str,
+    ticket_title: str,
+    ticket_description: str,
+    parsed: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Assemble context for a parsed ticket and ask the LLM for an analysis."""
+    settings = get_settings()
+    # Code lookups and the similar-incident search are independent
+    assembled, similar = await asyncio.gather(
+        assemble_context(parsed) if settings.CONTEXT_ENABLED else _no_context(),
+        find_similar_incidents(ticket_id, ticket_title, ticket_description, parsed),
+    )
+    sections = [_format_entities(parsed), format_similar_incidents(similar)]
+    head = "\n\n".join(section for section in sections if section)
+    # Code fills the space the ticket itself leaves, keeping at least a
+    # quarter of the budget when the ticket is very long
+    budget = prompt_token_budget()
+    base = get_ticket_analysis_prompt(
+        ticket_id, ticket_title, ticket_description, head, token_budget=budget
+    )
+    code = assembled.pack(
+        parsed,
+        max(budget - estimate_tokens(base), budget // 4),
+        max_items=settings.CONTEXT_MAX_ITEMS,
+    )
+    context = "\n\n".join(
+        section for section in (head, code.render("Relevant code:")) if section
+    )
+    prompt = get_ticket_analysis_prompt(
+        ticket_id=ticket_id,
+        ticket_title=ticket_title,
+        ticket_description=ticket_description,
+        context=context,
+        token_budget=budget,
+    )
+    analysis, routing = await get_model_router().generate(prompt, parsed)
+    if settings.KNOWLEDGE_RECORD_ANALYSES and not is_error_response(analysis):
+        await record_incident(
+            ticket_id, ticket_title, ticket_description, parsed, analysis
+        )
+    return {
+        "ticket_id": ticket_id,
+        "category": parsed.get("category", "unknown"),
+        "entities": parsed.get("entities", {}),
+        "has_stacktrace": parsed.get("has_stacktrace", False),
+        "context_sources": [snippet.source for snippet in code.snippets],
+        "context_lookups": assembled.stats(),
+        "similar_incidents": [
+            {"ticket_id": r["metadata"].get("ticket_id", r["ref"]), "score": r["score"]}
+            for r in similar
+        ],
+        "analysis": analysis,
+        "routing": routing.to_dict(),
+    }
+
+
+async def _refresh_known_incident(
+    ticket_id: str,
+    ticket_title: str,
+    ticket_description: str,
+    parsed: Dict[str, Any],
+    fingerprint: str,
+) -> None:
+    """Re-run the analysis for a known incident and store the new answer."""
+    try:
+        result = await _analyze_parsed(
+            ticket_id, ticket_title, ticket_description, parsed
+        )
+        index = get_fingerprint_index()
+        if index is not None and not is_error_response(result["analysis"]):
+            index.store(fingerprint, ticket_id, result["analysis"])
+    except Exception as e:
+        logger.error(f"Error refreshing known incident {fingerprint}: {str(e)}")
+    finally:
+        _refreshing.pop(fingerprint, None)
+
+
+def _schedule_refresh(
+    ticket_id: str,
+    ticket_title: str,
+    ticket_description: str,
+    parsed: Dict[str, Any],
+    known: KnownIncident,
+) -> None:
+    """Refresh a stale known incident in the background, once at a time."""
+    settings = get_settings()
+    if known.fingerprint in _refreshing:
+        return
+    if time.time() - known.updated_at < settings.FINGERPRINT_REFRESH_AFTER_SECONDS:
+        return
+    _refreshing[known.fingerprint] = asyncio.ensure_future(
+        _refresh_known_incident(
+            ticket_id, ticket_title, ticket_description, parsed, known.fingerprint
+        )
+    )
+
+
+def _reused_result(
+    ticket_id: str, parsed: Dict[str, Any], analysis: str, **provenance: Any
+) -> Dict[str, Any]:
+    """Result for a ticket answered with a previously generated analysis."""
+    return {
+        "ticket_id": ticket_id,
+        "category": parsed.get("category", "unknown"),
+        "entities": parsed.get("entities", {}),
+        "has_stacktrace": parsed.get("has_stacktrace", False),
+        "context_sources": [],
+        "context_lookups": None,
+        "similar_incidents": [],
+        "analysis": analysis,
+        "fingerprint": None,
+        "known_incident": None,
+        "near_duplicate": None,
+        "routing": None,
+        **provenance,
+    }
+
+
+def _similarity_scope() -> str:
+    """Near-duplicate cache namespace for ticket analyses."""
+    settings = get_settings()
+    return f"ticket_analysis:{settings.LLM_MODEL}:{settings.LLM_TEMPERATURE!r}"
+
+
+async def _run_analysis(
+    ticket_id: str,
+    ticket_title: str,
+    ticket_description: str,
+    parsed: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Run the full analysis for one ticket."""
+    settings = get_settings()
+    if parsed is None:
+        parsed = parse_ticket(ticket_id, ticket_title, ticket_description)
+    index = get_fingerprint_index()
+    fingerprint = fingerprint_ticket(parsed, settings.FINGERPRINT_MAX_FRAMES)
+    if index is not None and fingerprint is not None:
+        known = index.lookup(fingerprint)
+        if known is not None:
+            # A repeat of a known incident: answer without calling the LLM
+            if settings.FINGERPRINT_REFRESH_ON_HIT:
+                _schedule_refresh(
+                    ticket_id, ticket_title, ticket_description, parsed, known
+                )
+            return _reused_result(
+                ticket_id,
+                parsed,
+                known.analysis,
+                fingerprint=fingerprint,
+                known_incident=known.to_dict(),
+            )
+
+    # The same incident re-filed with different ids or timestamps
+    similarity_cache = get_similarity_cache()
+    ticket_text = f"{ticket_title}\n{ticket_description}"
+    if similarity_cache is not None:
+        duplicate = similarity_cache.lookup(_similarity_scope(), ticket_id, ticket_text)
+        if duplicate is not None:
+            return _reused_result(
+                ticket_id,
+                parsed,
+                duplicate.completion,
+                fingerprint=fingerprint,
+                near_duplicate={
+                    "ticket_id": duplicate.ticket_id,
+                    "similarity": duplicate.similarity,
+                },
+            )
+
+    result = await _analyze_parsed(ticket_id, ticket_title, ticket_description, parsed)
+    if not is_error_response(result["analysis"]):
+        if index is not None and fingerprint is not None:
+            index.store(fingerprint, ticket_id, result["analysis"])
+        if similarity_cache is not None:
+            similarity_cache.store(
+                _similarity_scope(), ticket_id, ticket_text, result["analysis"]
+            )
+    result["fingerprint"] = fingerprint
+    result["known_incident"] = None
+    result["near_duplicate"] = None
+    return result
+
+
+async def analyze_ticket(
+    ticket_id: str,
+    ticket_title: str,
+    ticket_description: str,
+    parsed: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Analyze a ticket, sharing work with identical concurrent requests.
+
+    Args:
+        ticket_id: Ticket identifier
+        ticket_title: Ticket title or summary
+        ticket_description: Detailed ticket description
+        parsed: The ticket already parsed by ``parse_ticket`` (e.g. in a
+            batch), to skip parsing it again
+
+    Returns:
+        Dictionary with parsed ticket information and the LLM analysis
+    """
+    key = analysis_key(ticket_id, ticket_title, ticket_description)
+    return await _analysis_flight.do(
+        key,
+        lambda: _run_analysis(ticket_id, ticket_title, ticket_description, parsed),
+    )
+
+
+def record_resolution(ticket_id: str, resolution: str) -> Optional[Dict[str, Any]]:
+    """
+    Record how a ticket's incident was resolved.
+
+    The resolution is returned with future repeats of the same stacktrace.
+
+    Args:
+        ticket_id: Ticket whose stacktrace fingerprint was stored
+        resolution: Description of the fix or workaround
+
+    Returns:
+        The updated known incident, or None if the ticket is not known
+    """
+    index = get_fingerprint_index()
+    if index is None:
+        return None
+    known = index.set_resolution(ticket_id, resolution)
+    return known.to_dict() if known else None
+
+
+def get_analysis_stats() -> Dict[str, int]:
+    """Get request coalescing statistics for the analysis path."""
+    return {**_analysis_flight.stats(), "refreshing": len(_refreshing)}
@@ -0,0 +1,555 @@
+"""
+Cache backends, including one shared by the worker processes of a host.
+
+Caches on the hot path (LLM completions, MCP files) keep a small
+per-process tier in front of an optional ``CacheBackend``:
+
+- ``MemoryCacheBackend`` lives in the process (one worker, or tests);
+- ``SQLiteCacheBackend`` is a SQLite database in WAL mode on local disk.
+  Every uvicorn worker on the host opens the same file, so a completion
+  computed by one worker is a hit for all of them, and the host holds one
+  copy instead of one per worker. WAL readers never block on writers, and
+  a primary-key read is a few microseconds.
+
+The SQLite tier is bounded by entry count and by the total size of the
+values, since a single MCP file can be several megabytes. Its writes wait
+at most ``busy_timeout`` for another process's write lock (they run on the
+event loop); a cache fill that cannot get the lock in time is skipped.
+
+Cross-process invalidation: every write or delete of a shared entry appends
+to an invalidation log in the same transaction. Each process polls the log
+(at most every ``poll_interval`` seconds) and drops the affected keys from
+its per-process tier; a process that has fallen behind the truncated log
+drops its whole per-process tier instead.
+
+Values are strings; callers serialize structured data themselves.
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry time to live."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept in memory
+            ttl_seconds: Seconds an entry stays valid (0 disables expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_entry(self, key: str) -> Optional[Tuple[str, float]]:
+        """Get ``(value, expires_at)``, refreshing its recency, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.time():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, refreshing its recency, or None if absent or expired."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: str, expires_at: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        if expires_at is None:
+            expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else 0.0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheBackend(ABC):
+    """Namespaced string store with per-entry expiry."""
+
+    # Whether other processes see this backend's entries
+    shared = False
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Tuple[str, float]]:
+        """
+        Look up a live entry.
+
+        Args:
+            namespace: Cache using the backend (e.g. ``completions``)
+            key: Entry key
+
+        Returns:
+            ``(value, expires_at)`` with ``expires_at`` 0 for no expiry, or None
+        """
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: str, expires_at: float) -> None:
+        """Insert or replace an entry (``expires_at`` 0 for no expiry)."""
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove an entry everywhere."""
+
+    @abstractmethod
+    def clear(self, namespace: str) -> None:
+        """Remove every entry of a namespace everywhere."""
+
+    def changed_keys(self, namespace: str) -> Optional[List[str]]:
+        """
+        Keys other processes changed since this process last asked.
+
+        Returns:
+            Keys to drop from the per-process tier, or None to drop all of
+            them (the log no longer reaches back far enough)
+        """
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend statistics."""
+        return {"backend": type(self).__name__, "shared": self.shared}
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release resources."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process backend: one LRU per namespace."""
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            max_entries: Maximum entries per namespace
+        """
+        self.max_entries = max_entries
+        self._namespaces: Dict[str, LRUCache] = {}
+        self._lock = threading.Lock()
+
+    def _lru(self, namespace: str) -> LRUCache:
+        with self._lock:
+            lru = self._namespaces.get(namespace)
+            if lru is None:
+                lru = LRUCache(max_entries=self.max_entries, ttl_seconds=0)
+                self._namespaces[namespace] = lru
+            return lru
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[str, float]]:
+        return self._lru(namespace).get_entry(key)
+
+    def set(self, namespace: str, key: str, value: str, expires_at: float) -> None:
+        self._lru(namespace).set(key, value, expires_at=expires_at)
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._lru(namespace).delete(key)
+
+    def clear(self, namespace: str) -> None:
+        self._lru(namespace).clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = {name: len(lru) for name, lru in self._namespaces.items()}
+        return {**super().stats(), "entries": entries}
+
+    def close(self) -> None:
+        with self._lock:
+            self._namespaces.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Backend in a SQLite WAL database shared by all processes of a host."""
+
+    shared = True
+
+    # Writes between housekeeping passes (expiry, size bound, log truncation)
+    PRUNE_EVERY = 256
+    # Invalidation log rows kept; slower readers drop their whole local tier
+    LOG_ROWS = 10_000
+    # Bumped when the layout of cache_entries changes (entries are dropped)
+    SCHEMA_VERSION = 2
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 100_000,
+        max_bytes: int = 512 * 1024 * 1024,
+        poll_interval: float = 0.5,
+        busy_timeout: float = 0.1,
+    ) -> None:
+        """
+        Open (and create if needed) the database.
+
+        Args:
+            path: Database file on a local filesystem (not NFS: WAL needs
+                shared memory between the processes)
+            max_entries: Entries kept; the least recently written go first
+            max_bytes: Total size of the values kept, bounded the same way
+            poll_interval: Minimum seconds between invalidation log polls
+            busy_timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self._origin = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        # Autocommit; writes use explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        # Opening is not on the request path; it may wait longer for the lock
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._writes = 0
+        self._unpruned_bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "busy_skips": 0,
+            "evictions": 0,
+            "invalidations_sent": 0,
+            "invalidations_received": 0,
+            "resyncs": 0,
+        }
+        self._create_schema()
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        # Only changes made after this process started concern it
+        self._start_seq = self._max_seq()
+        self._cursors: Dict[str, int] = {}
+        self._polled: Dict[str, float] = {}
+
+    def _create_schema(self) -> None:
+        with self._transaction() as conn:
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version != self.SCHEMA_VERSION:
+                # Entries in an older layout are dropped rather than migrated
+                conn.execute("DROP TABLE IF EXISTS cache_entries")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " written_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_written"
+                " ON cache_entries (written_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " namespace TEXT NOT NULL,"
+                " key TEXT,"
+                " origin TEXT NOT NULL)"
+            )
+            conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+
+    def _max_seq(self) -> int:
+        row = self._conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM cache_invalidations"
+        ).fetchone()
+        return int(row[0])
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries"
+                " WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None or (row[1] and row[1] < time.time()):
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return row[0], row[1]
+
+    def _log(self, namespace: str, key: Optional[str]) -> None:
+        self._conn.execute(
+            "INSERT INTO cache_invalidations (namespace, key, origin)"
+            " VALUES (?, ?, ?)",
+            (namespace, key, self._origin),
+        )
+        self._stats["invalidations_sent"] += 1
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; also takes the database's write lock up front."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._writes += 1
+                if (
+                    self._writes % self.PRUNE_EVERY == 0
+                    or self._unpruned_bytes > self.max_bytes // 16
+                ):
+                    self._prune()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def set(self, namespace: str, key: str, value: str, expires_at: float) -> None:
+        """
+        Insert or replace an entry.
+
+        Skipped if another process holds the write lock for longer than
+        ``busy_timeout``: filling a cache is not worth blocking the loop.
+        """
+        size = len(value.encode("utf-8"))
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries"
+                    " (namespace, key, value, size, expires_at, written_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (namespace, key, value, size, expires_at, time.time()),
+                )
+                # Other processes may hold an older value in their local
+                # tier, even if the key looked new when this write began
+                self._log(namespace, key)
+                self._stats["writes"] += 1
+                self._unpruned_bytes += size
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e):
+                raise
+            with self._lock:
+                self._stats["busy_skips"] += 1
+            logger.warning(f"Shared cache is busy; skipped a write: {str(e)}")
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            self._log(namespace, key)
+
+    def clear(self, namespace: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+            self._log(namespace, None)
+
+    def _prune(self) -> None:
+        """Drop expired entries, bound the size and truncate the log."""
+        now = time.time()
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE expires_at > 0 AND expires_at < ?",
+            (now,),
+        )
+        evicted = self._conn.execute(
+            "DELETE FROM cache_entries WHERE rowid IN ("
+            " SELECT rowid FROM cache_entries ORDER BY written_at DESC"
+            " LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        (excess,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) - ? FROM cache_entries", (self.max_bytes,)
+        ).fetchone()
+        if excess > 0:
+            oldest: List[int] = []
+            rows = self._conn.execute(
+                "SELECT rowid, size FROM cache_entries ORDER BY written_at"
+            )
+            for rowid, size in rows:
+                if excess <= 0:
+                    break
+                oldest.append(rowid)
+                excess -= size
+            rows.close()
+            self._conn.executemany(
+                "DELETE FROM cache_entries WHERE rowid = ?", [(r,) for r in oldest]
+            )
+            evicted += len(oldest)
+        self._stats["evictions"] += evicted
+        self._unpruned_bytes = 0
+        self._conn.execute(
+            "DELETE FROM cache_invalidations WHERE seq <= ("
+            " SELECT MAX(seq) FROM cache_invalidations) - ?",
+            (self.LOG_ROWS,),
+        )
+
+    def changed_keys(self, namespace: str) -> Optional[List[str]]:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._polled.get(namespace, 0.0) < self.poll_interval:
+                return []
+            self._polled[namespace] = now
+            cursor = self._cursors.get(namespace, self._start_seq)
+            oldest, latest = self._conn.execute(
+                "SELECT MIN(seq), MAX(seq) FROM cache_invalidations"
+            ).fetchone()
+            if latest is None or latest <= cursor:
+                return []
+            rows = self._conn.execute(
+                "SELECT key FROM cache_invalidations"
+                " WHERE seq > ? AND seq <= ? AND namespace = ? AND origin != ?",
+                (cursor, latest, namespace, self._origin),
+            ).fetchall()
+            self._cursors[namespace] = latest
+            # Rows after the cursor were truncated before this poll saw them
+            if cursor + 1 < oldest or any(key is None for key, in rows):
+                self._stats["resyncs"] += 1
+                return None
+            self._stats["invalidations_received"] += len(rows)
+            return [key for key, in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            rows = self._conn.execute(
+                "SELECT namespace, COUNT(*), SUM(size) FROM cache_entries"
+                " GROUP BY namespace"
+            ).fetchall()
+        return {
+            **super().stats(),
+            **stats,
+            "path": self.path,
+            "entries": {namespace: count for namespace, count, _ in rows},
+            "bytes": {namespace: size for namespace, _, size in rows},
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    """Whether a write failed because another process held the lock."""
+    return str(error).startswith(("database is locked", "database is busy"))
+
+
+def sync_local_tier(
+    backend: Optional[CacheBackend],
+    namespace: str,
+    delete: Callable[[str], None],
+    clear: Callable[[], None],
+) -> None:
+    """
+    Apply other processes' invalidations to a per-process tier.
+
+    Args:
+        backend: The cache's backend (nothing to do if None or per-process)
+        namespace: The cache's namespace in the backend
+        delete: Drops one key from the per-process tier
+        clear: Drops the whole per-process tier
+    """
+    if backend is None or not backend.shared:
+        return
+    try:
+        keys = backend.changed_keys(namespace)
+    except sqlite3.Error as e:
+        logger.error(f"Error polling cache invalidations: {str(e)}")
+        return
+    if keys is None:
+        clear()
+        return
+    for key in keys:
+        delete(key)
+
+
+# Singleton instance
+_shared_backend: Optional[CacheBackend] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache_backend() -> CacheBackend:
+    """Get or open the host-wide backend configured by ``SHARED_CACHE_*``."""
+    global _shared_backend
+    with _shared_lock:
+        if _shared_backend is None:
+            settings = get_settings()
+            if settings.SHARED_CACHE_BACKEND == "memory":
+                _shared_backend = MemoryCacheBackend(
+                    max_entries=settings.SHARED_CACHE_MAX_ENTRIES
+                )
+            else:
+                path = settings.SHARED_CACHE_PATH or os.path.join(
+                    tempfile.gettempdir(), "boaserver-cache.db"
+                )
+                _shared_backend = SQLiteCacheBackend(
+                    path,
+                    max_entries=settings.SHARED_CACHE_MAX_ENTRIES,
+                    max_bytes=settings.SHARED_CACHE_MAX_BYTES,
+                    poll_interval=settings.SHARED_CACHE_POLL_SECONDS,
+                )
+        return _shared_backend
+
+
+def get_cache_backend(tier: str) -> Optional[CacheBackend]:
+    """
+    Backend for a cache configured with ``tier``.
+
+    Args:
+        tier: ``process`` (per-process tier only) or ``shared``
+
+    Returns:
+        The shared backend, or None for per-process caching
+    """
+    if tier == "shared":
+        return get_shared_cache_backend()
+    if tier != "process":
+        logger.warning(f"Unknown cache tier {tier!r}; using 'process'")
+    return None
+
+
+def close_shared_cache_backend() -> None:
+    """Close the shared backend (app shutdown)."""
+    global _shared_backend
+    with _shared_lock:
+        if _shared_backend is not None:
+            _shared_backend.close()
+            _shared_backend = None
+
+
+def get_shared_cache_stats() -> Optional[Dict[str, Any]]:
+    """Get shared backend statistics without opening it."""
+    return _shared_backend.stats() if _shared_backend is not None else None
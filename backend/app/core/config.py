@@ -3,10 +3,10 @@ Configuration management module for BoaServer.
 """
 
 from functools import lru_cache
-from pydantic import BaseSettings, validator
-from typing import Optional, Dict, Any, List
-import os
 from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseSettings, validator
 
 
 class Settings(BaseSettings):
@@ -23,11 +23,165 @@ class Settings(BaseSettings):
     # MCP server configuration
     MCP_SERVER_URL: str
     MCP_SERVER_TOKEN: Optional[str] = None
+    MCP_MAX_CONNECTIONS: int = 20
+    MCP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    MCP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    MCP_TIMEOUT_SECONDS: float = 10.0
+    MCP_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    MCP_MAX_CONCURRENCY: int = 16
+    MCP_HTTP2: bool = False
+    MCP_FILE_CACHE_ENABLED: bool = True
+    MCP_FILE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    MCP_FILE_CACHE_MAX_ENTRY_BYTES: int = 4 * 1024 * 1024
+    MCP_FILE_CACHE_REVALIDATE_SECONDS: float = 30.0
+    # "process" or "shared" (host-wide tier, see SHARED_CACHE_*)
+    MCP_FILE_CACHE_TIER: str = "process"
+    MCP_DEFAULT_REPOSITORY: Optional[str] = None
+
+    # Local code index (repository name -> checkout directory)
+    CODE_INDEX_REPOSITORIES: Dict[str, str] = {}
+    CODE_INDEX_PATH: Optional[str] = None
+    CODE_INDEX_MAX_FILE_BYTES: int = 1024 * 1024
+    CODE_INDEX_REFRESH_SECONDS: float = 300.0
+
+    # Context assembly
+    CONTEXT_ENABLED: bool = True
+    CONTEXT_DEADLINE_SECONDS: float = 2.0
+    CONTEXT_CALL_TIMEOUT_SECONDS: float = 1.5
+    CONTEXT_MAX_LOOKUPS: int = 12
+    CONTEXT_MAX_ITEMS: int = 8
+
+    # Similar-incident knowledge base (disabled unless KNOWLEDGE_DIR is set)
+    KNOWLEDGE_DIR: Optional[str] = None
+    KNOWLEDGE_EMBEDDER: str = "hashing"
+    KNOWLEDGE_EMBEDDING_DIM: int = 384
+    KNOWLEDGE_TOP_K: int = 3
+    KNOWLEDGE_MIN_SCORE: float = 0.35
+    KNOWLEDGE_RECORD_ANALYSES: bool = True
+
+    # Stacktrace fingerprint index of known incidents
+    FINGERPRINT_ENABLED: bool = True
+    FINGERPRINT_DB_PATH: Optional[str] = None
+    FINGERPRINT_MAX_FRAMES: int = 8
+    FINGERPRINT_REFRESH_ON_HIT: bool = False
+    FINGERPRINT_REFRESH_AFTER_SECONDS: float = 24 * 3600
+    
+    # Admission control: per-client token bucket and a bounded request queue
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_RATE_PER_SECOND: float = 10.0
+    ADMISSION_BURST: int = 20
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_MAX_QUEUE: int = 128
+    ADMISSION_MAX_QUEUE_SECONDS: float = 5.0
+    # The ticket webhook has its own bounded queue (INGEST_*)
+    ADMISSION_EXEMPT_PATHS: List[str] = [
+        "/health", "/ready", "/metrics", "/api/webhooks/tickets"
+    ]
+    
+    # Per-stage latency metrics on /metrics and a Server-Timing response header
+    METRICS_ENABLED: bool = True
+    METRICS_SERVER_TIMING: bool = True
+    
+    # Slow-request profiler and event-loop stall watchdog (opt-in)
+    PROFILER_ENABLED: bool = False
+    PROFILER_SLOW_REQUEST_SECONDS: float = 5.0
+    PROFILER_SAMPLE_INTERVAL_SECONDS: float = 0.01
+    PROFILER_STALL_THRESHOLD_SECONDS: float = 0.1
+    PROFILER_MAX_CAPTURES: int = 50
+    # Required in the X-Admin-Token header of /api/admin (unset: endpoints denied)
+    ADMIN_TOKEN: Optional[str] = None
+    
+    # Open MCP connections and make a first model RPC before reporting /ready
+    PREWARM_ENABLED: bool = False
+    PREWARM_TIMEOUT_SECONDS: float = 10.0
+    PREWARM_MCP_CONNECTIONS: int = 4
+    
+    # Ticket webhook ingestion: collapse updates, parse in batches and
+    # pre-compute analyses in the background
+    INGEST_ENABLED: bool = True
+    INGEST_MAX_PENDING: int = 1000
+    INGEST_DEDUPE_WINDOW_SECONDS: float = 5.0
+    INGEST_BATCH_SIZE: int = 32
+    INGEST_CONCURRENCY: int = 2
+    # Overflow beyond INGEST_MAX_PENDING (and events kept across restarts);
+    # the webhook answers 429 once this is full too
+    INGEST_SPILL_ENABLED: bool = True
+    INGEST_SPILL_PATH: Optional[str] = None
+    INGEST_MAX_SPILLED: int = 100_000
+    INGEST_RESULT_MAX_ENTRIES: int = 1024
+    INGEST_RESULT_TTL_SECONDS: int = 3600
+    # A stored result is the whole analysis response, context included
+    INGEST_RESULT_MAX_ENTRY_BYTES: int = 1024 * 1024
+    # "process" or "shared" (host-wide tier, see SHARED_CACHE_*)
+    INGEST_RESULT_TIER: str = "process"
+    # Required in the X-Webhook-Token header of webhooks (unset: webhooks denied)
+    WEBHOOK_TOKEN: Optional[str] = None
     
     # LLM configuration
     LLM_MODEL: str = "gemini-pro"
     LLM_TEMPERATURE: float = 0.2
     LLM_MAX_TOKENS: int = 1024
+    # Upper bound on prompt size, below the model's own limit (0 = model limit)
+    LLM_PROMPT_TOKEN_BUDGET: int = 8192
+    # analyze_code splits larger inputs into chunks analyzed concurrently
+    LLM_CODE_CHUNK_TOKENS: int = 3000
+    LLM_CODE_MAX_CHUNKS: int = 16
+    LLM_CODE_MAP_CONCURRENCY: int = 8
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_MAX_QUEUE_SIZE: int = 64
+    # Per-attempt timeout (applied to queue wait and to the running call
+    # separately) and retries with jittered exponential backoff
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_RETRY_ATTEMPTS: int = 3
+    LLM_RETRY_BACKOFF_SECONDS: float = 0.5
+    LLM_RETRY_MAX_BACKOFF_SECONDS: float = 8.0
+    # Send a second request when the first is slower than the p95 latency
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_QUANTILE: float = 0.95
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    # Fail fast while the recent failure ratio of LLM calls is too high
+    LLM_BREAKER_FAILURE_RATIO: float = 0.5
+    LLM_BREAKER_MIN_CALLS: int = 10
+    LLM_BREAKER_WINDOW_SECONDS: float = 30.0
+    LLM_BREAKER_OPEN_SECONDS: float = 15.0
+    # Ticket analyses of simple tickets go to a fast model (None = LLM_MODEL only)
+    LLM_FAST_MODEL: Optional[str] = None
+    LLM_FAST_MAX_TOKENS: int = 1024
+    LLM_FAST_CATEGORIES: List[str] = ["feature", "bug", "unknown"]
+    LLM_FAST_MAX_PROMPT_TOKENS: int = 3000
+    # A model whose p95 latency exceeds this is avoided while the other is healthy
+    LLM_ROUTE_LATENCY_SLO_SECONDS: float = 20.0
+    # Only latencies this recent count, so an avoided model gets another chance
+    LLM_ROUTE_LATENCY_WINDOW_SECONDS: float = 120.0
+    # Fast answers shorter than this, or hedged, are redone on LLM_MODEL
+    LLM_ESCALATE_MIN_CHARS: int = 200
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_MAX_ENTRY_BYTES: int = 256 * 1024
+    LLM_CACHE_DB_PATH: Optional[str] = None
+    # "process" or "shared" (host-wide tier, see SHARED_CACHE_*)
+    LLM_CACHE_TIER: str = "process"
+
+    # Cache tier shared by the worker processes of a host: "sqlite" (a WAL
+    # database on local disk) or "memory" (this process only)
+    SHARED_CACHE_BACKEND: str = "sqlite"
+    SHARED_CACHE_PATH: Optional[str] = None
+    SHARED_CACHE_MAX_ENTRIES: int = 100_000
+    # Total size of the values in the SQLite tier (MCP files can be megabytes)
+    SHARED_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    # How often a worker picks up other workers' invalidations
+    SHARED_CACHE_POLL_SECONDS: float = 0.5
+
+    # Near-duplicate ticket cache
+    SIMILARITY_CACHE_ENABLED: bool = True
+    SIMILARITY_CACHE_THRESHOLD: float = 0.9
+    SIMILARITY_CACHE_MAX_ENTRIES: int = 2048
+    SIMILARITY_CACHE_TTL_SECONDS: int = 3600
+    SIMILARITY_CACHE_BANDS: int = 16
+    SIMILARITY_CACHE_ROWS: int = 4
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -0,0 +1,370 @@
+"""
+Context assembly: turn parsed ticket entities into code context for prompts.
+
+Every MCP lookup implied by the ticket (a code search per service name,
+error code, endpoint and exception type, a file fetch per file path) is
+issued concurrently. Each call has its own timeout and the whole stage has
+a global deadline; when the deadline passes, whatever has arrived is used
+and the remaining calls are cancelled. Results are then deduplicated and
+ranked so the most relevant code comes first.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import timed
+from app.llm.context_packer import PackedContext, Snippet, focus_windows, pack_snippets
+from app.mcp import client as mcp_client
+from app.mcp import local_search
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each kind of lookup; exact identifiers beat broad names
+LOOKUP_WEIGHTS = {
+    "file_path": 3.0,
+    "error_code": 3.0,
+    "exception": 2.5,
+    "endpoint": 2.0,
+    "service_name": 1.0,
+}
+
+# Lookup counters across all assemblies, for /stats
+_stats = {
+    "assemblies": 0,
+    "planned": 0,
+    "completed": 0,
+    "failed": 0,
+    "timed_out": 0,
+    "deadline_reached": 0,
+}
+
+
+@dataclass
+class Lookup:
+    """One MCP call planned from a ticket entity."""
+
+    kind: str
+    query: str
+    repository: Optional[str] = None
+
+    @property
+    def weight(self) -> float:
+        return LOOKUP_WEIGHTS.get(self.kind, 1.0)
+
+
+@dataclass
+class ContextItem:
+    """A piece of code returned by the MCP server."""
+
+    source: str
+    text: str
+    score: float = 0.0
+    matched: List[str] = field(default_factory=list)
+    #: A whole file rather than a search result snippet
+    whole_file: bool = False
+
+
+@dataclass
+class AssembledContext:
+    """Ranked context items and how the lookups went."""
+
+    items: List[ContextItem] = field(default_factory=list)
+    planned: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    elapsed_ms: float = 0.0
+
+    def pack(
+        self, parsed: Dict[str, Any], budget: int, max_items: Optional[int] = None
+    ) -> PackedContext:
+        """
+        Select the most relevant code that fits a token budget.
+
+        Whole files are cut down to the windows around the ticket's
+        stacktrace frames and entities first.
+
+        Args:
+            parsed: Output of ``parse_ticket``
+            budget: Maximum tokens of the rendered code
+            max_items: Maximum number of items to consider
+
+        Returns:
+            Packed snippets, most relevant first
+        """
+        items = self.items if max_items is None else self.items[:max_items]
+        return pack_snippets(context_snippets(items, parsed), budget)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get lookup counters for this assembly."""
+        return {
+            "planned": self.planned,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "items": len(self.items),
+            "elapsed_ms": round(self.elapsed_ms, 2),
+        }
+
+
+def _focus(parsed: Dict[str, Any]) -> Tuple[Dict[str, List[int]], List[str]]:
+    """Frame lines by file name, and identifiers worth finding in code."""
+    lines: Dict[str, List[int]] = {}
+    terms: List[str] = []
+    for trace in parsed.get("stacktraces", []):
+        if trace.get("exception_type"):
+            terms.append(trace["exception_type"].split(".")[-1])
+        for frame in trace.get("frames", []):
+            file_name = (frame.get("file") or "").replace("\\", "/").split("/")[-1]
+            if file_name and frame.get("line"):
+                lines.setdefault(file_name, []).append(frame["line"])
+            function = (frame.get("function") or "").split(".")[-1]
+            if len(function) >= 4 and function.isidentifier():
+                terms.append(function)
+    entities = parsed.get("entities", {})
+    terms += [code for code in entities.get("error_codes", []) if code.isupper()]
+    terms += [endpoint for endpoint in entities.get("endpoints", []) if "/" in endpoint]
+    return lines, list(dict.fromkeys(terms))
+
+
+def context_snippets(items: List[ContextItem], parsed: Dict[str, Any]) -> List[Snippet]:
+    """
+    Turn ranked context items into snippets for the context packer.
+
+    Search results are kept whole. Whole files are cut into windows around
+    the lines of stacktrace frames in that file and around frame function
+    names, exception types, error codes and endpoints.
+
+    Args:
+        items: Ranked context items
+        parsed: Output of ``parse_ticket``
+
+    Returns:
+        Snippets prioritized by item score
+    """
+    frame_lines, terms = _focus(parsed)
+    snippets: List[Snippet] = []
+    for item in items:
+        if not item.whole_file:
+            snippets.append(Snippet(item.source, item.text, item.score))
+            continue
+        file_name = item.source.replace("\\", "/").rsplit("/", 1)[-1]
+        file_name = file_name.rsplit(":", 1)[-1]
+        snippets.extend(
+            focus_windows(
+                item.text,
+                item.source,
+                focus_lines=frame_lines.get(file_name, []),
+                terms=terms,
+                priority=item.score,
+            )
+        )
+    return snippets
+
+
+def plan_lookups(
+    parsed: Dict[str, Any],
+    default_repository: Optional[str] = None,
+    max_lookups: int = 12,
+) -> List[Lookup]:
+    """
+    Plan the MCP lookups for a parsed ticket, most specific first.
+
+    Args:
+        parsed: Output of ``parse_ticket``
+        default_repository: Repository to fetch file paths from; without
+            one, file paths are searched for instead
+        max_lookups: Maximum number of lookups
+
+    Returns:
+        Deduplicated lookups
+    """
+    entities = parsed.get("entities", {})
+    file_paths = entities.get("file_paths", [])
+    # The file pattern also matches endpoints and dotted names such as
+    # ``java.lang``; only slash-separated paths are worth fetching
+    paths = [p for p in file_paths if "/" in p and not p.startswith("/api/")]
+    endpoints = list(entities.get("endpoints", []))
+    endpoints += [p for p in file_paths if p.startswith("/api/")]
+
+    lookups: List[Lookup] = []
+    for path in paths:
+        # Without a repository the path can still be found by searching
+        lookups.append(Lookup("file_path", path, default_repository))
+    for code in entities.get("error_codes", []):
+        if code.isupper():
+            lookups.append(Lookup("error_code", code))
+    for trace in parsed.get("stacktraces", []):
+        if trace.get("exception_type"):
+            lookups.append(Lookup("exception", trace["exception_type"]))
+        # The innermost application frames are the most likely culprits
+        for frame in trace.get("frames", [])[:2]:
+            if frame.get("file"):
+                lookups.append(Lookup("file_path", frame["file"]))
+    for endpoint in endpoints:
+        lookups.append(Lookup("endpoint", endpoint))
+    for service in entities.get("service_names", []):
+        lookups.append(Lookup("service_name", service))
+
+    seen: Set[Tuple[bool, str]] = set()
+    unique: List[Lookup] = []
+    for lookup in lookups:
+        key = (lookup.kind == "file_path", lookup.query)
+        if key not in seen:
+            seen.add(key)
+            unique.append(lookup)
+    return unique[:max_lookups]
+
+
+def _call(client: Any, searcher: Any, lookup: Lookup) -> Awaitable[Any]:
+    """Start the MCP call for a lookup."""
+    call: Awaitable[Any]
+    if lookup.kind == "file_path" and lookup.repository:
+        call = client.get_file(lookup.query, lookup.repository)
+    else:
+        call = searcher.search_code(lookup.query, limit=5)
+    return call
+
+
+def _collect(
+    items: Dict[Tuple[str, ...], ContextItem], lookup: Lookup, result: Any
+) -> None:
+    """Merge one lookup's results into ``items``, scoring as they arrive."""
+    label = f"{lookup.kind}:{lookup.query}"
+    key: Tuple[str, ...]
+    entries: List[Tuple[Tuple[str, ...], str, str, int]]
+    if isinstance(result, dict):
+        key = ("file", lookup.repository or "", result.get("path") or lookup.query)
+        entries = [(key, f"{key[1]}:{key[2]}", result.get("content") or "", 0)]
+    else:
+        entries = []
+        for rank, match in enumerate(result or []):
+            repository = match.get("repository") or ""
+            path = match.get("file") or ""
+            line = match.get("line")
+            key = ("snippet", repository, path, str(line))
+            source = f"{repository}:{path}" + (f":{line}" if line else "")
+            entries.append((key, source, match.get("snippet") or "", rank))
+
+    for key, source, text, rank in entries:
+        if not text:
+            continue
+        item = items.get(key)
+        if item is None:
+            item = items[key] = ContextItem(
+                source=source, text=text, whole_file=key[0] == "file"
+            )
+        if label not in item.matched:
+            # Code matched by several entities outranks code matched by one
+            item.matched.append(label)
+            item.score += lookup.weight / (rank + 1)
+
+
+def _rank(items: Dict[Tuple[str, ...], ContextItem]) -> List[ContextItem]:
+    """Order items by score and drop snippets of files included in full."""
+    full_files = {key[1:] for key in items if key[0] == "file"}
+    ranked = [
+        item
+        for key, item in items.items()
+        if key[0] == "file" or (key[1], key[2]) not in full_files
+    ]
+    ranked.sort(key=lambda item: item.score, reverse=True)
+    return ranked
+
+
+def _record(assembled: AssembledContext, deadline_reached: bool) -> None:
+    """Add one assembly's lookup counters to the process-wide totals."""
+    _stats["assemblies"] += 1
+    _stats["planned"] += assembled.planned
+    _stats["completed"] += assembled.completed
+    _stats["failed"] += assembled.failed
+    _stats["timed_out"] += assembled.timed_out
+    _stats["deadline_reached"] += deadline_reached
+
+
+@timed("assemble_context")
+async def assemble_context(
+    parsed: Dict[str, Any],
+    deadline: Optional[float] = None,
+    call_timeout: Optional[float] = None,
+    max_lookups: Optional[int] = None,
+) -> AssembledContext:
+    """
+    Look up code for a parsed ticket concurrently, within a deadline.
+
+    Never raises for MCP failures: failed and timed-out lookups are counted
+    and skipped.
+
+    Args:
+        parsed: Output of ``parse_ticket``
+        deadline: Seconds the whole stage may take (default from settings)
+        call_timeout: Seconds a single MCP call may take (default from settings)
+        max_lookups: Maximum number of MCP calls (default from settings)
+
+    Returns:
+        Ranked, deduplicated context
+    """
+    settings = get_settings()
+    deadline = settings.CONTEXT_DEADLINE_SECONDS if deadline is None else deadline
+    call_timeout = (
+        settings.CONTEXT_CALL_TIMEOUT_SECONDS if call_timeout is None else call_timeout
+    )
+    max_lookups = settings.CONTEXT_MAX_LOOKUPS if max_lookups is None else max_lookups
+
+    started = time.perf_counter()
+    lookups = plan_lookups(parsed, settings.MCP_DEFAULT_REPOSITORY, max_lookups)
+    assembled = AssembledContext(planned=len(lookups))
+    if not lookups:
+        _record(assembled, deadline_reached=False)
+        return assembled
+
+    client = mcp_client.get_mcp_client()
+    # Searches go to the local index when it is built, else to the MCP server
+    local = local_search.get_local_search()
+    searcher = local if local is not None and local.ready else client
+    tasks = {}
+    for lookup in lookups:
+        call = asyncio.wait_for(_call(client, searcher, lookup), call_timeout)
+        tasks[asyncio.ensure_future(call)] = lookup
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+    finally:
+        # Also reached if the caller is cancelled
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    items: Dict[Tuple[str, ...], ContextItem] = {}
+    # Merge in plan order so ties keep the most specific lookups first
+    for task, lookup in tasks.items():
+        if task not in done or task.cancelled():
+            continue
+        error = task.exception()
+        if isinstance(error, asyncio.TimeoutError):
+            assembled.timed_out += 1
+        elif error is not None:
+            assembled.failed += 1
+            logger.warning(f"Context lookup {lookup.kind} failed: {str(error)}")
+        else:
+            assembled.completed += 1
+            _collect(items, lookup, task.result())
+    assembled.timed_out += len(pending)
+
+    assembled.items = _rank(items)
+    assembled.elapsed_ms = (time.perf_counter() - started) * 1000
+    _record(assembled, deadline_reached=bool(pending))
+    if pending:
+        logger.info(
+            f"Context deadline reached with {len(pending)} of "
+            f"{len(lookups)} lookups outstanding"
+        )
+    return assembled
+
+
+def get_context_stats() -> Dict[str, int]:
+    """Get lookup counters summed over all context assemblies."""
+    return dict(_stats)
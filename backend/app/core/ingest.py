@@ -0,0 +1,668 @@
+"""
+Webhook ticket ingestion: queueing, batching and pre-computed analyses.
+
+The ticketing system posts every ticket update to ``/api/webhooks/tickets``.
+The webhook only enqueues the update and acknowledges it; a background
+dispatcher does the work:
+
+1. Updates to the same ticket within ``dedupe_window`` seconds of its first
+   queued update collapse into one event carrying the latest content, so a
+   burst of edits costs one analysis.
+2. Due events are taken in batches of up to ``batch_size`` and parsed with
+   ``parse_ticket`` in one executor call, off the event loop.
+3. Each parsed ticket is analyzed (at most ``concurrency`` at a time, so
+   interactive requests keep most of the LLM pool) and the result is kept
+   by ``analysis_key``. When an engineer then opens the ticket, the
+   analysis endpoint answers from that store instead of waiting for the LLM.
+
+The in-process queue holds at most ``max_pending`` tickets. Beyond that,
+events spill to a SQLite file (which also keeps them across restarts: the
+queue is flushed there on shutdown and reloaded on startup), and when the
+spill is full as well the webhook answers ``429`` with ``Retry-After``
+instead of growing without bound. Spill reads and writes run in an executor
+thread, since a write can wait on another worker's lock. Delivery is at
+most once: an event taken from the queue is not retried if the worker dies
+while analyzing it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.analysis import analysis_key, analyze_ticket
+from app.core.cache import get_cache_backend
+from app.core.config import get_settings
+from app.llm.cache import CompletionCache
+from app.llm.gemini import is_error_response
+from app.utils.ticket_parser import parse_ticket
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of accepting a webhook event
+QUEUED = "queued"
+COLLAPSED = "collapsed"
+SPILLED = "spilled"
+
+
+class QueueFull(Exception):
+    """Neither the in-process queue nor the spill has room for an event."""
+
+
+@dataclass
+class TicketEvent:
+    """The latest content of a ticket waiting to be processed."""
+
+    ticket_id: str
+    title: str
+    description: str
+    # When the first update of this event was received (time.time())
+    received_at: float
+    updates: int = 1
+
+
+class SpillStore:
+    """
+    Overflow queue in a SQLite file, shared by the workers of a host.
+
+    Methods block on disk I/O and on other workers' write locks, so callers
+    on the event loop run them in an executor.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0) -> None:
+        """
+        Open (and create if needed) the spill database.
+
+        Args:
+            path: Database file on a local filesystem
+            busy_timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        # Autocommit; writes use explicit BEGIN IMMEDIATE transactions. The
+        # connection is used from executor threads, one call at a time
+        self._conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_events ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " ticket_id TEXT NOT NULL UNIQUE,"
+            " title TEXT NOT NULL,"
+            " description TEXT NOT NULL,"
+            " received_at REAL NOT NULL,"
+            " updates INTEGER NOT NULL)"
+        )
+
+    def put(self, event: TicketEvent, max_events: int) -> Optional[str]:
+        """
+        Spill an event, collapsing it into a spilled update of the same ticket.
+
+        Args:
+            event: Event to store
+            max_events: Events the spill may hold
+
+        Returns:
+            ``SPILLED`` or ``COLLAPSED``, or None if the spill is full
+        """
+        with self._lock:
+            return self._put(event, max_events)
+
+    def _put(self, event: TicketEvent, max_events: int) -> Optional[str]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self._conn.execute(
+                "UPDATE ingest_events SET title = ?, description = ?,"
+                " updates = updates + ? WHERE ticket_id = ?",
+                (event.title, event.description, event.updates, event.ticket_id),
+            )
+            if cursor.rowcount:
+                outcome: Optional[str] = COLLAPSED
+            elif self._count() >= max_events:
+                outcome = None
+            else:
+                self._insert(event)
+                outcome = SPILLED
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return outcome
+
+    def put_many(self, events: Sequence[TicketEvent]) -> None:
+        """Spill events regardless of the size bound (shutdown flush)."""
+        with self._lock:
+            self._put_many(events)
+
+    def _put_many(self, events: Sequence[TicketEvent]) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for event in events:
+                self._conn.execute(
+                    "DELETE FROM ingest_events WHERE ticket_id = ?",
+                    (event.ticket_id,),
+                )
+                self._insert(event)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _insert(self, event: TicketEvent) -> None:
+        self._conn.execute(
+            "INSERT INTO ingest_events"
+            " (ticket_id, title, description, received_at, updates)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                event.ticket_id,
+                event.title,
+                event.description,
+                event.received_at,
+                event.updates,
+            ),
+        )
+
+    def _count(self) -> int:
+        return int(
+            self._conn.execute("SELECT COUNT(*) FROM ingest_events").fetchone()[0]
+        )
+
+    def take(self, limit: int) -> List[TicketEvent]:
+        """
+        Remove and return the oldest spilled events.
+
+        Args:
+            limit: Maximum number of events
+
+        Returns:
+            Events in the order they were spilled
+        """
+        with self._lock:
+            # A plain read does not wait for other workers' writes, so an
+            # empty spill is checked without taking the write lock
+            if not self._has_events():
+                return []
+            return self._take(limit)
+
+    def _has_events(self) -> bool:
+        row = self._conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM ingest_events)"
+        ).fetchone()
+        return bool(row[0])
+
+    def _take(self, limit: int) -> List[TicketEvent]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._conn.execute(
+                "SELECT seq, ticket_id, title, description, received_at, updates"
+                " FROM ingest_events ORDER BY seq LIMIT ?",
+                (limit,),
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    "DELETE FROM ingest_events WHERE seq <= ?", (rows[-1][0],)
+                )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return [TicketEvent(*row[1:]) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+
+class IngestQueue:
+    """Bounded queue of ticket events, keyed by ticket ID."""
+
+    def __init__(
+        self,
+        max_pending: int = 1000,
+        dedupe_window: float = 5.0,
+        spill: Optional[SpillStore] = None,
+        max_spilled: int = 100_000,
+    ) -> None:
+        """
+        Initialize the queue.
+
+        Args:
+            max_pending: Tickets held in memory
+            dedupe_window: Seconds an event waits for further updates
+            spill: Overflow store (None rejects events once memory is full)
+            max_spilled: Events the spill may hold
+        """
+        self.max_pending = max_pending
+        self.dedupe_window = dedupe_window
+        self.spill = spill
+        self.max_spilled = max_spilled
+        self._pending: "OrderedDict[str, TicketEvent]" = OrderedDict()
+        # Events spilled so far, as of the last spill access; recovered
+        # events from a previous run count as spilled
+        self._spill_pending = len(spill) if spill is not None else 0
+        self._spilled = self._spill_pending > 0
+        # Serializes spill writes with refills so that the spilled flag
+        # matches what is in the spill
+        self._spill_lock = asyncio.Lock()
+        self.arrived = asyncio.Event()
+        self._stats = {
+            "received": 0,
+            "collapsed": 0,
+            "spilled": 0,
+            "rejected": 0,
+        }
+
+    async def put(
+        self,
+        ticket_id: str,
+        title: str,
+        description: str,
+        now: Optional[float] = None,
+    ) -> str:
+        """
+        Enqueue a ticket update.
+
+        Args:
+            ticket_id: Ticket identifier
+            title: Ticket title
+            description: Ticket description
+            now: Receive time (defaults to the current time)
+
+        Returns:
+            ``QUEUED``, ``COLLAPSED`` or ``SPILLED``
+
+        Raises:
+            QueueFull: If the update cannot be held anywhere
+        """
+        self._stats["received"] += 1
+        pending = self._pending.get(ticket_id)
+        if pending is not None:
+            pending.title = title
+            pending.description = description
+            pending.updates += 1
+            self._stats["collapsed"] += 1
+            return COLLAPSED
+
+        event = TicketEvent(
+            ticket_id, title, description, time.time() if now is None else now
+        )
+        # Once events spill, later ones follow them so that order is kept
+        # and updates of a spilled ticket collapse into it
+        if len(self._pending) < self.max_pending and not self._spilled:
+            self._pending[ticket_id] = event
+            self.arrived.set()
+            return QUEUED
+        if self.spill is not None:
+            loop = asyncio.get_running_loop()
+            async with self._spill_lock:
+                outcome = await loop.run_in_executor(
+                    None, self.spill.put, event, self.max_spilled
+                )
+                if outcome is not None:
+                    self._spilled = True
+            if outcome is not None:
+                if outcome == COLLAPSED:
+                    self._stats["collapsed"] += 1
+                else:
+                    self._stats["spilled"] += 1
+                    self._spill_pending += 1
+                return outcome
+        self._stats["rejected"] += 1
+        raise QueueFull(f"Ingest queue is full ({len(self._pending)} pending)")
+
+    async def refill(self) -> int:
+        """
+        Move spilled events into memory, as far as there is room.
+
+        Returns:
+            Number of events moved
+        """
+        room = self.max_pending - len(self._pending)
+        if self.spill is None or room <= 0:
+            return 0
+        loop = asyncio.get_running_loop()
+        async with self._spill_lock:
+            events, self._spill_pending = await loop.run_in_executor(
+                None, self._take_spilled, room
+            )
+            if len(events) < room:
+                self._spilled = False
+        for event in events:
+            pending = self._pending.get(event.ticket_id)
+            if pending is None:
+                self._pending[event.ticket_id] = event
+            else:
+                # The spilled update arrived later
+                pending.title = event.title
+                pending.description = event.description
+                pending.updates += event.updates
+        return len(events)
+
+    def _take_spilled(self, limit: int) -> Tuple[List[TicketEvent], int]:
+        """Take spilled events and count the rest (runs in an executor thread)."""
+        assert self.spill is not None
+        events = self.spill.take(limit)
+        return events, len(self.spill) if events else 0
+
+    def take_due(self, limit: int, now: Optional[float] = None) -> List[TicketEvent]:
+        """
+        Remove events whose dedupe window has passed, oldest first.
+
+        Args:
+            limit: Maximum number of events
+            now: Current time (defaults to the current time)
+
+        Returns:
+            Events ready to be processed
+        """
+        now = time.time() if now is None else now
+        due: List[TicketEvent] = []
+        while self._pending and len(due) < limit:
+            event = next(iter(self._pending.values()))
+            if event.received_at + self.dedupe_window > now:
+                break
+            due.append(self._pending.popitem(last=False)[1])
+        return due
+
+    def seconds_until_due(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the oldest event is due, or None if none is pending."""
+        if not self._pending:
+            return None
+        now = time.time() if now is None else now
+        event = next(iter(self._pending.values()))
+        return max(0.0, event.received_at + self.dedupe_window - now)
+
+    async def flush(self) -> int:
+        """
+        Move every in-memory event to the spill (shutdown).
+
+        Returns:
+            Number of events that could not be kept
+        """
+        events = list(self._pending.values())
+        self._pending.clear()
+        if self.spill is None:
+            return len(events)
+        loop = asyncio.get_running_loop()
+        async with self._spill_lock:
+            await loop.run_in_executor(None, self.spill.put_many, events)
+        self._spill_pending += len(events)
+        return 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue counters."""
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "spill_pending": self._spill_pending,
+        }
+
+
+class PrecomputedAnalyses(CompletionCache):
+    """Analyses computed ahead of time, keyed by ``analysis_key``."""
+
+    NAMESPACE = "ticket_analyses"
+
+
+def _parse_batch(events: Sequence[TicketEvent]) -> List[Optional[Dict[str, Any]]]:
+    """Parse a batch of tickets (runs in an executor thread)."""
+    results: List[Optional[Dict[str, Any]]] = []
+    for event in events:
+        try:
+            results.append(
+                parse_ticket(event.ticket_id, event.title, event.description)
+            )
+        except Exception as e:
+            logger.error(f"Error parsing ticket {event.ticket_id}: {str(e)}")
+            results.append(None)
+    return results
+
+
+class IngestPipeline:
+    """Background dispatcher that parses and analyzes queued tickets."""
+
+    # Seconds between checks for events spilled by other workers
+    POLL_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        queue: IngestQueue,
+        results: PrecomputedAnalyses,
+        batch_size: int = 32,
+        concurrency: int = 2,
+    ) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            queue: Queue the webhook writes to
+            results: Store for the pre-computed analyses
+            batch_size: Tickets parsed per executor call
+            concurrency: Analyses run at the same time
+        """
+        self.queue = queue
+        self.results = results
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: Optional["asyncio.Task[None]"] = None
+        # Moving average of the processing time per ticket, for Retry-After
+        self._seconds_per_ticket = 1.0
+        self._stats = {
+            "batches": 0,
+            "parsed": 0,
+            "parse_failures": 0,
+            "precomputed": 0,
+            "unchanged": 0,
+            "analysis_failures": 0,
+        }
+
+    async def submit(self, ticket_id: str, title: str, description: str) -> str:
+        """
+        Accept a ticket update from the webhook.
+
+        Returns:
+            ``QUEUED``, ``COLLAPSED`` or ``SPILLED``
+
+        Raises:
+            QueueFull: If the update cannot be accepted
+        """
+        return await self.queue.put(ticket_id, title, description)
+
+    def retry_after(self) -> float:
+        """Seconds a rejected sender should wait: roughly one batch's worth."""
+        batch_seconds = self._seconds_per_ticket * self.batch_size / self.concurrency
+        return min(60.0, max(1.0, self.queue.dedupe_window + batch_seconds))
+
+    def lookup(
+        self, ticket_id: str, title: str, description: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get the pre-computed analysis of a ticket with exactly this content.
+
+        Returns:
+            The analysis result, or None if there is none
+        """
+        value = self.results.get(analysis_key(ticket_id, title, description))
+        if value is None:
+            return None
+        return {**json.loads(value), "precomputed": True}
+
+    async def _analyze(self, event: TicketEvent, parsed: Dict[str, Any]) -> None:
+        try:
+            key = analysis_key(event.ticket_id, event.title, event.description)
+            if self.results.get(key) is not None:
+                # An update that did not change the title or description
+                self._stats["unchanged"] += 1
+                return
+            async with self._semaphore:
+                result = await analyze_ticket(
+                    event.ticket_id, event.title, event.description, parsed
+                )
+            if is_error_response(result["analysis"]):
+                self._stats["analysis_failures"] += 1
+                return
+            self.results.set(key, json.dumps(result))
+        except Exception as e:
+            # One bad ticket must not stop the others or the dispatcher
+            logger.error(f"Error analyzing ticket {event.ticket_id}: {str(e)}")
+            self._stats["analysis_failures"] += 1
+            return
+        self._stats["precomputed"] += 1
+
+    async def process(self, events: Sequence[TicketEvent]) -> None:
+        """Parse a batch of events and pre-compute their analyses."""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        parsed = await loop.run_in_executor(None, _parse_batch, events)
+        self._stats["batches"] += 1
+        self._stats["parsed"] += sum(1 for result in parsed if result is not None)
+        self._stats["parse_failures"] += sum(1 for result in parsed if result is None)
+        await asyncio.gather(
+            *(
+                self._analyze(event, result)
+                for event, result in zip(events, parsed)
+                if result is not None
+            )
+        )
+        elapsed = (time.perf_counter() - started) / len(events)
+        self._seconds_per_ticket = 0.8 * self._seconds_per_ticket + 0.2 * elapsed
+
+    async def run(self) -> None:
+        """Process due events until cancelled."""
+        while True:
+            try:
+                await self.queue.refill()
+            except sqlite3.Error as e:
+                logger.error(f"Error reading spilled ticket events: {str(e)}")
+            events = self.queue.take_due(self.batch_size)
+            if events:
+                try:
+                    await self.process(events)
+                except Exception as e:
+                    logger.error(
+                        f"Error processing {len(events)} ticket events: {str(e)}"
+                    )
+                continue
+            wait = self.queue.seconds_until_due()
+            self.queue.arrived.clear()
+            try:
+                await asyncio.wait_for(
+                    self.queue.arrived.wait(),
+                    self.POLL_INTERVAL
+                    if wait is None
+                    else min(wait, self.POLL_INTERVAL),
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the dispatcher task."""
+        self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self) -> None:
+        """Stop the dispatcher and keep unprocessed events in the spill."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            lost = await self.queue.flush()
+        except sqlite3.Error as e:
+            logger.error(f"Error spilling ticket events: {str(e)}")
+            lost = len(self.queue)
+        if lost:
+            logger.warning(f"Dropped {lost} unprocessed ticket events on shutdown")
+        if self.queue.spill is not None:
+            self.queue.spill.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue and processing counters."""
+        return {
+            **self.queue.stats(),
+            **self._stats,
+            "seconds_per_ticket": round(self._seconds_per_ticket, 3),
+        }
+
+
+# Singleton instance
+_pipeline: Optional[IngestPipeline] = None
+
+
+def get_ingest_pipeline() -> Optional[IngestPipeline]:
+    """Get the running pipeline, or None if ingestion is disabled or stopped."""
+    return _pipeline
+
+
+def start_ingest() -> Optional[IngestPipeline]:
+    """
+    Create and start the pipeline configured by ``INGEST_*`` (app startup).
+
+    Returns:
+        The pipeline, or None if ``INGEST_ENABLED`` is off
+    """
+    global _pipeline
+    settings = get_settings()
+    if not settings.INGEST_ENABLED:
+        return None
+    if not settings.WEBHOOK_TOKEN:
+        logger.warning("WEBHOOK_TOKEN is not set; ticket webhooks will be refused")
+    spill = None
+    if settings.INGEST_SPILL_ENABLED:
+        path = settings.INGEST_SPILL_PATH or os.path.join(
+            tempfile.gettempdir(), "boaserver-ingest.db"
+        )
+        spill = SpillStore(path)
+    queue = IngestQueue(
+        max_pending=settings.INGEST_MAX_PENDING,
+        dedupe_window=settings.INGEST_DEDUPE_WINDOW_SECONDS,
+        spill=spill,
+        max_spilled=settings.INGEST_MAX_SPILLED,
+    )
+    results = PrecomputedAnalyses(
+        max_entries=settings.INGEST_RESULT_MAX_ENTRIES,
+        ttl_seconds=settings.INGEST_RESULT_TTL_SECONDS,
+        max_entry_bytes=settings.INGEST_RESULT_MAX_ENTRY_BYTES,
+        backend=get_cache_backend(settings.INGEST_RESULT_TIER),
+    )
+    _pipeline = IngestPipeline(
+        queue,
+        results,
+        batch_size=settings.INGEST_BATCH_SIZE,
+        concurrency=settings.INGEST_CONCURRENCY,
+    )
+    _pipeline.start()
+    return _pipeline
+
+
+async def stop_ingest() -> None:
+    """Stop the pipeline (app shutdown)."""
+    global _pipeline
+    if _pipeline is not None:
+        await _pipeline.stop()
+        _pipeline = None
+
+
+def get_ingest_stats() -> Optional[Dict[str, Any]]:
+    """Get pipeline statistics, or None if it is not running."""
+    return _pipeline.stats() if _pipeline is not None else None
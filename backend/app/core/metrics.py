@@ -0,0 +1,446 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Pipeline stages are timed with ``stage()`` (a context manager) or
+``timed()`` (a decorator for sync and async functions). Each observation
+goes into a per-stage histogram and, while an HTTP request is being
+served, into that request's ``Server-Timing`` header. Recording is a
+``perf_counter`` pair, a bisect over the bucket bounds and a locked
+increment, so it is cheap enough to stay on in production.
+
+Counters and gauges that components already keep in their ``stats()``
+(cache hits, pool occupancy...) are not duplicated here; they are read at
+scrape time by collectors registered with ``REGISTRY.add_collector``.
+"""
+
+import asyncio
+import bisect
+import functools
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+M = TypeVar("M", bound="_Metric")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans in-process stages (sub-millisecond) to LLM calls (tens of s)
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Sample(NamedTuple):
+    """One exposed value of a collected metric."""
+
+    name: str
+    kind: str
+    help: str
+    labels: Dict[str, str]
+    value: float
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """Base class of labelled metrics."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Exposition lines of the metric, its header included."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Increase the counter for a label combination."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Current value for a label combination."""
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed bucket bounds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: bucket counts (the last is +Inf), sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        """Number of observations for a label combination."""
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(c), s[0]) for key, (c, s) in self._series.items()]
+        lines = self.header()
+        for key, counts, total in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            suffix = _format_labels(labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics and scrape-time collectors rendered on ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def register(self, metric: M) -> M:
+        """Add a metric to the exposition."""
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Add a function producing samples at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        seen = set()
+        for collector in self._collectors:
+            for sample in collector():
+                if sample.name not in seen:
+                    seen.add(sample.name)
+                    lines.append(f"# HELP {sample.name} {sample.help}")
+                    lines.append(f"# TYPE {sample.name} {sample.kind}")
+                lines.append(
+                    f"{sample.name}{_format_labels(sample.labels)} "
+                    f"{_format_value(sample.value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "boa_stage_duration_seconds",
+        "Duration of analysis pipeline stages",
+        ["stage"],
+    )
+)
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "boa_http_request_duration_seconds",
+        "Duration of HTTP requests until the response starts",
+        ["method", "route", "status"],
+    )
+)
+ERRORS = REGISTRY.register(
+    Counter("boa_errors_total", "Errors by component", ["component"])
+)
+
+# Spans kept per request; later stages are only counted
+MAX_SPANS_PER_REQUEST = 512
+
+
+@dataclass
+class StageSpan:
+    """One timed stage within a request."""
+
+    name: str
+    start: float
+    duration: float
+    detail: Optional[str] = None
+
+
+class RequestTrace:
+    """Stage timeline and annotations of the request being served."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.spans: List[StageSpan] = []
+        self.annotations: Dict[str, Any] = {}
+        self.dropped_spans = 0
+
+    def add(self, name: str, seconds: float, detail: Optional[str] = None) -> None:
+        """Add a stage that has just finished."""
+        if len(self.spans) >= MAX_SPANS_PER_REQUEST:
+            self.dropped_spans += 1
+            return
+        start = time.perf_counter() - seconds - self.started
+        self.spans.append(StageSpan(name, max(start, 0.0), seconds, detail))
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar(
+    "request_trace", default=None
+)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """The trace of the request being served, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def request_trace() -> Iterator[RequestTrace]:
+    """Trace a request, reusing the enclosing trace if there is one."""
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def annotate(key: str, value: Any) -> None:
+    """Attach a value (e.g. a prompt size) to the current request's trace."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotations[key] = value
+
+
+def record_stage(name: str, seconds: float, detail: Optional[str] = None) -> None:
+    """Record a stage duration measured elsewhere."""
+    STAGE_SECONDS.observe(seconds, name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds, detail)
+
+
+@contextmanager
+def stage(name: str, detail: Optional[str] = None) -> Iterator[None]:
+    """
+    Time a block as a pipeline stage.
+
+    Args:
+        name: Stage name, used as the histogram label and Server-Timing entry
+        detail: What the stage worked on, kept in the request timeline only
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started, detail)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator timing every call of a sync or async function as a stage."""
+
+    def decorate(func: F) -> F:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with stage(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def server_timing(timings: Iterable[Tuple[str, float]], total: float) -> str:
+    """
+    Format a Server-Timing header value.
+
+    Repeated stages (e.g. several MCP fetches) are summed into one entry.
+
+    Args:
+        timings: (stage, seconds) pairs recorded during the request
+        total: Seconds from request start to response start
+
+    Returns:
+        Header value such as ``parse_ticket;dur=0.4, total;dur=812.3``
+    """
+    durations: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for name, seconds in timings:
+        durations[name] = durations.get(name, 0.0) + seconds
+        counts[name] = counts.get(name, 0) + 1
+    entries = [
+        f"{name};dur={seconds * 1000:.1f}"
+        + (f';desc="x{counts[name]}"' if counts[name] > 1 else "")
+        for name, seconds in durations.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request durations and Server-Timing."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        enabled: Optional[bool] = None,
+        server_timing: Optional[bool] = None,
+    ) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            enabled: Whether to record anything (defaults to ``METRICS_ENABLED``)
+            server_timing: Whether to add the ``Server-Timing`` header
+                (defaults to ``METRICS_SERVER_TIMING``)
+        """
+        self.app = app
+        self.enabled = enabled
+        self.server_timing = server_timing
+
+    def _configure(self) -> None:
+        """Read unset options from the settings, at the first request."""
+        settings = get_settings()
+        if self.enabled is None:
+            self.enabled = settings.METRICS_ENABLED
+        if self.server_timing is None:
+            self.server_timing = settings.METRICS_SERVER_TIMING
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.enabled is None or self.server_timing is None:
+            self._configure()
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        with request_trace() as trace:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    elapsed = time.perf_counter() - trace.started
+                    route = scope.get("route")
+                    REQUEST_SECONDS.observe(
+                        elapsed,
+                        scope["method"],
+                        getattr(route, "path", "unmatched"),
+                        str(message["status"]),
+                    )
+                    if self.server_timing:
+                        timings = [(span.name, span.duration) for span in trace.spans]
+                        headers = MutableHeaders(scope=message)
+                        headers.append("Server-Timing", server_timing(timings, elapsed))
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
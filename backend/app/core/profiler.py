@@ -0,0 +1,344 @@
+"""
+Slow-request capture and event-loop stall detection (opt-in).
+
+While ``PROFILER_ENABLED`` is set:
+
+- every HTTP request is traced (see ``app.core.metrics``); a request that
+  takes longer than ``PROFILER_SLOW_REQUEST_SECONDS`` is captured with its
+  full stage timeline (ticket parsing, each MCP call, prompt size, LLM
+  queue wait and generation) into a bounded ring buffer;
+- a sampler thread records the event loop thread's Python stack every
+  ``PROFILER_SAMPLE_INTERVAL_SECONDS`` while requests are in flight, and
+  slow captures include the most frequent stacks. All requests share one
+  loop, so samples are attributed to every request in flight at the time;
+- a heartbeat scheduled on the loop is watched from the same thread. When
+  it is late by more than ``PROFILER_STALL_THRESHOLD_SECONDS`` something
+  is blocking the loop (e.g. a synchronous SDK call in a coroutine): the
+  blocking stack and coroutine are recorded along with the stall length.
+
+Captures are served by ``GET /api/admin/slow-requests``.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from types import FrameType
+from typing import Any, Deque, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.metrics import RequestTrace, request_trace
+
+logger = logging.getLogger(__name__)
+
+# Frames of the loop waiting for I/O: samples ending here are idle time
+_IDLE_FRAMES = {("selectors.py", "select"), ("base_events.py", "_run_once")}
+_MAX_DEPTH = 48
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _stack(frame: Optional[FrameType]) -> List[FrameType]:
+    """Frames from outermost to innermost, limited to the innermost ones."""
+    frames: List[FrameType] = []
+    while frame is not None and len(frames) < _MAX_DEPTH:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _is_idle(frames: List[FrameType]) -> bool:
+    if not frames:
+        return True
+    code = frames[-1].f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+def _blocking_coroutine(frames: List[FrameType]) -> Optional[str]:
+    """Name of the innermost coroutine on the stack."""
+    for frame in reversed(frames):
+        if frame.f_code.co_flags & inspect.CO_COROUTINE:
+            module = frame.f_globals.get("__name__", "?")
+            name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            return f"{module}.{name}"
+    return None
+
+
+class _ActiveRequest:
+    """A request in flight and the loop samples taken during it."""
+
+    def __init__(self, method: str, path: str, trace: RequestTrace) -> None:
+        self.method = method
+        self.path = path
+        self.trace = trace
+        self.started_at = time.time()
+        self.samples: Counter = Counter()
+        self.idle_samples = 0
+        self.stalls: List[Dict[str, Any]] = []
+
+
+class LoopProfiler:
+    """Samples the event loop thread and keeps captures of slow requests."""
+
+    def __init__(
+        self,
+        slow_request_seconds: float = 5.0,
+        sample_interval: float = 0.01,
+        stall_threshold: float = 0.1,
+        max_captures: int = 50,
+        max_stacks: int = 20,
+    ) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            slow_request_seconds: Requests at least this long are captured
+            sample_interval: Seconds between stack samples and heartbeats
+            stall_threshold: Loop blocked this long is reported as a stall
+            max_captures: Slow requests (and stalls) kept
+            max_stacks: Most frequent stacks kept per capture
+        """
+        self.slow_request_seconds = slow_request_seconds
+        self.sample_interval = sample_interval
+        self.stall_threshold = stall_threshold
+        self.max_stacks = max_stacks
+        self.captures: Deque[Dict[str, Any]] = deque(maxlen=max_captures)
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=max_captures)
+        self._active: Dict[int, _ActiveRequest] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._beat = time.monotonic()
+        self._pending_stall: Optional[Dict[str, Any]] = None
+        self._requests = 0
+        self._samples = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampler is attached to a loop."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Attach to the running loop (call from the loop thread)."""
+        loop = asyncio.get_running_loop()
+        if self.running and self._loop is loop:
+            return
+        self.stop()
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._beat = time.monotonic()
+        loop.call_soon(self._heartbeat, loop, self._stop)
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="loop-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _heartbeat(
+        self, loop: asyncio.AbstractEventLoop, stop: threading.Event
+    ) -> None:
+        """Runs on the loop; a late heartbeat means the loop was blocked."""
+        if stop.is_set():
+            return
+        now = time.monotonic()
+        with self._lock:
+            stall, self._pending_stall = self._pending_stall, None
+            blocked = now - self._beat
+            self._beat = now
+        if stall is not None:
+            stall["duration_ms"] = round(blocked * 1000, 1)
+            self._record_stall(stall)
+        loop.call_later(self.sample_interval, self._heartbeat, loop, stop)
+
+    def _record_stall(self, stall: Dict[str, Any]) -> None:
+        logger.warning(
+            f"Event loop blocked for {stall['duration_ms']:.0f} ms "
+            f"by {stall['coroutine'] or 'non-coroutine code'}"
+        )
+        with self._lock:
+            stall["requests"] = [f"{a.method} {a.path}" for a in self._active.values()]
+            self.stalls.append(stall)
+            for active in self._active.values():
+                active.stalls.append(stall)
+
+    def _run(self, stop: threading.Event) -> None:
+        """Sampler thread: stack samples and stall detection."""
+        while not stop.wait(self.sample_interval):
+            with self._lock:
+                lag = time.monotonic() - self._beat
+                stalled = lag > self.stall_threshold and self._pending_stall is None
+                sampling = bool(self._active)
+            if not (stalled or sampling):
+                continue
+            frame = sys._current_frames().get(self._loop_thread or -1)
+            frames = _stack(frame)
+            del frame
+            if stalled:
+                stall = {
+                    "started_at": time.time() - lag,
+                    "coroutine": _blocking_coroutine(frames),
+                    "stack": [_label(f) for f in frames],
+                }
+                with self._lock:
+                    self._pending_stall = stall
+            if sampling:
+                idle = _is_idle(frames)
+                folded = "" if idle else ";".join(_label(f) for f in frames)
+                with self._lock:
+                    self._samples += 1
+                    for active in self._active.values():
+                        if idle:
+                            active.idle_samples += 1
+                        else:
+                            active.samples[folded] += 1
+
+    def begin(self, method: str, path: str, trace: RequestTrace) -> _ActiveRequest:
+        """Start tracking a request."""
+        active = _ActiveRequest(method, path, trace)
+        with self._lock:
+            self._active[id(active)] = active
+            self._requests += 1
+        return active
+
+    def end(self, active: _ActiveRequest, status: Optional[int]) -> None:
+        """Finish a request, capturing it if it was slow."""
+        duration = time.perf_counter() - active.trace.started
+        with self._lock:
+            self._active.pop(id(active), None)
+        if duration < self.slow_request_seconds:
+            return
+        trace = active.trace
+        sampled = sum(active.samples.values())
+        capture = {
+            "method": active.method,
+            "path": active.path,
+            "status": status,
+            "started_at": active.started_at,
+            "duration_ms": round(duration * 1000, 1),
+            "stages": [
+                {
+                    "name": span.name,
+                    "start_ms": round(span.start * 1000, 1),
+                    "duration_ms": round(span.duration * 1000, 1),
+                    "detail": span.detail,
+                }
+                for span in sorted(trace.spans, key=lambda span: span.start)
+            ],
+            "dropped_stages": trace.dropped_spans,
+            "annotations": dict(trace.annotations),
+            "loop_samples": {
+                "busy": sampled,
+                "idle": active.idle_samples,
+                "top_stacks": [
+                    {"stack": stack, "count": count}
+                    for stack, count in active.samples.most_common(self.max_stacks)
+                ],
+            },
+            "stalls": list(active.stalls),
+        }
+        logger.info(
+            f"Slow request {active.method} {active.path} took "
+            f"{capture['duration_ms']:.0f} ms"
+        )
+        with self._lock:
+            self.captures.append(capture)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get profiler state and counters."""
+        with self._lock:
+            return {
+                "running": self.running,
+                "requests": self._requests,
+                "in_flight": len(self._active),
+                "samples": self._samples,
+                "captures": len(self.captures),
+                "stalls": len(self.stalls),
+                "slow_request_seconds": self.slow_request_seconds,
+                "stall_threshold_seconds": self.stall_threshold,
+            }
+
+
+class ProfilerMiddleware:
+    """ASGI middleware feeding requests to the ``LoopProfiler``."""
+
+    def __init__(self, app: ASGIApp, profiler: Optional[LoopProfiler] = None) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            profiler: Profiler to use (defaults to the shared one, if enabled)
+        """
+        self.app = app
+        self._profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self._profiler or get_profiler()
+        if scope["type"] != "http" or profiler is None:
+            await self.app(scope, receive, send)
+            return
+        profiler.start()
+        status: Optional[int] = None
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with request_trace() as trace:
+            active = profiler.begin(scope["method"], scope["path"], trace)
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                profiler.end(active, status)
+
+
+# Singleton instance
+_profiler: Optional[LoopProfiler] = None
+
+
+def get_profiler() -> Optional[LoopProfiler]:
+    """Get or create the shared profiler, or None if profiling is disabled."""
+    global _profiler
+    settings = get_settings()
+    if not settings.PROFILER_ENABLED:
+        return None
+    if _profiler is None:
+        _profiler = LoopProfiler(
+            slow_request_seconds=settings.PROFILER_SLOW_REQUEST_SECONDS,
+            sample_interval=settings.PROFILER_SAMPLE_INTERVAL_SECONDS,
+            stall_threshold=settings.PROFILER_STALL_THRESHOLD_SECONDS,
+            max_captures=settings.PROFILER_MAX_CAPTURES,
+        )
+    return _profiler
+
+
+def stop_profiler() -> None:
+    """Stop the shared profiler's sampler thread (app shutdown)."""
+    if _profiler is not None:
+        _profiler.stop()
+
+
+def get_profiler_stats() -> Optional[Dict[str, Any]]:
+    """Get profiler statistics without creating the profiler."""
+    return _profiler.stats() if _profiler is not None else None
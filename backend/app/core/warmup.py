@@ -0,0 +1,164 @@
+"""
+Connection pre-warming and readiness.
+
+Nothing heavy happens at import time; the Gemini SDK is imported and the
+clients are built by the startup hook. With ``PREWARM_ENABLED`` a
+background task then opens connections to the MCP server (DNS, TCP, TLS)
+and makes a first metadata RPC per model, so the first tickets a freshly
+scaled-out worker receives do not pay for them.
+
+``/ready`` answers 503 until that has finished, while ``/health`` only
+reports that the process is alive. A warm-up step that fails or times out
+is reported but still lets the worker become ready: an upstream outage
+should not take every worker out of rotation.
+"""
+
+import asyncio
+import logging
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.llm.routing import FAST, LARGE, get_model_router
+from app.mcp.client import get_mcp_client
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Whether the worker has finished warming up, and how that went."""
+
+    def __init__(self) -> None:
+        self.ready = False
+        self._started = time.monotonic()
+        self._ready_after: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, step: str, seconds: float, error: Optional[str] = None) -> None:
+        """Record the outcome of a warm-up step."""
+        self.steps[step] = {
+            "ok": error is None,
+            "duration_ms": round(seconds * 1000, 1),
+            "error": error,
+        }
+
+    def mark_ready(self) -> None:
+        """Start accepting traffic."""
+        if not self.ready:
+            self.ready = True
+            self._ready_after = time.monotonic() - self._started
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness report served by ``/ready``."""
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "ready": self.ready,
+            "ready_after_ms": (
+                round(self._ready_after * 1000, 1)
+                if self._ready_after is not None
+                else None
+            ),
+            "warmup": dict(self.steps),
+        }
+
+
+async def _run_step(
+    readiness: Readiness,
+    name: str,
+    step: Callable[[], Awaitable[Any]],
+    timeout: float,
+) -> None:
+    started = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        await asyncio.wait_for(step(), timeout)
+    except asyncio.TimeoutError:
+        error = f"timed out after {timeout:.1f}s"
+    except Exception as e:
+        error = str(e)
+    elapsed = time.perf_counter() - started
+    readiness.record(name, elapsed, error)
+    if error is None:
+        logger.info(f"Warmed up {name} in {elapsed * 1000:.0f} ms")
+    else:
+        logger.warning(f"Warm-up of {name} failed: {error}")
+
+
+def _warmup_steps() -> List[Tuple[str, Callable[[], Awaitable[Any]]]]:
+    """The connections to open: the MCP pool and one RPC per distinct model."""
+    settings = get_settings()
+    mcp = get_mcp_client()
+    steps: List[Tuple[str, Callable[[], Awaitable[Any]]]] = [
+        ("mcp", lambda: mcp.warm(settings.PREWARM_MCP_CONNECTIONS))
+    ]
+    router = get_model_router()
+    clients = {id(client): client for client in map(router.client, (LARGE, FAST))}
+    loop = asyncio.get_running_loop()
+    for client in clients.values():
+        # The SDK call blocks; keep it off the loop (and out of the LLM pool)
+        warm = partial(loop.run_in_executor, None, client.warm)
+        steps.append((f"llm:{client.model_name}", warm))
+    return steps
+
+
+async def prewarm(readiness: Readiness) -> None:
+    """
+    Warm up every upstream connection concurrently, then mark ready.
+
+    Args:
+        readiness: Readiness state to report into
+    """
+    timeout = get_settings().PREWARM_TIMEOUT_SECONDS
+    try:
+        await asyncio.gather(
+            *(
+                _run_step(readiness, name, step, timeout)
+                for name, step in _warmup_steps()
+            )
+        )
+    except Exception as e:
+        logger.error(f"Error warming up connections: {str(e)}")
+    finally:
+        readiness.mark_ready()
+
+
+# Singleton instances
+_readiness = Readiness()
+_warmup_task: Optional["asyncio.Task[None]"] = None
+
+
+def get_readiness() -> Readiness:
+    """Get the worker's readiness state."""
+    return _readiness
+
+
+def start_warmup() -> Readiness:
+    """
+    Begin warming up in the background (app startup, after the clients exist).
+
+    Without ``PREWARM_ENABLED`` the worker is ready immediately.
+
+    Returns:
+        The readiness state of this startup
+    """
+    global _readiness, _warmup_task
+    _readiness = Readiness()
+    if get_settings().PREWARM_ENABLED:
+        _warmup_task = asyncio.ensure_future(prewarm(_readiness))
+    else:
+        _readiness.mark_ready()
+    return _readiness
+
+
+async def stop_warmup() -> None:
+    """Cancel an unfinished warm-up (app shutdown)."""
+    global _warmup_task
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+        try:
+            await _warmup_task
+        except asyncio.CancelledError:
+            pass
+    _warmup_task = None
+    _readiness.ready = False
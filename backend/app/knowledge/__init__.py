@@ -0,0 +1,3 @@
+"""
+Knowledge base of past tickets and stacktraces for similar-incident search.
+"""
@@ -0,0 +1,157 @@
+"""
+Embedding functions for the knowledge base.
+
+``HashingEmbedder`` runs fully offline with no model download and is the
+default; ``SentenceTransformerEmbedder`` uses a local SentenceTransformers
+model when the optional ``sentence-transformers`` package is installed.
+"""
+
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import List, Sequence
+
+import numpy as np
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+_CAMEL_PARTS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+class Embedder(ABC):
+    """Maps texts to L2-normalized float32 vectors."""
+
+    #: Identifies the embedding space; stored vectors are only comparable
+    #: with vectors from an embedder with the same name and dimension
+    name: str = ""
+    dimension: int = 0
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Array of shape ``(len(texts), dimension)`` with unit-length rows
+        """
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, leaving all-zero rows as they are."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    normalized: np.ndarray = (matrix / norms).astype(np.float32, copy=False)
+    return normalized
+
+
+def _tokens(text: str) -> List[str]:
+    """Lowercased words plus their camelCase and snake_case parts."""
+    tokens = []
+    for word in _WORD.findall(text):
+        if word.isdigit():
+            # Line numbers and ids make unrelated incidents look alike
+            continue
+        lowered = word.lower()
+        tokens.append(lowered)
+        parts = [p.lower() for p in _CAMEL_PARTS.findall(word) if not p.isdigit()]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if len(p) > 1)
+    return tokens
+
+
+class HashingEmbedder(Embedder):
+    """
+    Feature-hashing bag of words and word bigrams.
+
+    Deterministic, dependency-free and fast, which makes it suitable for
+    tests and for deployments without a local embedding model. Identifiers
+    are split on camelCase and underscores so ``UserAuthService`` and
+    ``user_auth`` share features.
+    """
+
+    def __init__(self, dimension: int = 384) -> None:
+        """
+        Initialize the embedder.
+
+        Args:
+            dimension: Number of hash buckets (vector size)
+        """
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def _features(self, text: str) -> np.ndarray:
+        tokens = _tokens(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        hashes = np.fromiter(
+            (zlib.crc32(feature.encode("utf-8")) for feature in features),
+            dtype=np.uint32,
+            count=len(features),
+        )
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        if not len(hashes):
+            return vector
+        weights = np.where(np.arange(len(hashes)) < len(tokens), 1.0, 0.5)
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+        np.add.at(vector, hashes % self.dimension, weights * signs)
+        # Sublinear term frequency so repeated log lines do not dominate
+        damped: np.ndarray = np.sign(vector) * np.log1p(np.abs(vector))
+        return damped
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return _normalize(np.stack([self._features(text) for text in texts]))
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Embeddings from a local SentenceTransformers model."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2") -> None:
+        """
+        Load the model.
+
+        Args:
+            model_name: SentenceTransformers model name or local path
+
+        Raises:
+            ImportError: If ``sentence-transformers`` is not installed
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "sentence-transformers is required for this embedder; "
+                "install boaserver with the 'embeddings' extra"
+            ) from e
+        self.model = SentenceTransformer(model_name)
+        self.dimension = int(self.model.get_sentence_embedding_dimension())
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectors = self.model.encode(list(texts), convert_to_numpy=True)
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+def create_embedder(spec: str, dimension: int = 384) -> Embedder:
+    """
+    Create an embedder from a settings string.
+
+    Args:
+        spec: ``hashing`` or ``sentence-transformers[:model]``
+        dimension: Vector size for the hashing embedder
+
+    Returns:
+        The embedder
+    """
+    kind, _, model = spec.partition(":")
+    if kind == "hashing":
+        return HashingEmbedder(dimension)
+    if kind == "sentence-transformers":
+        return SentenceTransformerEmbedder(model or "all-MiniLM-L6-v2")
+    raise ValueError(f"Unknown embedder: {spec}")
@@ -0,0 +1,347 @@
+"""
+Stacktrace fingerprints for recognising repeat incidents.
+
+A fingerprint identifies "the same failure": the exception type and the
+top frames of a trace and its causes, with everything that varies between
+occurrences removed (line numbers, hex addresses, numeric ids, UUIDs and
+generated lambda/proxy class suffixes). The exception message is left out
+because it usually embeds request-specific values.
+
+``FingerprintIndex`` maps fingerprints to the analysis (and, once known,
+the resolution) of the first ticket that produced them. Entries are kept in
+a dict for constant-time lookups and written through to SQLite so they
+survive restarts.
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Frames per trace that take part in the fingerprint
+DEFAULT_MAX_FRAMES = 8
+# Causes per trace that take part in the fingerprint
+MAX_CAUSES = 3
+
+_UUID = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+_HEX = re.compile(r"0x[0-9a-f]+|\b[0-9a-f]{8,}\b", re.IGNORECASE)
+# Generated classes: Foo$$Lambda$123/0x..., Foo$1, $Proxy12, GeneratedMethodAccessor3
+_GENERATED = re.compile(
+    r"\$\$Lambda\$[^.\s(]*|\$\d+|\$Proxy\d+|(?<=Accessor)\d+|\$\$EnhancerBy\w+"
+)
+_NUMBER = re.compile(r"\d+")
+
+
+def normalize_symbol(symbol: Optional[str]) -> str:
+    """Strip occurrence-specific parts from a function, file or type name."""
+    if not symbol:
+        return ""
+    symbol = _UUID.sub("<uuid>", symbol)
+    symbol = _GENERATED.sub("$?", symbol)
+    symbol = _HEX.sub("<hex>", symbol)
+    return _NUMBER.sub("#", symbol)
+
+
+def _file_name(path: Optional[str]) -> str:
+    """Last path component; checkout locations differ between hosts."""
+    if not path:
+        return ""
+    return path.replace("\\", "/").rsplit("/", 1)[-1]
+
+
+def fingerprint_parts(
+    trace: Dict[str, Any], max_frames: int = DEFAULT_MAX_FRAMES
+) -> List[str]:
+    """
+    Normalized components of a parsed stacktrace, cause chain included.
+
+    Args:
+        trace: A trace dictionary from ``parse_ticket``'s ``stacktraces``
+        max_frames: Frames per trace to include
+
+    Returns:
+        The strings the fingerprint is computed from
+    """
+    parts = []
+    current: Optional[Dict[str, Any]] = trace
+    depth = 0
+    while current is not None and depth <= MAX_CAUSES:
+        exception_type = normalize_symbol(current.get("exception_type"))
+        parts.append(f"{current.get('language')}:{exception_type}")
+        for frame in current.get("frames", [])[:max_frames]:
+            function = normalize_symbol(frame.get("function"))
+            file_name = normalize_symbol(_file_name(frame.get("file")))
+            parts.append(f"{function}@{file_name}")
+        current = current.get("cause")
+        depth += 1
+    return parts
+
+
+def _has_frames(trace: Dict[str, Any]) -> bool:
+    """Whether a trace or one of its causes has at least one frame."""
+    current: Optional[Dict[str, Any]] = trace
+    depth = 0
+    while current is not None and depth <= MAX_CAUSES:
+        if current.get("frames"):
+            return True
+        current = current.get("cause")
+        depth += 1
+    return False
+
+
+def fingerprint_trace(
+    trace: Dict[str, Any], max_frames: int = DEFAULT_MAX_FRAMES
+) -> Optional[str]:
+    """
+    Fingerprint a parsed stacktrace.
+
+    Args:
+        trace: A trace dictionary from ``parse_ticket``'s ``stacktraces``
+        max_frames: Frames per trace to include
+
+    Returns:
+        Hex fingerprint, or None if the trace has no frames: an exception
+        type alone ("KeyError") would match unrelated incidents
+    """
+    if not _has_frames(trace):
+        return None
+    digest = hashlib.sha256("\n".join(fingerprint_parts(trace, max_frames)).encode())
+    return digest.hexdigest()[:32]
+
+
+def fingerprint_ticket(
+    parsed: Dict[str, Any], max_frames: int = DEFAULT_MAX_FRAMES
+) -> Optional[str]:
+    """Fingerprint of a parsed ticket's first stacktrace, or None."""
+    for trace in parsed.get("stacktraces", []):
+        fingerprint = fingerprint_trace(trace, max_frames)
+        if fingerprint:
+            return fingerprint
+    return None
+
+
+@dataclass
+class KnownIncident:
+    """The stored answer for a fingerprint."""
+
+    fingerprint: str
+    ticket_id: str
+    analysis: str
+    resolution: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    hits: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the entry to a plain dictionary."""
+        return {
+            "fingerprint": self.fingerprint,
+            "ticket_id": self.ticket_id,
+            "resolution": self.resolution,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "hits": self.hits,
+        }
+
+
+class FingerprintIndex:
+    """Fingerprint to known-incident map, held in memory and persisted to SQLite."""
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        """
+        Open the index, loading all stored entries.
+
+        Args:
+            db_path: SQLite file (None keeps the index in memory only)
+        """
+        self._lock = threading.Lock()
+        self._entries: Dict[str, KnownIncident] = {}
+        self._by_ticket: Dict[str, str] = {}
+        self._lookups = 0
+        self._hits = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                " fingerprint TEXT PRIMARY KEY,"
+                " ticket_id TEXT NOT NULL,"
+                " analysis TEXT NOT NULL,"
+                " resolution TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.commit()
+            for row in self._conn.execute(
+                "SELECT fingerprint, ticket_id, analysis, resolution,"
+                " created_at, updated_at, hits FROM fingerprints"
+            ):
+                entry = KnownIncident(*row)
+                self._entries[entry.fingerprint] = entry
+                self._by_ticket[entry.ticket_id] = entry.fingerprint
+
+    def _write(self, entry: KnownIncident) -> None:
+        """Persist an entry (caller holds the lock)."""
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (fingerprint, ticket_id,"
+                " analysis, resolution, created_at, updated_at, hits)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.fingerprint,
+                    entry.ticket_id,
+                    entry.analysis,
+                    entry.resolution,
+                    entry.created_at,
+                    entry.updated_at,
+                    entry.hits,
+                ),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error writing fingerprint index: {str(e)}")
+
+    def lookup(self, fingerprint: str) -> Optional[KnownIncident]:
+        """
+        Look up a fingerprint, counting the hit or miss.
+
+        Hit counts are persisted with the next write to the entry.
+        """
+        with self._lock:
+            self._lookups += 1
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                self._hits += 1
+                entry.hits += 1
+            return entry
+
+    def store(
+        self,
+        fingerprint: str,
+        ticket_id: str,
+        analysis: str,
+        resolution: Optional[str] = None,
+    ) -> KnownIncident:
+        """
+        Store (or refresh) the answer for a fingerprint.
+
+        A refreshed analysis keeps the original ticket and any known
+        resolution unless new ones are given.
+
+        Args:
+            fingerprint: Fingerprint from ``fingerprint_ticket``
+            ticket_id: Ticket the analysis was produced for
+            analysis: LLM analysis
+            resolution: How the incident was resolved, if known
+
+        Returns:
+            The stored entry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                entry = KnownIncident(
+                    fingerprint, ticket_id, analysis, resolution, now, now
+                )
+                self._entries[fingerprint] = entry
+                self._by_ticket[ticket_id] = fingerprint
+            else:
+                entry.analysis = analysis
+                entry.resolution = resolution or entry.resolution
+                entry.updated_at = now
+            self._write(entry)
+            return entry
+
+    def set_resolution(
+        self, ticket_id: str, resolution: str
+    ) -> Optional[KnownIncident]:
+        """
+        Record how the incident first seen in a ticket was resolved.
+
+        Returns:
+            The updated entry, or None if the ticket has no fingerprint entry
+        """
+        with self._lock:
+            fingerprint = self._by_ticket.get(ticket_id)
+            entry = self._entries.get(fingerprint) if fingerprint else None
+            if entry is None:
+                return None
+            entry.resolution = resolution
+            entry.updated_at = time.time()
+            self._write(entry)
+            return entry
+
+    def close(self) -> None:
+        """Persist hit counts and close the database."""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.executemany(
+                    "UPDATE fingerprints SET hits = ? WHERE fingerprint = ?",
+                    [(e.hits, e.fingerprint) for e in self._entries.values()],
+                )
+                self._conn.commit()
+            finally:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit rate and size counters."""
+        with self._lock:
+            lookups, hits = self._lookups, self._hits
+            return {
+                "entries": len(self._entries),
+                "lookups": lookups,
+                "hits": hits,
+                "misses": lookups - hits,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "persistent": self._conn is not None,
+            }
+
+
+# Singleton instance
+_fingerprint_index: Optional[FingerprintIndex] = None
+
+
+def get_fingerprint_index() -> Optional[FingerprintIndex]:
+    """Get the fingerprint index, or None if fingerprinting is disabled."""
+    global _fingerprint_index
+    settings = get_settings()
+    if not settings.FINGERPRINT_ENABLED:
+        return None
+    if _fingerprint_index is None:
+        _fingerprint_index = FingerprintIndex(settings.FINGERPRINT_DB_PATH)
+    return _fingerprint_index
+
+
+def close_fingerprint_index() -> None:
+    """Persist and close the fingerprint index (app shutdown)."""
+    global _fingerprint_index
+    if _fingerprint_index is not None:
+        _fingerprint_index.close()
+        _fingerprint_index = None
+
+
+def get_fingerprint_stats() -> Optional[Dict[str, Any]]:
+    """Get fingerprint index statistics without opening it."""
+    return _fingerprint_index.stats() if _fingerprint_index is not None else None
@@ -0,0 +1,193 @@
+"""
+Similar-incident lookup and recording for the ticket analysis pipeline.
+
+Tickets are stored as ``ticket`` documents keyed by ticket ID; each of their
+stacktraces is stored as a ``stacktrace`` document keyed ``<ticket ID>#<n>``
+with line numbers stripped, so the same failure at a slightly different
+line still matches.
+"""
+
+import asyncio
+import functools
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.knowledge.embeddings import create_embedder
+from app.knowledge.store import KnowledgeBase, KnowledgeItem
+
+logger = logging.getLogger(__name__)
+
+# Characters of the stored analysis kept as the incident summary
+SUMMARY_CHARS = 600
+
+
+def stacktrace_text(trace: Dict[str, Any]) -> str:
+    """Text to embed for a parsed stacktrace: exception and frame names."""
+    lines = [f"{trace.get('exception_type') or ''}: {trace.get('message') or ''}"]
+    for frame in trace.get("frames", []):
+        lines.append(f"at {frame.get('function') or ''} {frame.get('file') or ''}")
+    return "\n".join(lines)
+
+
+def incident_items(
+    ticket_id: str,
+    ticket_title: str,
+    ticket_description: str,
+    parsed: Dict[str, Any],
+    analysis: Optional[str] = None,
+) -> List[KnowledgeItem]:
+    """
+    Build the knowledge base documents for an analyzed ticket.
+
+    Args:
+        ticket_id: Ticket identifier
+        ticket_title: Ticket title or summary
+        ticket_description: Detailed ticket description
+        parsed: Output of ``parse_ticket``
+        analysis: LLM analysis to keep as the incident summary
+
+    Returns:
+        One ticket document and one document per stacktrace
+    """
+    metadata = {
+        "ticket_id": ticket_id,
+        "category": parsed.get("category", "unknown"),
+        "summary": (analysis or "")[:SUMMARY_CHARS],
+    }
+    items = [
+        KnowledgeItem(
+            kind="ticket",
+            ref=ticket_id,
+            text=f"{ticket_title}\n{ticket_description}",
+            title=ticket_title,
+            metadata=metadata,
+        )
+    ]
+    for index, trace in enumerate(parsed.get("stacktraces", [])):
+        items.append(
+            KnowledgeItem(
+                kind="stacktrace",
+                ref=f"{ticket_id}#{index}",
+                text=stacktrace_text(trace),
+                title=ticket_title,
+                metadata=metadata,
+            )
+        )
+    return items
+
+
+def format_similar_incidents(results: List[Dict[str, Any]]) -> str:
+    """Render similar-incident results as prompt context."""
+    if not results:
+        return ""
+    lines = ["Similar past incidents:"]
+    for result in results:
+        metadata = result.get("metadata", {})
+        line = (
+            f"- {metadata.get('ticket_id', result['ref'])}: {result['title']} "
+            f"(similarity {result['score']:.2f}, matched {result['kind']})"
+        )
+        if metadata.get("summary"):
+            line += f"\n  Previous analysis: {metadata['summary']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _dedupe_by_ticket(results: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """Keep the best result per past ticket."""
+    seen = set()
+    unique = []
+    for result in sorted(results, key=lambda r: r["score"], reverse=True):
+        ticket = result.get("metadata", {}).get("ticket_id", result["ref"])
+        if ticket not in seen:
+            seen.add(ticket)
+            unique.append(result)
+    return unique[:k]
+
+
+async def find_similar_incidents(
+    ticket_id: str,
+    ticket_title: str,
+    ticket_description: str,
+    parsed: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """
+    Find past incidents similar to a ticket, by text and by stacktrace.
+
+    Never raises; returns an empty list if the knowledge base is disabled
+    or fails.
+
+    Args:
+        ticket_id: Ticket identifier (excluded from the results)
+        ticket_title: Ticket title or summary
+        ticket_description: Detailed ticket description
+        parsed: Output of ``parse_ticket``
+
+    Returns:
+        The best match per past ticket, most similar first
+    """
+    kb = get_knowledge_base()
+    if kb is None:
+        return []
+    settings = get_settings()
+    texts = [f"{ticket_title}\n{ticket_description}"]
+    texts += [stacktrace_text(trace) for trace in parsed.get("stacktraces", [])]
+    search = functools.partial(
+        kb.search_many,
+        texts,
+        k=settings.KNOWLEDGE_TOP_K,
+        exclude_refs=[ticket_id],
+        min_score=settings.KNOWLEDGE_MIN_SCORE,
+    )
+    try:
+        loop = asyncio.get_running_loop()
+        batches = await loop.run_in_executor(None, search)
+    except Exception as e:
+        logger.error(f"Error searching knowledge base: {str(e)}")
+        return []
+    results = [result for batch in batches for result in batch]
+    return _dedupe_by_ticket(results, settings.KNOWLEDGE_TOP_K)
+
+
+async def record_incident(
+    ticket_id: str,
+    ticket_title: str,
+    ticket_description: str,
+    parsed: Dict[str, Any],
+    analysis: Optional[str] = None,
+) -> None:
+    """Store an analyzed ticket in the knowledge base, if it is enabled."""
+    kb = get_knowledge_base()
+    if kb is None:
+        return
+    items = incident_items(
+        ticket_id, ticket_title, ticket_description, parsed, analysis
+    )
+    try:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, kb.add_many, items)
+    except Exception as e:
+        logger.error(f"Error recording incident {ticket_id}: {str(e)}")
+
+
+# Singleton instance
+_knowledge_base: Optional[KnowledgeBase] = None
+
+
+def get_knowledge_base() -> Optional[KnowledgeBase]:
+    """Get the knowledge base, or None if ``KNOWLEDGE_DIR`` is not set."""
+    global _knowledge_base
+    if _knowledge_base is None:
+        settings = get_settings()
+        if settings.KNOWLEDGE_DIR:
+            embedder = create_embedder(
+                settings.KNOWLEDGE_EMBEDDER, settings.KNOWLEDGE_EMBEDDING_DIM
+            )
+            _knowledge_base = KnowledgeBase(settings.KNOWLEDGE_DIR, embedder)
+    return _knowledge_base
+
+
+def get_knowledge_stats() -> Optional[Dict[str, Any]]:
+    """Get knowledge base statistics without opening it."""
+    return _knowledge_base.stats() if _knowledge_base is not None else None
@@ -0,0 +1,418 @@
+"""
+Knowledge base storage: SQLite metadata plus a memory-mapped embedding matrix.
+
+Embeddings live in one contiguous file of float32 rows (``embeddings.f32``)
+that is memory-mapped read-only, so a similarity search is a handful of
+batched matrix products over the mapped pages rather than one SQLite read
+per stored document. SQLite (``knowledge.sqlite3``) holds the text and
+metadata of each row and is only consulted for the top-k results.
+
+Appending writes new rows to the end of the matrix file and then commits
+their metadata; rows past the last committed one are discarded on open, so
+an interrupted append never leaves the two out of step. Replacing or
+deleting a document only flags its row; the matrix is never rewritten.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.knowledge.embeddings import Embedder
+
+logger = logging.getLogger(__name__)
+
+MATRIX_FILE = "embeddings.f32"
+DATABASE_FILE = "knowledge.sqlite3"
+
+
+@dataclass
+class KnowledgeItem:
+    """A document to store in the knowledge base."""
+
+    kind: str
+    ref: str
+    text: str
+    title: str = ""
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class KnowledgeBase:
+    """Similarity search over stored tickets and stacktraces."""
+
+    def __init__(
+        self, directory: str, embedder: Embedder, batch_rows: int = 16384
+    ) -> None:
+        """
+        Open (and create if needed) a knowledge base.
+
+        Args:
+            directory: Directory holding the matrix and database files
+            embedder: Embedding function; must match the one the knowledge
+                base was created with
+            batch_rows: Matrix rows scored per matrix product
+
+        Raises:
+            ValueError: If the stored embeddings came from another embedder
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.embedder = embedder
+        self.dimension = embedder.dimension
+        self.batch_rows = batch_rows
+        self._matrix_path = os.path.join(directory, MATRIX_FILE)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, DATABASE_FILE), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " row INTEGER PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " ref TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " metadata TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " deleted INTEGER NOT NULL DEFAULT 0);"
+            "CREATE INDEX IF NOT EXISTS documents_ref ON documents (kind, ref);"
+        )
+        self._check_embedder()
+        self._kind_codes: Dict[str, int] = {}
+        self._searches = 0
+        self._search_seconds = 0.0
+        self._load()
+
+    def _check_embedder(self) -> None:
+        """Record the embedder on creation and refuse a different one later."""
+        stored = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        expected = {"embedder": self.embedder.name, "dimension": str(self.dimension)}
+        if not stored:
+            self._conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)", expected.items()
+            )
+            self._conn.commit()
+        elif stored != expected:
+            raise ValueError(
+                f"Knowledge base in {self.directory} was built with {stored}, "
+                f"not {expected}"
+            )
+
+    def _kind_code(self, kind: str) -> int:
+        return self._kind_codes.setdefault(kind, len(self._kind_codes))
+
+    def _load(self) -> None:
+        """Reconcile the matrix file with the database and map it."""
+        row_bytes = self.dimension * 4
+        file_rows = (
+            os.path.getsize(self._matrix_path) // row_bytes
+            if os.path.exists(self._matrix_path)
+            else 0
+        )
+        (db_rows,) = self._conn.execute(
+            "SELECT COALESCE(MAX(row) + 1, 0) FROM documents"
+        ).fetchone()
+        if db_rows > file_rows:
+            logger.error(
+                f"Knowledge base matrix has {file_rows} rows but metadata has "
+                f"{db_rows}; dropping the rows without embeddings"
+            )
+            self._conn.execute("DELETE FROM documents WHERE row >= ?", (file_rows,))
+            self._conn.commit()
+            db_rows = file_rows
+        # Rows written by an append that never committed
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(db_rows * row_bytes)
+
+        self._rows = db_rows
+        self._live = np.zeros(db_rows, dtype=bool)
+        self._kinds = np.zeros(db_rows, dtype=np.int16)
+        for row, kind, deleted in self._conn.execute(
+            "SELECT row, kind, deleted FROM documents"
+        ):
+            self._live[row] = not deleted
+            self._kinds[row] = self._kind_code(kind)
+        self._map()
+
+    def _map(self) -> None:
+        """(Re)map the matrix file after its size changed."""
+        if self._rows:
+            self._matrix: np.ndarray = np.memmap(
+                self._matrix_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(self._rows, self.dimension),
+            )
+        else:
+            self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+
+    def add(
+        self,
+        kind: str,
+        ref: str,
+        text: str,
+        title: str = "",
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Add a document, replacing any earlier one with the same kind and ref.
+
+        Args:
+            kind: Document kind, e.g. ``ticket`` or ``stacktrace``
+            ref: Identifier, unique per kind
+            text: Text to embed
+            title: Short display title
+            metadata: JSON-serializable extra data returned with results
+        """
+        self.add_many([KnowledgeItem(kind, ref, text, title, metadata or {})])
+
+    def add_many(self, items: Sequence[KnowledgeItem]) -> None:
+        """
+        Add documents in one append, replacing earlier versions.
+
+        Args:
+            items: Documents to add
+        """
+        if not items:
+            return
+        # Within a batch, the last version of a document wins
+        items = list({(item.kind, item.ref): item for item in items}.values())
+        vectors = self.embedder.embed([item.text for item in items])
+        now = time.time()
+        with self._lock:
+            start = self._rows
+            with open(self._matrix_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            try:
+                replaced = self._replace_rows([(i.kind, i.ref) for i in items])
+                self._conn.executemany(
+                    "INSERT INTO documents "
+                    "(row, kind, ref, title, text, metadata, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            start + offset,
+                            item.kind,
+                            item.ref,
+                            item.title,
+                            item.text,
+                            json.dumps(item.metadata),
+                            now,
+                        )
+                        for offset, item in enumerate(items)
+                    ],
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                with open(self._matrix_path, "ab") as f:
+                    f.truncate(start * self.dimension * 4)
+                raise
+
+            self._live[replaced] = False
+            self._live = np.concatenate([self._live, np.ones(len(items), dtype=bool)])
+            codes = [self._kind_code(item.kind) for item in items]
+            self._kinds = np.concatenate([self._kinds, np.array(codes, np.int16)])
+            self._rows += len(items)
+            self._map()
+
+    def _replace_rows(self, keys: Iterable[Any]) -> List[int]:
+        """Flag the live rows for ``(kind, ref)`` keys as deleted."""
+        rows: List[int] = []
+        for kind, ref in set(keys):
+            found = self._conn.execute(
+                "SELECT row FROM documents WHERE kind = ? AND ref = ? AND deleted = 0",
+                (kind, ref),
+            ).fetchall()
+            rows.extend(row for (row,) in found)
+        if rows:
+            self._conn.executemany(
+                "UPDATE documents SET deleted = 1 WHERE row = ?",
+                [(row,) for row in rows],
+            )
+        return rows
+
+    def delete(self, kind: str, ref: str) -> bool:
+        """Delete a document. Returns False if it was not stored."""
+        with self._lock:
+            rows = self._replace_rows([(kind, ref)])
+            self._conn.commit()
+            self._live[rows] = False
+            return bool(rows)
+
+    def search(
+        self,
+        text: str,
+        k: int = 5,
+        kinds: Optional[Iterable[str]] = None,
+        exclude_refs: Iterable[str] = (),
+        min_score: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the stored documents most similar to a text.
+
+        Args:
+            text: Query text
+            k: Maximum number of results
+            kinds: Only return these kinds (all if None)
+            exclude_refs: Refs to skip, together with their ``ref#...``
+                sub-documents
+            min_score: Minimum cosine similarity
+
+        Returns:
+            Results with ``kind``, ``ref``, ``title``, ``text``, ``metadata``
+            and ``score``, best first
+        """
+        return self.search_many([text], k, kinds, exclude_refs, min_score)[0]
+
+    def search_many(
+        self,
+        texts: Sequence[str],
+        k: int = 5,
+        kinds: Optional[Iterable[str]] = None,
+        exclude_refs: Iterable[str] = (),
+        min_score: float = 0.0,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Find similar documents for a batch of texts with one pass over the matrix.
+
+        Args:
+            texts: Query texts
+            k: Maximum number of results per query
+            kinds: Only return these kinds (all if None)
+            exclude_refs: Refs to skip, with their ``ref#...`` sub-documents
+            min_score: Minimum cosine similarity
+
+        Returns:
+            One result list per query text
+        """
+        started = time.perf_counter()
+        excluded = set(exclude_refs)
+        queries = self.embedder.embed(list(texts))
+        # Excluded refs may take some of the top slots
+        fetch = k + (16 if excluded else 0)
+        rows, scores = self._top_k(queries, fetch, kinds)
+        results = [
+            self._describe(row_list, score_list, k, excluded, min_score)
+            for row_list, score_list in zip(rows, scores)
+        ]
+        self._searches += len(texts)
+        self._search_seconds += time.perf_counter() - started
+        return results
+
+    def _top_k(
+        self, queries: np.ndarray, k: int, kinds: Optional[Iterable[str]]
+    ) -> Any:
+        """Best ``k`` live rows and their scores for each query row."""
+        with self._lock:
+            matrix, live, kind_codes = self._matrix, self._live, self._kinds
+            if kinds is not None:
+                wanted = [
+                    self._kind_codes[kind] for kind in kinds if kind in self._kind_codes
+                ]
+                live = live & np.isin(kind_codes, wanted)
+        n_queries = len(queries)
+        if not len(matrix) or not k:
+            return [[] for _ in range(n_queries)], [[] for _ in range(n_queries)]
+
+        best_rows = []
+        best_scores = []
+        for start in range(0, len(matrix), self.batch_rows):
+            block = np.asarray(matrix[start : start + self.batch_rows])
+            scores = queries @ block.T
+            scores[:, ~live[start : start + len(block)]] = -np.inf
+            take = min(k, scores.shape[1])
+            top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_rows.append(top + start)
+            best_scores.append(np.take_along_axis(scores, top, axis=1))
+        rows = np.concatenate(best_rows, axis=1)
+        scores = np.concatenate(best_scores, axis=1)
+        order = np.argsort(-scores, axis=1)[:, :k]
+        rows = np.take_along_axis(rows, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        return (
+            [list(r[np.isfinite(s)]) for r, s in zip(rows, scores)],
+            [list(s[np.isfinite(s)]) for s in scores],
+        )
+
+    def _describe(
+        self,
+        rows: List[int],
+        scores: List[float],
+        k: int,
+        excluded: Iterable[str],
+        min_score: float,
+    ) -> List[Dict[str, Any]]:
+        """Fetch metadata for result rows from SQLite."""
+        wanted = [
+            (int(row), float(score))
+            for row, score in zip(rows, scores)
+            if score >= min_score
+        ]
+        if not wanted:
+            return []
+        placeholders = ",".join("?" * len(wanted))
+        with self._lock:
+            found = {
+                row: (kind, ref, title, text, metadata)
+                for row, kind, ref, title, text, metadata in self._conn.execute(
+                    "SELECT row, kind, ref, title, text, metadata FROM documents "
+                    f"WHERE row IN ({placeholders})",
+                    [row for row, _ in wanted],
+                )
+            }
+        results = []
+        for row, score in wanted:
+            kind, ref, title, text, metadata = found[row]
+            if any(ref == x or ref.startswith(f"{x}#") for x in excluded):
+                continue
+            results.append(
+                {
+                    "kind": kind,
+                    "ref": ref,
+                    "title": title,
+                    "text": text,
+                    "metadata": json.loads(metadata),
+                    "score": round(score, 4),
+                }
+            )
+            if len(results) >= k:
+                break
+        return results
+
+    def close(self) -> None:
+        """Close the database and unmap the matrix."""
+        with self._lock:
+            self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+            self._conn.close()
+
+    def __len__(self) -> int:
+        return int(self._live.sum())
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size and search statistics."""
+        with self._lock:
+            rows = self._rows
+            live = int(self._live.sum())
+        return {
+            "documents": live,
+            "rows": rows,
+            "deleted_rows": rows - live,
+            "matrix_bytes": rows * self.dimension * 4,
+            "embedder": self.embedder.name,
+            "searches": self._searches,
+            "avg_search_ms": (
+                round(self._search_seconds / self._searches * 1000, 2)
+                if self._searches
+                else 0.0
+            ),
+        }
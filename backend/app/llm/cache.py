@@ -0,0 +1,189 @@
+"""
+Response cache for LLM completions.
+
+Completions are keyed by a hash of the fully rendered prompt plus the
+generation parameters. A bounded in-memory LRU with TTL sits in front of an
+optional ``CacheBackend``: a SQLite file that survives restarts
+(``LLM_CACHE_DB_PATH``) or the host-wide tier shared by all workers
+(``LLM_CACHE_TIER=shared``, see ``app.core.cache``).
+"""
+
+import hashlib
+import logging
+import sqlite3
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+
+from app.core.cache import (
+    CacheBackend,
+    LRUCache,
+    SQLiteCacheBackend,
+    get_cache_backend,
+    sync_local_tier,
+)
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a rendered prompt so cosmetic differences share a cache key.
+
+    Line endings, trailing whitespace and Unicode composition are normalized;
+    everything else (including indentation inside code) is left untouched.
+    """
+    text = unicodedata.normalize("NFC", prompt)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def make_cache_key(prompt: str, model: str, temperature: float, max_tokens: int) -> str:
+    """
+    Build the cache key for a completion.
+
+    Args:
+        prompt: The fully rendered prompt
+        model: Model name
+        temperature: Sampling temperature
+        max_tokens: Maximum output tokens
+
+    Returns:
+        Hex digest identifying the completion
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{model}\x00{temperature!r}\x00{max_tokens}\x00".encode("utf-8"))
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CompletionCache:
+    """Two-tier completion cache: in-memory LRU in front of optional backend."""
+
+    NAMESPACE = "completions"
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600.0,
+        max_entry_bytes: int = 256 * 1024,
+        db_path: Optional[str] = None,
+        backend: Optional[CacheBackend] = None,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries in the memory tier
+            ttl_seconds: Seconds a completion stays valid (0 disables expiry)
+            max_entry_bytes: Completions larger than this are not cached
+            db_path: SQLite file for the persistent tier (ignored if
+                ``backend`` is given)
+            backend: Second tier, e.g. the host-wide shared backend (None and
+                no ``db_path`` disables it)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entry_bytes = max_entry_bytes
+        self.memory = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        if backend is None and db_path:
+            backend = SQLiteCacheBackend(db_path)
+        self.store = backend
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "oversize_rejections": 0,
+        }
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a completion.
+
+        Args:
+            key: Key from ``make_cache_key``
+
+        Returns:
+            The cached completion or None
+        """
+        sync_local_tier(
+            self.store, self.NAMESPACE, self.memory.delete, self.memory.clear
+        )
+        value = self.memory.get(key)
+        if value is not None:
+            self._stats["memory_hits"] += 1
+            return value
+        if self.store is not None:
+            try:
+                entry = self.store.get(self.NAMESPACE, key)
+            except sqlite3.Error as e:
+                logger.error(f"Error reading completion cache: {str(e)}")
+                entry = None
+            if entry is not None:
+                value, expires_at = entry
+                self.memory.set(key, value, expires_at=expires_at)
+                self._stats["disk_hits"] += 1
+                return value
+        self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: str) -> bool:
+        """
+        Store a completion.
+
+        Args:
+            key: Key from ``make_cache_key``
+            value: The completion text
+
+        Returns:
+            True if stored, False if the entry exceeded the size limit
+        """
+        if len(value.encode("utf-8")) > self.max_entry_bytes:
+            self._stats["oversize_rejections"] += 1
+            return False
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else 0.0
+        self.memory.set(key, value, expires_at=expires_at)
+        if self.store is not None:
+            try:
+                self.store.set(self.NAMESPACE, key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing completion cache: {str(e)}")
+        self._stats["stores"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters."""
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hits": hits,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.memory.evictions,
+            "expirations": self.memory.expirations,
+            "entries": len(self.memory),
+            "persistent": self.store is not None,
+            "shared": self.store is not None and self.store.shared,
+        }
+
+
+# Singleton instance
+_completion_cache: Optional[CompletionCache] = None
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """Get or create the shared completion cache, or None if disabled."""
+    global _completion_cache
+    settings = get_settings()
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _completion_cache is None:
+        _completion_cache = CompletionCache(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            max_entry_bytes=settings.LLM_CACHE_MAX_ENTRY_BYTES,
+            db_path=settings.LLM_CACHE_DB_PATH,
+            backend=get_cache_backend(settings.LLM_CACHE_TIER),
+        )
+    return _completion_cache
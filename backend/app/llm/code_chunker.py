@@ -0,0 +1,202 @@
+"""
+Split source code into chunks along function and class boundaries.
+
+Used by the map-reduce code analysis: each chunk should be a meaningful
+unit (a class, a group of functions) that fits a token budget. Boundaries
+are searched outermost first; a unit that is still too large is split at
+the definitions nested one level deeper (e.g. the methods of a class),
+and only as a last resort between arbitrary lines. Adjacent small units
+are then merged back up to the budget so the number of chunks stays low.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Pattern, Tuple
+
+import numpy as np
+
+from app.llm.context_packer import line_tokens
+
+_MODIFIERS = (
+    r"(?:(?:public|private|protected|internal|static|final|abstract|sealed|"
+    r"synchronized|override|open|suspend|async|virtual|export|default|pub|"
+    r"unsafe|inline|extern|const)\s+)*"
+)
+
+# Lines that start a definition, per language (matched after indentation)
+_DEFINITION_PATTERNS: Dict[str, str] = {
+    "python": r"(?:async\s+def|def|class)\s",
+    "javascript": _MODIFIERS
+    + r"(?:function\b|class\b|(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?"
+    r"(?:function\b|\([^)]*\)\s*=>|\w+\s*=>))|\w+\s*\([^)]*\)\s*\{",
+    "go": r"(?:func|type)\s",
+    "rust": _MODIFIERS + r"(?:fn|impl|struct|enum|trait|mod)\b",
+    "ruby": r"(?:def|class|module)\s",
+    "php": _MODIFIERS + r"(?:function|class|interface|trait)\s",
+}
+_DEFINITION_PATTERNS["typescript"] = _DEFINITION_PATTERNS["javascript"]
+# Java, Kotlin, C#, C, C++, Scala...: types and method signatures
+_DEFAULT_PATTERN = (
+    _MODIFIERS + r"(?:class|interface|enum|record|struct|object|trait|fun|def)\b"
+    r"|[\w<>\[\],.?*&:]+(?:\s+[\w<>\[\],.?*&:]+)*\s+[\w~]+\s*\([^;]*$"
+)
+# Decorators, annotations and comments belong to the definition below them
+_PREAMBLE = re.compile(r"\s*(?:@|#|//|/\*|\*|\"\"\"|///)")
+_CONTROL = re.compile(r"\s*(?:if|for|while|switch|catch|return|else|do|try)\b")
+
+_LANGUAGE_ALIASES = {
+    "py": "python",
+    "js": "javascript",
+    "jsx": "javascript",
+    "ts": "typescript",
+    "tsx": "typescript",
+    "golang": "go",
+    "rs": "rust",
+    "rb": "ruby",
+}
+
+
+@dataclass
+class CodeChunk:
+    """A contiguous range of source lines."""
+
+    start_line: int
+    end_line: int
+    text: str
+    tokens: int
+
+
+def definition_pattern(language: str) -> Pattern[str]:
+    """Compiled pattern for the lines that start a definition."""
+    language = language.lower()
+    language = _LANGUAGE_ALIASES.get(language, language)
+    return re.compile(_DEFINITION_PATTERNS.get(language, _DEFAULT_PATTERN))
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" \t"))
+
+
+class _Splitter:
+    """Recursive boundary search over one file."""
+
+    def __init__(self, lines: List[str], pattern: Pattern[str], budget: int) -> None:
+        self.lines = lines
+        self.pattern = pattern
+        self.budget = budget
+        costs = line_tokens(lines)
+        self.cumulative = np.concatenate((np.zeros(1), np.cumsum(costs)))
+
+    def cost(self, start: int, end: int) -> float:
+        return float(self.cumulative[end] - self.cumulative[start])
+
+    def _is_definition(self, index: int) -> bool:
+        line = self.lines[index]
+        stripped = line.lstrip(" \t")
+        return bool(
+            stripped and not _CONTROL.match(stripped) and self.pattern.match(stripped)
+        )
+
+    def _attach_preamble(self, index: int, start: int, level: int) -> int:
+        """Move a boundary up over the decorators and comments above it."""
+        while index - 1 >= start:
+            above = self.lines[index - 1]
+            if not above.strip() or _indent(above) != level:
+                break
+            if not _PREAMBLE.match(above):
+                break
+            index -= 1
+        return index
+
+    def _boundaries(self, start: int, end: int) -> List[int]:
+        """Definition starts at the outermost indentation level that has any."""
+        levels = sorted(
+            {
+                _indent(self.lines[i])
+                for i in range(start + 1, end)
+                if self._is_definition(i)
+            }
+        )
+        for level in levels:
+            found = [
+                self._attach_preamble(i, start, level)
+                for i in range(start + 1, end)
+                if _indent(self.lines[i]) == level and self._is_definition(i)
+            ]
+            found = sorted({i for i in found if start < i < end})
+            if found:
+                return found
+        return []
+
+    def _by_lines(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Last resort: cut between lines, preferring blank ones."""
+        pieces = []
+        while start < end:
+            target = self.cumulative[start] + self.budget
+            stop = int(np.searchsorted(self.cumulative, target, "right")) - 1
+            stop = min(max(stop, start + 1), end)
+            if stop < end:
+                for candidate in range(stop, start + (stop - start) // 2, -1):
+                    if not self.lines[candidate - 1].strip():
+                        stop = candidate
+                        break
+            pieces.append((start, stop))
+            start = stop
+        return pieces
+
+    def split(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Split ``[start, end)`` into ranges that fit the budget."""
+        if self.cost(start, end) <= self.budget:
+            return [(start, end)]
+        boundaries = self._boundaries(start, end)
+        if not boundaries:
+            return self._by_lines(start, end)
+        edges = [start] + boundaries + [end]
+        pieces: List[Tuple[int, int]] = []
+        for piece_start, piece_end in zip(edges, edges[1:]):
+            pieces.extend(self.split(piece_start, piece_end))
+        return pieces
+
+    def merge(self, pieces: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Join adjacent pieces while they fit the budget together."""
+        merged: List[Tuple[int, int]] = []
+        for start, end in pieces:
+            if merged and self.cost(merged[-1][0], end) <= self.budget:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+
+def split_code(code: str, language: str, max_tokens: int) -> List[CodeChunk]:
+    """
+    Split code into chunks of at most ``max_tokens`` estimated tokens.
+
+    Args:
+        code: Source code
+        language: Programming language, used to recognise definitions
+        max_tokens: Token budget per chunk
+
+    Returns:
+        Chunks in file order covering every line of the code. A single
+        line longer than the budget becomes its own, oversized chunk.
+
+    Raises:
+        ValueError: If ``max_tokens`` is not positive
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    lines = code.splitlines()
+    if not lines:
+        return []
+    splitter = _Splitter(lines, definition_pattern(language), max_tokens)
+    ranges = splitter.merge(splitter.split(0, len(lines)))
+    return [
+        CodeChunk(
+            start_line=start + 1,
+            end_line=end,
+            text="\n".join(lines[start:end]),
+            tokens=int(round(splitter.cost(start, end))),
+        )
+        for start, end in ranges
+    ]
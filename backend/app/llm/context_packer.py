@@ -0,0 +1,412 @@
+"""
+Token-budgeted packing of prompt context.
+
+Prompt size drives LLM latency and cost, and oversized prompts get
+truncated by the model at an arbitrary point. This module keeps prompts
+within a token budget derived from the model's context window and
+``LLM_MAX_TOKENS``:
+
+- ``estimate_tokens`` approximates the token count locally, with no
+  network call;
+- ``focus_windows`` cuts a long file down to the regions around stacktrace
+  frame lines and ticket entities;
+- ``pack_snippets`` fills a budget with the highest-priority snippets,
+  skipping duplicates and dropping the least valuable content first;
+- ``truncate_to_tokens`` trims free text, keeping its leading blocks.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+
+# Total context window (prompt + output) per model, in tokens
+MODEL_CONTEXT_TOKENS: Dict[str, int] = {
+    "gemini-pro": 32768,
+    "gemini-1.0-pro": 32768,
+    "gemini-1.5-flash": 1048576,
+    "gemini-1.5-pro": 2097152,
+}
+DEFAULT_CONTEXT_TOKENS = 32768
+# Headroom for estimation error and the SDK's own framing
+SAFETY_MARGIN_TOKENS = 256
+# Snippets are not cut down below this size; they are dropped instead
+MIN_PARTIAL_TOKENS = 48
+
+# Byte classes for token estimation: whitespace, word character, symbol.
+# Bytes of multi-byte UTF-8 characters count as word characters.
+_SPACE, _WORD_CHAR, _SYMBOL = 0, 1, 2
+_BYTE_CLASS = np.array(
+    [
+        (
+            _WORD_CHAR
+            if byte >= 128 or chr(byte).isalnum() or chr(byte) == "_"
+            else _SPACE
+            if chr(byte).isspace()
+            else _SYMBOL
+        )
+        for byte in range(256)
+    ],
+    dtype=np.uint8,
+)
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]{3,}")
+_CODE_LIKE = re.compile(r"[a-z0-9][A-Z]|_|[A-Z]{2}")
+
+
+def _byte_costs(data: np.ndarray) -> np.ndarray:
+    """
+    Estimated token cost of each byte of UTF-8 text.
+
+    A word costs one token for its first four bytes and a quarter token per
+    further byte; every symbol costs a token; whitespace is free.
+    """
+    classes = _BYTE_CLASS[data]
+    word = classes == _WORD_CHAR
+    costs: np.ndarray = np.where(word, 0.25, 0.0)
+    costs[classes == _SYMBOL] = 1.0
+    starts = word.copy()
+    starts[1:] &= ~word[:-1]
+    costs[starts] += 0.75
+    return costs
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+
+    Words cost about one token per four characters and punctuation about
+    one token per symbol, which tracks SentencePiece tokenizers closely on
+    both prose and code and errs on the high side. Runs locally in about
+    a millisecond for a 5,000-line file.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    return math.ceil(float(_byte_costs(data).sum()) - 1e-6)
+
+
+def line_tokens(lines: Sequence[str]) -> np.ndarray:
+    """
+    Estimate the tokens of each line of a text in a single pass.
+
+    Args:
+        lines: Lines without their line endings
+
+    Returns:
+        Float array of per-line estimates
+    """
+    if not lines:
+        return np.zeros(0)
+    encoded = [line.encode("utf-8") for line in lines]
+    data = np.frombuffer(b"\n".join(encoded) + b"\n", dtype=np.uint8)
+    lengths = np.fromiter((len(line) + 1 for line in encoded), dtype=np.int64)
+    starts = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(lengths)[:-1]))
+    per_line: np.ndarray = np.add.reduceat(_byte_costs(data), starts)
+    return per_line
+
+
+def prompt_token_budget(
+    model: Optional[str] = None,
+    max_output_tokens: Optional[int] = None,
+    cap: Optional[int] = None,
+) -> int:
+    """
+    Tokens available for a prompt.
+
+    Args:
+        model: Model name (default from settings)
+        max_output_tokens: Tokens reserved for the response (default
+            ``LLM_MAX_TOKENS``)
+        cap: Upper bound regardless of the model window (default
+            ``LLM_PROMPT_TOKEN_BUDGET``; 0 means no cap)
+
+    Returns:
+        Prompt token budget
+    """
+    settings = get_settings()
+    model = model or settings.LLM_MODEL
+    if max_output_tokens is None:
+        max_output_tokens = settings.LLM_MAX_TOKENS
+    if cap is None:
+        cap = settings.LLM_PROMPT_TOKEN_BUDGET
+    window = MODEL_CONTEXT_TOKENS.get(model.split("/")[-1], DEFAULT_CONTEXT_TOKENS)
+    budget = window - max_output_tokens - SAFETY_MARGIN_TOKENS
+    if cap:
+        budget = min(budget, cap)
+    return max(budget, 0)
+
+
+def allocate_budget(
+    sizes: Sequence[int], weights: Sequence[float], budget: int
+) -> List[int]:
+    """
+    Split a budget across parts in proportion to their weights.
+
+    Parts that need less than their share get exactly what they need and
+    the remainder is shared among the others.
+
+    Args:
+        sizes: Tokens each part would use in full
+        weights: Relative share of each part
+        budget: Tokens to split
+
+    Returns:
+        Tokens allotted to each part
+    """
+    allotted = [0] * len(sizes)
+    active = [i for i, size in enumerate(sizes) if size > 0]
+    remaining = budget
+    while active and remaining > 0:
+        total_weight = sum(weights[i] for i in active) or 1.0
+        shares = {i: remaining * weights[i] / total_weight for i in active}
+        satisfied = [i for i in active if sizes[i] <= shares[i]]
+        if not satisfied:
+            for i in active:
+                allotted[i] = int(shares[i])
+            break
+        for i in satisfied:
+            allotted[i] = sizes[i]
+            remaining -= sizes[i]
+            active.remove(i)
+    return allotted
+
+
+@dataclass
+class Snippet:
+    """A piece of prompt context with a packing priority."""
+
+    source: str
+    text: str
+    priority: float = 1.0
+    #: First line of the snippet within its source, if it is a window
+    start_line: Optional[int] = None
+    tokens: int = field(default=-1, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.tokens < 0:
+            self.tokens = estimate_tokens(self.text)
+
+    def render(self) -> str:
+        """Render the snippet as a context section."""
+        return f"--- {self.source}\n{self.text.rstrip()}"
+
+
+def _hit_lines(
+    lines: Sequence[str], focus_lines: Iterable[int], terms: Iterable[str]
+) -> Dict[int, float]:
+    """Weight of each interesting (0-based) line: frame lines beat term hits."""
+    hits: Dict[int, float] = {}
+    for number in focus_lines:
+        if 1 <= number <= len(lines):
+            hits[number - 1] = hits.get(number - 1, 0.0) + 2.0
+    terms = [term for term in terms if term]
+    if terms:
+        for index, line in enumerate(lines):
+            matched = sum(1 for term in terms if term in line)
+            if matched:
+                hits[index] = hits.get(index, 0.0) + min(matched, 3) * 0.5
+    return hits
+
+
+def focus_windows(
+    text: str,
+    source: str,
+    focus_lines: Iterable[int] = (),
+    terms: Iterable[str] = (),
+    radius: int = 12,
+    priority: float = 1.0,
+    max_windows: int = 4,
+) -> List[Snippet]:
+    """
+    Cut a long text down to the windows around its interesting lines.
+
+    Args:
+        text: Full file or pasted code
+        source: Label of the text, e.g. ``repo:path``
+        focus_lines: 1-based line numbers to center windows on, e.g. the
+            lines of stacktrace frames in this file
+        terms: Identifiers whose occurrences are worth including, e.g.
+            frame function names, exception types and error codes
+        radius: Lines of context on each side of an interesting line
+        priority: Priority of the best window; others scale down by their
+            share of the hits
+        max_windows: Maximum number of windows returned
+
+    Returns:
+        Windows labelled ``source:start-end``, best first. The head of the
+        text comes last, at a low priority; without any interesting lines,
+        it is all that is returned.
+    """
+    lines = text.splitlines()
+    if len(lines) <= 2 * radius + 1:
+        return [Snippet(source, text, priority)]
+    hits = _hit_lines(lines, focus_lines, terms)
+    if not hits:
+        head = "\n".join(lines[: 2 * radius + 1])
+        return [Snippet(f"{source}:1-{2 * radius + 1}", head, priority * 0.5, 1)]
+
+    # Merge the windows of nearby hits, summing their weights, but split
+    # runs of hits so one window cannot swallow the whole file
+    max_span = 4 * (2 * radius + 1)
+    windows: List[Tuple[int, int, float]] = []
+    for index in sorted(hits):
+        start, end = max(0, index - radius), min(len(lines), index + radius + 1)
+        if windows and start <= windows[-1][1]:
+            previous = windows[-1]
+            if end - previous[0] <= max_span:
+                windows[-1] = (previous[0], end, previous[2] + hits[index])
+                continue
+            start = previous[1]
+        windows.append((start, end, hits[index]))
+    head_end = 2 * radius + 1
+    windows.sort(key=lambda window: window[2], reverse=True)
+    windows = windows[:max_windows]
+    best = windows[0][2]
+    snippets = [
+        Snippet(
+            f"{source}:{start + 1}-{end}",
+            "\n".join(lines[start:end]),
+            priority * weight / best,
+            start + 1,
+        )
+        for start, end, weight in windows
+    ]
+    if all(start >= head_end for start, _, _ in windows):
+        # Imports and declarations, used only if there is room to spare
+        head = "\n".join(lines[:head_end])
+        snippets.append(Snippet(f"{source}:1-{head_end}", head, priority * 0.1, 1))
+    return snippets
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """
+    Trim a text to a token budget, keeping its leading content.
+
+    Whole lines are kept while they fit, and the cut moves back to the
+    last blank line if that loses little. Context is ordered most valuable
+    first, so this drops the least valuable content.
+
+    Args:
+        text: Text to trim
+        budget: Maximum tokens
+
+    Returns:
+        The text, or its head followed by an omission marker
+    """
+    # Every token is at least one byte
+    raw = text.encode("utf-8")
+    if len(raw) <= budget:
+        return text
+    cumulative = np.cumsum(_byte_costs(np.frombuffer(raw, dtype=np.uint8)))
+    if cumulative[-1] <= budget:
+        return text
+    marker = "[... truncated to fit the prompt budget]"
+    fits = int(np.searchsorted(cumulative, budget - estimate_tokens(marker), "right"))
+    # Cut at a line end; newline bytes are always character boundaries
+    head = raw[: max(raw.rfind(b"\n", 0, fits + 1), 0)].decode("utf-8")
+    # Prefer ending at a block boundary when that loses little
+    boundary = head.rfind("\n\n")
+    if boundary > 0 and boundary >= len(head) * 0.75:
+        head = head[:boundary]
+    return f"{head.rstrip()}\n{marker}" if head.strip() else marker
+
+
+def _dedupe_key(text: str) -> str:
+    return " ".join(text.split())
+
+
+@dataclass
+class PackedContext:
+    """Snippets selected by ``pack_snippets``."""
+
+    snippets: List[Snippet] = field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    dropped: int = 0
+    duplicates: int = 0
+    truncated: int = 0
+
+    def render(self, heading: Optional[str] = None) -> str:
+        """Render the selected snippets, best first."""
+        if not self.snippets:
+            return ""
+        sections = [heading] if heading else []
+        sections += [snippet.render() for snippet in self.snippets]
+        return "\n\n".join(sections)
+
+
+def pack_snippets(snippets: Sequence[Snippet], budget: int) -> PackedContext:
+    """
+    Fill a token budget with the highest-priority snippets.
+
+    Snippets whose text repeats, or is contained in, an already selected
+    snippet are skipped. A snippet that does not fit is trimmed if enough
+    budget remains, otherwise dropped in favour of smaller ones.
+
+    Args:
+        snippets: Candidate snippets
+        budget: Maximum tokens of the rendered snippets
+
+    Returns:
+        Selected snippets in priority order with packing counters
+    """
+    packed = PackedContext(budget=budget)
+    seen: Set[str] = set()
+    selected_texts: List[str] = []
+    for snippet in sorted(snippets, key=lambda s: s.priority, reverse=True):
+        key = _dedupe_key(snippet.text)
+        if not key or key in seen or any(key in text for text in selected_texts):
+            packed.duplicates += 1
+            continue
+        # Source header and separator
+        cost = snippet.tokens + estimate_tokens(snippet.source) + 4
+        remaining = budget - packed.tokens
+        if cost > remaining:
+            if remaining - (cost - snippet.tokens) < MIN_PARTIAL_TOKENS:
+                packed.dropped += 1
+                continue
+            text = truncate_to_tokens(snippet.text, remaining - (cost - snippet.tokens))
+            snippet = Snippet(
+                snippet.source, text, snippet.priority, snippet.start_line
+            )
+            cost = snippet.tokens + estimate_tokens(snippet.source) + 4
+            packed.truncated += 1
+        seen.add(key)
+        selected_texts.append(key)
+        packed.snippets.append(snippet)
+        packed.tokens += cost
+    return packed
+
+
+def focus_terms(text: str, code: str, limit: int = 24) -> List[str]:
+    """
+    Identifiers mentioned in a ticket that also occur in some code.
+
+    Args:
+        text: Ticket title and description
+        code: Code the identifiers are looked up in
+        limit: Maximum number of identifiers
+
+    Returns:
+        Up to ``limit`` identifiers, longest (most specific) first
+    """
+    # Only code-like names: camelCase, PascalCase compounds, snake_case or
+    # long identifiers; plain words such as "error" would match everywhere
+    mentioned = {
+        match
+        for match in _IDENTIFIER.findall(text)
+        if _CODE_LIKE.search(match) or len(match) >= 12
+    }
+    present = [term for term in mentioned if term in code]
+    present.sort(key=lambda term: (-len(term), term))
+    return present[:limit]
@@ -0,0 +1,222 @@
+"""
+Bounded execution pool for blocking LLM SDK calls.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.core.config import get_settings
+from app.core.metrics import stage
+
+T = TypeVar("T")
+
+
+class LLMQueueFullError(Exception):
+    """Raised when the LLM wait queue is at capacity."""
+
+
+class LLMQueueTimeoutError(LLMQueueFullError):
+    """Raised when a caller waited too long for a free slot."""
+
+
+class LLMExecutionPool:
+    """
+    Run blocking LLM calls on a dedicated thread pool.
+
+    At most ``max_concurrency`` calls run at once; up to ``max_queue_size``
+    further callers wait for a slot, and anything beyond that is rejected
+    with ``LLMQueueFullError`` instead of piling up on the event loop.
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queue_size: int = 64) -> None:
+        """
+        Initialize the pool.
+
+        Args:
+            max_concurrency: Maximum number of calls running at the same time
+            max_queue_size: Maximum number of callers waiting for a slot
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="llm-call"
+        )
+        # Slots are released from worker threads and the pool may be shared
+        # by more than one event loop, so waiters are plain futures woken
+        # through their own loop instead of an asyncio.Semaphore.
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]]
+        self._waiters = deque()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently executing."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a free slot."""
+        return len(self._waiters)
+
+    async def _acquire(self) -> None:
+        """Take a slot, waiting in FIFO order if none is free."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self.max_concurrency and not self._waiters:
+                self._in_flight += 1
+                return
+            if len(self._waiters) >= self.max_queue_size:
+                self._rejected += 1
+                raise LLMQueueFullError(
+                    f"LLM queue is full ({len(self._waiters)} waiting, "
+                    f"{self._in_flight} in flight)"
+                )
+            waiter: "asyncio.Future[None]" = loop.create_future()
+            entry = (loop, waiter)
+            self._waiters.append(entry)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(entry)
+                    handed_over = False
+                except ValueError:
+                    # The slot was handed to us just before we were cancelled
+                    handed_over = True
+            if handed_over:
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        """Free a slot, handing it straight to the next waiter if any."""
+        with self._lock:
+            if not self._waiters:
+                self._in_flight -= 1
+                return
+            loop, waiter = self._waiters.popleft()
+        try:
+            loop.call_soon_threadsafe(self._wake, waiter)
+        except RuntimeError:
+            # The waiter's loop is closed; pass the slot on
+            self._release()
+
+    def _wake(self, waiter: "asyncio.Future[None]") -> None:
+        """Resolve a waiter on its own loop."""
+        # A cancelled waiter gives the slot back from its own except block
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def _call(self, func: Callable[..., T], args: Any, kwargs: Any) -> T:
+        """Run ``func`` in a worker thread and account for the slot it holds."""
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            self._release()
+        with self._lock:
+            self._completed += 1
+        return result
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Execute a blocking callable without blocking the event loop.
+
+        Args:
+            func: The blocking callable to execute
+            *args: Positional arguments for ``func``
+            timeout: Seconds allowed for waiting for a slot and, separately,
+                for ``func`` once it is running (None waits indefinitely)
+            **kwargs: Keyword arguments for ``func``
+
+        Returns:
+            The return value of ``func``
+
+        Raises:
+            LLMQueueFullError: If the wait queue is already full
+            LLMQueueTimeoutError: If no slot became free within ``timeout``
+            asyncio.TimeoutError: If ``func`` ran for longer than ``timeout``
+        """
+        with stage("llm_queue_wait"):
+            try:
+                await asyncio.wait_for(self._acquire(), timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._rejected += 1
+                raise LLMQueueTimeoutError(
+                    f"No LLM slot became free within {timeout}s"
+                ) from None
+        loop = asyncio.get_running_loop()
+
+        def call() -> T:
+            return self._call(func, args, kwargs)
+
+        try:
+            future = loop.run_in_executor(self._executor, call)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is released by the worker thread when the call actually
+        # finishes, so a cancelled caller does not let more calls through
+        # than the SDK is really running.
+        return await asyncio.wait_for(future, timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Get current pool statistics."""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue_size": self.max_queue_size,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Shut down the worker threads."""
+        self._executor.shutdown(wait=wait)
+
+
+# Singleton instance
+_llm_pool: Optional[LLMExecutionPool] = None
+
+
+def get_llm_pool() -> LLMExecutionPool:
+    """Get or create the shared LLM execution pool."""
+    global _llm_pool
+    if _llm_pool is None:
+        settings = get_settings()
+        _llm_pool = LLMExecutionPool(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            max_queue_size=settings.LLM_MAX_QUEUE_SIZE,
+        )
+    return _llm_pool
+
+
+def shutdown_llm_pool() -> None:
+    """Shut down the shared LLM execution pool if it was created."""
+    global _llm_pool
+    if _llm_pool is not None:
+        _llm_pool.shutdown()
+        _llm_pool = None
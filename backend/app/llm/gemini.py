@@ -2,28 +2,85 @@
 Google Gemini Pro API integration.
 """
 
+import asyncio
 import logging
-import google.generativeai as genai
-from typing import Dict, List, Optional, Any
+import math
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from app.core.config import get_settings
+from app.core.metrics import ERRORS, stage
+from app.llm.cache import CompletionCache, get_completion_cache, make_cache_key
+from app.llm.code_chunker import CodeChunk, split_code
+from app.llm.context_packer import estimate_tokens, prompt_token_budget
+from app.llm.executor import LLMExecutionPool, get_llm_pool
+from app.llm.prompts import get_code_chunk_prompt, get_code_reduce_prompt
+from app.llm.resilience import ResilientCaller
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
-# Configure Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
+# Start of the text generate_response returns instead of raising
+ERROR_RESPONSE_PREFIX = "Error generating response"
+
+# google.generativeai takes ~0.6 s to import (protobuf, gRPC); it is loaded
+# and configured on first use, normally during application startup
+_genai: Any = None
+_genai_lock = threading.Lock()
+
+
+def load_genai() -> Any:
+    """
+    Import and configure the Gemini SDK once.
+    
+    Thread-safe, so startup can run the import off the event loop.
+    
+    Returns:
+        The ``google.generativeai`` module
+    """
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            
+            genai.configure(api_key=get_settings().GEMINI_API_KEY)
+            _genai = genai
+    return _genai
 
 
 class GeminiClient:
     """Client for interacting with Google Gemini Pro API."""
     
-    def __init__(self) -> None:
-        """Initialize Gemini client with configuration."""
-        self.model_name = settings.LLM_MODEL
-        self.temperature = settings.LLM_TEMPERATURE
-        self.max_tokens = settings.LLM_MAX_TOKENS
-        self.model = genai.GenerativeModel(
+    def __init__(
+        self,
+        pool: Optional[LLMExecutionPool] = None,
+        cache: Optional[CompletionCache] = None,
+        resilience: Optional[ResilientCaller] = None,
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize Gemini client with configuration.
+
+        Args:
+            pool: Execution pool for SDK calls (defaults to the shared pool)
+            cache: Completion cache (defaults to the shared cache, if enabled)
+            resilience: Timeout, retry, hedging and circuit breaker policy
+                (defaults to one configured from settings)
+            model_name: Model to call (defaults to ``LLM_MODEL``)
+            temperature: Sampling temperature (defaults to ``LLM_TEMPERATURE``)
+            max_tokens: Output token limit (defaults to ``LLM_MAX_TOKENS``)
+        """
+        settings = get_settings()
+        self.pool = pool or get_llm_pool()
+        self.cache = cache if cache is not None else get_completion_cache()
+        self.resilience = resilience or ResilientCaller.from_settings()
+        self.model_name = model_name or settings.LLM_MODEL
+        self.temperature = (
+            settings.LLM_TEMPERATURE if temperature is None else temperature
+        )
+        self.max_tokens = max_tokens or settings.LLM_MAX_TOKENS
+        self.model = load_genai().GenerativeModel(
             model_name=self.model_name,
             generation_config={
                 "temperature": self.temperature,
@@ -33,7 +90,25 @@ class GeminiClient:
             }
         )
     
-    async def generate_response(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
+    @staticmethod
+    def _build_prompt(prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Combine the prompt with additional context if provided."""
+        if not context:
+            return prompt
+        context_str = "\n\nAdditional Context:\n"
+        for key, value in context.items():
+            context_str += f"{key}: {value}\n"
+        return f"{prompt}\n\n{context_str}"
+    
+    def _cache_key(self, full_prompt: str) -> str:
+        """Cache key for a rendered prompt under this client's settings."""
+        return make_cache_key(
+            full_prompt, self.model_name, self.temperature, self.max_tokens
+        )
+    
+    async def generate_response(
+        self, prompt: str, context: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Generate a response from Gemini Pro.
         
@@ -45,28 +120,122 @@ class GeminiClient:
             The generated text response
         """
         try:
-            # Combine prompt with context if provided
-            full_prompt = prompt
-            if context:
-                context_str = "\n\nAdditional Context:\n"
-                for key, value in context.items():
-                    context_str += f"{key}: {value}\n"
-                full_prompt = f"{full_prompt}\n\n{context_str}"
+            full_prompt = self._build_prompt(prompt, context)
+            cache = self.cache
+            cache_key = self._cache_key(full_prompt) if cache is not None else None
+            if cache is not None and cache_key:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return cached
             
-            # Generate response
-            response = self.model.generate_content(full_prompt)
+            # Generate response off the event loop; the SDK call is blocking.
+            # Hedged requests are only sent while the pool has spare capacity
+            with stage("llm_generate"):
+                response = await self.resilience.call(
+                    lambda timeout: self.pool.run(
+                        self.model.generate_content, full_prompt, timeout=timeout
+                    ),
+                    can_hedge=lambda: self.pool.queue_depth == 0,
+                )
             
             # Extract and return the text
-            return response.text
+            text: str = response.text
+            if cache is not None and cache_key:
+                cache.set(cache_key, text)
+            return text
         
         except Exception as e:
             logger.error(f"Error generating Gemini response: {str(e)}")
-            return f"Error generating response: {str(e)}"
+            ERRORS.inc("llm")
+            return f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
     
-    async def analyze_code(self, code: str, language: str, query: Optional[str] = None) -> Dict[str, Any]:
+    async def stream_response(
+        self, prompt: str, context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from Gemini Pro as text chunks arrive.
+        
+        The blocking SDK stream is consumed on the execution pool. Closing
+        the generator (e.g. because the client disconnected) stops reading
+        from the upstream stream and cancels it.
+        
+        Args:
+            prompt: The prompt to send to the model
+            context: Optional additional context
+            
+        Yields:
+            Text chunks of the generated response
+        """
+        full_prompt = self._build_prompt(prompt, context)
+        cache = self.cache
+        cache_key = self._cache_key(full_prompt) if cache is not None else None
+        if cache is not None and cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Any]" = asyncio.Queue()
+        stop = threading.Event()
+
+        def publish(item: Any) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # Event loop already closed; nobody is listening any more
+                stop.set()
+
+        def produce() -> None:
+            try:
+                response = self.model.generate_content(full_prompt, stream=True)
+                try:
+                    for chunk in response:
+                        if stop.is_set():
+                            break
+                        text = chunk.text
+                        if text:
+                            publish(text)
+                finally:
+                    if stop.is_set():
+                        _cancel_stream(response)
+            except Exception as e:
+                publish(e)
+            finally:
+                publish(_STREAM_END)
+
+        def on_producer_done(future: "asyncio.Future[None]") -> None:
+            # Surfaces errors raised before produce() ran, e.g. a full queue
+            if not future.cancelled() and future.exception() is not None:
+                queue.put_nowait(future.exception())
+
+        producer = asyncio.ensure_future(self.pool.run(produce))
+        producer.add_done_callback(on_producer_done)
+        chunks: List[str] = []
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f"Error streaming Gemini response: {str(item)}")
+                    raise item
+                chunks.append(item)
+                yield item
+            if cache is not None and cache_key:
+                cache.set(cache_key, "".join(chunks))
+        finally:
+            # The worker notices this at the next chunk and releases its slot
+            stop.set()
+    
+    async def analyze_code(
+        self, code: str, language: str, query: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Analyze code with Gemini Pro.
         
+        Code larger than ``LLM_CODE_CHUNK_TOKENS`` is analyzed in chunks
+        concurrently and the findings merged (see ``_analyze_code_chunked``).
+        
         Args:
             code: The code to analyze
             language: The programming language
@@ -76,12 +245,18 @@ class GeminiClient:
             Dictionary with analysis results
         """
         try:
+            if estimate_tokens(code) > get_settings().LLM_CODE_CHUNK_TOKENS:
+                return await self._analyze_code_chunked(code, language, query)
+            
             # Construct prompt for code analysis
             prompt = f"Analyze this {language} code:\n\n```{language}\n{code}\n```\n\n"
             if query:
                 prompt += f"Specifically address this question: {query}"
             else:
-                prompt += "Provide a clear explanation of what this code does, any potential issues, and suggestions for improvement."
+                prompt += (
+                    "Provide a clear explanation of what this code does, any "
+                    "potential issues, and suggestions for improvement."
+                )
             
             # Generate response
             response = await self.generate_response(prompt)
@@ -101,6 +276,182 @@ class GeminiClient:
                 "success": False
             }
 
+    async def _analyze_code_chunked(
+        self, code: str, language: str, query: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Map-reduce analysis of a large file.
+        
+        The code is split along function and class boundaries, the chunks
+        are analyzed concurrently (at most ``LLM_CODE_MAP_CONCURRENCY`` at a
+        time) and a final call merges the findings. Wall-clock time is that
+        of the slowest chunk plus the merge, rather than growing with the
+        file size.
+        
+        Args:
+            code: The code to analyze
+            language: The programming language
+            query: Optional specific query about the code
+            
+        Returns:
+            Dictionary with analysis results
+            
+        Raises:
+            ValueError: If the prompt budget is too small for code chunks
+        """
+        settings = get_settings()
+        prompt_budget = prompt_token_budget(self.model_name, self.max_tokens)
+        # Bigger chunks rather than more of them past LLM_CODE_MAX_CHUNKS
+        chunk_tokens = max(
+            settings.LLM_CODE_CHUNK_TOKENS,
+            math.ceil(estimate_tokens(code) / settings.LLM_CODE_MAX_CHUNKS),
+        )
+        room = prompt_budget - _CHUNK_PROMPT_OVERHEAD
+        if room < _MIN_CHUNK_TOKENS:
+            raise ValueError(
+                f"Prompt budget of {prompt_budget} tokens leaves no room for code "
+                "chunks; raise LLM_PROMPT_TOKEN_BUDGET or lower LLM_MAX_TOKENS"
+            )
+        chunk_tokens = min(chunk_tokens, room)
+        chunks = split_code(code, language, chunk_tokens)
+        line_count = chunks[-1].end_line
+        instruction = f"Specifically address this question: {query}" if query else ""
+        semaphore = asyncio.Semaphore(settings.LLM_CODE_MAP_CONCURRENCY)
+        
+        async def analyze_chunk(part: int, chunk: CodeChunk) -> str:
+            prompt = get_code_chunk_prompt(
+                chunk.text, language, part, len(chunks),
+                chunk.start_line, chunk.end_line, line_count, instruction,
+            )
+            async with semaphore:
+                return await self.generate_response(prompt)
+        
+        results = await asyncio.gather(
+            *(analyze_chunk(part, chunk) for part, chunk in enumerate(chunks, 1))
+        )
+        findings = [
+            f"Lines {chunk.start_line}-{chunk.end_line}:\n{result.strip()}"
+            for chunk, result in zip(chunks, results)
+            if not is_error_response(result)
+        ]
+        failed = len(chunks) - len(findings)
+        logger.info(
+            f"Analyzed {language} code in {len(chunks)} chunks ({failed} failed)"
+        )
+        if not findings:
+            return {
+                "analysis": f"Error analyzing code: all {len(chunks)} chunks failed",
+                "language": language,
+                "success": False
+            }
+        if failed:
+            findings.append(
+                f"Note: {failed} of {len(chunks)} parts could not be analyzed."
+            )
+        
+        analysis = await self._reduce_findings(
+            findings, language, line_count, instruction, prompt_budget
+        )
+        return {
+            "analysis": analysis,
+            "language": language,
+            "success": not is_error_response(analysis)
+        }
+    
+    async def _reduce_findings(
+        self,
+        findings: List[str],
+        language: str,
+        line_count: int,
+        instruction: str,
+        prompt_budget: int,
+    ) -> str:
+        """Merge findings, in rounds if they do not fit one prompt."""
+        budget = prompt_budget - estimate_tokens(
+            get_code_reduce_prompt([], language, line_count, instruction)
+        )
+        while len(findings) > 1 and sum(map(estimate_tokens, findings)) > budget:
+            batches: List[List[str]] = [[]]
+            used = 0
+            for finding in findings:
+                tokens = estimate_tokens(finding)
+                if batches[-1] and used + tokens > budget:
+                    batches.append([])
+                    used = 0
+                batches[-1].append(finding)
+                used += tokens
+            if len(batches) == len(findings):
+                # Every finding fills a prompt on its own; nothing to batch
+                break
+            merged = await asyncio.gather(
+                *(
+                    self.generate_response(
+                        get_code_reduce_prompt(batch, language, line_count, instruction)
+                    )
+                    for batch in batches
+                )
+            )
+            if all(is_error_response(text) for text in merged):
+                # No progress; let the final call take everything there is
+                logger.error(f"All {len(batches)} merge batches failed")
+                break
+            # A batch that failed to merge carries its findings forward as-is
+            findings = [
+                finding
+                for batch, text in zip(batches, merged)
+                for finding in (batch if is_error_response(text) else [text])
+            ]
+        prompt = get_code_reduce_prompt(findings, language, line_count, instruction)
+        return await self.generate_response(prompt)
+    
+    def warm(self) -> None:
+        """
+        Open the connection to the model endpoint (DNS, TLS, first RPC).
+        
+        Fetches the model's metadata, which costs no tokens. Blocking; run
+        it off the event loop.
+        """
+        name = self.model_name
+        if not name.startswith("models/"):
+            name = f"models/{name}"
+        load_genai().get_model(name)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get execution statistics for this client's LLM calls."""
+        return {
+            "model": self.model_name,
+            "pool": self.pool.stats(),
+            "resilience": self.resilience.stats(),
+        }
+
+
+_STREAM_END = object()
+# Tokens of the chunk prompt around the code itself
+_CHUNK_PROMPT_OVERHEAD = 512
+# Smallest useful chunk; below this a file splits into meaningless fragments
+_MIN_CHUNK_TOKENS = 256
+
+
+def is_error_response(text: str) -> bool:
+    """
+    Whether a ``generate_response`` result is a failure.
+
+    Failed generations come back as an error message rather than an
+    exception, so callers check before caching or reusing the text.
+    """
+    return text.startswith(ERROR_RESPONSE_PREFIX)
+
+
+def _cancel_stream(response: Any) -> None:
+    """Best-effort cancellation of the underlying streaming RPC."""
+    iterator = getattr(response, "_iterator", None)
+    cancel = getattr(iterator, "cancel", None)
+    if callable(cancel):
+        try:
+            cancel()
+        except Exception as e:
+            logger.debug(f"Error cancelling Gemini stream: {str(e)}")
+
 
 # Singleton instance
 _gemini_client = None
@@ -112,3 +463,9 @@ def get_gemini_client() -> GeminiClient:
     if _gemini_client is None:
         _gemini_client = GeminiClient()
     return _gemini_client
+
+
+async def init_gemini_client() -> GeminiClient:
+    """Import the SDK off the event loop and create the shared client (app startup)."""
+    await asyncio.get_running_loop().run_in_executor(None, load_genai)
+    return get_gemini_client()
@@ -2,7 +2,17 @@
 Prompt templates for LLM interactions.
 """
 
-from typing import Dict, Any, Optional
+from typing import Optional, Sequence
+
+from app.core.metrics import timed
+from app.llm.context_packer import (
+    allocate_budget,
+    estimate_tokens,
+    focus_terms,
+    focus_windows,
+    pack_snippets,
+    truncate_to_tokens,
+)
 
 # System prompt for engineering assistance
 SYSTEM_PROMPT = """
@@ -18,7 +28,7 @@ Key capabilities:
 Always be clear, concise, and precise in your responses.
 If you're unsure about something, acknowledge it rather than making up information.
 When providing code solutions, ensure they follow best practices and are well-documented.
-"""
+"""  # noqa: E501
 
 # Ticket analysis prompt
 TICKET_ANALYSIS_PROMPT = """
@@ -62,45 +72,143 @@ Please provide:
 {context}
 """
 
+# Map step of chunked code analysis: one part of a large file
+CODE_CHUNK_ANALYSIS_PROMPT = """
+{system_prompt}
+
+You are reviewing part {part} of {parts} of a large {language} file
+(lines {start_line}-{end_line} of {line_count}). Other parts are reviewed
+separately, so do not speculate about code you cannot see.
+
+```{language}
+{code}
+```
+
+Briefly describe what this part does, then list concrete potential issues
+with their line numbers. {instruction}
+"""
+
+# Reduce step of chunked code analysis: merge per-part findings
+CODE_REDUCE_PROMPT = """
+{system_prompt}
+
+A {language} file of {line_count} lines was reviewed in parts. These are
+the findings for each part:
+
+{findings}
+
+Merge them into one analysis of the whole file: a clear explanation of what
+the code does, the potential issues (deduplicated, with line numbers) and
+suggestions for improvement. {instruction}
+"""
 
+
+@timed("render_prompt")
 def get_ticket_analysis_prompt(
     ticket_id: str,
     ticket_title: str,
     ticket_description: str,
-    context: Optional[str] = None
+    context: Optional[str] = None,
+    token_budget: Optional[int] = None
 ) -> str:
     """
     Get the ticket analysis prompt.
     
+    With a token budget, the description and context are trimmed to fit:
+    the description gets two thirds of the space unless the context needs
+    less, and context is trimmed from the end, where the least relevant
+    content is.
+    
     Args:
         ticket_id: Ticket identifier
         ticket_title: Ticket title or summary
         ticket_description: Detailed ticket description
         context: Additional context (optional)
+        token_budget: Maximum prompt tokens (optional)
         
     Returns:
         Formatted prompt for ticket analysis
     """
+    context = context or ""
+    if token_budget is not None:
+        fixed = estimate_tokens(TICKET_ANALYSIS_PROMPT.format(
+            system_prompt=SYSTEM_PROMPT,
+            ticket_id=ticket_id,
+            ticket_title=ticket_title,
+            ticket_description="",
+            context=""
+        ))
+        description_budget, context_budget = allocate_budget(
+            [estimate_tokens(ticket_description), estimate_tokens(context)],
+            [2.0, 1.0],
+            token_budget - fixed
+        )
+        ticket_description = truncate_to_tokens(ticket_description, description_budget)
+        context = truncate_to_tokens(context, context_budget) if context_budget else ""
     return TICKET_ANALYSIS_PROMPT.format(
         system_prompt=SYSTEM_PROMPT,
         ticket_id=ticket_id,
         ticket_title=ticket_title,
         ticket_description=ticket_description,
-        context=context or ""
+        context=context
+    )
+
+
+def fit_code(
+    code: str,
+    budget: int,
+    ticket_text: str = "",
+    focus_lines: Sequence[int] = ()
+) -> str:
+    """
+    Cut code down to a token budget around the lines that matter.
+    
+    Windows around the given lines (e.g. stacktrace frames) and around
+    identifiers the ticket mentions are kept, in file order.
+    
+    Args:
+        code: Source code
+        budget: Maximum tokens
+        ticket_text: Ticket title and description
+        focus_lines: 1-based line numbers to keep
+        
+    Returns:
+        The code, or the most relevant parts of it
+    """
+    if estimate_tokens(code) <= budget:
+        return code
+    windows = focus_windows(
+        code,
+        "lines",
+        focus_lines=focus_lines,
+        terms=focus_terms(ticket_text, code),
+        max_windows=16
+    )
+    packed = pack_snippets(windows, budget)
+    parts = sorted(packed.snippets, key=lambda snippet: snippet.start_line or 0)
+    return "\n\n".join(
+        f"[{snippet.source.replace(':', ' ', 1)}]\n{snippet.text}" for snippet in parts
     )
 
 
+@timed("render_prompt")
 def get_code_analysis_prompt(
     code: str,
     language: str,
     ticket_id: str,
     ticket_title: str,
     ticket_description: str,
-    context: Optional[str] = None
+    context: Optional[str] = None,
+    token_budget: Optional[int] = None,
+    focus_lines: Sequence[int] = ()
 ) -> str:
     """
     Get the code analysis prompt.
     
+    With a token budget, the code gets most of the space and is cut down to
+    the regions around ``focus_lines`` and identifiers mentioned in the
+    ticket; the description and context are trimmed from the end.
+    
     Args:
         code: Source code to analyze
         language: Programming language
@@ -108,10 +216,37 @@ def get_code_analysis_prompt(
         ticket_title: Ticket title or summary
         ticket_description: Detailed ticket description
         context: Additional context (optional)
+        token_budget: Maximum prompt tokens (optional)
+        focus_lines: 1-based code lines to keep when trimming (optional)
         
     Returns:
         Formatted prompt for code analysis
     """
+    context = context or ""
+    if token_budget is not None:
+        fixed = estimate_tokens(CODE_ANALYSIS_PROMPT.format(
+            system_prompt=SYSTEM_PROMPT,
+            language=language,
+            code="",
+            ticket_id=ticket_id,
+            ticket_title=ticket_title,
+            ticket_description="",
+            context=""
+        ))
+        code_budget, description_budget, context_budget = allocate_budget(
+            [
+                estimate_tokens(code),
+                estimate_tokens(ticket_description),
+                estimate_tokens(context)
+            ],
+            [3.0, 1.0, 1.0],
+            token_budget - fixed
+        )
+        code = fit_code(
+            code, code_budget, f"{ticket_title}\n{ticket_description}", focus_lines
+        )
+        ticket_description = truncate_to_tokens(ticket_description, description_budget)
+        context = truncate_to_tokens(context, context_budget) if context_budget else ""
     return CODE_ANALYSIS_PROMPT.format(
         system_prompt=SYSTEM_PROMPT,
         language=language,
@@ -119,5 +254,71 @@ def get_code_analysis_prompt(
         ticket_id=ticket_id,
         ticket_title=ticket_title,
         ticket_description=ticket_description,
-        context=context or ""
+        context=context
+    )
+
+
+def get_code_chunk_prompt(
+    code: str,
+    language: str,
+    part: int,
+    parts: int,
+    start_line: int,
+    end_line: int,
+    line_count: int,
+    instruction: str = ""
+) -> str:
+    """
+    Get the prompt analyzing one chunk of a large file.
+    
+    Args:
+        code: The chunk's source code
+        language: Programming language
+        part: 1-based chunk number
+        parts: Number of chunks
+        start_line: First line of the chunk in the file
+        end_line: Last line of the chunk in the file
+        line_count: Lines in the whole file
+        instruction: Specific question to address (optional)
+        
+    Returns:
+        Formatted prompt for the map step
+    """
+    return CODE_CHUNK_ANALYSIS_PROMPT.format(
+        system_prompt=SYSTEM_PROMPT,
+        language=language,
+        code=code,
+        part=part,
+        parts=parts,
+        start_line=start_line,
+        end_line=end_line,
+        line_count=line_count,
+        instruction=instruction
+    )
+
+
+def get_code_reduce_prompt(
+    findings: Sequence[str],
+    language: str,
+    line_count: int,
+    instruction: str = ""
+) -> str:
+    """
+    Get the prompt merging per-chunk findings into one analysis.
+    
+    Args:
+        findings: Findings per chunk, each labelled with its line range
+        language: Programming language
+        line_count: Lines in the whole file
+        instruction: Specific question to address (optional)
+        
+    Returns:
+        Formatted prompt for the reduce step
+    """
+    return CODE_REDUCE_PROMPT.format(
+        system_prompt=SYSTEM_PROMPT,
+        language=language,
+        line_count=line_count,
+        findings="\n\n".join(findings),
+        instruction=instruction
     )
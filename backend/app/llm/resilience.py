@@ -0,0 +1,447 @@
+"""
+Timeouts, retries, hedged requests and a circuit breaker for LLM calls.
+
+``ResilientCaller.call`` wraps one logical LLM call:
+
+- every attempt has a timeout, which ``func`` applies to the request once
+  it is running (see ``LLMExecutionPool.run``) so that time spent queued
+  for an execution slot is not mistaken for a slow upstream;
+- retryable failures (timeouts, rate limiting, 5xx, connection errors) are
+  retried with jittered exponential backoff via ``tenacity``; anything else
+  (e.g. an invalid request) fails immediately;
+- optionally, if an attempt is slower than the recent p95 latency, a
+  second identical request is sent and whichever finishes first wins;
+- a circuit breaker tracks the recent failure ratio and, once it is too
+  high, fails calls immediately for a cool-down period instead of letting
+  them queue up behind a degraded upstream.
+
+Note that a blocking SDK call that has been given up on (timed out or lost
+a hedge race) keeps its worker thread until it returns; the execution pool
+accounts for that.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.core.config import get_settings
+from app.llm.executor import LLMQueueFullError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# google.api_core exception classes worth retrying, matched by name so this
+# module does not import the SDK
+_RETRYABLE_ERRORS = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "BadGateway",
+    "GatewayTimeout",
+    "DeadlineExceeded",
+    "Aborted",
+}
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit is open."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"LLM circuit open; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed LLM call is worth retrying.
+
+    Args:
+        error: The exception raised by the attempt
+
+    Returns:
+        True for timeouts, connection errors, rate limiting and server errors
+    """
+    if isinstance(error, (CircuitOpenError, LLMQueueFullError)):
+        # Local back-pressure, not an upstream failure
+        return False
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in _RETRYABLE_ERRORS for cls in type(error).__mro__):
+        return True
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return isinstance(status, int) and status in _RETRYABLE_STATUS
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies."""
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 20,
+        max_age: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of most recent latencies kept
+            min_samples: Samples needed before quantiles are reported
+            max_age: Seconds after which a sample no longer counts (None
+                keeps samples until they are pushed out of the window)
+        """
+        self.min_samples = min_samples
+        self.max_age = max_age
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        if self.max_age is None:
+            return
+        while self._samples and self._samples[0][0] < now - self.max_age:
+            self._samples.popleft()
+
+    def record(self, seconds: float, now: Optional[float] = None) -> None:
+        """Add a latency sample."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._trim(now)
+            self._samples.append((now, seconds))
+
+    def quantile(self, q: float, now: Optional[float] = None) -> Optional[float]:
+        """The ``q`` quantile of recent latencies, or None if too few samples."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._trim(now)
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(seconds for _, seconds in self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Failure-ratio circuit breaker.
+
+    Closed: calls pass and outcomes are recorded over a sliding time
+    window. When at least ``min_calls`` outcomes are in the window and the
+    failure ratio reaches ``failure_ratio``, the circuit opens. Open: calls
+    fail with ``CircuitOpenError`` for ``open_seconds``. Half-open: one
+    probe call at a time is let through; a success closes the circuit, a
+    failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_ratio: float = 0.5,
+        min_calls: int = 10,
+        window_seconds: float = 30.0,
+        open_seconds: float = 15.0,
+    ) -> None:
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_ratio: Failure ratio at which the circuit opens
+            min_calls: Outcomes needed in the window before it can open
+            window_seconds: Length of the sliding outcome window
+            open_seconds: Time the circuit stays open before a probe
+        """
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            _, ok = self._outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def _open(self, now: float) -> None:
+        self.state = self.OPEN
+        self._opened_at = now
+        self._probing = False
+        self._outcomes.clear()
+        self._failures = 0
+        self.opened += 1
+        logger.warning(f"LLM circuit opened for {self.open_seconds:.0f}s")
+
+    def before_call(self) -> None:
+        """
+        Check that a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with a
+                probe already in flight)
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.open_seconds - now
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(remaining)
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.open_seconds)
+                self._probing = True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self._probing = False
+                logger.info("LLM circuit closed")
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit if needed."""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._failures += 1
+            self._trim(now)
+            calls = len(self._outcomes)
+            if (
+                self.state == self.CLOSED
+                and calls >= self.min_calls
+                and self._failures / calls >= self.failure_ratio
+            ):
+                self._open(now)
+
+    def release_probe(self) -> None:
+        """End a half-open probe that produced no verdict."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get breaker state and counters."""
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "state": self.state,
+                "window_calls": len(self._outcomes),
+                "window_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class ResilientCaller:
+    """Applies timeout, retry, hedging and circuit breaking to async calls."""
+
+    def __init__(
+        self,
+        timeout: float = 60.0,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 1.0,
+        breaker: Optional[CircuitBreaker] = None,
+        latency: Optional[LatencyTracker] = None,
+    ) -> None:
+        """
+        Initialize the caller.
+
+        Args:
+            timeout: Seconds each attempt may take
+            max_attempts: Attempts per call, including the first
+            backoff_base: Base of the exponential backoff between attempts
+            backoff_max: Maximum backoff between attempts
+            hedge: Whether to send a hedged second request for slow attempts
+            hedge_quantile: Latency quantile after which to hedge
+            hedge_min_delay: Minimum seconds before hedging
+            breaker: Circuit breaker (a new one by default)
+            latency: Latency tracker (a new one by default)
+        """
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = latency or LatencyTracker()
+        self._stats = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "ResilientCaller":
+        """Create a caller configured from application settings."""
+        settings = get_settings()
+        return cls(
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_attempts=settings.LLM_RETRY_ATTEMPTS,
+            backoff_base=settings.LLM_RETRY_BACKOFF_SECONDS,
+            backoff_max=settings.LLM_RETRY_MAX_BACKOFF_SECONDS,
+            hedge=settings.LLM_HEDGE_ENABLED,
+            hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+            hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+            breaker=CircuitBreaker(
+                failure_ratio=settings.LLM_BREAKER_FAILURE_RATIO,
+                min_calls=settings.LLM_BREAKER_MIN_CALLS,
+                window_seconds=settings.LLM_BREAKER_WINDOW_SECONDS,
+                open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+            ),
+        )
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off."""
+        if not self.hedge:
+            return None
+        quantile = self.latency.quantile(self.hedge_quantile)
+        if quantile is None:
+            return None
+        return max(quantile, self.hedge_min_delay)
+
+    async def _timed(self, func: Callable[[float], Awaitable[T]]) -> T:
+        """One request with a timeout, recording its latency on success."""
+        self._stats["attempts"] += 1
+        started = time.perf_counter()
+        try:
+            result = await func(self.timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise
+        self.latency.record(time.perf_counter() - started)
+        return result
+
+    async def _attempt(
+        self, func: Callable[[float], Awaitable[T]], can_hedge: Callable[[], bool]
+    ) -> T:
+        """One attempt, hedged with a second request if it runs slow."""
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._timed(func)
+        primary = asyncio.ensure_future(self._timed(func))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and can_hedge():
+                self._stats["hedges"] += 1
+                tasks.add(asyncio.ensure_future(self._timed(func)))
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call(
+        self,
+        func: Callable[[float], Awaitable[T]],
+        can_hedge: Callable[[], bool] = lambda: True,
+    ) -> T:
+        """
+        Run a call with timeouts, retries, hedging and circuit breaking.
+
+        Args:
+            func: Starts one request; called once per attempt (and hedge)
+                with the timeout to apply once the request is running
+            can_hedge: Checked before hedging, e.g. to skip hedging when the
+                execution pool is saturated
+
+        Returns:
+            The first successful result
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            Exception: The last error, once attempts are exhausted or for a
+                non-retryable error
+        """
+        self._stats["calls"] += 1
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(
+                multiplier=self.backoff_base, max=self.backoff_max
+            ),
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        )
+        async for attempt in retrying:
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    self._stats["retries"] += 1
+                self.breaker.before_call()
+                try:
+                    result = await self._attempt(func, can_hedge)
+                except asyncio.CancelledError:
+                    self.breaker.release_probe()
+                    raise
+                except Exception as e:
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    else:
+                        # A bad request says nothing about upstream health
+                        self.breaker.release_probe()
+                    self._stats["failures"] += 1
+                    raise
+                self.breaker.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get call, retry, hedge, latency and breaker statistics."""
+        p50 = self.latency.quantile(0.5)
+        p95 = self.latency.quantile(0.95)
+        return {
+            **self._stats,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "breaker": self.breaker.stats(),
+        }
@@ -0,0 +1,295 @@
+"""
+Latency-aware routing of ticket analyses between a fast and a large model.
+
+Simple tickets (by parsed category, without a stacktrace, with a small
+prompt) go to ``LLM_FAST_MODEL``; everything else goes to ``LLM_MODEL``.
+A model whose p95 latency over the last ``LLM_ROUTE_LATENCY_WINDOW_SECONDS``
+is above ``LLM_ROUTE_LATENCY_SLO_SECONDS`` or whose circuit breaker is open
+is avoided while the other one is healthy. An avoided model gets no traffic,
+so its samples age out and it is tried again once the window has passed.
+A fast answer that looks low-confidence (an error, very short, or hedged) is
+escalated to the large model. Every decision is counted and the most recent
+ones are kept for tuning.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import annotate
+from app.llm import gemini
+from app.llm.context_packer import estimate_tokens
+from app.llm.gemini import is_error_response
+from app.llm.resilience import CircuitBreaker, LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+LARGE = "large"
+
+_UNCERTAIN = re.compile(
+    r"\b(?:i'?m not sure|i am not sure|not enough information|"
+    r"insufficient information|cannot determine|can't determine|"
+    r"unable to determine|hard to say|more (?:information|details|context) "
+    r"(?:is|are|would be) needed|need more (?:information|details|context))\b",
+    re.I,
+)
+
+
+def low_confidence_reason(text: str, min_chars: int) -> Optional[str]:
+    """
+    Why an answer should be redone on the large model, if it should.
+
+    Args:
+        text: The generated answer
+        min_chars: Answers shorter than this are considered incomplete
+
+    Returns:
+        "error", "short" or "uncertain", or None for a confident answer
+    """
+    if is_error_response(text):
+        return "error"
+    if len(text.strip()) < min_chars:
+        return "short"
+    if _UNCERTAIN.search(text):
+        return "uncertain"
+    return None
+
+
+@dataclass
+class RoutingDecision:
+    """Which model answered a request, and why."""
+
+    route: str
+    model: str
+    reason: str
+    prompt_tokens: int
+    escalated: bool = False
+    escalation_reason: Optional[str] = None
+    latency_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dict."""
+        return asdict(self)
+
+
+class ModelRouter:
+    """Chooses between the fast and the large model per request."""
+
+    def __init__(
+        self,
+        fast_model: Optional[str] = None,
+        fast_max_tokens: int = 1024,
+        fast_categories: Tuple[str, ...] = ("feature", "bug", "unknown"),
+        fast_max_prompt_tokens: int = 3000,
+        latency_slo_seconds: float = 20.0,
+        latency_window_seconds: float = 120.0,
+        escalate_min_chars: int = 200,
+        history: int = 100,
+    ) -> None:
+        """
+        Initialize the router.
+
+        Args:
+            fast_model: Fast model name; None routes everything to LLM_MODEL
+            fast_max_tokens: Output token limit of the fast model
+            fast_categories: Ticket categories the fast model may answer
+            fast_max_prompt_tokens: Larger prompts go to the large model
+            latency_slo_seconds: p95 latency above which a model is avoided
+            latency_window_seconds: Age after which a latency sample is dropped
+            escalate_min_chars: Shorter fast answers are escalated
+            history: Number of recent decisions kept
+        """
+        self.fast_model = fast_model
+        self.fast_max_tokens = fast_max_tokens
+        self.fast_categories = set(fast_categories)
+        self.fast_max_prompt_tokens = fast_max_prompt_tokens
+        self.latency_slo_seconds = latency_slo_seconds
+        self.escalate_min_chars = escalate_min_chars
+        self._fast_client: Optional[gemini.GeminiClient] = None
+        self._latency = {
+            route: LatencyTracker(max_age=latency_window_seconds)
+            for route in (FAST, LARGE)
+        }
+        self._counts = {route: {"requests": 0, "errors": 0} for route in (FAST, LARGE)}
+        self._escalations: Counter = Counter()
+        self._reasons: Counter = Counter()
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "ModelRouter":
+        """Create a router configured from application settings."""
+        settings = get_settings()
+        return cls(
+            fast_model=settings.LLM_FAST_MODEL,
+            fast_max_tokens=settings.LLM_FAST_MAX_TOKENS,
+            fast_categories=tuple(settings.LLM_FAST_CATEGORIES),
+            fast_max_prompt_tokens=settings.LLM_FAST_MAX_PROMPT_TOKENS,
+            latency_slo_seconds=settings.LLM_ROUTE_LATENCY_SLO_SECONDS,
+            latency_window_seconds=settings.LLM_ROUTE_LATENCY_WINDOW_SECONDS,
+            escalate_min_chars=settings.LLM_ESCALATE_MIN_CHARS,
+        )
+
+    def client(self, route: str) -> Any:
+        """The Gemini client serving a route."""
+        if route == LARGE or not self.fast_model:
+            return gemini.get_gemini_client()
+        if self._fast_client is None:
+            self._fast_client = gemini.GeminiClient(
+                model_name=self.fast_model, max_tokens=self.fast_max_tokens
+            )
+        return self._fast_client
+
+    def model_name(self, route: str) -> str:
+        """Model name of a route."""
+        if route == FAST and self.fast_model:
+            return self.fast_model
+        return get_settings().LLM_MODEL
+
+    def _circuit_open(self, route: str) -> bool:
+        resilience = getattr(self.client(route), "resilience", None)
+        return (
+            resilience is not None and resilience.breaker.state == CircuitBreaker.OPEN
+        )
+
+    def degraded(self, route: str) -> bool:
+        """
+        Whether a route is slow or failing right now.
+
+        Too few recent latency samples count as healthy.
+        """
+        if self._circuit_open(route):
+            return True
+        p95 = self._latency[route].quantile(0.95)
+        return p95 is not None and p95 > self.latency_slo_seconds
+
+    def choose(self, parsed: Dict[str, Any], prompt_tokens: int) -> RoutingDecision:
+        """
+        Pick the model for a ticket analysis.
+
+        Args:
+            parsed: Parsed ticket (see ``parse_ticket``)
+            prompt_tokens: Estimated size of the prompt
+
+        Returns:
+            The routing decision
+        """
+        if not self.fast_model:
+            route, reason = LARGE, "single_model"
+        elif parsed.get("has_stacktrace"):
+            route, reason = LARGE, "stacktrace"
+        elif prompt_tokens > self.fast_max_prompt_tokens:
+            route, reason = LARGE, "prompt_size"
+        elif parsed.get("category", "unknown") in self.fast_categories:
+            route, reason = FAST, "category"
+        else:
+            route, reason = LARGE, "category"
+        if self.fast_model:
+            other = FAST if route == LARGE else LARGE
+            if self.degraded(route) and not self.degraded(other):
+                route, reason = other, f"{reason}+latency"
+        return RoutingDecision(route, self.model_name(route), reason, prompt_tokens)
+
+    async def _generate(self, route: str, prompt: str) -> str:
+        """Call one route, recording its latency."""
+        started = time.perf_counter()
+        text: str = await self.client(route).generate_response(prompt)
+        with self._lock:
+            self._counts[route]["requests"] += 1
+            if is_error_response(text):
+                self._counts[route]["errors"] += 1
+        if not is_error_response(text):
+            self._latency[route].record(time.perf_counter() - started)
+        return text
+
+    async def generate(
+        self, prompt: str, parsed: Dict[str, Any]
+    ) -> Tuple[str, RoutingDecision]:
+        """
+        Answer a ticket analysis prompt on the chosen model.
+
+        Args:
+            prompt: The analysis prompt
+            parsed: Parsed ticket the prompt was built from
+
+        Returns:
+            The answer and the routing decision that produced it
+        """
+        started = time.perf_counter()
+        decision = self.choose(parsed, estimate_tokens(prompt))
+        annotate("prompt_tokens", decision.prompt_tokens)
+        annotate("llm_model", decision.model)
+        text = await self._generate(decision.route, prompt)
+        if decision.route == FAST:
+            reason = low_confidence_reason(text, self.escalate_min_chars)
+            if reason is not None and not self._circuit_open(LARGE):
+                decision.escalated = True
+                decision.escalation_reason = reason
+                text = await self._generate(LARGE, prompt)
+        decision.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        annotate("llm_escalated", decision.escalated)
+        self._record(decision, parsed)
+        return text, decision
+
+    def _record(self, decision: RoutingDecision, parsed: Dict[str, Any]) -> None:
+        """Keep a decision for the stats."""
+        logger.debug(
+            f"Routed {parsed.get('ticket_id')} to {decision.model} "
+            f"({decision.reason}, escalated={decision.escalated})"
+        )
+        with self._lock:
+            self._reasons[f"{decision.route}:{decision.reason}"] += 1
+            if decision.escalated:
+                self._escalations[decision.escalation_reason] += 1
+            self._recent.append(
+                {
+                    "ticket_id": parsed.get("ticket_id"),
+                    "category": parsed.get("category", "unknown"),
+                    **decision.to_dict(),
+                }
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-model latency, decision counts and recent decisions."""
+        routes: Dict[str, Any] = {}
+        for route in (FAST, LARGE):
+            p50 = self._latency[route].quantile(0.5)
+            p95 = self._latency[route].quantile(0.95)
+            enabled = route == LARGE or bool(self.fast_model)
+            routes[route] = {
+                "model": self.model_name(route) if enabled else None,
+                **self._counts[route],
+                "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+        with self._lock:
+            recent: List[Dict[str, Any]] = list(self._recent)
+            return {
+                "routes": routes,
+                "decisions": dict(self._reasons),
+                "escalations": dict(self._escalations),
+                "recent": recent,
+            }
+
+
+# Singleton instance
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get or create the model router singleton."""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter.from_settings()
+    return _model_router
+
+
+def get_model_router_stats() -> Optional[Dict[str, Any]]:
+    """Get routing statistics without creating the router."""
+    return _model_router.stats() if _model_router is not None else None
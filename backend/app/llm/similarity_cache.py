@@ -0,0 +1,323 @@
+"""
+Near-duplicate response cache for ticket analyses.
+
+The exact completion cache misses when an incident is re-filed with a new
+ticket ID, timestamp or request ID in the text. This cache matches on the
+ticket text instead: volatile tokens are masked, the text is split into
+word shingles, and a MinHash signature of the shingles is indexed in
+locality-sensitive bands. A lookup only compares against entries sharing at
+least one band, then verifies the candidates with the exact Jaccard
+similarity of their shingle sets, so lookups stay sublinear in the number
+of cached entries while the threshold is applied exactly.
+
+Two texts with Jaccard similarity ``J`` share a band with probability
+``1 - (1 - J**rows) ** bands``. With the defaults (16 bands of 4 rows) that
+is over 99.9% at ``J = 0.9`` and about 12% at ``J = 0.3``, so unrelated
+tickets rarely even become candidates.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+_VOLATILE = [
+    (
+        re.compile(
+            r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?"
+            r"(?:Z|[+-]\d{2}:?\d{2})?"
+        ),
+        " timestamp ",
+    ),
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), " time "),
+    (
+        re.compile(
+            r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I
+        ),
+        " uuid ",
+    ),
+    (re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.]+\b"), " email "),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), " ip "),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b(?=[0-9a-f]*\d)[0-9a-f]{12,}\b", re.I), " hex "),
+    # Request ids, order numbers, ports... short numbers such as HTTP status
+    # codes carry meaning and are kept
+    (re.compile(r"\b\d{4,}\b"), " num "),
+]
+_WORD = re.compile(r"\w+")
+
+
+def mask_volatile(text: str, ticket_id: Optional[str] = None) -> str:
+    """
+    Replace the parts of a ticket that differ between re-filings.
+
+    Args:
+        text: Ticket title and description
+        ticket_id: The ticket's own ID, which may be quoted in its text
+
+    Returns:
+        Text with timestamps, ids, addresses and long numbers masked
+    """
+    if ticket_id:
+        text = text.replace(ticket_id, " ticket ")
+    for pattern, replacement in _VOLATILE:
+        text = pattern.sub(replacement, text)
+    return text.lower()
+
+
+def shingles(text: str) -> FrozenSet[int]:
+    """Hashes of the overlapping ``SHINGLE_SIZE``-word shingles of a text."""
+    words = _WORD.findall(text)
+    if len(words) < SHINGLE_SIZE:
+        grams: Iterable[str] = [" ".join(words)] if words else []
+    else:
+        grams = (
+            " ".join(words[i : i + SHINGLE_SIZE])
+            for i in range(len(words) - SHINGLE_SIZE + 1)
+        )
+    return frozenset(
+        int.from_bytes(
+            hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        for gram in grams
+    )
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer; uint64 arithmetic wraps as intended."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    mixed: np.ndarray = values ^ (values >> np.uint64(31))
+    return mixed
+
+
+def minhash(features: FrozenSet[int], seeds: np.ndarray) -> np.ndarray:
+    """
+    MinHash signature of a set of 64-bit feature hashes.
+
+    Args:
+        features: Shingle hashes
+        seeds: One uint64 seed per hash function
+
+    Returns:
+        For each seed, the minimum of the seeded hash over all features
+    """
+    if not features:
+        return np.zeros(len(seeds), dtype=np.uint64)
+    hashes = np.fromiter(features, dtype=np.uint64, count=len(features))
+    with np.errstate(over="ignore"):
+        signature: np.ndarray = _mix64(hashes[None, :] ^ seeds[:, None]).min(axis=1)
+    return signature
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    """Jaccard similarity of two shingle sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class NearDuplicate:
+    """A cached completion for a near-duplicate ticket."""
+
+    ticket_id: str
+    completion: str
+    similarity: float
+
+
+@dataclass
+class _Entry:
+    scope: str
+    ticket_id: str
+    band_keys: List[Tuple[str, int, bytes]]
+    shingles: FrozenSet[int]
+    completion: str
+    expires_at: float
+
+
+class SimilarityCache:
+    """LRU cache of completions, looked up by near-duplicate ticket text."""
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries: int = 2048,
+        ttl_seconds: float = 3600.0,
+        bands: int = 16,
+        rows: int = 4,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum Jaccard similarity of the ticket shingles for
+                a cached completion to be reused
+            max_entries: Maximum number of cached completions
+            ttl_seconds: Seconds a completion stays valid (0 disables expiry)
+            bands: Number of LSH bands; more bands find less similar
+                candidates at the cost of more candidates per lookup
+            rows: MinHash values per band; more rows make a band match
+                require a higher similarity
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bands = bands
+        self.rows = rows
+        # Fixed seeds keep signatures comparable between instances
+        self._seeds = _mix64(np.arange(1, bands * rows + 1, dtype=np.uint64))
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, bytes], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "candidates": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def _signature(
+        self, scope: str, ticket_id: str, text: str
+    ) -> Tuple[FrozenSet[int], List[Tuple[str, int, bytes]]]:
+        """Shingles of a ticket and the bucket keys of its MinHash bands."""
+        features = shingles(mask_volatile(text, ticket_id))
+        signature = minhash(features, self._seeds).reshape(self.bands, self.rows)
+        keys = [(scope, band, signature[band].tobytes()) for band in range(self.bands)]
+        return features, keys
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop an entry and its bucket memberships (caller holds the lock)."""
+        entry = self._entries.pop(entry_id)
+        for key in entry.band_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def lookup(self, scope: str, ticket_id: str, text: str) -> Optional[NearDuplicate]:
+        """
+        Find the cached completion of the most similar ticket.
+
+        Args:
+            scope: Namespace of the completion (prompt kind and parameters)
+            ticket_id: ID of the ticket being analyzed
+            text: Ticket title and description
+
+        Returns:
+            The best match at or above the threshold, or None
+        """
+        features, keys = self._signature(scope, ticket_id, text)
+        now = time.time()
+        best: Optional[Tuple[float, int]] = None
+        with self._lock:
+            self._stats["lookups"] += 1
+            candidates: Set[int] = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+            self._stats["candidates"] += len(candidates)
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry.expires_at and entry.expires_at < now:
+                    self._remove(entry_id)
+                    self._stats["expirations"] += 1
+                    continue
+                score = jaccard(features, entry.shingles)
+                if score >= self.threshold and (best is None or score > best[0]):
+                    best = (score, entry_id)
+            if best is None:
+                return None
+            score, entry_id = best
+            self._entries.move_to_end(entry_id)
+            self._stats["hits"] += 1
+            entry = self._entries[entry_id]
+            return NearDuplicate(entry.ticket_id, entry.completion, round(score, 4))
+
+    def store(self, scope: str, ticket_id: str, text: str, completion: str) -> None:
+        """
+        Cache the completion produced for a ticket.
+
+        Args:
+            scope: Namespace of the completion (prompt kind and parameters)
+            ticket_id: ID of the analyzed ticket
+            text: Ticket title and description
+            completion: The LLM completion to reuse for near-duplicates
+        """
+        features, keys = self._signature(scope, ticket_id, text)
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else 0.0
+        entry = _Entry(scope, ticket_id, keys, features, completion, expires_at)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit rate, candidate and eviction counters."""
+        with self._lock:
+            lookups = self._stats["lookups"]
+            return {
+                **self._stats,
+                "hit_ratio": (
+                    round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+                ),
+                "candidates_per_lookup": (
+                    round(self._stats["candidates"] / lookups, 2) if lookups else 0.0
+                ),
+                "entries": len(self._entries),
+                "buckets": len(self._buckets),
+                "threshold": self.threshold,
+            }
+
+
+# Singleton instance
+_similarity_cache: Optional[SimilarityCache] = None
+
+
+def get_similarity_cache() -> Optional[SimilarityCache]:
+    """Get or create the shared near-duplicate cache, or None if disabled."""
+    global _similarity_cache
+    settings = get_settings()
+    if not settings.SIMILARITY_CACHE_ENABLED:
+        return None
+    if _similarity_cache is None:
+        _similarity_cache = SimilarityCache(
+            threshold=settings.SIMILARITY_CACHE_THRESHOLD,
+            max_entries=settings.SIMILARITY_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SIMILARITY_CACHE_TTL_SECONDS,
+            bands=settings.SIMILARITY_CACHE_BANDS,
+            rows=settings.SIMILARITY_CACHE_ROWS,
+        )
+    return _similarity_cache
+
+
+def get_similarity_cache_stats() -> Optional[Dict[str, Any]]:
+    """Get near-duplicate cache statistics without creating the cache."""
+    return _similarity_cache.stats() if _similarity_cache is not None else None
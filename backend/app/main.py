@@ -3,10 +3,25 @@ Main FastAPI application file for BoaServer.
 """
 
 import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.api.admission import AdmissionMiddleware
+from app.api.router import router as api_router
+from app.api.routes.metrics import router as metrics_router
+from app.core.cache import close_shared_cache_backend
 from app.core.config import get_settings
+from app.core.ingest import start_ingest, stop_ingest
+from app.core.metrics import MetricsMiddleware
+from app.core.profiler import ProfilerMiddleware, stop_profiler
+from app.core.warmup import get_readiness, start_warmup, stop_warmup
+from app.knowledge.fingerprint import close_fingerprint_index
+from app.llm.executor import shutdown_llm_pool
+from app.llm.gemini import init_gemini_client
+from app.mcp.client import close_mcp_client, init_mcp_client
+from app.mcp.local_search import close_local_search, init_local_search
 
 # Configure logging
 logging.basicConfig(
@@ -14,7 +29,6 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -23,6 +37,17 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Shed load before it queues up inside the worker; added first so that
+# CORS headers are still set on 429/503 responses
+app.add_middleware(AdmissionMiddleware)
+
+# Captures slow requests when PROFILER_ENABLED is set; shares the metrics trace
+app.add_middleware(ProfilerMiddleware)
+
+# Wraps admission control, so durations include queueing and shed requests;
+# reads METRICS_ENABLED at the first request, not at import
+app.add_middleware(MetricsMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -33,23 +58,44 @@ app.add_middleware(
 )
 
 # Include API routes
-# This will be uncommented when the api module is created
-# from app.api.router import router as api_router
-# app.include_router(api_router, prefix="/api")
+app.include_router(api_router, prefix="/api")
+app.include_router(metrics_router)
 
 @app.get("/health")
 async def health_check() -> dict:
     """Simple health check endpoint."""
     return {"status": "healthy", "version": "0.1.0"}
 
+@app.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """Readiness probe: 503 until startup and connection warm-up are done."""
+    status = get_readiness().status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 # Startup event
 @app.on_event("startup")
 async def startup_event() -> None:
     """Execute actions on application startup."""
     logger.info("BoaServer starting up...")
+    # Validates the configuration: missing settings fail here, not at import
+    get_settings()
+    await init_gemini_client()
+    await init_mcp_client()
+    await init_local_search()
+    start_warmup()
+    start_ingest()
     
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
     """Execute actions on application shutdown."""
     logger.info("BoaServer shutting down...")
+    await stop_warmup()
+    # Before the clients close: unfinished events are spilled for next time
+    await stop_ingest()
+    await close_mcp_client()
+    await close_local_search()
+    close_fingerprint_index()
+    stop_profiler()
+    shutdown_llm_pool()
+    close_shared_cache_backend()
@@ -0,0 +1,342 @@
+"""
+Async client for the MCP server.
+
+A single long-lived ``httpx.AsyncClient`` is shared by all requests so TCP
+(and TLS) connections are pooled and kept alive between MCP calls. The
+client is created on application startup and closed on shutdown.
+
+The MCP server is expected to expose:
+
+- ``GET /files?repo=&path=&ref=`` returning ``{path, content, size,
+  last_modified}``
+- ``POST /search`` with ``{query, repositories, limit}`` returning
+  ``{"results": [{file, line, snippet, repository}, ...]}``
+"""
+
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.cache import get_cache_backend
+from app.core.config import get_settings
+from app.core.metrics import ERRORS, record_stage, timed
+from app.mcp.file_cache import FileContentCache, FileKey
+
+logger = logging.getLogger(__name__)
+
+
+class MCPError(Exception):
+    """Raised when an MCP request fails."""
+
+
+class MCPClient:
+    """Pooled, keep-alive client for the MCP server API."""
+
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_concurrency: int = 16,
+        http2: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        file_cache: Optional[FileContentCache] = None,
+    ) -> None:
+        """
+        Initialize the client. Connections are opened lazily.
+
+        Args:
+            base_url: MCP server URL
+            token: Optional bearer token
+            max_connections: Maximum open connections to the MCP host
+            max_keepalive_connections: Idle connections kept for reuse
+            keepalive_expiry: Seconds an idle connection is kept alive
+            timeout: Read/write/pool timeout in seconds
+            connect_timeout: Connect timeout in seconds
+            max_concurrency: Maximum MCP requests in flight at once
+            http2: Negotiate HTTP/2 if the ``h2`` package is installed
+            transport: Custom transport (used by tests)
+            file_cache: Cache for ``get_file`` responses (None disables it)
+        """
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "MCP_HTTP2 requested but 'h2' is not installed; using HTTP/1.1"
+            )
+            http2 = False
+        self.http2 = http2
+        self._headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self._transport = transport
+        self.file_cache = file_cache
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._requests = 0
+        self._errors = 0
+        self._total_latency = 0.0
+
+    async def start(self) -> None:
+        """Create the underlying connection pool."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def warm(self, connections: int = 1) -> None:
+        """
+        Open pooled connections ahead of traffic (DNS, TCP and TLS).
+
+        Sends ``HEAD /`` on each; any HTTP status will do, what matters is
+        the connection left in the keep-alive pool.
+
+        Args:
+            connections: Connections to open concurrently (at most the
+                keep-alive limit)
+
+        Raises:
+            MCPError: If the server cannot be reached
+        """
+        await self.start()
+        assert self._client is not None
+        keepalive = self.limits.max_keepalive_connections or connections
+        count = max(1, min(connections, keepalive))
+        try:
+            await asyncio.gather(*(self._client.head("/") for _ in range(count)))
+        except httpx.HTTPError as e:
+            raise MCPError(f"MCP warm-up failed: {str(e)}") from e
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the pool, bounded by the concurrency limit."""
+        await self.start()
+        assert self._client is not None and self._semaphore is not None
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await self._client.request(method, url, **kwargs)
+            if response.status_code == 304:
+                # Answer to a conditional request; the caller holds the body
+                return response
+            response.raise_for_status()
+            return response
+        except httpx.HTTPStatusError as e:
+            self._errors += 1
+            ERRORS.inc("mcp")
+            raise MCPError(
+                f"MCP {method} {url} failed with status {e.response.status_code}"
+            ) from e
+        except httpx.HTTPError as e:
+            self._errors += 1
+            ERRORS.inc("mcp")
+            raise MCPError(f"MCP {method} {url} failed: {str(e)}") from e
+        finally:
+            elapsed = time.perf_counter() - started
+            self._requests += 1
+            self._total_latency += elapsed
+            record_stage("mcp_http", elapsed, _describe(method, url, kwargs))
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    @timed("mcp_get_file")
+    async def get_file(self, path: str, repo: str, ref: str = "main") -> Dict[str, Any]:
+        """
+        Get the content of a file from a repository.
+
+        Args:
+            path: File path within the repository
+            repo: Repository name
+            ref: Branch, tag or commit SHA
+
+        Returns:
+            Dictionary with ``path``, ``content``, ``size`` and ``last_modified``
+        """
+        params = {"repo": repo, "path": path, "ref": ref}
+        cache = self.file_cache
+        if cache is None:
+            response = await self._request("GET", "/files", params=params)
+            data: Dict[str, Any] = response.json()
+            return data
+
+        key = FileKey(repo, path, ref)
+        entry = cache.lookup(key)
+        if entry is not None and entry.is_fresh(cache.revalidate_after):
+            cache.record_hit(entry)
+            return entry.data
+
+        headers = entry.conditional_headers() if entry is not None else {}
+        response = await self._request("GET", "/files", params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            cache.mark_revalidated(entry, key)
+            return entry.data
+
+        cache.record_miss()
+        data = response.json()
+        cache.store(
+            key,
+            data,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+            or data.get("last_modified"),
+        )
+        return data
+
+    @timed("mcp_search")
+    async def search_code(
+        self, query: str, repositories: Optional[List[str]] = None, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Search code across repositories.
+
+        Args:
+            query: Search query
+            repositories: Repositories to search (all if None)
+            limit: Maximum number of results
+
+        Returns:
+            List of matches with ``file``, ``line``, ``snippet`` and ``repository``
+        """
+        response = await self._request(
+            "POST",
+            "/search",
+            json={"query": query, "repositories": repositories, "limit": limit},
+        )
+        payload = response.json()
+        results: List[Dict[str, Any]] = (
+            payload.get("results", []) if isinstance(payload, dict) else payload
+        )
+        return results[:limit]
+
+    def _pool_connections(self) -> Dict[str, int]:
+        """Best-effort connection counts from the underlying httpcore pool."""
+        transport = getattr(self._client, "_transport", None)
+        pool = getattr(transport, "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return {}
+        try:
+            return {
+                "open": len(connections),
+                "idle": sum(1 for c in connections if c.is_idle()),
+            }
+        except Exception:
+            return {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get request and connection pool statistics."""
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "requests": self._requests,
+            "errors": self._errors,
+            "avg_latency_ms": (
+                round(self._total_latency / self._requests * 1000, 2)
+                if self._requests
+                else 0.0
+            ),
+            "connections": self._pool_connections(),
+            "file_cache": self.file_cache.stats() if self.file_cache else None,
+        }
+
+
+def _describe(method: str, url: str, kwargs: Dict[str, Any]) -> str:
+    """Short description of an MCP request for request timelines."""
+    params = kwargs.get("params") or {}
+    if "path" in params:
+        return f"{method} {url} {params.get('repo')}:{params['path']}"
+    query = (kwargs.get("json") or {}).get("query")
+    return f"{method} {url} {query!r}" if query else f"{method} {url}"
+
+
+# Singleton instance
+_mcp_client: Optional[MCPClient] = None
+
+
+def _build_client() -> MCPClient:
+    """Create an MCP client from application settings."""
+    settings = get_settings()
+    return MCPClient(
+        base_url=settings.MCP_SERVER_URL,
+        token=settings.MCP_SERVER_TOKEN,
+        max_connections=settings.MCP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.MCP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.MCP_KEEPALIVE_EXPIRY_SECONDS,
+        timeout=settings.MCP_TIMEOUT_SECONDS,
+        connect_timeout=settings.MCP_CONNECT_TIMEOUT_SECONDS,
+        max_concurrency=settings.MCP_MAX_CONCURRENCY,
+        http2=settings.MCP_HTTP2,
+        file_cache=(
+            FileContentCache(
+                max_bytes=settings.MCP_FILE_CACHE_MAX_BYTES,
+                max_entry_bytes=settings.MCP_FILE_CACHE_MAX_ENTRY_BYTES,
+                revalidate_after=settings.MCP_FILE_CACHE_REVALIDATE_SECONDS,
+                backend=get_cache_backend(settings.MCP_FILE_CACHE_TIER),
+            )
+            if settings.MCP_FILE_CACHE_ENABLED
+            else None
+        ),
+    )
+
+
+def get_mcp_client() -> MCPClient:
+    """Get or create the MCP client singleton."""
+    global _mcp_client
+    if _mcp_client is None:
+        _mcp_client = _build_client()
+    return _mcp_client
+
+
+async def init_mcp_client() -> MCPClient:
+    """Create the shared MCP client and its connection pool (app startup)."""
+    client = get_mcp_client()
+    await client.start()
+    return client
+
+
+async def close_mcp_client() -> None:
+    """Close the shared MCP client (app shutdown)."""
+    global _mcp_client
+    if _mcp_client is not None:
+        await _mcp_client.aclose()
+        _mcp_client = None
+
+
+def get_mcp_stats() -> Optional[Dict[str, Any]]:
+    """Get MCP client statistics without creating the client."""
+    return _mcp_client.stats() if _mcp_client is not None else None
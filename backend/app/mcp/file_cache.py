@@ -0,0 +1,370 @@
+"""
+Revalidating cache for MCP file contents.
+
+Files are keyed on ``(repo, path, ref)``. Content at a full commit SHA can
+never change, so those entries are served without contacting the MCP
+server. Entries for branches and tags are served directly for a short
+freshness window and revalidated afterwards with a conditional request
+(``If-None-Match`` / ``If-Modified-Since``); a ``304`` response renews the
+cached copy without transferring the file again.
+
+Eviction is driven by the total size of the cached content rather than the
+number of entries, so a few huge generated files cannot push out hundreds
+of small, frequently used ones.
+
+With ``MCP_FILE_CACHE_TIER=shared`` the in-process entries are backed by the
+host-wide cache (see ``app.core.cache``): a file fetched or revalidated by
+one worker is served by the others without another MCP request. A
+revalidation only records its time, in a namespace of its own, so it
+neither rewrites the file nor invalidates other workers' copies.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.core.cache import CacheBackend, sync_local_tier
+
+logger = logging.getLogger(__name__)
+
+
+class FileKey(NamedTuple):
+    """Identity of a cached file."""
+
+    repo: str
+    path: str
+    ref: str
+
+
+# Full SHA-1 or SHA-256 commit ids
+_COMMIT_SHA = re.compile(r"[0-9a-f]{40}(?:[0-9a-f]{24})?", re.IGNORECASE)
+
+
+def is_immutable_ref(ref: str) -> bool:
+    """Whether ``ref`` is a full commit SHA, whose content never changes."""
+    return _COMMIT_SHA.fullmatch(ref) is not None
+
+
+def _http_date(value: Optional[str]) -> Optional[str]:
+    """Convert an ISO-8601 or HTTP date to an HTTP date, or None."""
+    if not value:
+        return None
+    if value.endswith("GMT"):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return format_datetime(parsed.astimezone(timezone.utc), usegmt=True)
+
+
+def _entry_size(data: Dict[str, Any]) -> int:
+    """Approximate memory cost of a cached file response, in bytes."""
+    content = data.get("content") or ""
+    return len(content.encode("utf-8")) + len(str(data.get("path") or "")) + 64
+
+
+@dataclass
+class FileEntry:
+    """A cached file response and the validators needed to revalidate it."""
+
+    data: Dict[str, Any]
+    size: int
+    immutable: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    validated_at: float = 0.0
+
+    def is_fresh(self, max_age: float) -> bool:
+        """Whether the entry can be served without revalidation."""
+        return self.immutable or time.time() - self.validated_at < max_age
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers for a conditional request revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        last_modified = _http_date(self.last_modified)
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def dump(self) -> str:
+        """Serialize for a cache backend."""
+        return json.dumps(
+            {
+                "data": self.data,
+                "etag": self.etag,
+                "last_modified": self.last_modified,
+                "validated_at": self.validated_at,
+            }
+        )
+
+
+def _backend_key(key: FileKey) -> str:
+    return "\x00".join(key)
+
+
+def _file_key(backend_key: str) -> Optional[FileKey]:
+    parts = backend_key.split("\x00")
+    return FileKey(*parts) if len(parts) == 3 else None
+
+
+class FileContentCache:
+    """Thread-safe LRU of file responses bounded by total content size."""
+
+    NAMESPACE = "mcp_files"
+    # Latest revalidation time per file, shared without touching the entry
+    VALIDATIONS_NAMESPACE = "mcp_file_validations"
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entry_bytes: int = 4 * 1024 * 1024,
+        revalidate_after: float = 30.0,
+        backend: Optional[CacheBackend] = None,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Total size budget of cached content (this process)
+            max_entry_bytes: Files larger than this are not cached
+            revalidate_after: Seconds a branch entry is served before it is
+                revalidated with the MCP server
+            backend: Second tier shared with other workers (None disables it)
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.revalidate_after = revalidate_after
+        self.backend = backend
+        self._entries: "OrderedDict[FileKey, FileEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "shared_hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "oversize_rejections": 0,
+            "bytes_saved": 0,
+        }
+
+    def lookup(self, key: FileKey) -> Optional[FileEntry]:
+        """
+        Get the entry for a file, refreshing its recency.
+
+        The entry may be stale; check ``is_fresh`` before serving it without
+        revalidation.
+        """
+        sync_local_tier(self.backend, self.NAMESPACE, self._drop, self._clear_local)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if self.backend is None:
+            return entry
+        if entry is None:
+            return self._load(key)
+        if not entry.is_fresh(self.revalidate_after):
+            # Another worker may have revalidated it since
+            validated_at = self._shared_validation(key)
+            with self._lock:
+                entry.validated_at = max(entry.validated_at, validated_at)
+        return entry
+
+    def _load(self, key: FileKey) -> Optional[FileEntry]:
+        """Fetch an entry from the backend into this process."""
+        assert self.backend is not None
+        try:
+            found = self.backend.get(self.NAMESPACE, _backend_key(key))
+        except sqlite3.Error as e:
+            logger.error(f"Error reading shared file cache: {str(e)}")
+            return None
+        if found is None:
+            return None
+        stored = json.loads(found[0])
+        entry = self._insert(
+            key,
+            stored["data"],
+            stored.get("etag"),
+            stored.get("last_modified"),
+            max(stored.get("validated_at", 0.0), self._shared_validation(key)),
+        )
+        if entry is not None:
+            with self._lock:
+                self._stats["shared_hits"] += 1
+        return entry
+
+    def _share(self, key: FileKey, entry: FileEntry) -> None:
+        """Write an entry through to the backend."""
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(self.NAMESPACE, _backend_key(key), entry.dump(), 0.0)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing shared file cache: {str(e)}")
+
+    def _shared_validation(self, key: FileKey) -> float:
+        """When any worker last revalidated a file, or 0."""
+        assert self.backend is not None
+        try:
+            found = self.backend.get(self.VALIDATIONS_NAMESPACE, _backend_key(key))
+        except sqlite3.Error as e:
+            logger.error(f"Error reading shared file cache: {str(e)}")
+            return 0.0
+        return float(found[0]) if found is not None else 0.0
+
+    def _drop(self, backend_key: str) -> None:
+        """Forget an entry another worker changed."""
+        key = _file_key(backend_key)
+        if key is None:
+            return
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def _clear_local(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def record_hit(self, entry: FileEntry) -> None:
+        """Account for serving an entry without contacting the server."""
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["bytes_saved"] += entry.size
+
+    def record_miss(self) -> None:
+        """Account for a lookup that had to download the file."""
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def mark_revalidated(self, entry: FileEntry, key: Optional[FileKey] = None) -> None:
+        """
+        Renew an entry after the server answered ``304 Not Modified``.
+
+        Args:
+            entry: The revalidated entry
+            key: Its key; given, the renewal is shared with other workers
+        """
+        with self._lock:
+            entry.validated_at = time.time()
+            self._stats["revalidated"] += 1
+            self._stats["bytes_saved"] += entry.size
+        if key is None or self.backend is None:
+            return
+        # Other workers can now serve it without revalidating themselves
+        try:
+            self.backend.set(
+                self.VALIDATIONS_NAMESPACE,
+                _backend_key(key),
+                repr(entry.validated_at),
+                0.0,
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Error writing shared file cache: {str(e)}")
+
+    def store(
+        self,
+        key: FileKey,
+        data: Dict[str, Any],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> bool:
+        """
+        Cache a file response, evicting least recently used files as needed.
+
+        Args:
+            key: ``(repo, path, ref)``
+            data: File response from the MCP server
+            etag: ``ETag`` response header, if any
+            last_modified: ``Last-Modified`` header or the response's
+                ``last_modified`` field, if any
+
+        Returns:
+            True if stored, False if the file exceeded the size limit
+        """
+        entry = self._insert(key, data, etag, last_modified, time.time())
+        with self._lock:
+            if entry is None:
+                self._stats["oversize_rejections"] += 1
+                return False
+            self._stats["stores"] += 1
+        self._share(key, entry)
+        return True
+
+    def _insert(
+        self,
+        key: FileKey,
+        data: Dict[str, Any],
+        etag: Optional[str],
+        last_modified: Optional[str],
+        validated_at: float,
+    ) -> Optional[FileEntry]:
+        """Add an entry to this process, or None if it exceeds the size limit."""
+        size = _entry_size(data)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            if size > self.max_entry_bytes:
+                return None
+            entry = FileEntry(
+                data=data,
+                size=size,
+                immutable=is_immutable_ref(key.ref),
+                etag=etag,
+                last_modified=last_modified,
+                validated_at=validated_at,
+            )
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._stats["evictions"] += 1
+            return entry
+
+    def clear(self) -> None:
+        """Remove all entries, including shared ones."""
+        self._clear_local()
+        if self.backend is not None:
+            try:
+                self.backend.clear(self.NAMESPACE)
+                self.backend.clear(self.VALIDATIONS_NAMESPACE)
+            except sqlite3.Error as e:
+                logger.error(f"Error clearing shared file cache: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit ratio, bytes saved and occupancy."""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+            size = self._bytes
+        served = stats["hits"] + stats["revalidated"]
+        lookups = served + stats["misses"]
+        return {
+            **stats,
+            "hit_ratio": round(served / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "shared": self.backend is not None and self.backend.shared,
+        }
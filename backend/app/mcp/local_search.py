@@ -0,0 +1,217 @@
+"""
+Code search over local repository checkouts, backed by a trigram index.
+
+``LocalCodeSearch`` implements the same ``search_code`` contract as
+``MCPClient`` for repositories cloned onto the local filesystem, without
+a round trip to the MCP server. The index is refreshed incrementally in the
+background: only files whose modification time or size changed are read.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.mcp.trigram_index import DEFAULT_MAX_FILE_BYTES, TrigramIndex
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCodeSearch:
+    """Trigram-indexed code search over local repositories."""
+
+    def __init__(
+        self,
+        repositories: Dict[str, str],
+        index_path: Optional[str] = None,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        compact_ratio: float = 0.2,
+    ) -> None:
+        """
+        Initialize the search, loading an existing index if there is one.
+
+        Args:
+            repositories: Repository name to local checkout directory
+            index_path: Index file (None keeps the index in memory only)
+            max_file_bytes: Larger files are not indexed
+            compact_ratio: Save a new index file once changed files exceed
+                this fraction of the index
+        """
+        self.repositories = dict(repositories)
+        self.compact_ratio = compact_ratio
+        self.index = TrigramIndex(index_path, max_file_bytes=max_file_bytes)
+        # An index saved by a previous run is complete, if possibly stale
+        self.ready = self.index.stats()["base_files"] > 0
+        self._last_refresh: Dict[str, Any] = {}
+        self._searches = 0
+        self._search_seconds = 0.0
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Re-index changed files and persist the index when worthwhile.
+
+        Blocking; run it in an executor from async code.
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        started = time.perf_counter()
+        counts = self.index.refresh(self.repositories)
+        stats = self.index.stats()
+        changed = stats["delta_files"] + stats["tombstones"]
+        if (
+            self.index.path
+            and changed
+            and (
+                not stats["base_files"]
+                or changed >= self.compact_ratio * stats["base_files"]
+            )
+        ):
+            self.index.save()
+        self.ready = True
+        self._last_refresh = {
+            **counts,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        if counts["added"] or counts["updated"] or counts["removed"]:
+            logger.info(f"Refreshed local code index: {self._last_refresh}")
+        return counts
+
+    def search(
+        self,
+        query: str,
+        repositories: Optional[List[str]] = None,
+        limit: int = 10,
+        regex: bool = False,
+        case_sensitive: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Blocking form of ``search_code``."""
+        started = time.perf_counter()
+        try:
+            return self.index.search(
+                query,
+                self.repositories,
+                repositories=repositories,
+                limit=limit,
+                regex=regex,
+                case_sensitive=case_sensitive,
+            )
+        finally:
+            self._searches += 1
+            self._search_seconds += time.perf_counter() - started
+
+    async def search_code(
+        self,
+        query: str,
+        repositories: Optional[List[str]] = None,
+        limit: int = 10,
+        regex: bool = False,
+        case_sensitive: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search code across the local repositories.
+
+        Args:
+            query: Text, or a regular expression if ``regex`` is set
+            repositories: Repositories to search (all if None)
+            limit: Maximum number of results
+            regex: Treat ``query`` as a regular expression
+            case_sensitive: Match case exactly
+
+        Returns:
+            List of matches with ``file``, ``line``, ``snippet`` and ``repository``
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                self.search,
+                query,
+                repositories=repositories,
+                limit=limit,
+                regex=regex,
+                case_sensitive=case_sensitive,
+            ),
+        )
+
+    def close(self) -> None:
+        """Release the index."""
+        self.index.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index and search statistics."""
+        return {
+            "ready": self.ready,
+            "repositories": sorted(self.repositories),
+            "index": self.index.stats(),
+            "last_refresh": self._last_refresh,
+            "searches": self._searches,
+            "avg_search_ms": (
+                round(self._search_seconds / self._searches * 1000, 2)
+                if self._searches
+                else 0.0
+            ),
+        }
+
+
+# Singleton instance and its background refresh task
+_local_search: Optional[LocalCodeSearch] = None
+_refresh_task: "Optional[asyncio.Task[None]]" = None
+
+
+def get_local_search() -> Optional[LocalCodeSearch]:
+    """Get the local code search, or None if no repositories are configured."""
+    global _local_search
+    if _local_search is None:
+        settings = get_settings()
+        if settings.CODE_INDEX_REPOSITORIES:
+            _local_search = LocalCodeSearch(
+                settings.CODE_INDEX_REPOSITORIES,
+                index_path=settings.CODE_INDEX_PATH,
+                max_file_bytes=settings.CODE_INDEX_MAX_FILE_BYTES,
+            )
+    return _local_search
+
+
+async def _refresh_loop(search: LocalCodeSearch, interval: float) -> None:
+    """Refresh the index now and then every ``interval`` seconds."""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, search.refresh)
+        except Exception as e:
+            logger.error(f"Error refreshing local code index: {str(e)}")
+        if not interval:
+            return
+        await asyncio.sleep(interval)
+
+
+async def init_local_search() -> None:
+    """Start indexing the configured repositories in the background."""
+    global _refresh_task
+    search = get_local_search()
+    if search is not None and _refresh_task is None:
+        interval = get_settings().CODE_INDEX_REFRESH_SECONDS
+        _refresh_task = asyncio.ensure_future(_refresh_loop(search, interval))
+
+
+async def close_local_search() -> None:
+    """Stop background indexing and release the index."""
+    global _local_search, _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+    if _local_search is not None:
+        _local_search.close()
+        _local_search = None
+
+
+def get_local_search_stats() -> Optional[Dict[str, Any]]:
+    """Get local code search statistics without creating it."""
+    return _local_search.stats() if _local_search is not None else None
@@ -0,0 +1,567 @@
+"""
+Trigram inverted index for fast code search over local repositories.
+
+Every indexed file is broken into the set of 3-byte sequences (trigrams) of
+its case-folded content. A query is answered by intersecting the
+posting lists of the trigrams the query must contain, then verifying only
+the few candidate files with the real literal or regular expression. This
+is the approach of Google Code Search and zoekt, reduced to what a single
+process needs.
+
+The index lives in one file that is memory-mapped on load, so opening an
+index for a large monorepo costs no parsing and pages in only the posting
+lists a query touches. Files added or changed since the last save go into
+an in-memory delta segment, and removed or changed files are tombstoned;
+``save`` merges both back into a new index file.
+
+On-disk layout (little endian)::
+
+    header    magic, version, document count, trigram count,
+              documents size, postings count
+    documents JSON list of [repository, path, mtime_ns, size]
+    keys      uint32[trigram count]       sorted trigram values
+    offsets   uint64[trigram count + 1]   start of each posting list
+    postings  uint32[postings count]      document ids, ascending
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:  # Python 3.11+
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover
+    import sre_parse  # type: ignore[no-redef]
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b"BOATRGM\x00"
+INDEX_VERSION = 1
+_HEADER = struct.Struct("<8sIIIQQ")
+
+# Directories never worth indexing
+IGNORED_DIRECTORIES = frozenset(
+    [
+        ".git",
+        ".hg",
+        ".svn",
+        "node_modules",
+        "__pycache__",
+        ".venv",
+        "venv",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".idea",
+        ".tox",
+        "dist",
+        "build",
+        "target",
+    ]
+)
+DEFAULT_MAX_FILE_BYTES = 1024 * 1024
+# Files with a NUL byte in this prefix are treated as binary
+_BINARY_SNIFF_BYTES = 8192
+_SNIPPET_CHARS = 200
+
+
+@dataclass
+class Document:
+    """An indexed file."""
+
+    repository: str
+    path: str
+    mtime_ns: int
+    size: int
+
+
+# Non-ASCII characters that case-insensitive regexes match against ASCII
+# letters; they are folded so such matches are never filtered out
+_ASCII_FOLDS = tuple(
+    (char.encode("utf-8"), ascii_letter.encode("ascii"))
+    for char, ascii_letter in (
+        ("\u0130", "i"),
+        ("\u0131", "i"),
+        ("\u017f", "s"),
+        ("\u212a", "k"),
+    )
+)
+
+
+def _trigrams(data: bytes) -> Set[int]:
+    """Distinct trigrams of case-folded ``data``, as 24-bit integers."""
+    data = data.lower()
+    if not data.isascii():
+        for char, ascii_letter in _ASCII_FOLDS:
+            data = data.replace(char, ascii_letter)
+    # Matching is line based, so trigrams spanning a newline are never needed
+    grams: Set[Tuple[int, int, int]] = set()
+    for line in set(data.split(b"\n")):
+        grams.update(zip(line, line[1:], line[2:]))
+    return {a << 16 | b << 8 | c for a, b, c in grams}
+
+
+def _literal_runs(parsed: Any, case_sensitive: bool) -> List[str]:
+    """
+    Literal strings every match of a parsed regex must contain.
+
+    Only runs of consecutive literal characters in the top-level sequence
+    (or in groups that are not repeated or alternated) are used; anything
+    else ends the current run. This never produces a run that a match
+    could lack, so filtering on it is exact.
+    """
+    runs: List[str] = []
+    current: List[str] = []
+
+    def flush() -> None:
+        if current:
+            runs.append("".join(current))
+            current.clear()
+
+    for op, value in parsed:
+        if op is sre_parse.LITERAL and (case_sensitive or value < 128):
+            # Case folding in the index is ASCII-only
+            current.append(chr(value))
+        elif op is sre_parse.SUBPATTERN:
+            flush()
+            # value is (group, add_flags, del_flags, pattern)
+            group_case_sensitive = case_sensitive and not value[1] & re.IGNORECASE
+            runs.extend(_literal_runs(value[-1], group_case_sensitive))
+        else:
+            flush()
+    flush()
+    return runs
+
+
+def query_trigrams(
+    query: str, regex: bool = False, case_sensitive: bool = False
+) -> Optional[Set[int]]:
+    """
+    Trigrams a file must contain to match ``query``.
+
+    Args:
+        query: Literal text or regular expression
+        regex: Treat ``query`` as a regular expression
+        case_sensitive: Match case exactly
+
+    Returns:
+        Required trigrams, or None if the query cannot be narrowed down and
+        every file is a candidate
+    """
+    if regex:
+        parsed = sre_parse.parse(query)
+        if parsed.state.flags & re.IGNORECASE:
+            case_sensitive = False
+        runs = _literal_runs(parsed, case_sensitive)
+    elif case_sensitive:
+        runs = [query]
+    else:
+        runs = re.split(r"[^\x00-\x7f]", query)
+    required: Set[int] = set()
+    for run in runs:
+        required |= _trigrams(run.encode("utf-8"))
+    return required or None
+
+
+class TrigramIndex:
+    """Trigram index with a memory-mapped base segment and an in-memory delta."""
+
+    def __init__(
+        self, path: Optional[str] = None, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES
+    ) -> None:
+        """
+        Open an index, loading ``path`` if it exists.
+
+        Args:
+            path: Index file (None keeps the index in memory only)
+            max_file_bytes: Larger files are not indexed
+        """
+        self.path = path
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.RLock()
+        self._documents: List[Document] = []
+        self._locations: Dict[Tuple[str, str], int] = {}
+        self._tombstones: Set[int] = set()
+        self._skipped: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self._delta: Dict[int, "array[int]"] = {}
+        self._base_documents = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._views: List[memoryview] = []
+        self._keys: Any = ()
+        self._offsets: Any = (0,)
+        self._postings: Any = ()
+        if path and os.path.exists(path):
+            self._load(path)
+
+    # Loading and saving
+
+    def _load(self, path: str) -> None:
+        """Memory-map an index file as the base segment."""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"Index file {path} is truncated")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_docs, n_keys, docs_size, n_postings = _HEADER.unpack_from(
+            mapped
+        )
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            mapped.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} trigram index")
+
+        position = _HEADER.size
+        documents = json.loads(mapped[position : position + docs_size])
+        position = _align(position + docs_size, 8)
+        view = memoryview(mapped)
+        offsets = view[position : position + 8 * (n_keys + 1)].cast("Q")
+        position += 8 * (n_keys + 1)
+        keys = view[position : position + 4 * n_keys].cast("I")
+        position += 4 * n_keys
+        postings = view[position : position + 4 * n_postings].cast("I")
+
+        self._release()
+        self._mmap = mapped
+        self._views = [view, offsets, keys, postings]
+        self._keys, self._offsets, self._postings = keys, offsets, postings
+        self._documents = [Document(*entry) for entry in documents]
+        self._base_documents = n_docs
+        self._locations = {
+            (doc.repository, doc.path): doc_id
+            for doc_id, doc in enumerate(self._documents)
+        }
+        self._tombstones = set()
+        self._delta = {}
+
+    def _release(self) -> None:
+        """Unmap the base segment."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._keys, self._offsets, self._postings = (), (0,), ()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def close(self) -> None:
+        """Release the memory map."""
+        with self._lock:
+            self._release()
+
+    def _base_trigrams(self) -> Iterator[Tuple[int, Any]]:
+        """Yield ``(trigram, posting list)`` for the base segment."""
+        keys, offsets, postings = self._keys, self._offsets, self._postings
+        for i, key in enumerate(keys):
+            yield key, postings[offsets[i] : offsets[i + 1]]
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Merge the base and delta segments into a new index file.
+
+        The file is written next to its destination and atomically renamed
+        into place, then memory-mapped as the new base segment. Document ids
+        are renumbered to drop tombstones.
+
+        Args:
+            path: Destination (default: the path the index was opened with)
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("No index path configured")
+        with self._lock:
+            remap: Dict[int, int] = {}
+            documents: List[List[Any]] = []
+            for doc_id, doc in enumerate(self._documents):
+                if doc_id not in self._tombstones:
+                    remap[doc_id] = len(documents)
+                    documents.append([doc.repository, doc.path, doc.mtime_ns, doc.size])
+
+            keys, offsets, postings = self._merge_postings(remap)
+
+            encoded = json.dumps(documents, separators=(",", ":")).encode("utf-8")
+            header = _HEADER.pack(
+                INDEX_MAGIC,
+                INDEX_VERSION,
+                len(documents),
+                len(keys),
+                len(encoded),
+                len(postings),
+            )
+            padding = _align(len(header) + len(encoded), 8) - len(header) - len(encoded)
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(encoded)
+                f.write(b"\x00" * padding)
+                offsets.tofile(f)
+                keys.tofile(f)
+                postings.tofile(f)
+            self._release()
+            os.replace(tmp_path, path)
+            self.path = path
+            self._load(path)
+            logger.info(
+                f"Saved trigram index with {len(documents)} files and "
+                f"{len(keys)} trigrams to {path}"
+            )
+
+    def _merge_postings(
+        self, remap: Dict[int, int]
+    ) -> Tuple["array[int]", "array[int]", "array[int]"]:
+        """Merge base and delta posting lists, renumbering document ids."""
+        merged: Dict[int, List[Any]] = {}
+        for key, posting in self._base_trigrams():
+            merged[key] = [posting]
+        for key, posting in self._delta.items():
+            merged.setdefault(key, []).append(posting)
+
+        keys = array("I")
+        offsets = array("Q", [0])
+        postings = array("I")
+        for key in sorted(merged):
+            before = len(postings)
+            for posting in merged[key]:
+                postings.extend(remap[d] for d in posting if d in remap)
+            if len(postings) > before:
+                keys.append(key)
+                offsets.append(len(postings))
+        # Slices of the base segment die with this frame, so it can be unmapped
+        return keys, offsets, postings
+
+    # Updating
+
+    def add_file(self, repository: str, path: str, full_path: str) -> bool:
+        """
+        Index (or re-index) a file into the delta segment.
+
+        Args:
+            repository: Repository name
+            path: Path relative to the repository root
+            full_path: Path on disk
+
+        Returns:
+            True if indexed, False if skipped as binary, too large or unreadable
+        """
+        try:
+            stat = os.stat(full_path)
+            if stat.st_size > self.max_file_bytes:
+                return False
+            with open(full_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            logger.warning(f"Cannot index {full_path}: {str(e)}")
+            return False
+        if b"\x00" in data[:_BINARY_SNIFF_BYTES]:
+            return False
+
+        grams = _trigrams(data)
+        with self._lock:
+            self.remove_file(repository, path)
+            doc_id = len(self._documents)
+            self._documents.append(
+                Document(repository, path, stat.st_mtime_ns, stat.st_size)
+            )
+            self._locations[(repository, path)] = doc_id
+            for gram in grams:
+                posting = self._delta.get(gram)
+                if posting is None:
+                    posting = self._delta[gram] = array("I")
+                posting.append(doc_id)
+        return True
+
+    def remove_file(self, repository: str, path: str) -> bool:
+        """Tombstone a file. Returns False if it was not indexed."""
+        with self._lock:
+            doc_id = self._locations.pop((repository, path), None)
+            if doc_id is None:
+                return False
+            self._tombstones.add(doc_id)
+            return True
+
+    def refresh(self, repositories: Dict[str, str]) -> Dict[str, int]:
+        """
+        Bring the index up to date with the files on disk.
+
+        Files are re-indexed only when their modification time or size
+        changed; files that disappeared are tombstoned.
+
+        Args:
+            repositories: Repository name to local checkout directory
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen: Set[Tuple[str, str]] = set()
+        for repository, root in repositories.items():
+            for path, full_path, stat in _walk(root):
+                location = (repository, path)
+                doc_id = self._locations.get(location)
+                doc = self._documents[doc_id] if doc_id is not None else None
+                version = (stat.st_mtime_ns, stat.st_size)
+                if doc is not None and (doc.mtime_ns, doc.size) == version:
+                    seen.add(location)
+                    counts["unchanged"] += 1
+                    continue
+                if self._skipped.get(location) == version:
+                    continue
+                if self.add_file(repository, path, full_path):
+                    seen.add(location)
+                    self._skipped.pop(location, None)
+                    counts["updated" if doc is not None else "added"] += 1
+                else:
+                    # Binary or oversized; not read again until it changes
+                    self._skipped[location] = version
+
+        with self._lock:
+            # Also drops repositories that are no longer configured
+            for location in list(self._locations):
+                if location not in seen:
+                    self.remove_file(*location)
+                    counts["removed"] += 1
+        return counts
+
+    # Searching
+
+    def _posting(self, gram: int) -> Iterable[int]:
+        """Document ids (base and delta) containing a trigram."""
+        keys = self._keys
+        i = bisect_left(keys, gram)
+        base: Iterable[int] = ()
+        if i < len(keys) and keys[i] == gram:
+            base = self._postings[self._offsets[i] : self._offsets[i + 1]]
+        delta = self._delta.get(gram)
+        if delta is None:
+            return base
+        return list(base) + list(delta)
+
+    def candidates(
+        self, grams: Optional[Set[int]], repositories: Optional[Iterable[str]] = None
+    ) -> List[Document]:
+        """
+        Live documents containing every trigram in ``grams``.
+
+        Args:
+            grams: Required trigrams (None matches every document)
+            repositories: Restrict to these repositories
+
+        Returns:
+            Candidate documents in index order
+        """
+        allowed = set(repositories) if repositories else None
+        with self._lock:
+            if grams is None:
+                ids: Iterable[int] = range(len(self._documents))
+            else:
+                postings = sorted((self._posting(gram) for gram in grams), key=_length)
+                result = set(postings[0])
+                for posting in postings[1:]:
+                    if not result:
+                        break
+                    result.intersection_update(posting)
+                ids = sorted(result)
+            documents = []
+            for doc_id in ids:
+                doc = self._documents[doc_id]
+                if doc_id in self._tombstones:
+                    continue
+                if allowed is not None and doc.repository not in allowed:
+                    continue
+                documents.append(doc)
+            return documents
+
+    def search(
+        self,
+        query: str,
+        roots: Dict[str, str],
+        repositories: Optional[List[str]] = None,
+        limit: int = 10,
+        regex: bool = False,
+        case_sensitive: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find lines matching a literal or regular expression.
+
+        Args:
+            query: Text or pattern to search for
+            roots: Repository name to local checkout directory
+            repositories: Repositories to search (all if None)
+            limit: Maximum number of results
+            regex: Treat ``query`` as a regular expression
+            case_sensitive: Match case exactly
+
+        Returns:
+            Matches with ``file``, ``line``, ``snippet`` and ``repository``,
+            as returned by the MCP server's code search
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        grams = query_trigrams(query, regex=regex, case_sensitive=case_sensitive)
+
+        results: List[Dict[str, Any]] = []
+        for doc in self.candidates(grams, repositories):
+            root = roots.get(doc.repository)
+            if root is None:
+                continue
+            try:
+                with open(
+                    os.path.join(root, doc.path), encoding="utf-8", errors="replace"
+                ) as f:
+                    for line_number, line in enumerate(f, start=1):
+                        if pattern.search(line):
+                            results.append(
+                                {
+                                    "file": doc.path,
+                                    "line": line_number,
+                                    "snippet": line.strip()[:_SNIPPET_CHARS],
+                                    "repository": doc.repository,
+                                }
+                            )
+                            if len(results) >= limit:
+                                return results
+            except OSError:
+                # Deleted since the last refresh
+                continue
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index size counters."""
+        with self._lock:
+            return {
+                "files": len(self._locations),
+                "base_files": self._base_documents,
+                "delta_files": len(self._documents) - self._base_documents,
+                "tombstones": len(self._tombstones),
+                "base_trigrams": len(self._keys),
+                "delta_trigrams": len(self._delta),
+                "path": self.path,
+            }
+
+
+def _length(posting: Any) -> int:
+    return len(posting)
+
+
+def _align(position: int, alignment: int) -> int:
+    return (position + alignment - 1) // alignment * alignment
+
+
+def _walk(root: str) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """Yield ``(relative path, full path, stat)`` for regular files under root."""
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = [d for d in subdirectories if d not in IGNORED_DIRECTORIES]
+        for name in files:
+            full_path = os.path.join(directory, name)
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            relative = os.path.relpath(full_path, root).replace(os.sep, "/")
+            yield relative, full_path, stat
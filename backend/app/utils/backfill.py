@@ -0,0 +1,292 @@
+"""
+Bulk ticket parsing for backfills.
+
+``parse_tickets`` parses an iterable (or JSONL stream) of tickets across a
+process pool and yields the results as a generator. Tickets are submitted
+in chunks with a bounded number of chunks in flight, so arbitrarily large
+inputs are processed with bounded memory.
+
+Command line usage (from the backend directory)::
+
+    python -m app.utils.backfill tickets.jsonl --output parsed.jsonl --workers 8
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+)
+
+from app.utils.ticket_parser import parse_ticket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackfillProgress:
+    """Progress and throughput counters for a running backfill."""
+
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the backfill started."""
+        return time.monotonic() - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Completed tickets per second."""
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the counters as a dictionary."""
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.submitted - self.completed,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "tickets_per_second": round(self.throughput, 2),
+        }
+
+
+def iter_jsonl_tickets(stream: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Read tickets from a JSONL stream, one JSON object per line.
+
+    Blank lines are skipped; malformed lines are logged and skipped.
+
+    Args:
+        stream: An open text file or any iterable of lines
+
+    Yields:
+        Ticket dictionaries
+    """
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            ticket = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed ticket on line {line_number}: {str(e)}")
+            continue
+        if not isinstance(ticket, dict):
+            logger.warning(f"Skipping non-object ticket on line {line_number}")
+            continue
+        yield ticket
+
+
+def _parse_one(ticket: Mapping[str, Any]) -> Dict[str, Any]:
+    """Parse a single ticket mapping (``ticket_id``/``id``, title, description)."""
+    ticket_id = ticket.get("ticket_id", ticket.get("id", ""))
+    return parse_ticket(
+        str(ticket_id),
+        str(ticket.get("title") or ""),
+        str(ticket.get("description") or ""),
+    )
+
+
+def _parse_chunk(tickets: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Worker entry point: parse a chunk of tickets."""
+    return [_parse_one(ticket) for ticket in tickets]
+
+
+def _chunked(
+    tickets: Iterable[Mapping[str, Any]], chunk_size: int
+) -> Iterator[List[Mapping[str, Any]]]:
+    """Group an iterable into lists of ``chunk_size`` items."""
+    chunk: List[Mapping[str, Any]] = []
+    for ticket in tickets:
+        chunk.append(ticket)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _record(progress: BackfillProgress, results: List[Dict[str, Any]]) -> None:
+    """Account for a finished chunk."""
+    progress.completed += len(results)
+    progress.failed += sum(1 for result in results if "error" in result)
+
+
+def parse_tickets(
+    tickets: Iterable[Mapping[str, Any]],
+    workers: Optional[int] = None,
+    chunk_size: int = 256,
+    ordered: bool = True,
+    max_pending_chunks: Optional[int] = None,
+    progress: Optional[BackfillProgress] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Parse many tickets in parallel.
+
+    Args:
+        tickets: Iterable of ticket mappings with ``ticket_id`` (or ``id``),
+            ``title`` and ``description``
+        workers: Number of worker processes (default: CPU count; 1 parses
+            in the calling process)
+        chunk_size: Tickets per task sent to a worker
+        ordered: Yield results in input order; if False, yield chunks as
+            soon as they finish
+        max_pending_chunks: Chunks in flight at once (default: 2 per worker)
+        progress: Counters to update while running
+
+    Yields:
+        Parsed ticket dictionaries, as returned by ``parse_ticket``
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    progress = progress if progress is not None else BackfillProgress()
+    chunks = _chunked(tickets, chunk_size)
+
+    if workers == 1:
+        for chunk in chunks:
+            progress.submitted += len(chunk)
+            results = _parse_chunk(chunk)
+            _record(progress, results)
+            yield from results
+        return
+
+    max_pending = max_pending_chunks or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if ordered:
+            queue: Deque["Future[List[Dict[str, Any]]]"] = deque()
+            for chunk in chunks:
+                queue.append(executor.submit(_parse_chunk, chunk))
+                progress.submitted += len(chunk)
+                if len(queue) >= max_pending:
+                    results = queue.popleft().result()
+                    _record(progress, results)
+                    yield from results
+            while queue:
+                results = queue.popleft().result()
+                _record(progress, results)
+                yield from results
+        else:
+            pending: Set["Future[List[Dict[str, Any]]]"] = set()
+            for chunk in chunks:
+                pending.add(executor.submit(_parse_chunk, chunk))
+                progress.submitted += len(chunk)
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results = future.result()
+                        _record(progress, results)
+                        yield from results
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results = future.result()
+                    _record(progress, results)
+                    yield from results
+
+
+def run_backfill(
+    source: TextIO,
+    sink: TextIO,
+    workers: Optional[int] = None,
+    chunk_size: int = 256,
+    ordered: bool = True,
+    report_every: float = 10.0,
+) -> BackfillProgress:
+    """
+    Parse a JSONL stream of tickets into a JSONL stream of results.
+
+    Args:
+        source: Input stream with one ticket per line
+        sink: Output stream for one parsed ticket per line
+        workers: Number of worker processes
+        chunk_size: Tickets per task sent to a worker
+        ordered: Preserve input order in the output
+        report_every: Seconds between progress log lines (0 disables)
+
+    Returns:
+        Final progress counters
+    """
+    progress = BackfillProgress()
+    last_report = time.monotonic()
+    for result in parse_tickets(
+        iter_jsonl_tickets(source),
+        workers=workers,
+        chunk_size=chunk_size,
+        ordered=ordered,
+        progress=progress,
+    ):
+        sink.write(json.dumps(result) + "\n")
+        if report_every and time.monotonic() - last_report >= report_every:
+            logger.info(f"Backfill progress: {progress.to_dict()}")
+            last_report = time.monotonic()
+    return progress
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point for offline backfills."""
+    parser = argparse.ArgumentParser(
+        description="Parse a JSONL file of tickets into a JSONL file of results."
+    )
+    parser.add_argument("input", help="Input JSONL file, or - for stdin")
+    parser.add_argument(
+        "--output", "-o", default="-", help="Output file (default: stdout)"
+    )
+    parser.add_argument("--workers", "-w", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument(
+        "--unordered", action="store_true", help="Do not preserve input order"
+    )
+    parser.add_argument("--report-every", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = (
+        sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    )
+    try:
+        progress = run_backfill(
+            source,
+            sink,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            ordered=not args.unordered,
+            report_every=args.report_every,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    logger.info(f"Backfill finished: {progress.to_dict()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Compiled, streaming entity extraction engine for ticket text.
+
+``EntityExtractor`` produces exactly the entities of the original
+per-category ``re.findall`` scans, but with the patterns compiled once and
+the four keyword-driven categories (services, error codes, endpoints and
+environments) recognised in a single anchored scan. Text can be fed in
+chunks so large attachments are processed with bounded memory.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+ENTITY_CATEGORIES = (
+    "service_names",
+    "error_codes",
+    "file_paths",
+    "endpoints",
+    "environments",
+)
+
+COMMON_ENVIRONMENTS = frozenset(
+    ["prod", "production", "dev", "development", "staging", "test", "qa"]
+)
+
+# Original per-category patterns (all but the file pattern are
+# case-insensitive). Kept here as the reference semantics.
+SERVICE_PATTERN = r"(?:service|app|component|module)[\s:]+([a-zA-Z0-9_-]+)"
+ERROR_PATTERN = r"(?:error|exception|code)[\s:]+([A-Z0-9_]{3,})"
+FILE_PATTERN = r"(?:\/[\w\-\.]+)+\/?|(?:[\w-]+\.[\w-]+)"
+ENDPOINT_PATTERN = r"(?:\/api\/[\w\/\-{}]+)|(?:endpoint[\s:]+([\/\w\-]+))"
+ENV_PATTERN = r"(?:environment|env|in)[\s:]+([a-zA-Z0-9_-]+)"
+
+# Every keyword-category match starts with one of these anchors, so the
+# engine only evaluates the category patterns where an anchor occurs.
+_ANCHOR = (
+    r"(?=service|app|component|module|error|exception|code"
+    r"|environment|env|in|endpoint|/api/)"
+)
+
+
+def _keyword_scanner(error_pattern: str, flags: int) -> "re.Pattern[str]":
+    """
+    Build the combined keyword scanner.
+
+    Each category is an optional lookahead with an outer group spanning the
+    whole category match and an inner group holding the extracted value, so
+    one match reports every category matching at that position. The final
+    conditional rejects positions where no category matched.
+    """
+    return re.compile(
+        _ANCHOR
+        + rf"(?=({SERVICE_PATTERN}))?"
+        + rf"(?=({error_pattern}))?"
+        + rf"(?=({ENDPOINT_PATTERN}))?"
+        + rf"(?=({ENV_PATTERN}))?"
+        + r"(?(1)|(?(3)|(?(5)|(?(7)|(?!)))))",
+        flags,
+    )
+
+
+# Fast path: scan lowercased text case-sensitively, which is several times
+# cheaper for the regex engine than IGNORECASE and gives identical spans.
+_KEYWORDS_LOWER = _keyword_scanner(ERROR_PATTERN.replace("A-Z", "a-z"), 0)
+# Fallback for text whose lowercase form differs in length or that contains
+# the non-ASCII characters IGNORECASE folds onto ASCII letters.
+_KEYWORDS_IGNORECASE = _keyword_scanner(ERROR_PATTERN, re.IGNORECASE)
+_CASE_FOLDING_CHARS = re.compile("[İıſK]")
+_FILES = re.compile(FILE_PATTERN)
+
+# (whole-match group, value group) for each keyword category
+_KEYWORD_GROUPS = (
+    ("service_names", 1, 2),
+    ("error_codes", 3, 4),
+    ("endpoints", 5, 6),
+    ("environments", 7, 8),
+)
+
+# Default number of trailing characters carried between chunks. Entities
+# longer than this may be cut at a chunk boundary.
+DEFAULT_CHUNK_OVERLAP = 4096
+
+
+class EntityExtractor:
+    """
+    Incremental entity extractor.
+
+    Feed text with ``feed`` (any number of times) and call ``finish`` to
+    obtain the entities. Matching follows ``re.findall`` semantics for each
+    category independently, so the result equals scanning the concatenated
+    text with the original patterns.
+    """
+
+    def __init__(self, chunk_overlap: int = DEFAULT_CHUNK_OVERLAP) -> None:
+        """
+        Initialize the extractor.
+
+        Args:
+            chunk_overlap: Characters kept from one chunk to the next so that
+                entities spanning a boundary are still found
+        """
+        self.chunk_overlap = chunk_overlap
+        self._buffer = ""
+        # Absolute offset of the start of the buffer
+        self._base = 0
+        # Absolute offset from which each category resumes scanning
+        self._resume = {category: 0 for category in ENTITY_CATEGORIES}
+        self._found: Dict[str, Set[str]] = {
+            category: set() for category in ENTITY_CATEGORIES
+        }
+
+    def feed(self, text: str) -> None:
+        """
+        Add text, scanning everything that can no longer be affected by
+        text still to come.
+
+        Args:
+            text: Next piece of the ticket text
+        """
+        self._buffer += text
+        limit = len(self._buffer) - self.chunk_overlap
+        # Wait until the buffer is at least twice the overlap so that many
+        # small chunks (e.g. lines) do not rescan the carried tail each time
+        if limit > 0 and limit >= self.chunk_overlap:
+            self._scan(limit)
+            self._buffer = self._buffer[limit:]
+            self._base += limit
+
+    def finish(self) -> Dict[str, List[str]]:
+        """
+        Scan the remaining text and return the extracted entities.
+
+        Returns:
+            Dictionary with extracted entities by category
+        """
+        self._scan(len(self._buffer))
+        self._base += len(self._buffer)
+        self._buffer = ""
+        found = self._found
+        return {
+            "service_names": list(found["service_names"]),
+            "error_codes": list(found["error_codes"]),
+            "file_paths": list(found["file_paths"]),
+            "endpoints": [m for m in found["endpoints"] if m],
+            "environments": [
+                env
+                for env in found["environments"]
+                if env.lower() in COMMON_ENVIRONMENTS
+            ],
+        }
+
+    def _scan(self, limit: int) -> None:
+        """Process every match starting before buffer offset ``limit``."""
+        buffer = self._buffer
+        base = self._base
+        resume = self._resume
+        found = self._found
+
+        lowered = buffer.lower()
+        if len(lowered) == len(buffer) and (
+            buffer.isascii() or not _CASE_FOLDING_CHARS.search(buffer)
+        ):
+            scanner, haystack = _KEYWORDS_LOWER, lowered
+        else:
+            scanner, haystack = _KEYWORDS_IGNORECASE, buffer
+
+        start = min(resume[category] for category, _, _ in _KEYWORD_GROUPS) - base
+        for match in scanner.finditer(haystack, max(start, 0)):
+            position = match.start()
+            if position >= limit:
+                break
+            absolute = base + position
+            for category, whole_group, value_group in _KEYWORD_GROUPS:
+                if absolute < resume[category]:
+                    continue
+                end = match.end(whole_group)
+                if end == -1:
+                    continue
+                # Like findall, the next match must start after this one
+                resume[category] = base + end
+                value_start, value_end = match.span(value_group)
+                found[category].add(
+                    buffer[value_start:value_end] if value_start != -1 else ""
+                )
+
+        files = found["file_paths"]
+        for match in _FILES.finditer(buffer, max(resume["file_paths"] - base, 0)):
+            if match.start() >= limit:
+                break
+            files.add(match.group())
+            resume["file_paths"] = base + match.end()
+
+        # Every position before the limit has now been considered
+        for category in resume:
+            resume[category] = max(resume[category], base + limit)
+
+
+def extract_entities(
+    chunks: Iterable[str], chunk_overlap: Optional[int] = None
+) -> Dict[str, List[str]]:
+    """
+    Extract entities from text supplied as an iterable of chunks.
+
+    Args:
+        chunks: Pieces of the text, in order (e.g. lines of a file)
+        chunk_overlap: Characters carried between chunks
+
+    Returns:
+        Dictionary with extracted entities by category
+    """
+    extractor = EntityExtractor(
+        chunk_overlap=DEFAULT_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+    )
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor.finish()
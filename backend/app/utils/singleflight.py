@@ -0,0 +1,87 @@
+"""
+Single-flight coalescing of concurrent identical async calls.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A shared in-flight call and the number of callers waiting on it."""
+
+    def __init__(self, task: "asyncio.Task[Any]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run at most one in-flight call per key.
+
+    Concurrent callers with the same key await one shared task instead of
+    each starting their own. A cancelled caller only stops waiting; the
+    shared work is cancelled once no caller is left waiting for it.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty call table."""
+        self._calls: Dict[Tuple[int, Hashable], _Call] = {}
+        self._started = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``func`` once for all concurrent callers sharing ``key``.
+
+        Args:
+            key: Identity of the call; equal keys share one execution
+            func: Zero-argument coroutine function doing the actual work
+
+        Returns:
+            The result of the shared call
+        """
+        loop = asyncio.get_running_loop()
+        # Tasks cannot be awaited across event loops, so calls are scoped
+        # to the loop that started them.
+        slot = (id(loop), key)
+        call = self._calls.get(slot)
+        if call is None or call.task.done():
+            task = asyncio.ensure_future(func())
+            started = _Call(task)
+            self._calls[slot] = started
+            task.add_done_callback(lambda _: self._forget(slot, started))
+            call = started
+            self._started += 1
+        else:
+            self._coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                logger.debug(f"Last waiter for {key!r} cancelled; cancelling call")
+                # New callers must not join a call that is being torn down
+                self._forget(slot, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, slot: Tuple[int, Hashable], call: _Call) -> None:
+        """Drop a finished call from the table."""
+        if self._calls.get(slot) is call:
+            del self._calls[slot]
+
+    def stats(self) -> Dict[str, int]:
+        """Get coalescing statistics."""
+        return {
+            "in_flight": len(self._calls),
+            "started": self._started,
+            "coalesced": self._coalesced,
+        }
@@ -0,0 +1,352 @@
+"""
+Linear-time stacktrace parser for Java/Scala, Python and Node.js traces.
+
+The parser walks the text line by line and only uses constant-pass string
+operations on each line, so its running time is proportional to the size
+of the input no matter what the input contains.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+PYTHON_TRACEBACK_HEADER = "Traceback (most recent call last):"
+PYTHON_CHAIN_MARKERS = (
+    "During handling of the above exception, another exception occurred:",
+    "The above exception was the direct cause of the following exception:",
+)
+# Frame locations without a line number that still identify a real frame
+_SPECIAL_LOCATIONS = frozenset(
+    ["Native Method", "Unknown Source", "native", "<anonymous>", "unknown location"]
+)
+_NODE_EXTENSIONS = (".js", ".mjs", ".cjs", ".ts", ".jsx", ".tsx")
+_IDENTIFIER_EXTRA = frozenset("._$")
+# Longest cause chain kept; deeper "Caused by" blocks are folded into the
+# last kept cause so adversarial input cannot build unbounded nesting
+MAX_CAUSE_DEPTH = 32
+
+
+@dataclass
+class StackFrame:
+    """A single frame of a stacktrace."""
+
+    function: Optional[str]
+    file: Optional[str]
+    line: Optional[int]
+    column: Optional[int] = None
+    code: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the frame to a plain dictionary."""
+        return {
+            "function": self.function,
+            "file": self.file,
+            "line": self.line,
+            "column": self.column,
+            "code": self.code,
+        }
+
+
+@dataclass
+class StackTrace:
+    """A parsed stacktrace, optionally chained to the exception that caused it."""
+
+    language: str
+    exception_type: Optional[str]
+    message: Optional[str]
+    frames: List[StackFrame] = field(default_factory=list)
+    raw: str = ""
+    cause: Optional["StackTrace"] = None
+    suppressed: List["StackTrace"] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the trace (and its cause chain) to a plain dictionary."""
+        return {
+            "language": self.language,
+            "exception_type": self.exception_type,
+            "message": self.message,
+            "frames": [frame.to_dict() for frame in self.frames],
+            "raw": self.raw,
+            "cause": self.cause.to_dict() if self.cause else None,
+            "suppressed": [trace.to_dict() for trace in self.suppressed],
+        }
+
+
+def _is_identifier(text: str) -> bool:
+    """Whether ``text`` looks like a (possibly qualified) exception type."""
+    if not text or text[0].isdigit() or text[0] == ".":
+        return False
+    return all(ch.isalnum() or ch in _IDENTIFIER_EXTRA for ch in text)
+
+
+def _parse_exception_line(line: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Split an exception header into type and message.
+
+    Handles ``Type: message``, a bare ``Type``, log prefixes before the type
+    (``... ERROR Foo - pkg.Type: message``) and Java's
+    ``Exception in thread "main" pkg.Type: message``.
+    """
+    text = line.strip()
+    if text.startswith('Exception in thread "'):
+        closing = text.find('" ', len('Exception in thread "'))
+        if closing != -1:
+            text = text[closing + 2 :]
+    separator = text.find(": ")
+    head = text if separator == -1 else text[:separator]
+    message = None if separator == -1 else text[separator + 2 :].strip()
+    if head.endswith(":"):
+        head = head[:-1]
+    tokens = head.split()
+    candidate = tokens[-1] if tokens else ""
+    if _is_identifier(candidate):
+        return candidate, message
+    return None, text or None
+
+
+def _split_location(
+    location: str,
+) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """Split ``file:line[:column]`` into its parts."""
+    parts = location.rsplit(":", 2)
+    numbers: List[int] = []
+    while len(parts) > 1 and parts[-1].isdigit() and len(numbers) < 2:
+        numbers.insert(0, int(parts.pop()))
+    path = ":".join(parts) or None
+    line = numbers[0] if numbers else None
+    column = numbers[1] if len(numbers) > 1 else None
+    return path, line, column
+
+
+def _parse_at_frame(line: str) -> Optional[Tuple[StackFrame, str]]:
+    """
+    Parse a Java/Scala or Node ``at ...`` frame.
+
+    Returns:
+        The frame and the detected language, or None if the line is not a frame
+    """
+    text = line.strip()
+    if not text.startswith("at "):
+        return None
+    rest = text[3:].strip()
+    node_style = False
+    if rest.endswith(")") and "(" in rest:
+        paren = rest.rfind("(")
+        name = rest[:paren]
+        node_style = name.endswith(" ")
+        function: Optional[str] = name.strip() or None
+        location = rest[paren + 1 : -1].strip()
+    else:
+        # Node frames for anonymous functions: "at /path/file.js:10:5"
+        function, location = None, rest
+        node_style = True
+
+    if location in _SPECIAL_LOCATIONS:
+        path, line_no, column = None, None, None
+    else:
+        path, line_no, column = _split_location(location)
+        if line_no is None:
+            return None
+        if path and " " in path and not node_style:
+            return None
+
+    if column is not None or (path and path.endswith(_NODE_EXTENSIONS)):
+        node_style = True
+    frame = StackFrame(function=function, file=path, line=line_no, column=column)
+    return frame, "node" if node_style else "java"
+
+
+def _parse_python_frame(line: str) -> Optional[StackFrame]:
+    """Parse a ``File "path", line N, in func`` traceback line."""
+    text = line.strip()
+    if not text.startswith('File "'):
+        return None
+    closing = text.find('"', 6)
+    if closing == -1:
+        return None
+    path = text[6:closing]
+    line_no: Optional[int] = None
+    function: Optional[str] = None
+    for part in text[closing + 1 :].split(","):
+        part = part.strip()
+        if part.startswith("line ") and part[5:].isdigit():
+            line_no = int(part[5:])
+        elif part.startswith("in "):
+            function = part[3:].strip() or None
+    return StackFrame(function=function, file=path, line=line_no)
+
+
+class _Parser:
+    """Single forward pass over the lines of a text."""
+
+    def __init__(self, text: str) -> None:
+        self.lines = text.splitlines()
+        self.index = 0
+        self.traces: List[StackTrace] = []
+        # First line not claimed by an already parsed trace
+        self.claimed = 0
+        # Length of the Python cause chain ending at the last trace
+        self.python_chain_depth = 0
+
+    def parse(self) -> List[StackTrace]:
+        lines = self.lines
+        pending_python_chain = False
+        while self.index < len(lines):
+            line = lines[self.index]
+            stripped = line.strip()
+            if stripped == PYTHON_TRACEBACK_HEADER:
+                trace = self._parse_python()
+                previous = self.traces[-1] if self.traces else None
+                if (
+                    pending_python_chain
+                    and previous is not None
+                    and previous.language == "python"
+                    and self.python_chain_depth < MAX_CAUSE_DEPTH
+                ):
+                    # Python prints the cause first, then the exception it led to
+                    trace.cause = self.traces.pop()
+                    self.python_chain_depth += 1
+                else:
+                    self.python_chain_depth = 0
+                self.traces.append(trace)
+                self.claimed = self.index
+                pending_python_chain = False
+                continue
+            if stripped in PYTHON_CHAIN_MARKERS:
+                pending_python_chain = True
+                self.index += 1
+                continue
+            parsed = _parse_at_frame(line)
+            if parsed is not None:
+                self.traces.append(self._parse_at_trace())
+                self.claimed = self.index
+                pending_python_chain = False
+                continue
+            if stripped:
+                pending_python_chain = False
+            self.index += 1
+        return self.traces
+
+    def _header_before(self, index: int, floor: int) -> Optional[int]:
+        """Index of the exception header line directly above ``index``."""
+        if index - 1 >= floor and self.lines[index - 1].strip():
+            if _parse_at_frame(self.lines[index - 1]) is None:
+                return index - 1
+        return None
+
+    def _parse_at_trace(self) -> StackTrace:
+        """Parse a Java/Scala or Node trace whose first frame is at ``index``."""
+        lines = self.lines
+        header_index = self._header_before(self.index, self.claimed)
+        start = header_index if header_index is not None else self.index
+        exception_type, message = (
+            _parse_exception_line(lines[header_index])
+            if header_index is not None
+            else (None, None)
+        )
+        root = StackTrace(
+            language="java", exception_type=exception_type, message=message
+        )
+        current = root
+        depth = 0
+        languages = set()
+        end = self.index
+        while self.index < len(lines):
+            line = lines[self.index]
+            stripped = line.strip()
+            parsed = _parse_at_frame(line)
+            if parsed is not None:
+                frame, language = parsed
+                current.frames.append(frame)
+                languages.add(language)
+            elif stripped.startswith("... ") and stripped.endswith(" more"):
+                pass
+            elif stripped.startswith("Caused by: "):
+                if depth < MAX_CAUSE_DEPTH:
+                    exception_type, message = _parse_exception_line(
+                        stripped[len("Caused by: ") :]
+                    )
+                    cause = StackTrace(
+                        language="java", exception_type=exception_type, message=message
+                    )
+                    current.cause = cause
+                    current = cause
+                    depth += 1
+            elif stripped.startswith("Suppressed: "):
+                exception_type, message = _parse_exception_line(
+                    stripped[len("Suppressed: ") :]
+                )
+                suppressed = StackTrace(
+                    language="java", exception_type=exception_type, message=message
+                )
+                root.suppressed.append(suppressed)
+                current = suppressed
+                depth = MAX_CAUSE_DEPTH
+            else:
+                break
+            end = self.index
+            self.index += 1
+
+        language = "node" if languages == {"node"} else "java"
+        raw = "\n".join(lines[start : end + 1]).strip()
+        trace: Optional[StackTrace] = root
+        while trace is not None:
+            trace.language = language
+            trace = trace.cause
+        for suppressed in root.suppressed:
+            suppressed.language = language
+        root.raw = raw
+        return root
+
+    def _parse_python(self) -> StackTrace:
+        """Parse a Python traceback starting at its header line."""
+        lines = self.lines
+        start = self.index
+        header = lines[start]
+        # Tickets often indent pasted text, so frames are recognised by being
+        # indented deeper than the header rather than by indentation alone
+        indent = len(header) - len(header.lstrip())
+        self.index += 1
+        frames: List[StackFrame] = []
+        while self.index < len(lines):
+            line = lines[self.index]
+            stripped = line.lstrip()
+            if not stripped or len(line) - len(stripped) <= indent:
+                break
+            frame = _parse_python_frame(line)
+            if frame is not None:
+                frames.append(frame)
+            elif frames and frames[-1].code is None and not stripped.startswith("["):
+                frames[-1].code = stripped.rstrip() or None
+            self.index += 1
+
+        exception_type, message = None, None
+        end = self.index - 1
+        if self.index < len(lines) and lines[self.index].strip():
+            exception_type, message = _parse_exception_line(lines[self.index])
+            end = self.index
+            self.index += 1
+        return StackTrace(
+            language="python",
+            exception_type=exception_type,
+            message=message,
+            frames=frames,
+            raw="\n".join(lines[start : end + 1]).strip(),
+        )
+
+
+def parse_stacktraces(text: str) -> List[StackTrace]:
+    """
+    Find and parse every stacktrace in a text.
+
+    Recognises Java/Scala traces (including ``Caused by:`` chains and
+    ``Suppressed:`` blocks), Python tracebacks (including chained
+    exceptions) and Node.js stacks. Runs in time linear in ``len(text)``.
+
+    Args:
+        text: Ticket description, log dump or other free text
+
+    Returns:
+        Top-level stacktraces in order of appearance; causes are reachable
+        through ``StackTrace.cause``
+    """
+    return _Parser(text).parse()
@@ -2,9 +2,16 @@
 Ticket parsing utilities for extracting information from issue tickets.
 """
 
-import re
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.metrics import ERRORS, timed
+from app.utils.entity_extractor import (
+    ENTITY_CATEGORIES,
+    EntityExtractor,
+    extract_entities,
+)
+from app.utils.stacktrace import parse_stacktraces
 
 logger = logging.getLogger(__name__)
 
@@ -19,50 +26,35 @@ def extract_key_entities(ticket_text: str) -> Dict[str, List[str]]:
     Returns:
         Dictionary with extracted entities by category
     """
-    # Initialize result
-    entities = {
-        "service_names": [],
-        "error_codes": [],
-        "file_paths": [],
-        "endpoints": [],
-        "environments": []
-    }
-    
     try:
-        # Extract service names (simplified approach)
-        service_pattern = r'(?i)(?:service|app|component|module)[\s:]+([a-zA-Z0-9_-]+)'
-        service_matches = re.findall(service_pattern, ticket_text)
-        entities["service_names"] = list(set(service_matches))
-        
-        # Extract error codes
-        error_pattern = r'(?i)(?:error|exception|code)[\s:]+([A-Z0-9_]{3,})'
-        error_matches = re.findall(error_pattern, ticket_text)
-        entities["error_codes"] = list(set(error_matches))
-        
-        # Extract file paths
-        file_pattern = r'(?:\/[\w\-\.]+)+\/?|(?:[\w-]+\.[\w-]+)'
-        file_matches = re.findall(file_pattern, ticket_text)
-        entities["file_paths"] = list(set(file_matches))
-        
-        # Extract API endpoints
-        endpoint_pattern = r'(?i)(?:\/api\/[\w\/\-{}]+)|(?:endpoint[\s:]+([\/\w\-]+))'
-        endpoint_matches = re.findall(endpoint_pattern, ticket_text)
-        entities["endpoints"] = list(set([m for m in endpoint_matches if m]))
-        
-        # Extract environments
-        env_pattern = r'(?i)(?:environment|env|in)[\s:]+([a-zA-Z0-9_-]+)'
-        env_matches = re.findall(env_pattern, ticket_text)
-        # Filter common environment names
-        common_envs = ["prod", "production", "dev", "development", "staging", "test", "qa"]
-        entities["environments"] = list(set([
-            env for env in env_matches if env.lower() in common_envs
-        ]))
+        extractor = EntityExtractor()
+        extractor.feed(ticket_text)
+        return extractor.finish()
+    
+    except Exception as e:
+        logger.error(f"Error extracting entities from ticket: {str(e)}")
+        return {category: [] for category in ENTITY_CATEGORIES}
+
+
+def extract_key_entities_chunked(chunks: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Extract key entities from ticket text supplied in chunks.
+    
+    Suitable for multi-MB attachments: only a bounded window of the text is
+    held in memory at a time.
+    
+    Args:
+        chunks: Pieces of the ticket text in order (e.g. an open file)
         
-        return entities
+    Returns:
+        Dictionary with extracted entities by category
+    """
+    try:
+        return extract_entities(chunks)
     
     except Exception as e:
         logger.error(f"Error extracting entities from ticket: {str(e)}")
-        return entities
+        return {category: [] for category in ENTITY_CATEGORIES}
 
 
 def extract_stacktrace(ticket_text: str) -> Optional[str]:
@@ -73,31 +65,36 @@ def extract_stacktrace(ticket_text: str) -> Optional[str]:
         ticket_text: The ticket description or content
         
     Returns:
-        Extracted stacktrace or None if not found
+        Raw text of the first stacktrace or None if not found
     """
     try:
-        # Common stacktrace patterns
-        patterns = [
-            # Pattern for Java/Scala style stacktraces
-            r'(?:Exception|Error).*?\n(?:\s+at\s+[\w\.]+\([^)]+\)\n)+',
-            # Pattern for Python tracebacks
-            r'Traceback \(most recent call last\):\n(?:\s+File ".*", line \d+.*\n)+.*: .*',
-            # Pattern for JavaScript/Node.js stacktraces
-            r'(?:Error|Exception).*?\n(?:\s+at\s+[\w\.]+\s+\([^)]+\)\n)+'
-        ]
-        
-        for pattern in patterns:
-            matches = re.search(pattern, ticket_text, re.DOTALL)
-            if matches:
-                return matches.group(0)
-        
-        return None
+        traces = parse_stacktraces(ticket_text)
+        return traces[0].raw if traces else None
     
     except Exception as e:
         logger.error(f"Error extracting stacktrace: {str(e)}")
         return None
 
 
+def extract_stacktraces(ticket_text: str) -> List[Dict[str, Any]]:
+    """
+    Extract all stacktraces from ticket text as structured frames.
+    
+    Args:
+        ticket_text: The ticket description or content
+        
+    Returns:
+        List of parsed stacktraces (exception type, message, frames, cause)
+    """
+    try:
+        return [trace.to_dict() for trace in parse_stacktraces(ticket_text)]
+    
+    except Exception as e:
+        logger.error(f"Error extracting stacktraces: {str(e)}")
+        return []
+
+
+@timed("parse_ticket")
 def parse_ticket(
     ticket_id: str,
     ticket_title: str,
@@ -121,18 +118,20 @@ def parse_ticket(
         # Extract entities
         entities = extract_key_entities(combined_text)
         
-        # Extract stacktrace
-        stacktrace = extract_stacktrace(ticket_description)
+        # Extract stacktraces
+        stacktraces = extract_stacktraces(ticket_description)
+        stacktrace = stacktraces[0]["raw"] if stacktraces else None
         
         # Determine ticket category (simplified approach)
         category = "unknown"
-        if "error" in ticket_title.lower() or "exception" in ticket_title.lower() or stacktrace:
+        title = ticket_title.lower()
+        if "error" in title or "exception" in title or stacktrace:
             category = "error"
-        elif "feature" in ticket_title.lower() or "enhancement" in ticket_title.lower():
+        elif "feature" in title or "enhancement" in title:
             category = "feature"
-        elif "bug" in ticket_title.lower():
+        elif "bug" in title:
             category = "bug"
-        elif "performance" in ticket_title.lower() or "slow" in ticket_title.lower():
+        elif "performance" in title or "slow" in title:
             category = "performance"
         
         # Build result
@@ -143,11 +142,13 @@ def parse_ticket(
             "category": category,
             "entities": entities,
             "stacktrace": stacktrace,
+            "stacktraces": stacktraces,
             "has_stacktrace": stacktrace is not None
         }
     
     except Exception as e:
         logger.error(f"Error parsing ticket: {str(e)}")
+        ERRORS.inc("parse_ticket")
         return {
             "ticket_id": ticket_id,
             "title": ticket_title,
@@ -0,0 +1,286 @@
+"""
+Load benchmark of the HTTP API against local Gemini and MCP stand-ins.
+
+Runs the full application in-process with ``benchmarks.fakes`` in place
+of Gemini and the MCP server, and drives it at fixed concurrency levels.
+For each level it reports throughput, latency percentiles (time to the
+first response byte and to the end of the body) and event-loop lag, so
+changes to queueing, pooling or blocking code show up as numbers. Run
+from the backend directory:
+
+    python -m benchmarks.bench_load --concurrency 1,8,32 --output load.json
+    python -m benchmarks.bench_load --scenario stream --llm-latency 2,0.3
+
+Latency specs are ``median[,sigma[,tail_probability[,tail_multiplier]]]``
+in seconds (see ``LatencyModel.parse``). Caches are disabled so every
+request reaches the fakes; ``--warm`` enables them and repeats tickets.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import Ticket, realistic
+from benchmarks.fakes import (
+    FakeGeminiModel,
+    FakeMCPTransport,
+    LatencyModel,
+    install_fakes,
+)
+from benchmarks.report import latency_summary, write_results
+
+BENCH_ENVIRONMENT = {
+    "GEMINI_API_KEY": "benchmark",
+    "MCP_SERVER_URL": "http://mcp.bench",
+    "MCP_DEFAULT_REPOSITORY": "bench-service",
+    # One client drives all the load; per-client rate limits would cap it
+    "ADMISSION_RATE_PER_SECOND": "0",
+}
+CACHE_SWITCHES = (
+    "LLM_CACHE_ENABLED",
+    "SIMILARITY_CACHE_ENABLED",
+    "FINGERPRINT_ENABLED",
+    "MCP_FILE_CACHE_ENABLED",
+)
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires on the event loop."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        self.lags = []
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> List[float]:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        return self.lags
+
+
+async def call_asgi(
+    app: Any, method: str, path: str, body: Dict[str, Any]
+) -> Tuple[int, float, float, int]:
+    """
+    Send one request straight to the ASGI app.
+
+    httpx's ASGI transport buffers whole responses, which hides the time to
+    the first streamed byte; this minimal client does not.
+
+    Returns:
+        Status, seconds to the first body byte, seconds to the end, body size
+    """
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    finished = asyncio.Event()
+    sent_body = False
+    status = 0
+    size = 0
+    first_byte: Optional[float] = None
+    started = time.perf_counter()
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status, size, first_byte
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk and first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+            if not message.get("more_body", False):
+                finished.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+    total = time.perf_counter() - started
+    return status, first_byte if first_byte is not None else total, total, size
+
+
+def _request(scenario: str, ticket: Ticket, n: int, warm: bool) -> Tuple[str, Dict]:
+    # Unique text per request defeats the caches unless warm runs want hits
+    suffix = "" if warm else f"\nrequest {n}"
+    if scenario == "stream":
+        prompt = f"{ticket.title}\n{ticket.description[:4000]}{suffix}"
+        return "/api/stream/sse", {"prompt": prompt}
+    return "/api/analysis/ticket", {
+        "ticket_id": f"{ticket.ticket_id}-{0 if warm else n}",
+        "title": ticket.title,
+        "description": ticket.description + suffix,
+    }
+
+
+async def run_level(
+    app: Any,
+    scenario: str,
+    concurrency: int,
+    requests: int,
+    tickets: List[Ticket],
+    warm: bool,
+    llm: FakeGeminiModel,
+    mcp: FakeMCPTransport,
+) -> Dict[str, Any]:
+    """
+    Drive ``requests`` requests through ``concurrency`` workers.
+
+    Returns:
+        Throughput, latency and loop-lag metrics of the level
+    """
+    counter = iter(range(requests))
+    first_bytes: List[float] = []
+    totals: List[float] = []
+    statuses: Dict[str, int] = {}
+    llm_calls, llm_errors, mcp_requests = llm.calls, llm.errors, mcp.requests
+
+    async def worker() -> None:
+        for n in counter:
+            path, body = _request(scenario, tickets[n % len(tickets)], n, warm)
+            status, first_byte, total, _ = await call_asgi(app, "POST", path, body)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == 200:
+                first_bytes.append(first_byte)
+                totals.append(total)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    lags = await monitor.stop()
+
+    lag = latency_summary(lags)
+    return {
+        "requests": requests,
+        "elapsed_seconds": round(elapsed, 3),
+        "rps": round(len(totals) / elapsed, 2),
+        "errors": requests - len(totals),
+        "statuses": statuses,
+        **{f"ttfb_{k}": v for k, v in latency_summary(first_bytes).items()},
+        **latency_summary(totals),
+        "loop_lag_p50_ms": lag["p50_ms"],
+        "loop_lag_p99_ms": lag["p99_ms"],
+        "loop_lag_max_ms": lag["max_ms"],
+        "llm_calls": llm.calls - llm_calls,
+        "llm_failures": llm.errors - llm_errors,
+        "mcp_requests": mcp.requests - mcp_requests,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Start the app with the fakes installed and run every level."""
+    from app.main import app
+
+    llm = FakeGeminiModel(
+        LatencyModel.parse(args.llm_latency),
+        error_rate=args.llm_error_rate,
+        seed=args.seed,
+    )
+    mcp = FakeMCPTransport(
+        LatencyModel.parse(args.mcp_latency),
+        error_rate=args.mcp_error_rate,
+        seed=args.seed + 1,
+    )
+    install_fakes(llm, mcp)
+    # Per-request INFO logs would dominate the measured work
+    logging.getLogger().setLevel(logging.WARNING)
+    tickets = realistic(args.seed)
+
+    await app.router.startup()
+    try:
+        results = {}
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            requests = args.requests or max(32, 4 * concurrency)
+            level = await run_level(
+                app, args.scenario, concurrency, requests, tickets, args.warm, llm, mcp
+            )
+            results[f"{args.scenario}/c{concurrency}"] = level
+            print(
+                f"c={concurrency:<4} rps={level['rps']:<8} "
+                f"p50={level['p50_ms']:.0f}ms p95={level['p95_ms']:.0f}ms "
+                f"p99={level['p99_ms']:.0f}ms ttfb_p50={level['ttfb_p50_ms']:.0f}ms "
+                f"lag_p99={level['loop_lag_p99_ms']:.1f}ms errors={level['errors']}"
+            )
+        return results
+    finally:
+        await app.router.shutdown()
+
+
+def main() -> None:
+    """Parse arguments, configure the app and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=["analyze", "stream"], default="analyze")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument(
+        "--requests", type=int, default=0, help="per level (default 4x concurrency)"
+    )
+    parser.add_argument("--llm-latency", default="0.5,0.4,0.02,6")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--mcp-latency", default="0.02,0.5")
+    parser.add_argument("--mcp-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--warm", action="store_true", help="enable caches")
+    parser.add_argument("--output", help="JSON result file ('-' for stdout)")
+    args = parser.parse_args()
+
+    # Must be in place before the application reads its settings
+    for key, value in BENCH_ENVIRONMENT.items():
+        os.environ.setdefault(key, value)
+    for key in CACHE_SWITCHES:
+        os.environ.setdefault(key, "true" if args.warm else "false")
+
+    results = asyncio.run(run(args))
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    config["settings"] = {
+        key: os.environ[key] for key in (*BENCH_ENVIRONMENT, *CACHE_SWITCHES)
+    }
+    write_results("load", config, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Microbenchmarks of ticket parsing over realistic and adversarial tickets.
+
+Times ``parse_ticket``, ``extract_key_entities`` and ``extract_stacktrace``
+on every ticket of ``benchmarks.corpus`` and reports per-group throughput
+and the slowest ticket. Entity extraction is also timed on pasted logs of
+``--legacy-sizes`` characters against the original implementation
+(``benchmarks.legacy``), after checking that both return the same entities.
+Run from the backend directory:
+
+    python -m benchmarks.bench_parsing --output parsing.json
+"""
+
+import argparse
+import os
+import time
+from functools import partial
+from typing import Callable, Dict, List
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("MCP_SERVER_URL", "http://mcp.invalid")
+
+from app.utils.ticket_parser import (  # noqa: E402
+    extract_key_entities,
+    extract_key_entities_chunked,
+    extract_stacktrace,
+    parse_ticket,
+)
+from benchmarks.corpus import Ticket, corpus, make_log_ticket  # noqa: E402
+from benchmarks.legacy import legacy_extract_key_entities  # noqa: E402
+from benchmarks.report import best_of, write_results  # noqa: E402
+
+FUNCTIONS: Dict[str, Callable[[Ticket], object]] = {
+    "parse_ticket": lambda t: parse_ticket(t.ticket_id, t.title, t.description),
+    "extract_key_entities": lambda t: extract_key_entities(
+        f"{t.title}\n{t.description}"
+    ),
+    "extract_stacktrace": lambda t: extract_stacktrace(t.description),
+}
+
+
+def run(kind: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time every function on every ticket.
+
+    Args:
+        kind: Corpus to use (``realistic``, ``adversarial`` or ``all``)
+        repeat: Runs per ticket; the best one counts
+
+    Returns:
+        Metrics keyed by ``<function>/<group>`` and, for adversarial tickets,
+        ``<function>/<ticket name>``
+    """
+    tickets = corpus(kind)
+    results: Dict[str, Dict[str, float]] = {}
+    for name, func in FUNCTIONS.items():
+        groups: Dict[str, List[float]] = {}
+        sizes: Dict[str, int] = {}
+        for ticket in tickets:
+            seconds = best_of(partial(func, ticket), repeat)
+            group = (
+                "realistic" if ticket.name.startswith("realistic") else "adversarial"
+            )
+            groups.setdefault(group, []).append(seconds)
+            sizes[group] = sizes.get(group, 0) + len(ticket.description)
+            if group == "adversarial":
+                results[f"{name}/{ticket.name}"] = {"time_ms": round(seconds * 1000, 3)}
+        for group, timings in groups.items():
+            total = sum(timings)
+            results[f"{name}/{group}"] = {
+                "total_ms": round(total * 1000, 3),
+                "max_ms": round(max(timings) * 1000, 3),
+                "tickets_per_s": round(len(timings) / total, 1) if total else 0.0,
+                "mb_per_s": round(sizes[group] / total / 1e6, 2) if total else 0.0,
+            }
+    return results
+
+
+def run_legacy(sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time entity extraction on pasted logs against the original implementation.
+
+    Args:
+        sizes: Ticket sizes in characters
+        repeat: Runs per size; the best one counts
+
+    Returns:
+        Metrics keyed by ``extract_key_entities/legacy-<size>``
+
+    Raises:
+        AssertionError: If the engine's entities differ from the original's
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        text = make_log_ticket(size)
+        expected = {k: set(v) for k, v in legacy_extract_key_entities(text).items()}
+        actual = {k: set(v) for k, v in extract_key_entities(text).items()}
+        assert actual == expected, "engine output differs from legacy output"
+
+        lines = text.splitlines(keepends=True)
+        legacy = best_of(partial(legacy_extract_key_entities, text), repeat)
+        engine = best_of(partial(extract_key_entities, text), repeat)
+        chunked = best_of(partial(extract_key_entities_chunked, lines), repeat)
+        results[f"extract_key_entities/legacy-{size}"] = {
+            "legacy_ms": round(legacy * 1000, 3),
+            "engine_ms": round(engine * 1000, 3),
+            "chunked_ms": round(chunked * 1000, 3),
+            "speedup": round(legacy / engine, 2) if engine else 0.0,
+        }
+    return results
+
+
+def main() -> None:
+    """Run the microbenchmarks, print a table and optionally write JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--corpus", choices=["realistic", "adversarial", "all"], default="all"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--legacy-sizes",
+        default="10000,300000,3000000",
+        help="Comma-separated log sizes for the legacy comparison ('' to skip)",
+    )
+    parser.add_argument("--output", help="JSON result file ('-' for stdout)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    legacy_sizes = [int(size) for size in args.legacy_sizes.split(",") if size]
+    results = run(args.corpus, args.repeat)
+    print(f"{'case':<48} {'ms':>10}")
+    for case, metrics in results.items():
+        ms = metrics.get("total_ms", metrics.get("time_ms"))
+        print(f"{case:<48} {ms:>10.2f}")
+    legacy = run_legacy(legacy_sizes, args.repeat)
+    if legacy:
+        print(
+            f"\n{'case':<48} {'legacy ms':>10} {'engine ms':>10} "
+            f"{'chunked ms':>11} {'speedup':>8}"
+        )
+    for case, metrics in legacy.items():
+        print(
+            f"{case:<48} {metrics['legacy_ms']:>10.2f} {metrics['engine_ms']:>10.2f} "
+            f"{metrics['chunked_ms']:>11.2f} {metrics['speedup']:>7.2f}x"
+        )
+    results.update(legacy)
+    print(f"done in {time.perf_counter() - started:.1f}s")
+    config = {
+        "corpus": args.corpus,
+        "repeat": args.repeat,
+        "legacy_sizes": legacy_sizes,
+    }
+    write_results("parsing", config, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compare two benchmark result files, e.g. from two commits.
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+
+Metrics ending in ``_ms`` or ``_seconds`` (and error counts) are
+lower-is-better; ``rps`` and ``*_per_s`` metrics are higher-is-better.
+Exits with status 1 when any metric regressed by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+HIGHER_IS_BETTER = ("rps", "_per_s")
+LOWER_IS_BETTER = ("_ms", "_seconds", "errors", "rejected")
+# Differences below this many milliseconds are timer noise
+MIN_ABSOLUTE_MS = 0.5
+
+
+def _direction(metric: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if not compared."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(
+    base: Dict[str, Any], head: Dict[str, Any], threshold: float
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Compare the results of two runs of the same benchmark.
+
+    Args:
+        base: Baseline result document
+        head: Result document to check
+        threshold: Allowed change for the worse, in percent
+
+    Returns:
+        All compared rows and the names of regressed metrics
+    """
+    rows: List[Dict[str, Any]] = []
+    regressions: List[str] = []
+    for case, metrics in head["results"].items():
+        before = base["results"].get(case)
+        if before is None:
+            continue
+        for metric, value in metrics.items():
+            direction = _direction(metric)
+            old = before.get(metric)
+            if direction is None or not isinstance(old, (int, float)):
+                continue
+            change = (value - old) / old * 100 if old else 0.0
+            worse = -change * direction
+            noise = metric.endswith("_ms") and abs(value - old) < MIN_ABSOLUTE_MS
+            regressed = worse > threshold and not noise
+            rows.append(
+                {
+                    "case": case,
+                    "metric": metric,
+                    "base": old,
+                    "head": value,
+                    "change_pct": round(change, 1),
+                    "regressed": regressed,
+                }
+            )
+            if regressed:
+                regressions.append(f"{case} {metric}")
+    return rows, regressions
+
+
+def main() -> None:
+    """Print a comparison table and exit 1 on regressions."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+    if base.get("benchmark") != head.get("benchmark"):
+        sys.exit(f"cannot compare {base.get('benchmark')} with {head.get('benchmark')}")
+
+    print(
+        f"{base['benchmark']}: {base['environment'].get('commit')} -> "
+        f"{head['environment'].get('commit')}"
+    )
+    rows, regressions = compare(base, head, args.threshold)
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(
+            f"{row['case']:<40} {row['metric']:<16} {row['base']:>12} "
+            f"{row['head']:>12} {row['change_pct']:>+8.1f}%{flag}"
+        )
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Seeded ticket corpus for the parsing and load benchmarks.
+
+``realistic`` tickets look like what on-call engineers paste: a short
+summary, log excerpts, Java/Python/JavaScript stacktraces with causes.
+``adversarial`` tickets target the parsers' worst cases: megabyte-long
+single lines, thousands of frames, deep cause chains, near-miss patterns
+that make regexes backtrack, and non-ASCII noise.
+"""
+
+import random
+from typing import Dict, List, NamedTuple
+
+
+class Ticket(NamedTuple):
+    """One benchmark ticket."""
+
+    name: str
+    ticket_id: str
+    title: str
+    description: str
+
+
+_LOG_LINES = [
+    "2023-04-01T12:00:{s:02d}Z INFO  com.example.service.UserService - "
+    "request {n} in prod handled by /api/users/login in {ms}ms",
+    "2023-04-01T12:00:{s:02d}Z WARN  com.example.auth.TokenCache - "
+    "cache miss for key user:{n} (module auth, env: staging)",
+    "2023-04-01T12:00:{s:02d}Z ERROR com.example.app.ApiController - "
+    "error code AUTH_FAILURE for request {n}",
+    "java.lang.IllegalStateException: token expired for user {n}",
+    "    at com.example.app.StringUtils.processInput(StringUtils.java:{ms})",
+    "    at com.example.app.ApiController.handleRequest(ApiController.java:23)",
+    "Please check /src/auth/middleware.js and config/app.yaml",
+]
+
+_SERVICES = ["UserAuth", "billing-api", "OrderService", "search-indexer", "gateway"]
+_ENVS = ["prod", "staging", "qa"]
+
+
+def make_log_ticket(size: int, seed: int = 7) -> str:
+    """Build a ticket body of roughly ``size`` characters of pasted logs."""
+    rng = random.Random(seed)
+    lines = ["Service UserAuth failing after deploy, logs below:"]
+    total = 0
+    while total < size:
+        line = rng.choice(_LOG_LINES).format(
+            s=rng.randint(0, 59), n=rng.randint(1, 10**6), ms=rng.randint(1, 999)
+        )
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def java_trace(rng: random.Random, frames: int = 12, causes: int = 1) -> str:
+    """A Java stacktrace with ``causes`` nested ``Caused by`` sections."""
+    lines: List[str] = []
+    for depth in range(causes + 1):
+        prefix = "Caused by: " if depth else ""
+        lines.append(
+            f"{prefix}java.lang.IllegalStateException: "
+            f"token expired for user {rng.randint(1, 10 ** 6)}"
+        )
+        for n in range(frames):
+            cls = rng.choice(["StringUtils", "ApiController", "TokenCache", "Dao"])
+            line = rng.randint(1, 900)
+            lines.append(f"    at com.example.app.{cls}.method{n}({cls}.java:{line})")
+        if depth:
+            lines.append(f"    ... {rng.randint(5, 40)} more")
+    return "\n".join(lines)
+
+
+def python_trace(rng: random.Random, frames: int = 8) -> str:
+    """A Python traceback."""
+    lines = ["Traceback (most recent call last):"]
+    for n in range(frames):
+        lines.append(
+            f'  File "/srv/app/handlers/module{n}.py", line {rng.randint(1, 500)}, '
+            f"in handle_{n}"
+        )
+        lines.append(f"    result = process(payload[{n}])")
+    lines.append("KeyError: 'customer_id'")
+    return "\n".join(lines)
+
+
+def js_trace(rng: random.Random, frames: int = 8) -> str:
+    """A Node.js stacktrace."""
+    lines = ["TypeError: Cannot read properties of undefined (reading 'id')"]
+    for n in range(frames):
+        lines.append(
+            f"    at handler{n} (/app/src/routes/orders.js:{rng.randint(1, 300)}:"
+            f"{rng.randint(1, 80)})"
+        )
+    return "\n".join(lines)
+
+
+def realistic(seed: int = 11) -> List[Ticket]:
+    """Tickets shaped like real on-call reports."""
+    rng = random.Random(seed)
+    tickets: List[Ticket] = []
+    for n in range(40):
+        service = rng.choice(_SERVICES)
+        env = rng.choice(_ENVS)
+        kind = n % 5
+        if kind == 0:
+            title = f"Error in {service} after deploy"
+            body = (
+                f"Service {service} in {env} started failing at 12:04.\n"
+                f"Error code AUTH_FAILURE on /api/users/login\n\n"
+                f"{java_trace(rng, rng.randint(8, 30), rng.randint(0, 2))}"
+            )
+        elif kind == 1:
+            title = f"Exception in {service} worker"
+            body = f"Seen in env: {env}\n{python_trace(rng, rng.randint(4, 15))}"
+        elif kind == 2:
+            title = f"Bug: checkout page crashes ({service})"
+            body = f"Steps: open cart, pay.\n{js_trace(rng, rng.randint(4, 12))}"
+        elif kind == 3:
+            title = f"{service} slow since yesterday"
+            body = make_log_ticket(rng.randint(2_000, 20_000), seed=seed + n)
+        else:
+            title = f"Feature request: export for {service}"
+            body = (
+                "It would help to export the report as CSV from "
+                "/api/reports/export. See config/app.yaml for the format."
+            )
+        tickets.append(Ticket(f"realistic-{kind}", f"BENCH-R{n}", title, body))
+    return tickets
+
+
+def adversarial(seed: int = 13) -> List[Ticket]:
+    """Tickets targeting the parsers' worst-case inputs."""
+    rng = random.Random(seed)
+    cases: Dict[str, str] = {
+        # One 1 MB line: no newline for line-based scanners to split on
+        "single-line-1mb": " ".join(
+            f"error code E{rng.randint(100, 999)} in /var/log/app{n}.log"
+            for n in range(30_000)
+        ),
+        # A huge trace: frame loops and deduplication
+        "frames-5000": java_trace(rng, frames=5_000),
+        # Deep "Caused by" chain
+        "causes-200": java_trace(rng, frames=5, causes=200),
+        # Almost-frames: "at" lines that never close their parenthesis
+        "near-miss-frames": "java.lang.Error: x\n"
+        + "\n".join(
+            f"    at com.example.A{n}.m(A.java:" + "9" * 200 for n in range(2000)
+        ),
+        # Path-like runs that invite backtracking in path patterns
+        "path-runs": "/" + "a/" * 100_000 + "!",
+        "dotted-runs": ".".join("x" * 3 for _ in range(100_000)),
+        # Keyword soup for the "service/env/error" patterns
+        "keyword-soup": ("service: env: error: code: endpoint: in: " * 20_000),
+        # Many short traces interleaved with log lines
+        "many-traces": "\n".join(
+            python_trace(rng, 3) + "\n" + make_log_ticket(500, seed=n)
+            for n in range(300)
+        ),
+        # Non-ASCII noise and control characters
+        "unicode-noise": "".join(
+            rng.choice("αβγδ日本語🙂\t\r\u200b  at ()") for _ in range(500_000)
+        ),
+        "empty": "",
+    }
+    return [
+        Ticket(name, f"BENCH-A{n}", f"Exception flood {name}", body)
+        for n, (name, body) in enumerate(cases.items())
+    ]
+
+
+def corpus(kind: str = "all") -> List[Ticket]:
+    """
+    Get benchmark tickets.
+
+    Args:
+        kind: ``realistic``, ``adversarial`` or ``all``
+
+    Returns:
+        Tickets in a fixed order
+    """
+    if kind == "realistic":
+        return realistic()
+    if kind == "adversarial":
+        return adversarial()
+    return realistic() + adversarial()
@@ -0,0 +1,222 @@
+"""
+Local stand-ins for Gemini and the MCP server with realistic latency.
+
+Both fakes draw their latency from a ``LatencyModel`` (log-normal body plus
+an optional slow tail) and fail a configurable share of calls, so load
+benchmarks see queueing, retries and tail latency instead of the instant
+answers of the test mocks. Everything is seeded for reproducible runs.
+"""
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List
+
+import httpx
+
+
+class ServiceUnavailable(Exception):
+    """Named like google.api_core.exceptions.ServiceUnavailable (retryable)."""
+
+
+@dataclass
+class LatencyModel:
+    """
+    Latency distribution of a fake upstream.
+
+    Attributes:
+        median: Median latency in seconds
+        sigma: Log-normal shape; 0 gives a constant latency
+        tail_probability: Share of calls that hit the slow tail
+        tail_multiplier: Latency factor of slow-tail calls
+    """
+
+    median: float
+    sigma: float = 0.5
+    tail_probability: float = 0.0
+    tail_multiplier: float = 10.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds."""
+        latency = self.median * math.exp(rng.gauss(0.0, self.sigma))
+        if self.tail_probability and rng.random() < self.tail_probability:
+            latency *= self.tail_multiplier
+        return latency
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """
+        Parse ``median[,sigma[,tail_probability[,tail_multiplier]]]``.
+
+        Example: ``0.8,0.4,0.02,8`` is a 800 ms median with 2% of calls 8x
+        slower.
+        """
+        values = [float(part) for part in spec.split(",") if part]
+        return cls(*values)
+
+
+class _FakeChunk:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Blocking stand-in for ``genai.GenerativeModel``.
+
+    Like the real SDK, ``generate_content`` blocks its thread for the whole
+    generation, so it exercises the execution pool and the resilience layer.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        error_rate: float = 0.0,
+        answer_chars: int = 1200,
+        stream_chunks: int = 20,
+        seed: int = 1,
+    ) -> None:
+        """
+        Initialize the fake model.
+
+        Args:
+            latency: Time to generate a whole answer
+            error_rate: Share of calls failing with ``ServiceUnavailable``
+            answer_chars: Length of each answer
+            stream_chunks: Chunks a streamed answer is split into
+            seed: Random seed
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.answer_chars = answer_chars
+        self.stream_chunks = max(1, stream_chunks)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def _answer(self, prompt: str) -> str:
+        sentence = (
+            f"The failure most likely originates in the component named in "
+            f"the trace ({len(prompt)} prompt chars). "
+        )
+        return (sentence * (self.answer_chars // len(sentence) + 1))[
+            : self.answer_chars
+        ]
+
+    def _draw(self) -> float:
+        # Called from the LLM pool's threads; keep the draw sequence seeded
+        with self._lock:
+            self.calls += 1
+            failed = self._rng.random() < self.error_rate
+            self.errors += failed
+            latency = self.latency.sample(self._rng)
+        if failed:
+            raise ServiceUnavailable("fake upstream unavailable")
+        return latency
+
+    def generate_content(self, prompt: str, stream: bool = False) -> Any:
+        """Generate an answer, or an iterator of chunks when streaming."""
+        latency = self._draw()
+        answer = self._answer(prompt)
+        if not stream:
+            time.sleep(latency)
+            return _FakeChunk(answer)
+        return self._stream(answer, latency)
+
+    def _stream(self, answer: str, latency: float) -> Iterator[_FakeChunk]:
+        size = math.ceil(len(answer) / self.stream_chunks)
+        for start in range(0, len(answer), size):
+            time.sleep(latency / self.stream_chunks)
+            yield _FakeChunk(answer[start : start + size])
+
+
+class FakeMCPTransport(httpx.AsyncBaseTransport):
+    """httpx transport answering MCP ``/files`` and ``/search`` requests."""
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        error_rate: float = 0.0,
+        file_lines: int = 400,
+        seed: int = 2,
+    ) -> None:
+        """
+        Initialize the fake server.
+
+        Args:
+            latency: Time to answer one request
+            error_rate: Share of requests answered with HTTP 503
+            file_lines: Lines in each served file
+            seed: Random seed
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.file_lines = file_lines
+        self._rng = random.Random(seed)
+        self.requests = 0
+
+    def _file(self, path: str) -> Dict[str, Any]:
+        lines: List[str] = []
+        for n in range(self.file_lines):
+            if n % 20 == 0:
+                lines.append(f"public String handler{n}(String input) {{")
+            else:
+                lines.append(f"    String value{n} = input.trim(); // {path}")
+        content = "\n".join(lines)
+        return {
+            "path": path,
+            "content": content,
+            "size": len(content),
+            "last_modified": "2024-01-01T00:00:00Z",
+        }
+
+    def _search(self, query: str, limit: int) -> Dict[str, Any]:
+        return {
+            "results": [
+                {
+                    "file": f"src/main/java/com/example/Match{n}.java",
+                    "line": 10 + n,
+                    "snippet": f"throw new IllegalStateException({query!r});",
+                    "repository": "bench-service",
+                }
+                for n in range(limit)
+            ]
+        }
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency.sample(self._rng))
+        if self._rng.random() < self.error_rate:
+            return httpx.Response(503, json={"detail": "fake MCP unavailable"})
+        if request.url.path == "/files":
+            body = self._file(request.url.params.get("path", "unknown"))
+        else:
+            payload: Dict[str, Any] = json.loads(request.content or b"{}")
+            body = self._search(payload.get("query", ""), payload.get("limit", 10))
+        return httpx.Response(200, json=body)
+
+
+def install_fakes(llm: FakeGeminiModel, mcp: FakeMCPTransport) -> None:
+    """
+    Point the application's Gemini and MCP singletons at the fakes.
+
+    Must run after the application settings have been configured.
+
+    Args:
+        llm: Fake Gemini model
+        mcp: Fake MCP transport
+    """
+    from app.llm import gemini
+    from app.mcp import client as mcp_client
+
+    client = gemini.GeminiClient()
+    client.model = llm
+    gemini._gemini_client = client
+    fake = mcp_client._build_client()
+    fake._transport = mcp
+    mcp_client._mcp_client = fake
@@ -0,0 +1,44 @@
+"""
+The original entity extraction, before the single-pass engine.
+
+Kept as the reference the engine must agree with (``tests/test_ticket_parser``)
+and as the baseline it is timed against (``benchmarks.bench_parsing``).
+"""
+
+import re
+from typing import Dict, List
+
+
+def legacy_extract_key_entities(ticket_text: str) -> Dict[str, List[str]]:
+    """The original implementation: five uncompiled findall scans."""
+    entities = {}
+    entities["service_names"] = list(
+        set(
+            re.findall(
+                r"(?i)(?:service|app|component|module)[\s:]+([a-zA-Z0-9_-]+)",
+                ticket_text,
+            )
+        )
+    )
+    entities["error_codes"] = list(
+        set(
+            re.findall(
+                r"(?i)(?:error|exception|code)[\s:]+([A-Z0-9_]{3,})", ticket_text
+            )
+        )
+    )
+    entities["file_paths"] = list(
+        set(re.findall(r"(?:\/[\w\-\.]+)+\/?|(?:[\w-]+\.[\w-]+)", ticket_text))
+    )
+    endpoint_matches = re.findall(
+        r"(?i)(?:\/api\/[\w\/\-{}]+)|(?:endpoint[\s:]+([\/\w\-]+))", ticket_text
+    )
+    entities["endpoints"] = list(set([m for m in endpoint_matches if m]))
+    env_matches = re.findall(
+        r"(?i)(?:environment|env|in)[\s:]+([a-zA-Z0-9_-]+)", ticket_text
+    )
+    common_envs = ["prod", "production", "dev", "development", "staging", "test", "qa"]
+    entities["environments"] = list(
+        set([env for env in env_matches if env.lower() in common_envs])
+    )
+    return entities
@@ -0,0 +1,115 @@
+"""
+Benchmark result files.
+
+Every benchmark writes one JSON document::
+
+    {"benchmark": "...", "environment": {...}, "config": {...},
+     "results": {"<case>": {"<metric>": value, ...}, ...}}
+
+so runs on two commits can be compared with ``benchmarks.compare``.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100) of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """Best wall-clock time of ``repeat`` runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max/mean in milliseconds."""
+    if not seconds:
+        seconds = [0.0]
+    return {
+        "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 3),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 3),
+        "max_ms": round(max(seconds) * 1000, 3),
+        "mean_ms": round(sum(seconds) / len(seconds) * 1000, 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    dirty = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=no"],
+        capture_output=True,
+        text=True,
+        timeout=5,
+    ).stdout.strip()
+    return result.stdout.strip() + ("-dirty" if dirty else "")
+
+
+def environment() -> Dict[str, Any]:
+    """Where and when the benchmark ran."""
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_results(
+    benchmark: str,
+    config: Dict[str, Any],
+    results: Dict[str, Dict[str, Any]],
+    output: Optional[str],
+) -> Dict[str, Any]:
+    """
+    Assemble a result document and write it as JSON.
+
+    Args:
+        benchmark: Benchmark name
+        config: Parameters the run used
+        results: Metrics by case
+        output: File to write, ``-`` for stdout, or None to skip
+
+    Returns:
+        The result document
+    """
+    document = {
+        "benchmark": benchmark,
+        "environment": environment(),
+        "config": config,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2, sort_keys=True)
+    if output == "-":
+        sys.stdout.write(text + "\n")
+    elif output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return document
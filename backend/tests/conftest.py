@@ -5,8 +5,43 @@ Pytest fixtures for BoaServer tests.
 import pytest
 from fastapi.testclient import TestClient
 
+from app.api.admission import AdmissionController
+from app.core.config import get_settings
+from app.knowledge.fingerprint import FingerprintIndex
+from app.llm.similarity_cache import SimilarityCache
 from app.main import app
-from app.llm.gemini import GeminiClient
+
+
+@pytest.fixture(autouse=True)
+def fingerprint_index(monkeypatch):
+    """Give each test its own empty in-memory fingerprint index."""
+    index = FingerprintIndex()
+    monkeypatch.setattr("app.knowledge.fingerprint._fingerprint_index", index)
+    return index
+
+
+@pytest.fixture(autouse=True)
+def similarity_cache(monkeypatch):
+    """Give each test its own empty near-duplicate cache."""
+    cache = SimilarityCache()
+    monkeypatch.setattr("app.llm.similarity_cache._similarity_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def admission_controller(monkeypatch):
+    """Give each test its own admission controller and rate limits."""
+    controller = AdmissionController()
+    monkeypatch.setattr("app.api.admission._admission_controller", controller)
+    return controller
+
+
+@pytest.fixture
+def ingest_spill(monkeypatch, tmp_path):
+    """Keep spilled webhook events of tests that start the app out of the temp dir."""
+    path = str(tmp_path / "ingest.db")
+    monkeypatch.setattr(get_settings(), "INGEST_SPILL_PATH", path)
+    return path
 
 
 @pytest.fixture
@@ -31,7 +66,7 @@ def sample_ticket():
             at com.example.app.Main.main(Main.java:12)
         
         Please check the file /src/auth/middleware.js for potential issues.
-        """
+        """  # noqa: E501
     }
 
 
@@ -42,7 +77,10 @@ def mock_mcp_client(monkeypatch):
         async def get_file(self, path, repo, ref="main"):
             return {
                 "path": path,
-                "content": "// Sample code content for testing\nfunction authenticate(user) {\n  return user.token != null;\n}",
+                "content": (
+                    "// Sample code content for testing\n"
+                    "function authenticate(user) {\n  return user.token != null;\n}"
+                ),
                 "size": 100,
                 "last_modified": "2023-04-01T12:00:00Z"
             }
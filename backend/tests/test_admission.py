@@ -0,0 +1,117 @@
+"""
+Tests for admission control and load shedding.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    Rejected,
+    TokenBucket,
+    client_key,
+)
+
+
+def test_token_bucket_refills():
+    """Test burst capacity and continuous refill."""
+    bucket = TokenBucket(rate=2.0, burst=2, now=0.0)
+
+    assert bucket.take(0.0) == 0
+    assert bucket.take(0.0) == 0
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0
+
+
+def test_client_key_prefers_api_key():
+    """Test that requests are keyed by API key, then by address."""
+    with_key = {"headers": [(b"x-api-key", b"secret")], "client": ("10.0.0.1", 1)}
+    without_key = {"headers": [], "client": ("10.0.0.1", 1)}
+
+    assert client_key(with_key).startswith("key:")
+    assert "secret" not in client_key(with_key)
+    assert client_key(without_key) == "addr:10.0.0.1"
+
+
+def test_rate_limit_is_per_client():
+    """Test that one client's burst does not limit another."""
+    controller = AdmissionController(rate_per_second=1.0, burst=2)
+
+    controller.check_rate("a")
+    controller.check_rate("a")
+    with pytest.raises(Rejected) as error:
+        controller.check_rate("a")
+    controller.check_rate("b")
+
+    assert error.value.status_code == 429
+    assert controller.stats()["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_is_bounded_and_times_out():
+    """Test FIFO hand-over, queue-full shedding and the queue timeout."""
+    controller = AdmissionController(
+        max_concurrency=1, max_queue=1, max_queue_seconds=0.1
+    )
+    await controller.acquire()
+
+    waiting = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(Rejected) as full:
+        await controller.acquire()
+    assert full.value.status_code == 503
+
+    controller.release()
+    await waiting
+    assert controller.stats()["in_flight"] == 1
+
+    with pytest.raises(Rejected):
+        await controller.acquire()
+    stats = controller.stats()
+    assert stats["shed_queue_full"] == 1
+    assert stats["shed_queue_timeout"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["admitted"] == 2
+    assert stats["queue_wait_p99_ms"] > 0
+
+    controller.release()
+    assert controller.stats()["in_flight"] == 0
+
+
+def make_app(controller):
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionMiddleware, controller=controller, exempt_paths=["/health"]
+    )
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/work")
+    async def work():
+        return {"ok": True}
+
+    return app
+
+
+def test_middleware_sheds_with_retry_after():
+    """Test 429/503 responses with Retry-After and the exempt health check."""
+    controller = AdmissionController(rate_per_second=0.5, burst=1)
+    client = TestClient(make_app(controller))
+
+    assert client.get("/work").status_code == 200
+    limited = client.get("/work")
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "2"
+    assert all(client.get("/health").status_code == 200 for _ in range(5))
+
+    saturated = AdmissionController(max_concurrency=0, max_queue=0)
+    response = TestClient(make_app(saturated)).get("/work")
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert controller.stats()["in_flight"] == 0
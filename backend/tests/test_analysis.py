@@ -0,0 +1,109 @@
+"""
+Tests for the ticket analysis pipeline.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.analysis import analysis_key, analyze_ticket
+from app.utils.singleflight import SingleFlight
+
+
+class CountingGeminiClient:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate_response(self, prompt, context=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return "shared analysis"
+
+
+@pytest.fixture
+def counting_gemini(monkeypatch):
+    fake = CountingGeminiClient()
+    monkeypatch.setattr("app.llm.gemini.get_gemini_client", lambda: fake)
+    return fake
+
+
+def test_analysis_key_depends_on_content():
+    """Test that the key changes when ticket content changes."""
+    assert analysis_key("T-1", "a", "b") == analysis_key("T-1", "a", "b")
+    assert analysis_key("T-1", "a", "b") != analysis_key("T-1", "a", "c")
+    assert analysis_key("T-1", "a", "b") != analysis_key("T-2", "a", "b")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_analyses_share_one_call(
+    counting_gemini, mock_mcp_client, sample_ticket
+):
+    """Test that identical concurrent requests run the pipeline once."""
+    ticket = (sample_ticket["id"], sample_ticket["title"], sample_ticket["description"])
+
+    results = await asyncio.gather(*(analyze_ticket(*ticket) for _ in range(5)))
+
+    assert counting_gemini.calls == 1
+    assert all(result["analysis"] == "shared analysis" for result in results)
+    assert results[0]["category"] == "error"
+    assert "user-service:/src/auth/middleware.js:45" in results[0]["context_sources"]
+    lookups = results[0]["context_lookups"]
+    assert lookups["completed"] == lookups["planned"] > 0
+    assert lookups["failed"] == lookups["timed_out"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_work():
+    """Test that shared work survives while any waiter remains."""
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await started.wait()
+    first.cancel()
+
+    assert await second == "done"
+    assert first.cancelled()
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 1}
+
+
+@pytest.mark.asyncio
+async def test_shared_work_cancelled_when_all_waiters_leave():
+    """Test that abandoned work is cancelled."""
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+def test_analysis_endpoint(client, mock_gemini_client, mock_mcp_client, sample_ticket):
+    """Test the ticket analysis endpoint."""
+    response = client.post(
+        "/api/analysis/ticket",
+        json={
+            "ticket_id": sample_ticket["id"],
+            "title": sample_ticket["title"],
+            "description": sample_ticket["description"],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json()["analysis"].startswith("This is a mock response")
@@ -2,9 +2,6 @@
 Tests for API endpoints.
 """
 
-import pytest
-from fastapi.testclient import TestClient
-
 
 def test_health_endpoint(client):
     """Test that health endpoint returns 200."""
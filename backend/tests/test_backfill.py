@@ -0,0 +1,63 @@
+"""
+Tests for bulk ticket parsing.
+"""
+
+import io
+import json
+
+from app.utils.backfill import BackfillProgress, iter_jsonl_tickets, main, parse_tickets
+
+
+def make_tickets(count):
+    return [
+        {
+            "id": f"TICKET-{i}",
+            "title": "Service returning 500 errors" if i % 2 else "Feature request",
+            "description": f"The service UserAuth{i} fails in production.",
+        }
+        for i in range(count)
+    ]
+
+
+def test_parse_tickets_preserves_order_across_processes():
+    """Test that parallel parsing yields results in input order."""
+    tickets = make_tickets(50)
+    progress = BackfillProgress()
+
+    results = list(parse_tickets(tickets, workers=2, chunk_size=7, progress=progress))
+
+    assert [r["ticket_id"] for r in results] == [t["id"] for t in tickets]
+    assert results[1]["category"] == "error"
+    assert results[0]["category"] == "feature"
+    assert progress.completed == progress.submitted == 50
+    assert progress.to_dict()["in_flight"] == 0
+
+
+def test_parse_tickets_unordered_yields_every_ticket():
+    """Test unordered mode returns the same set of results."""
+    tickets = make_tickets(30)
+
+    results = parse_tickets(tickets, workers=2, chunk_size=4, ordered=False)
+
+    assert sorted(r["ticket_id"] for r in results) == sorted(t["id"] for t in tickets)
+
+
+def test_iter_jsonl_tickets_skips_bad_lines():
+    """Test JSONL reading with blank and malformed lines."""
+    stream = io.StringIO('{"id": "A"}\n\nnot json\n[1, 2]\n{"id": "B"}\n')
+
+    assert [t["id"] for t in iter_jsonl_tickets(stream)] == ["A", "B"]
+
+
+def test_cli_writes_jsonl(tmp_path):
+    """Test the command line entry point."""
+    source = tmp_path / "tickets.jsonl"
+    target = tmp_path / "parsed.jsonl"
+    source.write_text("\n".join(json.dumps(t) for t in make_tickets(5)))
+
+    assert main([str(source), "-o", str(target), "--workers", "1"]) == 0
+
+    lines = target.read_text().splitlines()
+    assert [json.loads(line)["ticket_id"] for line in lines] == [
+        f"TICKET-{i}" for i in range(5)
+    ]
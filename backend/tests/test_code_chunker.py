@@ -0,0 +1,80 @@
+"""
+Tests for splitting code into chunks along definition boundaries.
+"""
+
+import pytest
+
+from app.llm.code_chunker import split_code
+
+JAVA_METHOD = """    @Override
+    public int compute{n}(int x) {{
+{body}        return y;
+    }}
+"""
+
+
+def java_class(methods=12):
+    body = "        int y = x * 2;\n" * 30
+    return (
+        "package com.example;\n\npublic class Service {\n"
+        + "\n".join(JAVA_METHOD.format(n=n, body=body) for n in range(methods))
+        + "}\n"
+    )
+
+
+def test_small_code_is_one_chunk():
+    """Test that code within budget is not split."""
+    chunks = split_code("def f():\n    return 1\n", "python", 1000)
+    assert [(c.start_line, c.end_line) for c in chunks] == [(1, 2)]
+
+
+def test_chunks_cover_every_line_within_budget():
+    """Test that chunks are contiguous, complete and within budget."""
+    code = java_class()
+    chunks = split_code(code, "java", 800)
+
+    assert len(chunks) > 1
+    assert chunks[0].start_line == 1
+    assert chunks[-1].end_line == len(code.splitlines())
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.start_line == previous.end_line + 1
+    assert all(chunk.tokens <= 800 for chunk in chunks)
+    assert "\n".join(chunk.text for chunk in chunks) == code.rstrip("\n")
+
+
+def test_nested_methods_split_with_their_annotations():
+    """Test that a large class is split between methods, annotations kept."""
+    chunks = split_code(java_class(), "java", 800)
+    for chunk in chunks[1:]:
+        assert chunk.text.startswith("    @Override\n    public int compute")
+
+
+def test_python_functions_and_decorators():
+    """Test Python boundaries, including decorators and async functions."""
+    functions = [
+        f"@app.route('/v{n}')\nasync def view_{n}(request):\n"
+        + "    data = await request.json()\n" * 40
+        + "    return data\n"
+        for n in range(6)
+    ]
+    chunks = split_code("import os\n\n\n" + "\n\n".join(functions), "py", 600)
+
+    assert len(chunks) == 6
+    assert all(c.text.lstrip("\n").startswith("@app.route") for c in chunks[1:])
+    assert sum("async def view_" in c.text for c in chunks) == 6
+
+
+def test_code_without_definitions_splits_between_lines():
+    """Test the line-based fallback for code with no recognisable structure."""
+    code = "\n".join(f"SET key_{n} value_{n};" for n in range(2000))
+    chunks = split_code(code, "sql", 500)
+
+    assert len(chunks) > 10
+    assert all(chunk.tokens <= 500 for chunk in chunks)
+    assert chunks[-1].end_line == 2000
+
+
+def test_budget_must_be_positive():
+    """Test that a budget of no tokens is rejected."""
+    with pytest.raises(ValueError):
+        split_code("x = 1\n", "python", 0)
@@ -0,0 +1,127 @@
+"""
+Tests for concurrent context assembly.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.context import assemble_context, get_context_stats, plan_lookups
+from app.utils.ticket_parser import parse_ticket
+
+
+class SlowMCPClient:
+    """MCP stub where each query can be given its own latency."""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.calls = []
+
+    async def get_file(self, path, repo, ref="main"):
+        self.calls.append(("get_file", path))
+        await asyncio.sleep(self.delays.get(path, 0.05))
+        return {"path": path, "content": f"// contents of {path}"}
+
+    async def search_code(self, query, repositories=None, limit=10):
+        self.calls.append(("search_code", query))
+        await asyncio.sleep(self.delays.get(query, 0.05))
+        if query in self.failing:
+            raise RuntimeError("MCP unavailable")
+        return [
+            {
+                "file": "/src/auth/middleware.js",
+                "line": 45,
+                "snippet": "return user.token.validate();",
+                "repository": "user-service",
+            },
+            {
+                "file": f"/src/{query}.js",
+                "line": 1,
+                "snippet": f"// {query}",
+                "repository": "user-service",
+            },
+        ]
+
+
+@pytest.fixture
+def parsed_ticket(sample_ticket):
+    return parse_ticket(
+        sample_ticket["id"], sample_ticket["title"], sample_ticket["description"]
+    )
+
+
+@pytest.fixture
+def slow_mcp(monkeypatch):
+    def install(**kwargs):
+        fake = SlowMCPClient(**kwargs)
+        monkeypatch.setattr("app.mcp.client.get_mcp_client", lambda: fake)
+        return fake
+
+    return install
+
+
+def test_plan_lookups(parsed_ticket):
+    """Test that entities become deduplicated lookups, most specific first."""
+    lookups = plan_lookups(parsed_ticket)
+
+    kinds = [lookup.kind for lookup in lookups]
+    assert kinds[0] == "file_path"
+    assert "exception" in kinds and "endpoint" in kinds
+    assert len({(lookup.kind, lookup.query) for lookup in lookups}) == len(lookups)
+    assert len(plan_lookups(parsed_ticket, max_lookups=2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_lookups_run_concurrently(parsed_ticket, slow_mcp):
+    """Test that N lookups take about one round trip."""
+    fake = slow_mcp()
+
+    started = time.perf_counter()
+    assembled = await assemble_context(parsed_ticket, deadline=2, call_timeout=1)
+    elapsed = time.perf_counter() - started
+
+    assert assembled.completed == assembled.planned == len(fake.calls) > 2
+    assert elapsed < 0.05 * 2
+    # The snippet found by every search is deduplicated and ranked first
+    sources = [item.source for item in assembled.items]
+    assert len(sources) == len(set(sources))
+    assert sources[0] == "user-service:/src/auth/middleware.js:45"
+    assert len(assembled.items[0].matched) > 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_partial_results(parsed_ticket, slow_mcp):
+    """Test that slow and failing lookups do not fail the stage."""
+    fake = slow_mcp(
+        delays={"NullPointerException": 5, "java.lang.NullPointerException": 5},
+        failing={"/api/users/login"},
+    )
+
+    totals = get_context_stats()
+    started = time.perf_counter()
+    assembled = await assemble_context(parsed_ticket, deadline=0.3, call_timeout=10)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1
+    assert assembled.timed_out == 1
+    assert assembled.failed == 1
+    assert assembled.completed == assembled.planned - 2
+    assert assembled.items
+    assert fake.calls
+    assert assembled.stats()["timed_out"] == 1
+    assert get_context_stats()["timed_out"] == totals["timed_out"] + 1
+    assert get_context_stats()["failed"] == totals["failed"] + 1
+    assert get_context_stats()["deadline_reached"] == totals["deadline_reached"] + 1
+
+
+@pytest.mark.asyncio
+async def test_per_call_timeout(parsed_ticket, slow_mcp):
+    """Test that one slow call is cut off by its own timeout."""
+    slow_mcp(delays={"java.lang.NullPointerException": 5})
+
+    assembled = await assemble_context(parsed_ticket, deadline=5, call_timeout=0.2)
+
+    assert assembled.timed_out == 1
+    assert assembled.completed == assembled.planned - 1
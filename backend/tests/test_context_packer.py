@@ -0,0 +1,175 @@
+"""
+Tests for token-budgeted prompt context packing.
+"""
+
+from app.core.context import AssembledContext, ContextItem
+from app.llm.context_packer import (
+    Snippet,
+    allocate_budget,
+    estimate_tokens,
+    focus_windows,
+    pack_snippets,
+    prompt_token_budget,
+    truncate_to_tokens,
+)
+from app.llm.prompts import get_code_analysis_prompt, get_ticket_analysis_prompt
+from app.utils.ticket_parser import parse_ticket
+
+
+def big_file(lines=5000, special=None):
+    """A long Java file with one distinctive method at line ``special``."""
+    body = [f"    int helper{n}(int x) {{ return x + {n}; }}" for n in range(lines)]
+    if special:
+        body[
+            special - 1
+        ] = "    String processInput(String input) { return input.trim(); }"
+    return "\n".join(body)
+
+
+def test_estimate_tokens():
+    """Test that estimates are local, additive and in a sensible range."""
+    assert estimate_tokens("") == 0
+    prose = "The checkout service returns errors for every request. " * 20
+    assert len(prose) / 6 < estimate_tokens(prose) < len(prose) / 2
+    assert estimate_tokens("a(b);") == 5
+    assert abs(estimate_tokens(prose + prose) - 2 * estimate_tokens(prose)) <= 1
+    assert estimate_tokens("naïve café") >= 2
+
+
+def test_prompt_token_budget():
+    """Test that the budget leaves room for the response and honours the cap."""
+    assert prompt_token_budget("gemini-pro", 1024, cap=0) == 32768 - 1024 - 256
+    assert prompt_token_budget("models/gemini-pro", 1024, cap=4000) == 4000
+    assert prompt_token_budget("unknown-model", 1024, cap=0) > 0
+
+
+def test_allocate_budget():
+    """Test that unused shares go to the parts that need them."""
+    assert allocate_budget([100, 5000], [2.0, 1.0], 1000) == [100, 900]
+    assert allocate_budget([5000, 5000], [2.0, 1.0], 900) == [600, 300]
+    assert allocate_budget([10, 0], [1.0, 1.0], 900) == [10, 0]
+
+
+def test_focus_windows_center_on_frames_and_terms():
+    """Test that a long file is cut down to the lines that matter."""
+    code = big_file(special=4000)
+    windows = focus_windows(
+        code, "repo:Big.java", focus_lines=[2500], terms=["processInput"]
+    )
+
+    assert [w.source for w in windows] == [
+        "repo:Big.java:2488-2512",
+        "repo:Big.java:3988-4012",
+        "repo:Big.java:1-25",
+    ]
+    assert "helper2499(" in windows[0].text
+    assert "processInput" in windows[1].text
+    assert windows[0].priority > windows[1].priority > windows[2].priority
+    assert sum(w.tokens for w in windows) < estimate_tokens(code) / 50
+
+
+def test_focus_windows_without_hits_keep_head():
+    """Test that a file with nothing of interest contributes only its head."""
+    windows = focus_windows(big_file(), "repo:Big.java", priority=2.0)
+    assert len(windows) == 1 and windows[0].source == "repo:Big.java:1-25"
+    assert windows[0].priority == 1.0
+
+
+def test_pack_snippets_prioritizes_and_dedupes():
+    """Test priority order, duplicate removal and dropping under budget."""
+    snippets = [
+        Snippet("low", "x = 1\n" * 200, priority=0.5),
+        Snippet("high", "def handler(request):\n    return process(request)", 3.0),
+        Snippet("dup", "return process(request)", 2.0),
+        Snippet("mid", "class Processor:\n    pass", 1.0),
+    ]
+    packed = pack_snippets(snippets, budget=60)
+
+    assert [s.source for s in packed.snippets] == ["high", "mid"]
+    assert (packed.duplicates, packed.dropped) == (1, 1)
+    assert packed.tokens <= 60
+
+
+def test_pack_snippets_truncates_when_room_remains():
+    """Test that an oversized snippet is trimmed rather than dropped."""
+    packed = pack_snippets([Snippet("big", "value = compute()\n" * 500)], 200)
+    assert packed.truncated == 1
+    assert packed.tokens <= 200
+    assert packed.snippets[0].text.endswith("[... truncated to fit the prompt budget]")
+
+
+def test_truncate_to_tokens():
+    """Test that text within budget is unchanged and long text keeps its head."""
+    assert truncate_to_tokens("short text", 100) == "short text"
+    text = "\n\n".join(f"Block {n}: " + "word " * 30 for n in range(50))
+    trimmed = truncate_to_tokens(text, 200)
+    assert trimmed.startswith("Block 0:")
+    assert estimate_tokens(trimmed) <= 200
+
+
+def test_ticket_prompt_fits_budget():
+    """Test that a pasted huge description is trimmed to the budget."""
+    description = "Stack trace attached.\n" + big_file(3000)
+    context = "Relevant code:\n\n" + "--- repo:a.py\nprint('a')\n" * 400
+    prompt = get_ticket_analysis_prompt(
+        "T-1", "Checkout fails", description, context, token_budget=4000
+    )
+
+    assert estimate_tokens(prompt) <= 4000
+    assert "Stack trace attached." in prompt
+    assert "Relevant code:" in prompt
+    assert get_ticket_analysis_prompt("T-1", "t", "d", "c") == (
+        get_ticket_analysis_prompt("T-1", "t", "d", "c", token_budget=4000)
+    )
+
+
+def test_code_prompt_keeps_relevant_code():
+    """Test that code is cut down around frames and identifiers in the ticket."""
+    prompt = get_code_analysis_prompt(
+        big_file(special=4321),
+        "java",
+        "T-1",
+        "NPE in processInput",
+        "NullPointerException thrown from processInput",
+        token_budget=3000,
+        focus_lines=[1200],
+    )
+
+    assert estimate_tokens(prompt) <= 3000
+    assert "[lines 4309-4333]" in prompt and "input.trim()" in prompt
+    assert "[lines 1188-1212]" in prompt and "[lines 1-25]" in prompt
+    assert prompt.index("[lines 1188-1212]") < prompt.index("[lines 4309-4333]")
+
+
+def test_assembled_context_pack_uses_frames():
+    """Test that whole files are windowed around the ticket's frames."""
+    parsed = parse_ticket(
+        "T-1",
+        "NPE",
+        """java.lang.NullPointerException: input is null
+    at com.example.app.StringUtils.processInput(StringUtils.java:4321)
+    at com.example.app.Main.main(Main.java:12)""",
+    )
+    assembled = AssembledContext(
+        items=[
+            ContextItem(
+                "repo:src/StringUtils.java",
+                big_file(special=4321),
+                score=3.0,
+                whole_file=True,
+            ),
+            ContextItem("repo:src/Main.java:12", "StringUtils.processInput(arg);", 1.0),
+        ]
+    )
+    packed = assembled.pack(parsed, budget=2000)
+
+    sources = [snippet.source for snippet in packed.snippets]
+    assert sources == [
+        "repo:src/StringUtils.java:4309-4333",
+        "repo:src/Main.java:12",
+        "repo:src/StringUtils.java:1-25",
+    ]
+    assert packed.tokens <= 2000
+    tight = assembled.pack(parsed, budget=400)
+    assert [snippet.source for snippet in tight.snippets] == sources[:1]
+    assert tight.truncated == 1 and tight.tokens <= 400
@@ -0,0 +1,120 @@
+"""
+Tests for the MCP file content cache.
+"""
+
+import httpx
+import pytest
+
+from app.mcp.client import MCPClient
+from app.mcp.file_cache import FileContentCache, FileKey, is_immutable_ref
+
+SHA = "3f786850e387550fdab836ed7e6dc881de23001b"
+
+
+def file_server(requests, etag='"v1"'):
+    """MCP stub serving /files with ETag support."""
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        path = request.url.params["path"]
+        return httpx.Response(
+            200,
+            json={
+                "path": path,
+                "content": f"// {path}",
+                "size": 10,
+                "last_modified": "2023-04-01T12:00:00Z",
+            },
+            headers={"ETag": etag},
+        )
+
+    return handler
+
+
+def make_client(requests, cache, **kwargs):
+    return MCPClient(
+        "http://mcp.test",
+        transport=httpx.MockTransport(file_server(requests, **kwargs)),
+        file_cache=cache,
+    )
+
+
+def test_is_immutable_ref():
+    """Test commit SHA detection."""
+    assert is_immutable_ref(SHA)
+    assert is_immutable_ref("a" * 64)
+    assert not is_immutable_ref("main")
+    assert not is_immutable_ref(SHA[:12])
+
+
+@pytest.mark.asyncio
+async def test_commit_sha_is_served_from_cache():
+    """Test that files at a commit SHA are never refetched."""
+    requests = []
+    cache = FileContentCache(revalidate_after=0)
+    client = make_client(requests, cache)
+
+    first = await client.get_file("src/auth.js", "user-service", ref=SHA)
+    second = await client.get_file("src/auth.js", "user-service", ref=SHA)
+    await client.aclose()
+
+    assert first == second
+    assert len(requests) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["bytes_saved"] > 0
+
+
+@pytest.mark.asyncio
+async def test_branch_ref_revalidates():
+    """Test that stale branch entries are revalidated with a conditional GET."""
+    requests = []
+    cache = FileContentCache(revalidate_after=0)
+    client = make_client(requests, cache)
+
+    first = await client.get_file("src/auth.js", "user-service")
+    second = await client.get_file("src/auth.js", "user-service")
+    await client.aclose()
+
+    assert first == second
+    assert len(requests) == 2
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert requests[1].headers["If-Modified-Since"] == "Sat, 01 Apr 2023 12:00:00 GMT"
+    assert cache.stats()["revalidated"] == 1
+
+
+@pytest.mark.asyncio
+async def test_branch_ref_fresh_window():
+    """Test that branch entries are served directly while fresh."""
+    requests = []
+    cache = FileContentCache(revalidate_after=60)
+    client = make_client(requests, cache)
+
+    await client.get_file("src/auth.js", "user-service")
+    await client.get_file("src/auth.js", "user-service")
+    await client.aclose()
+
+    assert len(requests) == 1
+
+
+def test_byte_budget_eviction():
+    """Test that eviction is driven by total size, not entry count."""
+    cache = FileContentCache(max_bytes=10_000, max_entry_bytes=10_000)
+    for i in range(20):
+        cache.store(FileKey("repo", f"small{i}.py", "main"), {"content": "x" * 100})
+    assert len(cache) == 20
+
+    cache.store(FileKey("repo", "generated.py", "main"), {"content": "x" * 8_000})
+    stats = cache.stats()
+    assert stats["bytes"] <= 10_000
+    assert stats["evictions"] > 0
+    assert cache.lookup(FileKey("repo", "generated.py", "main")) is not None
+    # The most recently used small files survive
+    assert cache.lookup(FileKey("repo", "small19.py", "main")) is not None
+
+    assert not cache.store(
+        FileKey("repo", "huge.py", "main"), {"content": "x" * 20_000}
+    )
+    assert cache.stats()["oversize_rejections"] == 1
@@ -0,0 +1,188 @@
+"""
+Tests for stacktrace fingerprinting and the known-incident index.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.analysis import analyze_ticket
+from app.knowledge.fingerprint import (
+    FingerprintIndex,
+    fingerprint_ticket,
+    normalize_symbol,
+)
+from app.utils.ticket_parser import parse_ticket
+
+JAVA_TRACE = """
+java.lang.IllegalStateException: Order {order} is not payable
+    at com.example.orders.OrderService.pay(OrderService.java:{line})
+    at com.example.orders.OrderService$$Lambda$17/1915318863.apply(Unknown Source)
+    at com.example.api.OrderController.checkout(OrderController.java:{other})
+"""
+
+
+def parsed_trace(order="8812", line=120, other=33, exception="IllegalStateException"):
+    description = JAVA_TRACE.format(order=order, line=line, other=other).replace(
+        "IllegalStateException", exception
+    )
+    return parse_ticket("T-1", "Checkout fails", description)
+
+
+class CountingGeminiClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_response(self, prompt, context=None):
+        self.calls += 1
+        return f"analysis #{self.calls}"
+
+
+@pytest.fixture
+def counting_gemini(monkeypatch):
+    fake = CountingGeminiClient()
+    monkeypatch.setattr("app.llm.gemini.get_gemini_client", lambda: fake)
+    return fake
+
+
+def test_normalize_symbol():
+    """Test that occurrence-specific parts are stripped."""
+    assert normalize_symbol("Foo$$Lambda$17/0x0000000800c4b440") == "Foo$?"
+    assert normalize_symbol("Handler$3.run") == "Handler$?.run"
+    assert normalize_symbol("GeneratedMethodAccessor42") == "GeneratedMethodAccessor$?"
+    assert normalize_symbol("worker-7") == "worker-#"
+
+
+def test_fingerprint_ignores_volatile_details():
+    """Test that line numbers, ids and lambda addresses do not matter."""
+    first = fingerprint_ticket(parsed_trace())
+    second = fingerprint_ticket(parsed_trace(order="1", line=121, other=40))
+
+    assert first is not None
+    assert first == second
+    assert first != fingerprint_ticket(parsed_trace(exception="TimeoutException"))
+
+
+def test_no_fingerprint_without_stacktrace():
+    """Test that tickets without a stacktrace are not fingerprinted."""
+    parsed = parse_ticket("T-1", "Slow page", "The dashboard takes 30s to load")
+    assert fingerprint_ticket(parsed) is None
+
+
+def test_index_persists_entries_and_resolutions(tmp_path):
+    """Test that entries, resolutions and hit counts survive a reopen."""
+    db_path = str(tmp_path / "fingerprints.db")
+    index = FingerprintIndex(db_path)
+    index.store("fp-1", "T-1", "cause: payment state")
+    assert index.set_resolution("T-1", "Deployed hotfix 1.2.3").resolution
+    assert index.set_resolution("T-404", "n/a") is None
+    index.lookup("fp-1")
+    index.close()
+
+    reopened = FingerprintIndex(db_path)
+    entry = reopened.lookup("fp-1")
+    assert (entry.ticket_id, entry.analysis) == ("T-1", "cause: payment state")
+    assert entry.resolution == "Deployed hotfix 1.2.3"
+    assert entry.hits == 2
+    reopened.close()
+
+
+def test_index_stats():
+    """Test hit ratio reporting."""
+    index = FingerprintIndex()
+    index.store("fp-1", "T-1", "analysis")
+    index.lookup("fp-1")
+    index.lookup("fp-2")
+
+    stats = index.stats()
+    assert stats["entries"] == 1
+    assert (stats["lookups"], stats["hits"], stats["misses"]) == (2, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+    assert stats["persistent"] is False
+
+
+@pytest.mark.asyncio
+async def test_repeat_incident_skips_llm(counting_gemini, mock_mcp_client):
+    """Test that a repeat of a known stacktrace is answered from the index."""
+    first = await analyze_ticket(
+        "T-1", "Checkout fails", JAVA_TRACE.format(order=1, line=120, other=33)
+    )
+    second = await analyze_ticket(
+        "T-2", "Checkout broken again", JAVA_TRACE.format(order=2, line=125, other=33)
+    )
+
+    assert counting_gemini.calls == 1
+    assert first["known_incident"] is None
+    assert second["analysis"] == first["analysis"] == "analysis #1"
+    assert second["fingerprint"] == first["fingerprint"]
+    assert second["known_incident"]["ticket_id"] == "T-1"
+    assert second["known_incident"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_frameless_traces_do_not_share_a_fingerprint(
+    counting_gemini, mock_mcp_client
+):
+    """Test that an exception type alone does not identify an incident."""
+    first = await analyze_ticket(
+        "T-1", "Signup fails", "Traceback (most recent call last):\nKeyError: email"
+    )
+    second = await analyze_ticket(
+        "T-2", "Export fails", "Traceback (most recent call last):\nKeyError: format"
+    )
+
+    assert counting_gemini.calls == 2
+    assert first["fingerprint"] is None and second["fingerprint"] is None
+    assert second["known_incident"] is None
+    assert second["analysis"] == "analysis #2"
+
+
+@pytest.mark.asyncio
+async def test_stale_hit_refreshes_in_background(
+    counting_gemini, mock_mcp_client, fingerprint_index, monkeypatch
+):
+    """Test that a stale stored answer is replaced by a background refresh."""
+    monkeypatch.setenv("FINGERPRINT_REFRESH_ON_HIT", "true")
+    monkeypatch.setenv("FINGERPRINT_REFRESH_AFTER_SECONDS", "0")
+    from app.core.config import get_settings
+
+    get_settings.cache_clear()
+    try:
+        description = JAVA_TRACE.format(order=1, line=120, other=33)
+        first = await analyze_ticket("T-1", "Checkout fails", description)
+        second = await analyze_ticket("T-2", "Checkout fails", description)
+        assert second["analysis"] == "analysis #1"
+
+        for _ in range(100):
+            if counting_gemini.calls == 2:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        assert fingerprint_index.lookup(first["fingerprint"]).analysis == "analysis #2"
+    finally:
+        get_settings.cache_clear()
+
+
+def test_resolution_endpoint(client, mock_gemini_client, mock_mcp_client):
+    """Test recording a resolution for an analyzed ticket."""
+    ticket = {
+        "ticket_id": "T-1",
+        "title": "Checkout fails",
+        "description": JAVA_TRACE.format(order=1, line=120, other=33),
+    }
+    assert client.post("/api/analysis/ticket", json=ticket).status_code == 200
+
+    response = client.post(
+        "/api/analysis/ticket/T-1/resolution", json={"resolution": "Fixed in 1.2.3"}
+    )
+    assert response.status_code == 200
+    assert response.json()["resolution"] == "Fixed in 1.2.3"
+
+    missing = client.post(
+        "/api/analysis/ticket/T-9/resolution", json={"resolution": "n/a"}
+    )
+    assert missing.status_code == 404
+
+    ticket["ticket_id"] = "T-2"
+    repeat = client.post("/api/analysis/ticket", json=ticket).json()
+    assert repeat["known_incident"]["resolution"] == "Fixed in 1.2.3"
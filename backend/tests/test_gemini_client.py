@@ -0,0 +1,311 @@
+"""
+Tests for the Gemini client.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.config import get_settings
+from app.llm.cache import CompletionCache
+from app.llm.executor import LLMExecutionPool, LLMQueueFullError
+from app.llm.gemini import GeminiClient
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowModel:
+    """Blocking stand-in for genai.GenerativeModel."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        time.sleep(self.delay)
+        return FakeResponse("analysis")
+
+
+def make_client(model, pool=None, cache=None):
+    client = GeminiClient(
+        pool=pool or LLMExecutionPool(max_concurrency=2),
+        cache=cache or CompletionCache(),
+    )
+    client.model = model
+    return client
+
+
+@pytest.mark.asyncio
+async def test_generate_response_does_not_block_event_loop():
+    """Test that a slow SDK call leaves the loop free for other work."""
+    client = make_client(SlowModel(delay=0.3))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    result = await client.generate_response("prompt", context={"service": "auth"})
+    task.cancel()
+
+    assert result == "analysis"
+    assert ticks >= 10
+    assert "service: auth" in client.model.prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_analyze_code_uses_pool():
+    """Test that code analysis goes through the execution pool."""
+    pool = LLMExecutionPool(max_concurrency=1)
+    client = make_client(SlowModel(delay=0), pool=pool)
+
+    result = await client.analyze_code("x = 1", "python")
+
+    assert result["success"] is True
+    assert pool.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_in_flight_and_rejects_when_queue_full():
+    """Test the in-flight limit, wait queue and rejection."""
+    pool = LLMExecutionPool(max_concurrency=1, max_queue_size=1)
+    release = threading.Event()
+
+    first = asyncio.create_task(pool.run(release.wait))
+    second = asyncio.create_task(pool.run(lambda: "done"))
+    await asyncio.sleep(0.05)
+
+    assert pool.in_flight == 1
+    assert pool.queue_depth == 1
+    with pytest.raises(LLMQueueFullError):
+        await pool.run(lambda: None)
+
+    release.set()
+    assert await second == "done"
+    await first
+    assert pool.stats() == {
+        "max_concurrency": 1,
+        "max_queue_size": 1,
+        "in_flight": 0,
+        "queue_depth": 0,
+        "completed": 2,
+        "failed": 0,
+        "rejected": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    """Test that cancelling a queued caller frees its place in line."""
+    pool = LLMExecutionPool(max_concurrency=1, max_queue_size=4)
+    release = threading.Event()
+
+    running = asyncio.create_task(pool.run(release.wait))
+    waiting = asyncio.create_task(pool.run(lambda: None))
+    await asyncio.sleep(0.05)
+    waiting.cancel()
+    await asyncio.sleep(0)
+
+    release.set()
+    await running
+    assert await pool.run(lambda: "ok") == "ok"
+    assert pool.in_flight == 0
+
+
+class StreamingModel:
+    """Stand-in for a streaming GenerativeModel."""
+
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.yielded = 0
+
+    def generate_content(self, prompt, stream=False):
+        def iterate():
+            for chunk in self.chunks:
+                time.sleep(self.delay)
+                self.yielded += 1
+                yield FakeResponse(chunk)
+
+        return iterate()
+
+
+@pytest.mark.asyncio
+async def test_stream_response_yields_chunks():
+    """Test that streamed chunks arrive in order."""
+    client = make_client(StreamingModel(["a", "b", "c"]))
+
+    chunks = [chunk async for chunk in client.stream_response("prompt")]
+
+    assert chunks == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_stream_response_stops_upstream_when_closed():
+    """Test that closing the stream early stops consuming the upstream."""
+    pool = LLMExecutionPool(max_concurrency=1)
+    model = StreamingModel([str(i) for i in range(50)], delay=0.01)
+    client = make_client(model, pool=pool)
+
+    stream = client.stream_response("prompt")
+    assert await stream.__anext__() == "0"
+    await stream.aclose()
+    await asyncio.sleep(0.1)
+
+    assert model.yielded < 50
+    assert pool.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_response_served_from_cache():
+    """Test that a repeated prompt skips the model call."""
+    model = SlowModel(delay=0)
+    client = make_client(model)
+
+    first = await client.generate_response("prompt")
+    second = await client.generate_response("prompt  \r\n")
+
+    assert first == second == "analysis"
+    assert len(model.prompts) == 1
+    assert client.cache.stats()["memory_hits"] == 1
+
+
+class ChunkModel:
+    """Stand-in that answers map prompts per part and records concurrency."""
+
+    def __init__(self, delay=0.1, fail_part=None):
+        self.delay = delay
+        self.fail_part = fail_part
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if "reviewed in parts" in prompt:
+                return FakeResponse("merged analysis")
+            part = prompt.split("You are reviewing part ")[1].split(" ")[0]
+            if part == str(self.fail_part):
+                raise RuntimeError("upstream error")
+            return FakeResponse(f"finding for part {part}")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def large_python_file(functions=60):
+    return "\n\n".join(
+        f"def handler_{n}(request):\n"
+        + "".join(f"    value_{i} = request.get('field_{i}')\n" for i in range(20))
+        + "    return value_0\n"
+        for n in range(functions)
+    )
+
+
+@pytest.mark.asyncio
+async def test_analyze_code_map_reduce(monkeypatch):
+    """Test that large code is analyzed in concurrent chunks and merged."""
+    monkeypatch.setattr(get_settings(), "LLM_CODE_CHUNK_TOKENS", 1000)
+    model = ChunkModel(delay=0.1)
+    client = make_client(model, pool=LLMExecutionPool(max_concurrency=16))
+
+    started = time.perf_counter()
+    result = await client.analyze_code(large_python_file(), "python", "Any bugs?")
+    elapsed = time.perf_counter() - started
+
+    map_prompts = [p for p in model.prompts if "You are reviewing part" in p]
+    reduce_prompt = model.prompts[-1]
+    assert result == {
+        "analysis": "merged analysis",
+        "language": "python",
+        "success": True,
+    }
+    assert len(map_prompts) > 4
+    # Chunks start at function boundaries
+    assert all(
+        p.split("```python\n")[1].startswith("def handler_") for p in map_prompts
+    )
+    assert "Lines 1-" in reduce_prompt and "finding for part 1" in reduce_prompt
+    assert "Any bugs?" in reduce_prompt
+    # Chunks run concurrently: about one map round plus the reduce call
+    assert model.peak > 4
+    assert elapsed < 0.1 * len(map_prompts)
+
+
+@pytest.mark.asyncio
+async def test_analyze_code_chunk_failures(monkeypatch):
+    """Test that failed chunks are reported and small code stays single-call."""
+    monkeypatch.setattr(get_settings(), "LLM_CODE_CHUNK_TOKENS", 1000)
+    model = ChunkModel(delay=0, fail_part=2)
+    client = make_client(model)
+
+    result = await client.analyze_code(large_python_file(), "python")
+
+    assert result["success"] is True
+    assert "parts could not be analyzed" in model.prompts[-1]
+    assert "finding for part 2\n" not in model.prompts[-1]
+
+    single = make_client(SlowModel(delay=0))
+    await single.analyze_code("x = 1", "python")
+    assert len(single.model.prompts) == 1
+    assert "reviewing part" not in single.model.prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_analyze_code_rejects_a_budget_too_small_for_chunks(monkeypatch):
+    """Test that a prompt budget below the chunk prompt overhead is reported."""
+    monkeypatch.setattr(get_settings(), "LLM_CODE_CHUNK_TOKENS", 1000)
+    monkeypatch.setattr(get_settings(), "LLM_PROMPT_TOKEN_BUDGET", 600)
+    model = ChunkModel(delay=0)
+    client = make_client(model)
+
+    result = await client.analyze_code(large_python_file(), "python")
+
+    assert result["success"] is False
+    assert "LLM_PROMPT_TOKEN_BUDGET" in result["analysis"]
+    assert model.prompts == []
+
+
+class MergeModel:
+    """Stand-in for the reduce step whose first merge of part 3 fails."""
+
+    def __init__(self):
+        self.prompts = []
+        self.failed = False
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        findings = prompt.split("findings for each part:\n\n")[1].split("\n\nMerge")[0]
+        if "finding 3" in findings and not self.failed:
+            self.failed = True
+            raise RuntimeError("upstream error")
+        return FakeResponse(f"merged [{findings}]")
+
+
+@pytest.mark.asyncio
+async def test_failed_merge_keeps_its_findings():
+    """Test that findings of a batch whose merge fails reach the final call."""
+    model = MergeModel()
+    client = make_client(model)
+    findings = [f"finding {n} " + "detail " * 100 for n in range(1, 5)]
+
+    analysis = await client._reduce_findings(findings, "python", 100, "", 826)
+
+    assert model.failed
+    assert all(f"finding {n}" in model.prompts[-1] for n in range(1, 5))
+    assert all(f"finding {n}" in analysis for n in range(1, 5))
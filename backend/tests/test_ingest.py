@@ -0,0 +1,276 @@
+"""
+Tests for webhook ticket ingestion.
+"""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.core.ingest import (
+    COLLAPSED,
+    QUEUED,
+    SPILLED,
+    IngestPipeline,
+    IngestQueue,
+    PrecomputedAnalyses,
+    QueueFull,
+    SpillStore,
+)
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_updates_within_the_window_collapse():
+    """Test that repeated updates become one event with the latest content."""
+    queue = IngestQueue(dedupe_window=5.0)
+
+    assert await queue.put("T-1", "title", "first", now=100.0) == QUEUED
+    assert await queue.put("T-2", "other", "", now=101.0) == QUEUED
+    assert await queue.put("T-1", "title", "second", now=103.0) == COLLAPSED
+
+    assert queue.take_due(10, now=104.0) == []
+    assert queue.seconds_until_due(now=104.0) == pytest.approx(1.0)
+    due = queue.take_due(10, now=105.0)
+    assert [(e.ticket_id, e.description, e.updates) for e in due] == [
+        ("T-1", "second", 2)
+    ]
+    assert [e.ticket_id for e in queue.take_due(10, now=106.0)] == ["T-2"]
+
+
+@pytest.mark.asyncio
+async def test_overflow_spills_then_rejects(tmp_path):
+    """Test the memory bound, the spill bound and refilling from the spill."""
+    queue = IngestQueue(
+        max_pending=2,
+        dedupe_window=0,
+        spill=SpillStore(str(tmp_path / "spill.db")),
+        max_spilled=2,
+    )
+    assert [await queue.put(f"T-{n}", "title", "") for n in range(4)] == [
+        QUEUED,
+        QUEUED,
+        SPILLED,
+        SPILLED,
+    ]
+    assert await queue.put("T-3", "title", "edited") == COLLAPSED
+    with pytest.raises(QueueFull):
+        await queue.put("T-4", "title", "")
+    assert queue.stats()["rejected"] == 1
+
+    assert [e.ticket_id for e in queue.take_due(10)] == ["T-0", "T-1"]
+    assert await queue.refill() == 2
+    events = queue.take_due(10)
+    assert [e.ticket_id for e in events] == ["T-2", "T-3"]
+    assert events[1].description == "edited"
+    # Once the dispatcher finds the spill drained, events go to memory again
+    assert await queue.refill() == 0
+    assert await queue.put("T-5", "title", "") == QUEUED
+
+
+@pytest.mark.asyncio
+async def test_full_queue_without_spill_rejects():
+    """Test that without a spill the memory bound is the limit."""
+    queue = IngestQueue(max_pending=1)
+    await queue.put("T-1", "title", "")
+    with pytest.raises(QueueFull):
+        await queue.put("T-2", "title", "")
+
+
+@pytest.mark.asyncio
+async def test_unprocessed_events_survive_a_restart(tmp_path):
+    """Test that events flushed on shutdown are picked up on startup."""
+    path = str(tmp_path / "spill.db")
+    queue = IngestQueue(spill=SpillStore(path))
+    await queue.put("T-1", "title", "description", now=100.0)
+    assert await queue.flush() == 0
+    queue.spill.close()
+
+    restarted = IngestQueue(spill=SpillStore(path))
+    await restarted.put("T-2", "title", "", now=200.0)
+    await restarted.refill()
+    due = restarted.take_due(10, now=300.0)
+    assert [(e.ticket_id, e.received_at) for e in due] == [
+        ("T-1", 100.0),
+        ("T-2", 200.0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_spill_io_stays_off_the_event_loop(tmp_path):
+    """Test that a spill locked by another worker does not stall the loop."""
+    path = str(tmp_path / "spill.db")
+    queue = IngestQueue(
+        max_pending=1, dedupe_window=0, spill=SpillStore(path, busy_timeout=0.5)
+    )
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    other_worker.execute("BEGIN IMMEDIATE")
+
+    # An empty spill is checked without waiting for the write lock
+    started = time.perf_counter()
+    assert await queue.refill() == 0
+    assert time.perf_counter() - started < 0.25
+
+    await queue.put("T-1", "title", "")
+    spilling = asyncio.ensure_future(queue.put("T-2", "title", ""))
+    started = time.perf_counter()
+    await asyncio.sleep(0.05)
+    assert time.perf_counter() - started < 0.25
+    with pytest.raises(sqlite3.OperationalError):
+        await spilling
+    other_worker.execute("ROLLBACK")
+    other_worker.close()
+
+    assert await queue.put("T-2", "title", "") == SPILLED
+    assert queue.stats()["spill_pending"] == 1
+
+
+class FakeAnalyses:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, ticket_id, title, description, parsed=None):
+        self.calls.append((ticket_id, description, parsed))
+        return {"ticket_id": ticket_id, "analysis": f"Analysis of {description}"}
+
+
+class FlakyAnalyses(FakeAnalyses):
+    async def __call__(self, ticket_id, title, description, parsed=None):
+        if ticket_id == "T-1":
+            raise ValueError("malformed ticket")
+        return await super().__call__(ticket_id, title, description, parsed)
+
+
+@pytest.mark.asyncio
+async def test_failing_ticket_does_not_stop_the_dispatcher(monkeypatch):
+    """Test that an error is logged per ticket and later events still run."""
+    analyze = FlakyAnalyses()
+    monkeypatch.setattr("app.core.ingest.analyze_ticket", analyze)
+    queue = IngestQueue(dedupe_window=0)
+    pipeline = IngestPipeline(queue, PrecomputedAnalyses())
+    calls = 0
+    process = pipeline.process
+
+    async def process_once_broken(events):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("executor shut down")
+        await process(events)
+
+    monkeypatch.setattr(pipeline, "process", process_once_broken)
+    pipeline.start()
+    await queue.put("T-0", "lost", "")
+    for _ in range(100):
+        if calls:
+            break
+        await asyncio.sleep(0.01)
+    await queue.put("T-1", "title", "bad")
+    await queue.put("T-2", "title", "good")
+    for _ in range(100):
+        if pipeline.stats()["precomputed"]:
+            break
+        await asyncio.sleep(0.01)
+    await pipeline.stop()
+
+    assert pipeline.lookup("T-2", "title", "good")["analysis"] == "Analysis of good"
+    assert pipeline.stats()["analysis_failures"] == 1
+
+
+@pytest.fixture
+def webhook_headers(monkeypatch):
+    """Configure a webhook token and return the headers that carry it."""
+    monkeypatch.setattr(get_settings(), "WEBHOOK_TOKEN", "secret")
+    return {"X-Webhook-Token": "secret"}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_webhook_precomputes_the_analysis(monkeypatch, ingest_spill, webhook_headers):
+    """Test that a burst of updates is analyzed once, ahead of the request."""
+    analyze = FakeAnalyses()
+    monkeypatch.setattr("app.core.ingest.analyze_ticket", analyze)
+    monkeypatch.setattr(get_settings(), "INGEST_DEDUPE_WINDOW_SECONDS", 0.1)
+
+    with TestClient(app) as client:
+        statuses = [
+            client.post(
+                "/api/webhooks/tickets",
+                json={"ticket_id": "T-1", "title": "Checkout fails", "description": d},
+                headers=webhook_headers,
+            )
+            for d in ("v1", "v2", "v3")
+        ]
+        assert [r.status_code for r in statuses] == [202] * 3
+        assert [r.json()["status"] for r in statuses] == [
+            QUEUED,
+            COLLAPSED,
+            COLLAPSED,
+        ]
+        wait_for(lambda: client.get("/api/stats").json()["ingest"]["precomputed"])
+
+        response = client.post(
+            "/api/analysis/ticket",
+            json={"ticket_id": "T-1", "title": "Checkout fails", "description": "v3"},
+        )
+
+    assert response.json()["precomputed"] is True
+    assert response.json()["analysis"] == "Analysis of v3"
+    assert len(analyze.calls) == 1
+    ticket_id, description, parsed = analyze.calls[0]
+    assert description == "v3"
+    assert parsed["ticket_id"] == "T-1"
+
+
+def test_webhook_applies_backpressure(monkeypatch, ingest_spill, webhook_headers):
+    """Test 429 with Retry-After once the queue is full."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "INGEST_MAX_PENDING", 1)
+    monkeypatch.setattr(settings, "INGEST_SPILL_ENABLED", False)
+    monkeypatch.setattr(settings, "INGEST_DEDUPE_WINDOW_SECONDS", 60.0)
+
+    with TestClient(app) as client:
+        first = client.post(
+            "/api/webhooks/tickets",
+            json={"ticket_id": "T-1", "title": "a"},
+            headers=webhook_headers,
+        )
+        second = client.post(
+            "/api/webhooks/tickets",
+            json={"ticket_id": "T-2", "title": "b"},
+            headers=webhook_headers,
+        )
+
+    assert first.status_code == 202
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 60
+
+
+def test_webhook_token(monkeypatch, ingest_spill):
+    """Test that webhooks are refused without a token or with a wrong one."""
+    event = {"ticket_id": "T-1", "title": "a"}
+    with TestClient(app) as client:
+        unset = client.post(
+            "/api/webhooks/tickets", json=event, headers={"X-Webhook-Token": ""}
+        )
+        assert unset.status_code == 403
+
+    monkeypatch.setattr(get_settings(), "WEBHOOK_TOKEN", "secret")
+    with TestClient(app) as client:
+        assert client.post("/api/webhooks/tickets", json=event).status_code == 403
+        wrong = client.post(
+            "/api/webhooks/tickets", json=event, headers={"X-Webhook-Token": "guess"}
+        )
+        assert wrong.status_code == 403
+        accepted = client.post(
+            "/api/webhooks/tickets", json=event, headers={"X-Webhook-Token": "secret"}
+        )
+        assert accepted.status_code == 202
@@ -0,0 +1,145 @@
+"""
+Tests for the similar-incident knowledge base.
+"""
+
+import numpy as np
+import pytest
+
+from app.knowledge import incidents
+from app.knowledge.embeddings import HashingEmbedder
+from app.knowledge.store import MATRIX_FILE, KnowledgeBase, KnowledgeItem
+
+INCIDENTS = [
+    ("T-1", "Login fails with NullPointerException in UserAuth token validation"),
+    ("T-2", "Payment service timeout when calling the bank gateway"),
+    ("T-3", "Disk full on logging hosts after log rotation stopped"),
+    ("T-4", "UserAuth returns 500 because the session token is null"),
+]
+
+
+@pytest.fixture
+def kb(tmp_path):
+    knowledge_base = KnowledgeBase(str(tmp_path / "kb"), HashingEmbedder(128))
+    knowledge_base.add_many(
+        [KnowledgeItem("ticket", ref, text, title=text) for ref, text in INCIDENTS]
+    )
+    yield knowledge_base
+    knowledge_base.close()
+
+
+def test_hashing_embedder():
+    """Test that embeddings are deterministic unit vectors."""
+    embedder = HashingEmbedder(64)
+    vectors = embedder.embed(["UserAuthService failed", "user auth failed", ""])
+
+    assert vectors.shape == (3, 64) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:2], axis=1), 1.0)
+    assert not vectors[2].any()
+    assert np.array_equal(
+        vectors, embedder.embed(["UserAuthService failed", "user auth failed", ""])
+    )
+    # camelCase identifiers share features with their parts
+    assert float(vectors[0] @ vectors[1]) > 0.3
+
+
+def test_search_ranks_similar_incidents(kb):
+    """Test top-k similarity search."""
+    results = kb.search("NullPointerException validating UserAuth token", k=2)
+
+    assert [r["ref"] for r in results] == ["T-1", "T-4"]
+    assert results[0]["score"] >= results[1]["score"]
+    assert results[0]["title"] == INCIDENTS[0][1]
+    assert kb.search("bank gateway timeout", k=1, min_score=0.99) == []
+
+
+def test_search_many_batches_match_single_queries(tmp_path):
+    """Test that blocked matrix products give the same top-k as one product."""
+    small_batches = KnowledgeBase(
+        str(tmp_path / "kb"), HashingEmbedder(64), batch_rows=3
+    )
+    rng = np.random.default_rng(0)
+    words = ["auth", "token", "payment", "disk", "timeout", "null", "login", "gateway"]
+    small_batches.add_many(
+        [
+            KnowledgeItem("ticket", f"T-{i}", " ".join(rng.choice(words, size=5)))
+            for i in range(50)
+        ]
+    )
+    queries = ["auth token null", "payment gateway timeout", "disk"]
+
+    batched = small_batches.search_many(queries, k=5)
+    small_batches.batch_rows = 1000
+    for query, expected in zip(queries, batched):
+        assert [r["score"] for r in small_batches.search(query, k=5)] == [
+            r["score"] for r in expected
+        ]
+    small_batches.close()
+
+
+def test_replace_delete_and_filters(kb):
+    """Test replacement, deletion, kind filters and excluded refs."""
+    kb.add("ticket", "T-2", "UserAuth token null pointer on login")
+    kb.add("stacktrace", "T-1#0", "NullPointerException at UserAuth.validate")
+
+    assert len(kb) == 5
+    assert kb.stats()["deleted_rows"] == 1
+    refs = [r["ref"] for r in kb.search("UserAuth token null", k=10)]
+    assert refs.count("T-2") == 1
+
+    only_traces = kb.search("NullPointerException UserAuth", k=10, kinds=["stacktrace"])
+    assert [r["ref"] for r in only_traces] == ["T-1#0"]
+    excluded = kb.search("NullPointerException UserAuth", k=10, exclude_refs=["T-1"])
+    assert {"T-1", "T-1#0"}.isdisjoint(r["ref"] for r in excluded)
+
+    assert kb.delete("ticket", "T-4")
+    assert "T-4" not in [r["ref"] for r in kb.search("UserAuth session", k=10)]
+    assert not kb.delete("ticket", "T-404")
+
+
+def test_reopen_and_recover_uncommitted_rows(kb, tmp_path):
+    """Test that the matrix is reloaded and torn appends are discarded."""
+    directory = str(tmp_path / "kb")
+    expected = kb.search("payment timeout", k=3)
+    kb.close()
+
+    # Simulate a crash between writing embeddings and committing metadata
+    with open(f"{directory}/{MATRIX_FILE}", "ab") as f:
+        f.write(np.ones((2, 128), dtype=np.float32).tobytes())
+
+    reopened = KnowledgeBase(directory, HashingEmbedder(128))
+    assert reopened.stats()["rows"] == 4
+    assert reopened.search("payment timeout", k=3) == expected
+    reopened.add("ticket", "T-5", "Payment retries exhausted")
+    assert reopened.stats()["rows"] == 5
+    reopened.close()
+
+    with pytest.raises(ValueError):
+        KnowledgeBase(directory, HashingEmbedder(256))
+
+
+@pytest.mark.asyncio
+async def test_analysis_uses_and_records_incidents(
+    tmp_path, monkeypatch, mock_gemini_client, mock_mcp_client, sample_ticket
+):
+    """Test that analyses are recorded and later similar tickets find them."""
+    from app.core.analysis import analyze_ticket
+
+    knowledge_base = KnowledgeBase(str(tmp_path / "kb"), HashingEmbedder(256))
+    monkeypatch.setattr(incidents, "_knowledge_base", knowledge_base)
+
+    first = await analyze_ticket(
+        sample_ticket["id"], sample_ticket["title"], sample_ticket["description"]
+    )
+    assert first["similar_incidents"] == []
+    assert len(knowledge_base) == 2  # the ticket and its stacktrace
+
+    second = await analyze_ticket(
+        "TICKET-456",
+        "UserAuth service 500 errors again",
+        # A different top frame, so not a fingerprint repeat
+        sample_ticket["description"].replace(
+            "processInput(StringUtils.java:45)", "parseInput(StringUtils.java:51)"
+        ),
+    )
+    assert second["similar_incidents"][0]["ticket_id"] == sample_ticket["id"]
+    knowledge_base.close()
@@ -0,0 +1,59 @@
+"""
+Tests for the LLM completion cache.
+"""
+
+import time
+
+from app.llm.cache import CompletionCache, LRUCache, make_cache_key
+
+
+def test_cache_key_depends_on_generation_settings():
+    """Test that model parameters are part of the key."""
+    base = make_cache_key("prompt", "gemini-pro", 0.2, 1024)
+
+    assert base == make_cache_key("prompt\r\n", "gemini-pro", 0.2, 1024)
+    assert base != make_cache_key("prompt", "gemini-pro", 0.7, 1024)
+    assert base != make_cache_key("prompt", "gemini-pro", 0.2, 2048)
+    assert base != make_cache_key("prompt", "other-model", 0.2, 1024)
+
+
+def test_lru_evicts_and_expires():
+    """Test LRU eviction order and TTL expiry."""
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.evictions == 1
+
+    cache.set("old", "x", expires_at=time.time() - 1)
+    assert cache.get("old") is None
+    assert cache.expirations == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test that completions are served from SQLite after a restart."""
+    db_path = str(tmp_path / "completions.db")
+    cache = CompletionCache(db_path=db_path)
+    cache.set("key", "stored completion")
+    cache.store.close()
+
+    restarted = CompletionCache(db_path=db_path)
+    assert restarted.get("key") == "stored completion"
+    assert restarted.get("key") == "stored completion"
+    stats = restarted.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+
+
+def test_oversize_entries_are_rejected():
+    """Test the per-entry size limit."""
+    cache = CompletionCache(max_entry_bytes=10)
+
+    assert cache.set("key", "x" * 11) is False
+    assert cache.get("key") is None
+    assert cache.stats()["oversize_rejections"] == 1
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,111 @@
+"""
+Tests for the MCP client.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.mcp.client import MCPClient, MCPError
+
+
+def make_client(handler, **kwargs):
+    return MCPClient(
+        "http://mcp.test",
+        token="secret",
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_file_and_search_code():
+    """Test request shapes and response handling."""
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        if request.url.path == "/files":
+            return httpx.Response(200, json={"path": "a.py", "content": "x = 1"})
+        return httpx.Response(200, json={"results": [{"file": "a.py"}] * 5})
+
+    client = make_client(handler)
+    file = await client.get_file("a.py", "user-service", ref="abc123")
+    results = await client.search_code("NullPointer", ["user-service"], limit=2)
+    await client.aclose()
+
+    assert file["content"] == "x = 1"
+    assert len(results) == 2
+    assert seen[0].url.params["ref"] == "abc123"
+    assert seen[0].headers["Authorization"] == "Bearer secret"
+    assert client.stats()["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_raise_mcp_error():
+    """Test that HTTP errors surface as MCPError and are counted."""
+    client = make_client(lambda request: httpx.Response(503))
+
+    with pytest.raises(MCPError):
+        await client.get_file("a.py", "repo")
+    assert client.stats()["errors"] == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit():
+    """Test that no more than max_concurrency requests run at once."""
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, json={"results": []})
+
+    client = make_client(handler, max_concurrency=3)
+    await asyncio.gather(*(client.search_code("q") for _ in range(10)))
+    await client.aclose()
+
+    assert peak == 3
+    assert client.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_warm_opens_connections_up_to_keepalive_limit():
+    """Test that warm-up sends HEAD requests and reports unreachable servers."""
+    seen = []
+
+    def handler(request):
+        seen.append(request.method)
+        return httpx.Response(404)
+
+    client = make_client(handler, max_keepalive_connections=2)
+    await client.warm(connections=5)
+    await client.aclose()
+    assert seen == ["HEAD", "HEAD"]
+
+    def unreachable(request):
+        raise httpx.ConnectError("name resolution failed")
+
+    client = make_client(unreachable)
+    with pytest.raises(MCPError):
+        await client.warm()
+    await client.aclose()
+
+
+def test_client_lifecycle_follows_app(monkeypatch, ingest_spill):
+    """Test that the shared client is opened on startup and closed on shutdown."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.mcp import client as mcp_client
+
+    with TestClient(app) as test_client:
+        assert mcp_client.get_mcp_stats()["started"] is True
+        assert test_client.get("/api/stats").json()["mcp"]["started"] is True
+    assert mcp_client.get_mcp_stats() is None
@@ -0,0 +1,104 @@
+"""
+Tests for stage metrics, the /metrics endpoint and Server-Timing.
+"""
+
+import pytest
+
+from app.core.metrics import (
+    STAGE_SECONDS,
+    Counter,
+    Histogram,
+    Registry,
+    server_timing,
+    stage,
+    timed,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test Prometheus histogram exposition."""
+    registry = Registry()
+    histogram = registry.register(
+        Histogram("test_seconds", "Test durations", ["stage"], buckets=(0.1, 1.0))
+    )
+    counter = registry.register(Counter("test_total", "Test events", ["kind"]))
+    histogram.observe(0.05, "parse")
+    histogram.observe(0.5, "parse")
+    histogram.observe(5.0, "parse")
+    counter.inc('say "hi"')
+
+    text = registry.render()
+
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="parse",le="1"} 2' in text
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="parse"} 3' in text
+    assert 'test_seconds_sum{stage="parse"} 5.55' in text
+    assert 'test_total{kind="say \\"hi\\""} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_stage_and_timed_record_observations():
+    """Test the context manager and the sync/async decorator."""
+
+    @timed("test_sync")
+    def parse():
+        return 1
+
+    @timed("test_async")
+    async def fetch():
+        return 2
+
+    before = STAGE_SECONDS.count("test_block")
+    with stage("test_block"):
+        pass
+
+    assert parse() == 1
+    assert await fetch() == 2
+    assert STAGE_SECONDS.count("test_block") == before + 1
+    assert STAGE_SECONDS.count("test_sync") >= 1
+    assert STAGE_SECONDS.count("test_async") >= 1
+
+
+def test_server_timing_sums_repeated_stages():
+    """Test Server-Timing header formatting."""
+    value = server_timing(
+        [("mcp_get_file", 0.010), ("mcp_get_file", 0.020), ("llm_generate", 1.5)],
+        1.6,
+    )
+
+    assert value == (
+        'mcp_get_file;dur=30.0;desc="x2", llm_generate;dur=1500.0, total;dur=1600.0'
+    )
+
+
+def test_metrics_endpoint_and_server_timing_header(
+    client, mock_mcp_client, mock_gemini_client
+):
+    """Test that an analysis reports its stages in both places."""
+    response = client.post(
+        "/api/analysis/ticket",
+        json={
+            "ticket_id": "T-1",
+            "title": "Error in login",
+            "description": "Login fails with AUTH_FAILURE",
+        },
+    )
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert "parse_ticket;dur=" in timing
+    assert "render_prompt;dur=" in timing
+    assert "total;dur=" in timing
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = metrics.text
+    assert 'boa_stage_duration_seconds_count{stage="parse_ticket"}' in body
+    assert (
+        'boa_http_request_duration_seconds_count{method="POST",'
+        'route="/api/analysis/ticket",status="200"}' in body
+    )
+    assert "boa_llm_in_flight 0" in body
+    assert 'boa_cache_requests_total{cache="fingerprint",result="miss"}' in body
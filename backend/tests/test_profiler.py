@@ -0,0 +1,112 @@
+"""
+Tests for slow-request capture and event-loop stall detection.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.core.metrics import annotate, stage
+from app.core.profiler import LoopProfiler, ProfilerMiddleware
+
+
+async def blocking_handler():
+    # A synchronous call inside a coroutine, like a blocking SDK call
+    time.sleep(0.2)
+
+
+@pytest.mark.asyncio
+async def test_detects_loop_stall_and_blocking_coroutine():
+    """Test that a blocked loop is reported with the coroutine to blame."""
+    profiler = LoopProfiler(stall_threshold=0.05, sample_interval=0.005)
+    profiler.start()
+    await asyncio.sleep(0.02)
+
+    await blocking_handler()
+    await asyncio.sleep(0.03)
+    profiler.stop()
+
+    assert len(profiler.stalls) == 1
+    stall = profiler.stalls[0]
+    assert stall["duration_ms"] >= 150
+    assert stall["coroutine"].endswith("blocking_handler")
+    assert any("blocking_handler" in frame for frame in stall["stack"])
+
+
+def make_app(profiler):
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+    @app.get("/slow")
+    async def slow():
+        with stage("mcp_http", detail="GET /files repo:a.py"):
+            await asyncio.sleep(0.05)
+        annotate("prompt_tokens", 1234)
+        with stage("llm_generate"):
+            time.sleep(0.05)
+        return {"ok": True}
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    return app
+
+
+def test_captures_slow_requests_only():
+    """Test the stage timeline and loop samples of a captured request."""
+    profiler = LoopProfiler(slow_request_seconds=0.08, sample_interval=0.005)
+    client = TestClient(make_app(profiler))
+
+    assert client.get("/fast").status_code == 200
+    assert client.get("/slow").status_code == 200
+    profiler.stop()
+
+    assert len(profiler.captures) == 1
+    capture = profiler.captures[0]
+    assert (capture["method"], capture["path"], capture["status"]) == (
+        "GET",
+        "/slow",
+        200,
+    )
+    assert capture["duration_ms"] >= 100
+    names = [s["name"] for s in capture["stages"]]
+    assert names == ["mcp_http", "llm_generate"]
+    assert capture["stages"][0]["detail"] == "GET /files repo:a.py"
+    assert capture["stages"][1]["start_ms"] >= capture["stages"][0]["duration_ms"]
+    assert capture["annotations"] == {"prompt_tokens": 1234}
+    # The synchronous sleep shows up as busy loop samples in the handler
+    samples = capture["loop_samples"]
+    assert samples["busy"] > 0 and samples["idle"] > 0
+    assert "slow (test_profiler.py" in samples["top_stacks"][0]["stack"]
+    assert profiler.stats()["requests"] == 2
+
+
+def test_admin_endpoint(client, monkeypatch):
+    """Test the slow-request endpoint and its admin token."""
+    # Denied unless a token is configured
+    assert client.get("/api/admin/slow-requests").status_code == 403
+    monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+    response = client.get("/api/admin/slow-requests", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["enabled"] is False
+
+    profiler = LoopProfiler()
+    profiler.captures.append({"path": "/api/analysis/ticket"})
+    monkeypatch.setattr(get_settings(), "PROFILER_ENABLED", True)
+    monkeypatch.setattr("app.core.profiler._profiler", profiler)
+
+    assert client.get("/api/admin/slow-requests").status_code == 403
+    wrong = {"X-Admin-Token": "wrong"}
+    assert client.get("/api/admin/slow-requests", headers=wrong).status_code == 403
+    response = client.get(
+        "/api/admin/slow-requests", headers={"X-Admin-Token": "secret"}
+    )
+    profiler.stop()
+    assert response.status_code == 200
+    assert response.json()["captures"] == [{"path": "/api/analysis/ticket"}]
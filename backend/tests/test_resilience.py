@@ -0,0 +1,243 @@
+"""
+Tests for LLM call timeouts, retries, hedging and the circuit breaker.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.llm.cache import CompletionCache
+from app.llm.executor import LLMExecutionPool, LLMQueueFullError, LLMQueueTimeoutError
+from app.llm.gemini import GeminiClient
+from app.llm.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    ResilientCaller,
+    is_retryable,
+)
+
+
+class ServiceUnavailable(Exception):
+    """Named like google.api_core.exceptions.ServiceUnavailable."""
+
+
+class InvalidArgument(Exception):
+    """Named like google.api_core.exceptions.InvalidArgument."""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FlakyModel:
+    """Fails the first ``failures`` calls, then answers after ``delay``."""
+
+    def __init__(self, failures=0, delay=0.0, error=ServiceUnavailable):
+        self.failures = failures
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error("upstream unavailable")
+        time.sleep(self.delay)
+        return FakeResponse("analysis")
+
+
+def make_client(model, **caller_options):
+    options = {"backoff_base": 0.01, "backoff_max": 0.02, **caller_options}
+    client = GeminiClient(
+        pool=LLMExecutionPool(max_concurrency=4),
+        cache=CompletionCache(),
+        resilience=ResilientCaller(**options),
+    )
+    client.model = model
+    return client
+
+
+def test_is_retryable():
+    """Test which errors are retried."""
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(ConnectionResetError())
+    assert is_retryable(ServiceUnavailable())
+    assert not is_retryable(InvalidArgument())
+    assert not is_retryable(ValueError())
+    assert not is_retryable(CircuitOpenError(1.0))
+    assert not is_retryable(LLMQueueFullError())
+    assert not is_retryable(LLMQueueTimeoutError())
+
+    error = RuntimeError("rate limited")
+    error.code = 429
+    assert is_retryable(error)
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    """Test that transient upstream errors are retried with backoff."""
+    model = FlakyModel(failures=2)
+    client = make_client(model, max_attempts=3)
+
+    assert await client.generate_response("prompt") == "analysis"
+    assert model.calls == 3
+    stats = client.stats()["resilience"]
+    assert stats["retries"] == 2
+    assert stats["failures"] == 2
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_invalid_requests():
+    """Test that non-retryable errors fail on the first attempt."""
+    model = FlakyModel(failures=5, error=InvalidArgument)
+    client = make_client(model, max_attempts=3)
+
+    result = await client.generate_response("prompt")
+
+    assert result.startswith("Error generating response")
+    assert model.calls == 1
+    assert client.resilience.breaker.stats()["window_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_attempt_timeout():
+    """Test that a hung call times out and the retry succeeds."""
+
+    class HangOnce(FlakyModel):
+        def generate_content(self, prompt):
+            self.calls += 1
+            time.sleep(0.5 if self.calls == 1 else 0)
+            return FakeResponse("analysis")
+
+    model = HangOnce()
+    client = make_client(model, timeout=0.1, max_attempts=2)
+
+    started = time.perf_counter()
+    assert await client.generate_response("prompt") == "analysis"
+
+    assert time.perf_counter() - started < 0.4
+    assert client.stats()["resilience"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_does_not_count_against_timeout():
+    """Test that the attempt timeout starts once the call is running."""
+    model = FlakyModel(delay=0.2)
+    client = make_client(model, timeout=0.3, max_attempts=1)
+    client.pool = LLMExecutionPool(max_concurrency=1)
+
+    blocker = asyncio.create_task(client.pool.run(time.sleep, 0.2))
+    await asyncio.sleep(0.01)
+    assert await client.generate_response("prompt") == "analysis"
+    await blocker
+
+    assert client.stats()["resilience"]["timeouts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_is_not_an_upstream_failure():
+    """Test that a caller stuck in the queue is not retried or a breaker failure."""
+    model = FlakyModel()
+    client = make_client(model, timeout=0.1, max_attempts=3)
+    client.pool = LLMExecutionPool(max_concurrency=1)
+
+    blocker = asyncio.create_task(client.pool.run(time.sleep, 0.3))
+    await asyncio.sleep(0.01)
+    result = await client.generate_response("prompt")
+    await blocker
+
+    assert result.startswith("Error generating response")
+    assert model.calls == 0
+    stats = client.stats()["resilience"]
+    assert stats["attempts"] == 1
+    assert stats["timeouts"] == 0
+    assert stats["breaker"]["window_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_cuts_tail_latency():
+    """Test that a slow attempt is raced by a hedged second request."""
+
+    class TailModel(FlakyModel):
+        def generate_content(self, prompt):
+            self.calls += 1
+            time.sleep(1.0 if self.calls == 1 else 0.01)
+            return FakeResponse("analysis")
+
+    latency = LatencyTracker(min_samples=5)
+    for _ in range(10):
+        latency.record(0.02)
+    client = make_client(TailModel(), hedge=True, hedge_min_delay=0.05, latency=latency)
+
+    started = time.perf_counter()
+    assert await client.generate_response("prompt") == "analysis"
+
+    assert time.perf_counter() - started < 0.5
+    stats = client.stats()["resilience"]
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_latency_history():
+    """Test that hedging waits for enough latency samples."""
+    caller = ResilientCaller(hedge=True, latency=LatencyTracker(min_samples=5))
+
+    async def call(timeout):
+        return "ok"
+
+    assert caller.hedge_delay() is None
+    assert await caller.call(call) == "ok"
+    assert caller.stats()["hedges"] == 0
+
+
+def test_circuit_breaker_transitions(monkeypatch):
+    """Test closed -> open -> half-open -> closed/open."""
+    now = [1000.0]
+    monkeypatch.setattr("app.llm.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(
+        failure_ratio=0.5, min_calls=4, window_seconds=10, open_seconds=5
+    )
+
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # One probe after the cool-down; a failed probe reopens the circuit
+    now[0] += 6
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] += 6
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["opened"] == 2
+    assert breaker.stats()["rejected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast():
+    """Test that calls stop reaching a failing upstream."""
+    model = FlakyModel(failures=1000, delay=0)
+    breaker = CircuitBreaker(min_calls=4, open_seconds=60)
+    client = make_client(model, max_attempts=2, breaker=breaker)
+
+    results = [await client.generate_response(f"prompt {i}") for i in range(10)]
+
+    assert all(r.startswith("Error generating response") for r in results)
+    assert "circuit open" in results[-1]
+    assert model.calls == 4
+    assert breaker.stats()["rejected"] >= 6
@@ -0,0 +1,132 @@
+"""
+Tests for latency-aware model routing.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.llm.routing import FAST, LARGE, ModelRouter, low_confidence_reason
+
+CONFIDENT = "The null pointer comes from the session lookup. " * 10
+
+
+class FakeClient:
+    def __init__(self, answer=CONFIDENT, delay=0.0):
+        self.answer = answer
+        self.delay = delay
+        self.prompts = []
+
+    async def generate_response(self, prompt, context=None):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        return self.answer
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    large = FakeClient()
+    monkeypatch.setattr("app.llm.gemini.get_gemini_client", lambda: large)
+    return {LARGE: large, FAST: FakeClient()}
+
+
+def make_router(clients, **options):
+    router = ModelRouter(fast_model="gemini-fast", **options)
+    router._fast_client = clients[FAST]
+    return router
+
+
+def ticket(category="feature", has_stacktrace=False):
+    return {"ticket_id": "T-1", "category": category, "has_stacktrace": has_stacktrace}
+
+
+def test_low_confidence_reason():
+    """Test the escalation heuristics."""
+    assert low_confidence_reason("Error generating response: boom", 10) == "error"
+    assert low_confidence_reason("Check logs.", 50) == "short"
+    assert (
+        low_confidence_reason(CONFIDENT + "I'm not sure which service.", 50)
+        == "uncertain"
+    )
+    assert low_confidence_reason(CONFIDENT, 50) is None
+
+
+def test_choose_by_category_stacktrace_and_size(clients):
+    """Test the rule-based part of the decision."""
+    router = make_router(clients, fast_max_prompt_tokens=1000)
+
+    assert router.choose(ticket("feature"), 100).route == FAST
+    assert router.choose(ticket("performance"), 100).route == LARGE
+    decision = router.choose(ticket("bug", has_stacktrace=True), 100)
+    assert (decision.route, decision.reason) == (LARGE, "stacktrace")
+    decision = router.choose(ticket("feature"), 5000)
+    assert (decision.route, decision.reason) == (LARGE, "prompt_size")
+    assert decision.model != "gemini-fast"
+
+
+def test_single_model_without_fast_model(clients):
+    """Test that routing is a no-op unless a fast model is configured."""
+    router = ModelRouter(fast_model=None)
+
+    decision = router.choose(ticket("feature"), 10)
+
+    assert (decision.route, decision.reason) == (LARGE, "single_model")
+
+
+def test_avoids_slow_model(clients):
+    """Test that a model above the latency SLO is avoided."""
+    router = make_router(clients, latency_slo_seconds=1.0)
+    for _ in range(30):
+        router._latency[LARGE].record(5.0)
+        router._latency[FAST].record(0.2)
+
+    decision = router.choose(ticket("performance"), 100)
+
+    assert (decision.route, decision.reason) == (FAST, "category+latency")
+
+
+def test_slow_model_is_retried_once_its_samples_age_out(clients):
+    """Test that an avoided model is routed to again after it recovers."""
+    router = make_router(clients, latency_slo_seconds=1.0, latency_window_seconds=60)
+    now = time.monotonic()
+    for _ in range(30):
+        router._latency[LARGE].record(5.0, now=now - 90)
+        router._latency[FAST].record(0.2, now=now - 90)
+
+    decision = router.choose(ticket("performance"), 100)
+
+    assert (decision.route, decision.reason) == (LARGE, "category")
+    assert router.stats()["routes"][LARGE]["latency_p95_ms"] is None
+
+
+@pytest.mark.asyncio
+async def test_fast_answer_is_used(clients):
+    """Test that a confident fast answer is returned as is."""
+    router = make_router(clients)
+
+    text, decision = await router.generate("prompt", ticket("feature"))
+
+    assert text == CONFIDENT
+    assert decision.route == FAST and not decision.escalated
+    assert clients[LARGE].prompts == []
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_escalates(clients):
+    """Test that an unsure fast answer is redone on the large model."""
+    clients[FAST].answer = "Not enough information to tell."
+    clients[LARGE].answer = CONFIDENT + "large"
+    router = make_router(clients)
+
+    text, decision = await router.generate("prompt", ticket("feature"))
+
+    assert text.endswith("large")
+    assert decision.escalated and decision.escalation_reason == "short"
+    assert decision.route == FAST
+    stats = router.stats()
+    assert stats["escalations"] == {"short": 1}
+    assert stats["decisions"] == {"fast:category": 1}
+    assert stats["routes"][FAST]["requests"] == 1
+    assert stats["routes"][LARGE]["requests"] == 1
+    assert stats["recent"][0]["ticket_id"] == "T-1"
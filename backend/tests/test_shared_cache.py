@@ -0,0 +1,212 @@
+"""
+Tests for the cache backends and the cross-worker shared tier.
+"""
+
+import multiprocessing
+import sqlite3
+import time
+
+import httpx
+import pytest
+
+from app.core.cache import MemoryCacheBackend, SQLiteCacheBackend, get_cache_backend
+from app.llm.cache import CompletionCache
+from app.mcp.client import MCPClient
+from app.mcp.file_cache import FileContentCache
+
+
+def worker(path, key, value):
+    """Another uvicorn worker writing to the shared cache."""
+    cache = CompletionCache(backend=SQLiteCacheBackend(path, poll_interval=0))
+    cache.set(key, value)
+    cache.store.close()
+
+
+def open_worker(path):
+    return CompletionCache(backend=SQLiteCacheBackend(path, poll_interval=0))
+
+
+def test_backends_share_the_interface(tmp_path):
+    """Test get/set/expiry/delete on both backends."""
+    for backend in (MemoryCacheBackend(), SQLiteCacheBackend(str(tmp_path / "c.db"))):
+        backend.set("ns", "key", "value", 0.0)
+        backend.set("ns", "old", "value", time.time() - 1)
+        backend.set("other", "key", "other value", 0.0)
+
+        assert backend.get("ns", "key") == ("value", 0.0)
+        assert backend.get("ns", "old") is None
+        backend.delete("ns", "key")
+        assert backend.get("ns", "key") is None
+        backend.clear("other")
+        assert backend.get("other", "key") is None
+        backend.close()
+
+
+def test_entries_written_by_another_process_are_hits(tmp_path):
+    """Test that a completion computed in one process serves another."""
+    path = str(tmp_path / "shared.db")
+    cache = open_worker(path)
+    assert cache.get("key") is None
+
+    process = multiprocessing.get_context("spawn").Process(
+        target=worker, args=(path, "key", "from another worker")
+    )
+    process.start()
+    process.join(timeout=30)
+    assert process.exitcode == 0
+
+    assert cache.get("key") == "from another worker"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["shared"] is True
+
+
+def test_overwrites_invalidate_other_workers_memory_tier(tmp_path):
+    """Test that a replaced entry is dropped from other processes' LRU."""
+    path = str(tmp_path / "shared.db")
+    first, second = open_worker(path), open_worker(path)
+
+    first.set("key", "v1")
+    assert second.get("key") == "v1"
+    assert second.get("key") == "v1"
+    assert second.stats()["memory_hits"] == 1
+
+    first.set("key", "v2")
+    assert second.get("key") == "v2"
+    # Every write is logged, the first one included
+    assert second.store.stats()["invalidations_received"] == 2
+    # A worker does not invalidate its own memory tier
+    assert first.get("key") == "v2"
+    assert first.stats()["memory_hits"] == 1
+
+
+def test_truncated_invalidation_log_clears_memory_tier(tmp_path):
+    """Test that a worker behind the truncated log drops everything."""
+    path = str(tmp_path / "shared.db")
+    first, second = open_worker(path), open_worker(path)
+    first.store.LOG_ROWS = 2
+    first.store.PRUNE_EVERY = 1
+    second.store.set(CompletionCache.NAMESPACE, "key", "v1", 0.0)
+    assert second.get("key") == "v1"
+
+    for n in range(5):
+        first.set("key", f"v{n + 2}")
+
+    assert second.get("key") == "v6"
+    assert second.store.stats()["resyncs"] == 1
+
+
+def test_size_bound_evicts_the_oldest_entries(tmp_path):
+    """Test that the total size of the values is bounded, not just the count."""
+    backend = SQLiteCacheBackend(str(tmp_path / "c.db"), max_bytes=10_000)
+    backend.PRUNE_EVERY = 1_000
+    for n in range(5):
+        backend.set("ns", f"small{n}", "x" * 100, 0.0)
+    # A single large value triggers housekeeping before PRUNE_EVERY writes
+    backend.set("ns", "large", "x" * 9_600, 0.0)
+
+    assert backend.get("ns", "small0") is None
+    assert backend.get("ns", "small4") is not None
+    assert backend.get("ns", "large") is not None
+    assert backend.stats()["bytes"]["ns"] <= 10_000
+    backend.close()
+
+
+def test_write_is_skipped_while_another_process_holds_the_lock(tmp_path):
+    """Test that a cache fill does not wait out a long write transaction."""
+    path = str(tmp_path / "c.db")
+    backend = SQLiteCacheBackend(path, busy_timeout=0.01)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    started = time.monotonic()
+    backend.set("ns", "key", "value", 0.0)
+    assert time.monotonic() - started < 1.0
+    assert backend.stats()["busy_skips"] == 1
+    assert backend.get("ns", "key") is None
+
+    other.execute("ROLLBACK")
+    backend.set("ns", "key", "value", 0.0)
+    assert backend.get("ns", "key") == ("value", 0.0)
+    other.close()
+    backend.close()
+
+
+def test_entries_of_an_older_layout_are_dropped(tmp_path):
+    """Test that opening a database written by an older version resets it."""
+    path = str(tmp_path / "c.db")
+    old = sqlite3.connect(path)
+    old.execute(
+        "CREATE TABLE cache_entries (namespace TEXT, key TEXT, value TEXT,"
+        " expires_at REAL, written_at REAL, PRIMARY KEY (namespace, key))"
+    )
+    old.execute("INSERT INTO cache_entries VALUES ('ns', 'key', 'value', 0, 0)")
+    old.commit()
+    old.close()
+
+    backend = SQLiteCacheBackend(path)
+    assert backend.get("ns", "key") is None
+    backend.set("ns", "key", "value", 0.0)
+    assert backend.get("ns", "key") == ("value", 0.0)
+    backend.close()
+
+
+def file_server(requests):
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200, json={"path": "a.py", "content": "x = 1"}, headers={"ETag": '"v1"'}
+        )
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_file_cache_is_shared_between_workers(tmp_path):
+    """Test that files fetched and revalidated by one worker serve the other."""
+    path = str(tmp_path / "shared.db")
+    requests = []
+    caches = [
+        FileContentCache(
+            revalidate_after=60, backend=SQLiteCacheBackend(path, poll_interval=0)
+        )
+        for _ in range(2)
+    ]
+    clients = [
+        MCPClient(
+            "http://mcp.test",
+            transport=httpx.MockTransport(file_server(requests)),
+            file_cache=cache,
+        )
+        for cache in caches
+    ]
+
+    first = await clients[0].get_file("a.py", "repo")
+    second = await clients[1].get_file("a.py", "repo")
+    assert first == second
+    assert len(requests) == 1
+    assert caches[1].stats()["shared_hits"] == 1
+
+    # Once stale, one worker revalidates and the other sees the renewal
+    for cache in caches:
+        cache.revalidate_after = 0.5
+        for entry in cache._entries.values():
+            entry.validated_at -= 1
+    received = caches[1].backend.stats()["invalidations_received"]
+    await clients[0].get_file("a.py", "repo")
+    await clients[1].get_file("a.py", "repo")
+    for client in clients:
+        await client.aclose()
+
+    assert len(requests) == 2
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert caches[1].stats()["hits"] == 2
+    # The renewal neither rewrote the file nor invalidated the other copy
+    assert caches[1].backend.stats()["invalidations_received"] == received
+    assert caches[1].stats()["shared_hits"] == 1
+
+
+def test_process_tier_has_no_backend():
+    """Test tier selection."""
+    assert get_cache_backend("process") is None
@@ -0,0 +1,111 @@
+"""
+Tests for the near-duplicate ticket cache.
+"""
+
+import pytest
+
+from app.core.analysis import analyze_ticket
+from app.llm.similarity_cache import SimilarityCache, mask_volatile
+
+TICKET = """
+Checkout requests to payment-service fail with HTTP 502 since {time}.
+Request id {request_id} from customer {email} at 10.2.{octet}.7 was rejected.
+The gateway logs show upstream connect error or disconnect/reset before
+headers, reset reason: connection termination. Retries do not help and the
+error rate on the checkout dashboard is around 30 percent for all regions.
+"""
+
+
+def ticket_text(time="2024-03-01T10:15:00Z", request_id="8f1c2a9e", octet=4):
+    return "Checkout failing\n" + TICKET.format(
+        time=time,
+        request_id=f"{request_id}-1b2c-4d3e-8f4a-5b6c7d8e9f00",
+        email="jane@example.com",
+        octet=octet,
+    )
+
+
+class CountingGeminiClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_response(self, prompt, context=None):
+        self.calls += 1
+        return f"analysis #{self.calls}"
+
+
+@pytest.fixture
+def counting_gemini(monkeypatch):
+    fake = CountingGeminiClient()
+    monkeypatch.setattr("app.llm.gemini.get_gemini_client", lambda: fake)
+    return fake
+
+
+def test_mask_volatile():
+    """Test that ids, timestamps and addresses are masked."""
+    masked = mask_volatile("OPS-1234 at 2024-03-01 10:15:00 from 10.0.0.1", "OPS-1234")
+    assert masked.split() == ["ticket", "at", "timestamp", "from", "ip"]
+    assert "502" in mask_volatile("HTTP 502 for order 99812")
+    assert "99812" not in mask_volatile("HTTP 502 for order 99812")
+
+
+def test_refiled_ticket_is_a_near_duplicate():
+    """Test that a ticket re-filed with new ids matches the cached one."""
+    cache = SimilarityCache(threshold=0.9)
+    cache.store("scope", "OPS-1", ticket_text(), "analysis")
+
+    match = cache.lookup(
+        "scope",
+        "OPS-2",
+        ticket_text(time="2024-03-02T08:00:01Z", request_id="0a0b0c0d", octet=9),
+    )
+    assert match is not None
+    assert (match.ticket_id, match.completion) == ("OPS-1", "analysis")
+    assert match.similarity == 1.0
+
+
+def test_threshold_and_scope():
+    """Test that different tickets and other scopes do not match."""
+    cache = SimilarityCache(threshold=0.9)
+    cache.store("scope", "OPS-1", ticket_text(), "analysis")
+
+    edited = ticket_text().replace("Retries do not help and the", "Rolling back fixed")
+    assert cache.lookup("scope", "OPS-2", edited) is None
+    assert cache.lookup("other", "OPS-2", ticket_text()) is None
+    assert cache.lookup("scope", "OPS-3", "Disk full on logging hosts") is None
+
+    loose = SimilarityCache(threshold=0.5)
+    loose.store("scope", "OPS-1", ticket_text(), "analysis")
+    assert 0.5 <= loose.lookup("scope", "OPS-2", edited).similarity < 0.9
+
+
+def test_eviction_removes_buckets():
+    """Test that the LRU bound is kept and evicted entries stop matching."""
+    cache = SimilarityCache(max_entries=2)
+    texts = [
+        "Login fails with NullPointerException in UserAuth token validation",
+        "Payment service timeout when calling the bank gateway",
+        "Disk full on logging hosts after log rotation stopped",
+    ]
+    for number, text in enumerate(texts):
+        cache.store("scope", f"OPS-{number}", text, f"analysis {number}")
+
+    assert len(cache) == 2
+    assert cache.lookup("scope", "OPS-9", texts[0]) is None
+    assert cache.lookup("scope", "OPS-9", texts[2]).ticket_id == "OPS-2"
+    stats = cache.stats()
+    assert (stats["evictions"], stats["hits"], stats["lookups"]) == (1, 1, 2)
+
+
+@pytest.mark.asyncio
+async def test_refiled_ticket_skips_llm(counting_gemini, mock_mcp_client):
+    """Test that the analysis pipeline reuses a near-duplicate's completion."""
+    first = await analyze_ticket("OPS-1", "Checkout failing", ticket_text())
+    second = await analyze_ticket(
+        "OPS-2", "Checkout failing", ticket_text(request_id="77aa77aa", octet=8)
+    )
+
+    assert counting_gemini.calls == 1
+    assert first["near_duplicate"] is None
+    assert second["analysis"] == "analysis #1"
+    assert second["near_duplicate"] == {"ticket_id": "OPS-1", "similarity": 1.0}
@@ -0,0 +1,176 @@
+"""
+Tests for the structured stacktrace parser.
+"""
+
+import random
+import time
+
+from app.utils.stacktrace import MAX_CAUSE_DEPTH, parse_stacktraces
+
+JAVA_TRACE = """
+Request failed after deploy:
+
+Exception in thread "main" java.lang.IllegalStateException: Failed to process request
+    at com.example.app.ApiController.handleRequest(ApiController.java:23)
+    at com.example.app.Main.main(Main.java:12)
+Caused by: java.lang.NullPointerException: input is null
+    at com.example.app.StringUtils.processInput(StringUtils.java:45)
+    at java.base/java.lang.Thread.run(Native Method)
+    ... 2 more
+
+Thanks!
+"""
+
+PYTHON_TRACE = """
+    Traceback (most recent call last):
+      File "/srv/app/db.py", line 10, in connect
+        conn = pool.get()
+    KeyError: 'primary'
+
+    During handling of the above exception, another exception occurred:
+
+    Traceback (most recent call last):
+      File "/srv/app/api.py", line 42, in handler
+        db.connect()
+      File "/srv/app/db.py", line 12, in connect
+        raise ConnectionError("no database")
+    ConnectionError: no database
+    Some trailing ticket text.
+"""
+
+NODE_TRACE = """TypeError: Cannot read properties of undefined (reading 'id')
+    at getUser (/app/src/users.js:14:22)
+    at /app/src/router.js:30:5
+    at async Promise.all (index 0)
+"""
+
+
+def test_parse_java_trace_with_cause_chain():
+    """Test Java header, frames and Caused by chain."""
+    [trace] = parse_stacktraces(JAVA_TRACE)
+
+    assert trace.language == "java"
+    assert trace.exception_type == "java.lang.IllegalStateException"
+    assert trace.message == "Failed to process request"
+    assert [f.function for f in trace.frames] == [
+        "com.example.app.ApiController.handleRequest",
+        "com.example.app.Main.main",
+    ]
+    assert (trace.frames[0].file, trace.frames[0].line) == ("ApiController.java", 23)
+    assert trace.cause.exception_type == "java.lang.NullPointerException"
+    assert trace.cause.message == "input is null"
+    assert trace.cause.frames[1].file is None
+    assert trace.raw.startswith("Exception in thread")
+    assert trace.raw.endswith("... 2 more")
+
+
+def test_parse_chained_python_traceback():
+    """Test indented Python tracebacks and exception chaining."""
+    [trace] = parse_stacktraces(PYTHON_TRACE)
+
+    assert trace.language == "python"
+    assert trace.exception_type == "ConnectionError"
+    assert trace.message == "no database"
+    assert [(f.file, f.line, f.function) for f in trace.frames] == [
+        ("/srv/app/api.py", 42, "handler"),
+        ("/srv/app/db.py", 12, "connect"),
+    ]
+    assert trace.frames[1].code == 'raise ConnectionError("no database")'
+    assert trace.cause.exception_type == "KeyError"
+    assert "trailing" not in trace.raw
+
+
+def test_parse_node_trace():
+    """Test Node.js frames with columns and anonymous functions."""
+    [trace] = parse_stacktraces(NODE_TRACE)
+
+    assert trace.language == "node"
+    assert trace.exception_type == "TypeError"
+    assert trace.frames[0].function == "getUser"
+    assert (trace.frames[0].line, trace.frames[0].column) == (14, 22)
+    assert trace.frames[1].function is None
+    assert trace.frames[1].file == "/app/src/router.js"
+    assert len(trace.frames) == 2
+
+
+def test_returns_all_traces_and_ignores_prose():
+    """Test that several traces are returned and prose is not a frame."""
+    text = "Please look at the logs at noon.\n" + JAVA_TRACE + NODE_TRACE
+    traces = parse_stacktraces(text)
+
+    assert [t.language for t in traces] == ["java", "node"]
+    assert parse_stacktraces("Please look at the logs at noon (UTC).") == []
+
+
+def _elapsed(text):
+    start = time.perf_counter()
+    parse_stacktraces(text)
+    return time.perf_counter() - start
+
+
+def test_adversarial_inputs_run_in_linear_time():
+    """Test inputs that make backtracking regexes blow up."""
+    adversarial = [
+        lambda n: "Exception" * n,
+        lambda n: "Exception: x\n" + " at a.b(" * n,
+        lambda n: ("Error\n    at a.b(c.java:1)\n" + "(" * 50 + "\n") * (n // 60),
+        lambda n: "Caused by: X: y\n    at a.b(c.java:1)\n" * (n // 40),
+        lambda n: (
+            'Traceback (most recent call last):\n  File "x", line 1\nE: m\n'
+            "During handling of the above exception, another exception occurred:\n"
+        )
+        * (n // 120),
+        lambda n: "at " * n,
+    ]
+    for build in adversarial:
+        small, large = build(50_000), build(400_000)
+        small_time = min(_elapsed(small) for _ in range(3))
+        large_time = min(_elapsed(large) for _ in range(3))
+        assert large_time < 2.0
+        # 8x the input must not take dramatically more than 8x the time
+        assert large_time < max(small_time, 0.002) * 30
+
+
+def test_cause_chains_are_bounded():
+    """Test that deep chains are capped so results stay serialisable."""
+    text = (
+        "X: y\n    at a.b(c.java:1)\n"
+        + "Caused by: X: y\n    at a.b(c.java:1)\n" * 5000
+    )
+    [trace] = parse_stacktraces(text)
+
+    depth = 0
+    while trace.cause is not None:
+        trace, depth = trace.cause, depth + 1
+    assert depth == MAX_CAUSE_DEPTH
+    assert parse_stacktraces(text)[0].to_dict()
+
+
+def test_fuzz_random_lines():
+    """Test that random trace-like noise never raises."""
+    rng = random.Random(42)
+    fragments = [
+        "at ",
+        "(",
+        ")",
+        ":",
+        "12",
+        "Foo.java",
+        "x.js",
+        "Caused by: ",
+        "... 3 more",
+        "Traceback (most recent call last):",
+        'File "',
+        '", line ',
+        ", in ",
+        "\n",
+        "    ",
+        "Error: ",
+        "Suppressed: ",
+        'Exception in thread "',
+        "<anonymous>",
+    ]
+    for _ in range(2000):
+        text = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 80)))
+        for trace in parse_stacktraces(text):
+            assert trace.to_dict()["language"] in ("java", "python", "node")
@@ -0,0 +1,68 @@
+"""
+Tests for the streaming API routes.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+
+class StreamingGeminiClient:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def stream_response(self, prompt, context=None):
+        try:
+            for chunk in self.chunks:
+                await asyncio.sleep(0)
+                yield chunk
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def streaming_client(monkeypatch):
+    fake = StreamingGeminiClient(["Null ", "pointer ", "in auth"])
+    monkeypatch.setattr("app.llm.gemini.get_gemini_client", lambda: fake)
+    return fake
+
+
+def test_sse_streams_tokens(client, streaming_client):
+    """Test that SSE emits one token event per chunk and a done event."""
+    response = client.post("/api/stream/sse", json={"prompt": "why?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in response.text.split("\n\n") if block]
+    tokens = [
+        json.loads(block.split("data: ", 1)[1])["text"]
+        for block in events
+        if block.startswith("event: token")
+    ]
+    assert tokens == ["Null ", "pointer ", "in auth"]
+    assert events[-1].startswith("event: done")
+
+
+def test_websocket_streams_tokens(client, streaming_client):
+    """Test that the WebSocket route streams tokens then done."""
+    with client.websocket_connect("/api/stream/ws") as websocket:
+        websocket.send_json({"prompt": "why?"})
+        messages = []
+        while True:
+            message = websocket.receive_json()
+            messages.append(message)
+            if message["type"] != "token":
+                break
+
+    assert [m["text"] for m in messages[:-1]] == ["Null ", "pointer ", "in auth"]
+    assert messages[-1] == {"type": "done"}
+    assert streaming_client.closed
+
+
+def test_websocket_rejects_invalid_request(client, streaming_client):
+    """Test that malformed requests get an error message, not a disconnect."""
+    with client.websocket_connect("/api/stream/ws") as websocket:
+        websocket.send_json({"context": {}})
+        assert websocket.receive_json()["type"] == "error"
@@ -2,8 +2,16 @@
 Tests for ticket parser.
 """
 
-import pytest
-from app.utils.ticket_parser import extract_key_entities, extract_stacktrace, parse_ticket
+import random
+
+from app.utils.entity_extractor import extract_entities
+from app.utils.ticket_parser import (
+    extract_key_entities,
+    extract_key_entities_chunked,
+    extract_stacktrace,
+    parse_ticket,
+)
+from benchmarks.legacy import legacy_extract_key_entities
 
 
 def test_extract_key_entities():
@@ -34,7 +42,7 @@ def test_extract_stacktrace():
         at com.example.app.StringUtils.processInput(StringUtils.java:45)
         at com.example.app.ApiController.handleRequest(ApiController.java:23)
         at com.example.app.Main.main(Main.java:12)
-    """
+    """  # noqa: E501
     
     result = extract_stacktrace(java_stacktrace)
     assert result is not None
@@ -59,7 +67,7 @@ def test_parse_ticket():
         at com.example.app.Main.main(Main.java:12)
     
     Please check the file /src/auth/middleware.js for potential issues.
-    """
+    """  # noqa: E501
     
     parsed = parse_ticket(ticket_id, ticket_title, ticket_description)
     
@@ -69,3 +77,42 @@ def test_parse_ticket():
     assert parsed["has_stacktrace"] is True
     assert "UserAuth" in parsed["entities"]["service_names"]
     assert "java.lang.NullPointerException" in parsed["stacktrace"]
+
+
+def _random_ticket(rng):
+    words = [
+        "service", "App", "ERROR", "code", "env", "in", "prod", "Staging",
+        "/api/users/login", "endpoint:", "/src/auth/middleware.js", "module:",
+        "com.example.Foo", "AUTH_FAILURE", "err42", "java.lang.NPE", "at",
+        "a.b.c", "main.py", "codenv", "Environment:", "\n", ":", "-", "ſervice",
+        "naïve", "İn", "QA",
+    ]
+    return "".join(
+        rng.choice(words) + rng.choice([" ", "", ": ", "\n"])
+        for _ in range(rng.randint(0, 60))
+    )
+
+
+def test_extract_key_entities_matches_reference():
+    """Test that the compiled engine returns the original entities."""
+    rng = random.Random(1234)
+    for _ in range(2000):
+        text = _random_ticket(rng)
+        entities = extract_key_entities(text)
+        expected = {k: set(v) for k, v in legacy_extract_key_entities(text).items()}
+        assert {key: set(value) for key, value in entities.items()} == expected, text
+
+
+def test_extract_key_entities_chunked_matches_whole_text():
+    """Test that chunked extraction equals whole-text extraction."""
+    rng = random.Random(99)
+    text = "".join(_random_ticket(rng) for _ in range(200))
+    expected = {k: set(v) for k, v in legacy_extract_key_entities(text).items()}
+
+    for size in (1, 7, 64, 1000):
+        chunks = (text[i:i + size] for i in range(0, len(text), size))
+        entities = extract_entities(chunks, chunk_overlap=256)
+        assert {key: set(value) for key, value in entities.items()} == expected
+
+    chunked = extract_key_entities_chunked(iter(text.splitlines(keepends=True)))
+    assert {key: set(value) for key, value in chunked.items()} == expected
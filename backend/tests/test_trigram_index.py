@@ -0,0 +1,211 @@
+"""
+Tests for the trigram code index and local code search.
+"""
+
+import os
+import random
+import re
+
+import pytest
+
+from app.mcp.local_search import LocalCodeSearch
+from app.mcp.trigram_index import TrigramIndex, query_trigrams
+
+FILES = {
+    "src/auth/middleware.js": (
+        "function authenticate(user) {\n" "  return user.token.validate();\n" "}\n"
+    ),
+    "src/auth/errors.py": "class AuthFailure(Exception):\n    code = 'AUTH_FAILURE'\n",
+    "src/users/login.py": "def login(request):\n    raise AuthFailure()\n",
+    "README.md": "User service\n",
+    "node_modules/lib/index.js": "AUTH_FAILURE everywhere\n",
+}
+
+
+def write_repo(root, files):
+    for path, content in files.items():
+        full_path = root / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "user-service"
+    write_repo(root, FILES)
+    (root / "logo.png").write_bytes(b"\x89PNG\x00\x00AUTH_FAILURE")
+    return root
+
+
+def make_index(repo, path=None, name="user-service"):
+    index = TrigramIndex(path)
+    index.refresh({name: str(repo)})
+    return index
+
+
+def test_query_trigrams():
+    """Test the trigrams required by literal and regex queries."""
+    assert query_trigrams("ab") is None
+    assert query_trigrams("abcd") == query_trigrams("ABCD")
+    assert len(query_trigrams("abcd")) == 2
+    # Alternation and optional parts cannot be required
+    assert query_trigrams("foo|bar", regex=True) is None
+    assert query_trigrams("x?yz", regex=True) is None
+    assert query_trigrams(r"auth\w+failure", regex=True) == query_trigrams(
+        "auth"
+    ) | query_trigrams("failure")
+
+
+def test_literal_and_regex_search(repo):
+    """Test literal, case-insensitive and regex searches."""
+    index = make_index(repo)
+    roots = {"user-service": str(repo)}
+
+    results = index.search("AUTH_FAILURE", roots)
+    assert [(r["file"], r["line"]) for r in results] == [("src/auth/errors.py", 2)]
+    assert results[0]["repository"] == "user-service"
+    assert results[0]["snippet"] == "code = 'AUTH_FAILURE'"
+
+    assert {r["file"] for r in index.search("authfailure", roots)} == {
+        "src/auth/errors.py",
+        "src/users/login.py",
+    }
+    assert index.search("authfailure", roots, case_sensitive=True) == []
+    assert [
+        r["file"] for r in index.search(r"def \w+\(request", roots, regex=True)
+    ] == ["src/users/login.py"]
+    assert len(index.search("auth", roots, limit=2)) == 2
+    assert index.search("auth", roots, repositories=["other-service"]) == []
+
+
+def test_ignored_and_binary_files_are_not_indexed(repo):
+    """Test that vendored directories and binary files are skipped."""
+    index = make_index(repo)
+
+    assert index.stats()["files"] == 4
+    files = {r["file"] for r in index.search("auth", {"user-service": str(repo)})}
+    assert "node_modules/lib/index.js" not in files
+    assert "logo.png" not in files
+
+
+def test_save_and_load(repo, tmp_path):
+    """Test that a saved index is memory-mapped and answers the same queries."""
+    path = str(tmp_path / "index.bin")
+    roots = {"user-service": str(repo)}
+    index = make_index(repo, path)
+    before = index.search("auth", roots, limit=100)
+    index.save()
+    index.close()
+
+    loaded = TrigramIndex(path)
+    assert loaded.stats()["base_files"] == 4
+    assert loaded.stats()["delta_files"] == 0
+    assert loaded.search("auth", roots, limit=100) == before
+    loaded.close()
+
+
+def test_incremental_refresh(repo, tmp_path):
+    """Test that only changed files are re-indexed, before and after a save."""
+    path = str(tmp_path / "index.bin")
+    roots = {"user-service": str(repo)}
+    index = make_index(repo, path)
+    index.save()
+
+    assert index.refresh(roots)["unchanged"] == 4
+    (repo / "src/users/login.py").write_text("def login(request):\n    pass\n")
+    os.utime(repo / "src/users/login.py", ns=(1, 1))
+    (repo / "src/auth/errors.py").unlink()
+    (repo / "src/auth/session.py").write_text("SESSION_EXPIRED = 'AuthFailure'\n")
+
+    counts = index.refresh(roots)
+    assert counts == {"added": 1, "updated": 1, "removed": 1, "unchanged": 2}
+    assert [r["file"] for r in index.search("authfailure", roots)] == [
+        "src/auth/session.py"
+    ]
+
+    index.save()
+    assert index.stats()["tombstones"] == 0
+    assert [r["file"] for r in index.search("authfailure", roots)] == [
+        "src/auth/session.py"
+    ]
+    index.close()
+
+
+def test_matches_brute_force_search(tmp_path):
+    """Test that candidate filtering never loses a match."""
+    rng = random.Random(7)
+    words = ["auth", "Token", "user_id", "KEY", "fail", "ſession", "(", ")", "."]
+    root = tmp_path / "repo"
+    files = {
+        f"f{i}.txt": "\n".join(
+            " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+            for _ in range(rng.randint(1, 5))
+        )
+        for i in range(60)
+    }
+    write_repo(root, files)
+    roots = {"repo": str(root)}
+    index = make_index(root, name="repo")
+    index.save(str(tmp_path / "index.bin"))
+
+    queries = [
+        ("auth token", False),
+        ("session", False),
+        ("user_id key", False),
+        (r"auth\s+\w+", True),
+        (r"(?i)token (fail|key)", True),
+        (r"fail\.?", True),
+        (r"\(\)", True),
+    ]
+    for query, regex in queries:
+        for case_sensitive in (False, True):
+            flags = 0 if case_sensitive else re.IGNORECASE
+            pattern = re.compile(query if regex else re.escape(query), flags)
+            expected = sorted(
+                (path, number)
+                for path, content in files.items()
+                for number, line in enumerate(content.split("\n"), start=1)
+                if pattern.search(line)
+            )
+            found = sorted(
+                (r["file"], r["line"])
+                for r in index.search(
+                    query,
+                    roots,
+                    limit=10_000,
+                    regex=regex,
+                    case_sensitive=case_sensitive,
+                )
+            )
+            assert found == expected, (query, case_sensitive)
+    index.close()
+
+
+@pytest.mark.asyncio
+async def test_local_code_search(repo, tmp_path):
+    """Test the search_code contract of the local search backend."""
+    search = LocalCodeSearch(
+        {"user-service": str(repo)}, index_path=str(tmp_path / "index.bin")
+    )
+    assert not search.ready
+    search.refresh()
+    assert search.ready
+
+    results = await search.search_code("validate", ["user-service"], limit=5)
+    assert results == [
+        {
+            "file": "src/auth/middleware.js",
+            "line": 2,
+            "snippet": "return user.token.validate();",
+            "repository": "user-service",
+        }
+    ]
+    assert search.stats()["searches"] == 1
+    search.close()
+
+    # A saved index is usable immediately on the next start
+    restarted = LocalCodeSearch(
+        {"user-service": str(repo)}, index_path=str(tmp_path / "index.bin")
+    )
+    assert restarted.ready
+    restarted.close()
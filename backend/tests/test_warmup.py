@@ -0,0 +1,145 @@
+"""
+Tests for cold start: lazy imports, connection warm-up and readiness.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.core.warmup import Readiness, prewarm
+from app.main import app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous for slow CI machines; importing google.generativeai alone used to
+# take longer than this on a developer laptop
+IMPORT_BUDGET_SECONDS = 3.0
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+from app.core.config import get_settings
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "sdk_loaded": "google.generativeai" in sys.modules,
+    "settings_read": get_settings.cache_info().currsize > 0,
+}))
+"""
+
+
+def test_import_is_fast_and_needs_no_configuration(tmp_path):
+    """Test that importing the app loads no SDK and reads no settings."""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("GEMINI_API_KEY", "MCP_SERVER_URL")
+    }
+    env["PYTHONPATH"] = BACKEND_DIR
+    # Run outside the backend directory so that no .env file is picked up
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    assert probe["sdk_loaded"] is False
+    assert probe["settings_read"] is False
+    assert probe["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_ready_only_after_startup(ingest_spill):
+    """Test that /ready fails before startup while /health does not."""
+    client = TestClient(app)
+    assert client.get("/health").status_code == 200
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(app) as started:
+        response = started.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+
+    assert client.get("/ready").status_code == 503
+
+
+class FakeMCP:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.warmed = 0
+
+    async def warm(self, connections):
+        await asyncio.sleep(self.delay)
+        self.warmed = connections
+
+
+class FakeLLM:
+    def __init__(self, model_name, fail=False):
+        self.model_name = model_name
+        self.fail = fail
+        self.warmed = False
+
+    def warm(self):
+        time.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("handshake refused")
+        self.warmed = True
+
+
+class FakeRouter:
+    def __init__(self, large, fast):
+        self.clients = {"large": large, "fast": fast}
+
+    def client(self, route):
+        return self.clients[route]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_reports_each_step_then_becomes_ready(monkeypatch):
+    """Test warm-up of MCP and both models, with a failure and a timeout."""
+    mcp = FakeMCP(delay=1.0)
+    large, fast = FakeLLM("gemini-pro"), FakeLLM("gemini-flash", fail=True)
+    monkeypatch.setattr("app.core.warmup.get_mcp_client", lambda: mcp)
+    monkeypatch.setattr(
+        "app.core.warmup.get_model_router", lambda: FakeRouter(large, fast)
+    )
+    monkeypatch.setattr(get_settings(), "PREWARM_TIMEOUT_SECONDS", 0.3)
+
+    readiness = Readiness()
+    await prewarm(readiness)
+    status = readiness.status()
+
+    assert status["ready"] is True
+    assert large.warmed is True
+    assert status["warmup"]["llm:gemini-pro"]["ok"] is True
+    assert status["warmup"]["llm:gemini-flash"]["error"] == "handshake refused"
+    assert status["warmup"]["mcp"]["error"].startswith("timed out")
+
+
+@pytest.mark.asyncio
+async def test_prewarm_warms_a_shared_model_once(monkeypatch):
+    """Test that a single-model setup is warmed once."""
+    mcp = FakeMCP()
+    model = FakeLLM("gemini-pro")
+    monkeypatch.setattr("app.core.warmup.get_mcp_client", lambda: mcp)
+    monkeypatch.setattr(
+        "app.core.warmup.get_model_router", lambda: FakeRouter(model, model)
+    )
+
+    readiness = Readiness()
+    await prewarm(readiness)
+
+    assert sorted(readiness.steps) == ["llm:gemini-pro", "mcp"]
+    assert mcp.warmed == get_settings().PREWARM_MCP_CONNECTIONS
+    assert all(step["ok"] for step in readiness.steps.values())